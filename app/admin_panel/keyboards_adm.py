@@ -1,3 +1,4 @@
+from functools import cache, lru_cache
 from typing import Optional
 from aiogram.types import (
     ReplyKeyboardMarkup,
@@ -12,9 +13,15 @@ from app.database.models import (
     SlotStatus, TelegramFile, FileType, User, DiscountType
     )
 
+# Клавиатуры неизменяемы: статические меню строятся один раз (@cache),
+# клавиатуры с простыми параметрами кешируются в ограниченном LRU.
+# Возвращаемую разметку нельзя изменять - она общая для всех вызовов.
+KEYBOARD_CACHE_SIZE = 1024
+
 
 # ===== ГЛАВНОЕ МЕНЮ =====
 
+@cache
 def admin_main_menu():
     """Главное меню администратора"""
     builder = ReplyKeyboardBuilder()
@@ -45,6 +52,7 @@ def admin_main_menu():
 
 # ===== ПОДМЕНЮ ДЛЯ КАЖДОЙ КАТЕГОРИИ =====
 
+@cache
 def excursions_submenu():
     """Подменю управления экскурсиями"""
     builder = ReplyKeyboardBuilder()
@@ -63,6 +71,7 @@ def excursions_submenu():
     builder.adjust(2, 2, 1)
     return builder.as_markup(resize_keyboard=True)
 
+@cache
 def captains_submenu():
     """Подменю управления капитанами"""
     builder = ReplyKeyboardBuilder()
@@ -81,6 +90,7 @@ def captains_submenu():
     builder.adjust(2, 2, 1)
     return builder.as_markup(resize_keyboard=True)
 
+@cache
 def clients_submenu():
     """Подменю управления клиентами"""
     builder = ReplyKeyboardBuilder()
@@ -99,6 +109,7 @@ def clients_submenu():
     builder.adjust(2, 2, 1)
     return builder.as_markup(resize_keyboard=True)
 
+@cache
 def bookings_submenu():
     """Подменю управления записями"""
     builder = ReplyKeyboardBuilder()
@@ -117,6 +128,7 @@ def bookings_submenu():
     builder.adjust(2, 2, 2, 2)
     return builder.as_markup(resize_keyboard=True)
 
+@cache
 def statistics_submenu():
     """Подменю статистики"""
     builder = ReplyKeyboardBuilder()
@@ -137,6 +149,7 @@ def statistics_submenu():
     builder.adjust(2, 2, 2, 1)
     return builder.as_markup(resize_keyboard=True)
 
+@cache
 def finances_submenu():
     """Подменю финансов"""
     builder = ReplyKeyboardBuilder()
@@ -154,6 +167,7 @@ def finances_submenu():
     builder.adjust(2, 2)
     return builder.as_markup(resize_keyboard=True)
 
+@cache
 def notifications_submenu():
     """Подменю уведомлений"""
     builder = ReplyKeyboardBuilder()
@@ -170,6 +184,7 @@ def notifications_submenu():
     builder.adjust(2, 1)
     return builder.as_markup(resize_keyboard=True)
 
+@cache
 def settings_submenu():
     """Подменю настроек"""
     builder = ReplyKeyboardBuilder()
@@ -190,6 +205,7 @@ def settings_submenu():
 
 # ===== ОБЩИЕ КНОПКИ =====
 
+@cache
 def back_button():
     """Кнопка Назад"""
     return ReplyKeyboardMarkup(
@@ -197,6 +213,7 @@ def back_button():
         resize_keyboard=True
     )
 
+@cache
 def cancel_button():
     """Кнопка Отмена"""
     return ReplyKeyboardMarkup(
@@ -207,6 +224,7 @@ def cancel_button():
 
 # ===== УПРАВЛЕНИЕ КАПИТАНАМИ =====
 
+@cache
 def find_client_for_captains() -> InlineKeyboardMarkup:
     """Инлайн-кнопка перехода к поиску клиента для произведения в капитаны"""
     builder = InlineKeyboardBuilder()
@@ -228,6 +246,7 @@ def captains_list_keyboard(captains: list) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def captain_period_menu(captain_id: int, captain_name: str) -> InlineKeyboardMarkup:
     """Меню выбора периода для капитана"""
     builder = InlineKeyboardBuilder()
@@ -238,6 +257,7 @@ def captain_period_menu(captain_id: int, captain_name: str) -> InlineKeyboardMar
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def back_to_captains_list_menu() -> InlineKeyboardMarkup:
     """Кнопка возврата к списку капитанов"""
     builder = InlineKeyboardBuilder()
@@ -260,6 +280,7 @@ def captains_list_for_salary_keyboard(captains: list) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def captain_salary_period_menu(captain_id: int, captain_name: str) -> InlineKeyboardMarkup:
     """Меню выбора периода для расчета зарплаты капитана"""
     builder = InlineKeyboardBuilder()
@@ -269,6 +290,7 @@ def captain_salary_period_menu(captain_id: int, captain_name: str) -> InlineKeyb
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def back_to_captains_list_salary_menu() -> InlineKeyboardMarkup:
     """Кнопка возврата к списку капитанов"""
     builder = InlineKeyboardBuilder()
@@ -379,6 +401,7 @@ def client_or_child_selection_menu(client: User, children: list) -> InlineKeyboa
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def client_edit_fields_menu(target_id: int, target_type: str, has_phone: bool = True) -> InlineKeyboardMarkup:
     """
     Меню выбора поля для редактирования
@@ -415,6 +438,7 @@ def client_edit_fields_menu(target_id: int, target_type: str, has_phone: bool =
     builder.adjust(2)
     return builder.as_markup()
 
+@cache
 def cancel_inline_button() -> InlineKeyboardMarkup:
     """Инлайн-кнопка Отмена"""
     builder = InlineKeyboardBuilder()
@@ -424,6 +448,7 @@ def cancel_inline_button() -> InlineKeyboardMarkup:
 
 # ===== РАБОТА С КЛИЕНТАМИ =====
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def client_actions(client_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура действий с выбранным клиентом
@@ -496,6 +521,7 @@ def client_list(clients: list) -> InlineKeyboardMarkup:
 
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def client_role_change(client_id: int, current_role: str) -> InlineKeyboardMarkup:
     """
     Клавиатура выбора новой роли для клиента
@@ -533,6 +559,7 @@ def client_role_change(client_id: int, current_role: str) -> InlineKeyboardMarku
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def back_to_client_actions(client_id: int) -> InlineKeyboardMarkup:
     """
     Кнопка возврата к действиям с клиентом
@@ -547,6 +574,7 @@ def back_to_client_actions(client_id: int) -> InlineKeyboardMarkup:
     )
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def client_virtual_actions(client_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура действий с виртуальным клиентом
@@ -633,6 +661,7 @@ def excursions_list(all_excursions: list, active_only: bool) -> InlineKeyboardMa
 
     return keyboard.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def excursion_actions_menu(excursion_id: int):
     """Действия с экскурсией"""
     builder = InlineKeyboardBuilder()
@@ -646,6 +675,7 @@ def excursion_actions_menu(excursion_id: int):
     builder.adjust(2, 2, 1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def excursion_redaction(exc_id:int):
     redact_reg_cell_list = (
     'Название',
@@ -666,12 +696,14 @@ def excursion_redaction(exc_id:int):
         keyboard.add(InlineKeyboardButton(text=cell, callback_data=callback))
     return keyboard.adjust(2).as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def end_add_excursion(exc_id:int):
     return InlineKeyboardMarkup(inline_keyboard=[
     [InlineKeyboardButton(text='Отредактировать данные', callback_data=f'redact_exc_data:{exc_id}'),
      InlineKeyboardButton(text='В главное админ-меню', callback_data='back_to_admin_panel')],
 ])
 
+@cache
 def error_add_excursion():
     return ReplyKeyboardMarkup(keyboard=[
     [KeyboardButton(text='Новая экскурсия')],
@@ -679,6 +711,7 @@ def error_add_excursion():
     resize_keyboard=True
 )
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def excursion_management(excursion_id: int, is_active: bool = True) -> InlineKeyboardMarkup:
     """Клавиатура управления конкретной экскурсией
 
@@ -719,6 +752,7 @@ def excursion_management(excursion_id: int, is_active: bool = True) -> InlineKey
 
 # ===== ВРЕМЕННЫЕ СЛОТЫ =====
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def slot_actions_menu(slot_id: int) -> InlineKeyboardMarkup:
     """Действия с конкретным слотом"""
     builder = InlineKeyboardBuilder()
@@ -734,6 +768,7 @@ def slot_actions_menu(slot_id: int) -> InlineKeyboardMarkup:
     builder.adjust(2, 2, 1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def slot_confirmation_menu(slot_id: int, action: str) -> InlineKeyboardMarkup:
     """Меню подтверждения действий со слотом"""
     builder = InlineKeyboardBuilder()
@@ -786,6 +821,7 @@ def excursions_selection_menu_for_schedule(
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def schedule_exc_management_menu() -> InlineKeyboardMarkup:
     """Меню управления расписанием"""
     builder = InlineKeyboardBuilder()
@@ -800,6 +836,7 @@ def schedule_exc_management_menu() -> InlineKeyboardMarkup:
     builder.adjust(2, 2)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def time_slot_menu(slot_date: str, excursion_id: int) -> InlineKeyboardMarkup:
     """Меню выбора времени для слота"""
     builder = InlineKeyboardBuilder()
@@ -827,6 +864,7 @@ def time_slot_menu(slot_date: str, excursion_id: int) -> InlineKeyboardMarkup:
     builder.adjust(3, 3, 3, 3, 1, 1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def slot_action_confirmation_menu(
     slot_id: int,
     action: str,
@@ -939,6 +977,7 @@ def captains_selection_menu(
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def no_captains_options_menu(slot_id: int = None, context: str = "create") -> InlineKeyboardMarkup:
     """Меню при отсутствии капитанов"""
     builder = InlineKeyboardBuilder()
@@ -979,6 +1018,7 @@ def no_captains_options_menu(slot_id: int = None, context: str = "create") -> In
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def slots_conflict_keyboard(slot_id: int) -> InlineKeyboardMarkup:
     """Клавиатура для решения конфликта слотов"""
     builder = InlineKeyboardBuilder()
@@ -1001,6 +1041,7 @@ def slots_conflict_keyboard(slot_id: int) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def captain_conflict_keyboard(slot_id: int) -> InlineKeyboardMarkup:
     """Клавиатура при занятости капитана"""
     builder = InlineKeyboardBuilder()
@@ -1046,6 +1087,7 @@ def schedule_view_options() -> InlineKeyboardMarkup:
     builder.adjust(2, 2, 1, 1)
     return builder.as_markup()
 
+@cache
 def schedule_back_menu() -> InlineKeyboardMarkup:
     """Кнопка возврата в меню расписания"""
     builder = InlineKeyboardBuilder()
@@ -1176,6 +1218,7 @@ def schedule_month_management_menu(slots_by_date: dict) -> InlineKeyboardMarkup:
 
 # ===== ПРОМОКОДЫ =====
 
+@cache
 def promocodes_menu() -> InlineKeyboardMarkup:
     """Меню управления промокодами"""
     builder = InlineKeyboardBuilder()
@@ -1191,6 +1234,7 @@ def promocodes_menu() -> InlineKeyboardMarkup:
     builder.adjust(2, 2, 1)
     return builder.as_markup()
 
+@cache
 def promo_type_selection_menu() -> InlineKeyboardMarkup:
     """Меню выбора типа скидки для промокода"""
     builder = InlineKeyboardBuilder()
@@ -1203,6 +1247,7 @@ def promo_type_selection_menu() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def promo_duration_selection_menu(
     include_cancel: bool = True,
     cancel_callback: str = "cancel_promo_creation",
@@ -1247,6 +1292,7 @@ def promo_duration_selection_menu(
 
     return builder.as_markup()
 
+@cache
 def promo_creation_confirmation_menu() -> InlineKeyboardMarkup:
     """Меню подтверждения создания промокода"""
     builder = InlineKeyboardBuilder()
@@ -1259,6 +1305,7 @@ def promo_creation_confirmation_menu() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def promo_edit_field_menu() -> InlineKeyboardMarkup:
     """Меню выбора поля промокода для редактирования"""
     builder = InlineKeyboardBuilder()
@@ -1341,6 +1388,7 @@ def promo_list(promocodes: list) -> InlineKeyboardMarkup:
     builder.adjust(*rows)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def promo_actions(promo_id: int, is_active: bool = True) -> InlineKeyboardMarkup:
     """
     Клавиатура действий с конкретным промокодом
@@ -1390,6 +1438,7 @@ def promo_actions(promo_id: int, is_active: bool = True) -> InlineKeyboardMarkup
 
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def deactivate_promo_confirm(promo_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура подтверждения деактивации промокода
@@ -1415,6 +1464,7 @@ def deactivate_promo_confirm(promo_id: int) -> InlineKeyboardMarkup:
 
 # ===== МЕНЮ НАСТРОЕК =====
 
+@cache
 def concent_files_menu() -> InlineKeyboardMarkup:
     """Меню для управления файлами согласия"""
     builder = InlineKeyboardBuilder()
@@ -1439,6 +1489,7 @@ def concent_files_menu() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def concent_upload_menu() -> InlineKeyboardMarkup:
     """Меню выбора типа файла для загрузки"""
     builder = InlineKeyboardBuilder()
@@ -1463,12 +1514,14 @@ def concent_upload_menu() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def concent_back_menu() -> InlineKeyboardMarkup:
     """Кнопка назад в меню файлов"""
     builder = InlineKeyboardBuilder()
     builder.button(text="Назад", callback_data="concent_files")
     return builder.as_markup()
 
+@cache
 def concent_cancel_menu() -> InlineKeyboardMarkup:
     """Кнопка отмены загрузки файла"""
     builder = InlineKeyboardBuilder()
@@ -1525,6 +1578,7 @@ def concent_file_selection_menu(
 
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def receipt_settings_menu(
     send_receipt: bool,
     vat_rate: int,
@@ -1572,6 +1626,7 @@ def receipt_settings_menu(
 
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def vat_rate_selection_menu(current_rate: int) -> InlineKeyboardMarkup:
     """Меню выбора ставки НДС"""
     builder = InlineKeyboardBuilder()
@@ -1599,6 +1654,7 @@ def vat_rate_selection_menu(current_rate: int) -> InlineKeyboardMarkup:
 
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def tax_system_selection_menu(current_code: int) -> InlineKeyboardMarkup:
     """Меню выбора системы налогообложения"""
     builder = InlineKeyboardBuilder()
@@ -1630,6 +1686,7 @@ def tax_system_selection_menu(current_code: int) -> InlineKeyboardMarkup:
 # ===== МЕНЮ СТАТИСТИКИ =====
 
 
+@cache
 def dashboard_quick_actions():
     """Быстрые действия для дашборда"""
     builder = InlineKeyboardBuilder()
@@ -1690,6 +1747,7 @@ def excursion_list_for_stats(excursions: list) -> InlineKeyboardMarkup:
 # ===== СОЗДАНИЕ БРОНИРОВАНИЯ НА СЛОТ =====
 
 
+@cache
 def create_booking_client_choice() -> ReplyKeyboardMarkup:
     """Клавиатура выбора типа клиента для создания записи"""
     builder = ReplyKeyboardBuilder()
@@ -1867,6 +1925,7 @@ def admin_children_selection(children: list, selected_ids: list = None, max_chil
 
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def admin_child_weight(child_index: int, total_children: int) -> InlineKeyboardMarkup:
     """
     Клавиатура для ввода веса ребенка (админ-версия)
@@ -1896,6 +1955,7 @@ def admin_child_weight(child_index: int, total_children: int) -> InlineKeyboardM
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def admin_virtual_child_form_navigation() -> InlineKeyboardMarkup:
     """Клавиатура навигации при создании виртуального ребенка"""
     builder = InlineKeyboardBuilder()
@@ -1908,6 +1968,7 @@ def admin_virtual_child_form_navigation() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def admin_confirm_virtual_child() -> InlineKeyboardMarkup:
     """Клавиатура подтверждения создания виртуального ребенка"""
     builder = InlineKeyboardBuilder()
@@ -1928,6 +1989,7 @@ def admin_confirm_virtual_child() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def create_virtual_child() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
 
@@ -1947,6 +2009,7 @@ def create_virtual_child() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def cancel_create_virtual_child() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
 
@@ -1958,6 +2021,7 @@ def cancel_create_virtual_child() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def continue_booking_with_excess_weight() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Продолжить (игнорировать вес)", callback_data="admin_continue_booking")
@@ -1966,6 +2030,7 @@ def continue_booking_with_excess_weight() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def confirm_booking() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Подтвердить и создать запись", callback_data="admin_confirm_booking_final")
@@ -1974,6 +2039,7 @@ def confirm_booking() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def slot_already_booked(excursion_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура для случая, когда у клиента уже есть бронь на этот слот
@@ -1998,6 +2064,7 @@ def slot_already_booked(excursion_id: int) -> InlineKeyboardMarkup:
 
 # ===== ВОЗВРАТ СРЕДСТВ =====
 
+@cache
 def refunds_admin_menu() -> InlineKeyboardMarkup:
     """Меню управления возвратами"""
     builder = InlineKeyboardBuilder()
@@ -2021,6 +2088,7 @@ def refunds_list_keyboard(refunds: list) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def refund_detail_actions(refund_id: int, booking_id: int) -> InlineKeyboardMarkup:
     """Клавиатура для деталей возврата"""
     builder = InlineKeyboardBuilder()
@@ -2037,6 +2105,7 @@ def refund_detail_actions(refund_id: int, booking_id: int) -> InlineKeyboardMark
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def admin_mark_booking_refunded_menu(booking_id: int) -> InlineKeyboardMarkup:
     """Меню для отметки бронирования как возвращенного вручную"""
     builder = InlineKeyboardBuilder()
@@ -2051,6 +2120,7 @@ def admin_mark_booking_refunded_menu(booking_id: int) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def admin_mark_refund_successful_menu(refund_id: int, booking_id: int) -> InlineKeyboardMarkup:
     """Меню для отметки конкретного возврата как успешного"""
     builder = InlineKeyboardBuilder()
@@ -2065,6 +2135,7 @@ def admin_mark_refund_successful_menu(refund_id: int, booking_id: int) -> Inline
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def back_to_admin_menu(back_callback: str) -> InlineKeyboardMarkup:
     """Кнопка возврата в админ-меню"""
     builder = InlineKeyboardBuilder()
@@ -2072,6 +2143,7 @@ def back_to_admin_menu(back_callback: str) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def admin_cancel_booking_with_refund_menu(booking_id: int) -> InlineKeyboardMarkup:
     """Меню отмены бронирования с возвратом для администратора"""
     builder = InlineKeyboardBuilder()
@@ -2094,6 +2166,7 @@ def admin_cancel_booking_with_refund_menu(booking_id: int) -> InlineKeyboardMark
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def admin_cancel_booking_no_refund_menu(booking_id: int) -> InlineKeyboardMarkup:
     """Меню отмены бронирования без возврата для администратора"""
     builder = InlineKeyboardBuilder()
@@ -2108,6 +2181,7 @@ def admin_cancel_booking_no_refund_menu(booking_id: int) -> InlineKeyboardMarkup
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def admin_force_refund_confirmation_menu(booking_id: int) -> InlineKeyboardMarkup:
     """Меню подтверждения принудительного возврата"""
     builder = InlineKeyboardBuilder()
@@ -2129,6 +2203,7 @@ def admin_force_refund_confirmation_menu(booking_id: int) -> InlineKeyboardMarku
 
 # ===== ФИНАНСЫ =====
 
+@cache
 def finances_summary_menu() -> ReplyKeyboardMarkup:
     """Меню сводки по финансам"""
     builder = ReplyKeyboardBuilder()
@@ -2143,6 +2218,7 @@ def finances_summary_menu() -> ReplyKeyboardMarkup:
 # ===== МЕНЮ УВЕДОМЛЕНИЙ =====
 
 
+@cache
 def notification_confirmation_keyboard():
     """Клавиатура подтверждения отправки рассылки"""
     builder = InlineKeyboardBuilder()
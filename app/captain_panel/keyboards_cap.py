@@ -1,3 +1,4 @@
+from functools import cache
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import ReplyKeyboardBuilder, InlineKeyboardBuilder
 from typing import List
@@ -5,6 +6,7 @@ from typing import List
 from app.database.models import ExcursionSlot, Booking
 
 
+@cache
 def captain_main_menu() -> ReplyKeyboardMarkup:
     """Главное меню капитана"""
     builder = ReplyKeyboardBuilder()
@@ -0,0 +1,113 @@
+"""
+Очередь пересчета сводной таблицы daily_stats.
+
+Триггеры SQLite записывают в daily_stats_dirty дни, данные которых
+изменились: день создания бронирования (создание, смена статуса,
+суммы, слота, состава детей), день создания возврата, день регистрации
+пользователя и день начала слота (проведение, смена экскурсии).
+Задача планировщика rollup_daily_stats пересчитывает только эти дни
+(DailyStatsRepository.rebuild).
+
+Триггеры создаются после create_all (событие after_create у metadata),
+для существующих БД - в init_models через setup_daily_stats(), которая
+при первом запуске ставит в очередь все дни с данными (backfill).
+"""
+
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def _mark_sql(value: str) -> str:
+    """Поставить в очередь день значения value (datetime или подзапрос)"""
+    return (
+        f"INSERT OR IGNORE INTO daily_stats_dirty (stat_date) "
+        f"SELECT date({value}) WHERE {value} IS NOT NULL"
+    )
+
+
+def _booking_date(booking_id: str) -> str:
+    return f"(SELECT created_at FROM bookings WHERE id = {booking_id})"
+
+
+DAILY_STATS_DDL: List[str] = [
+    "CREATE TRIGGER IF NOT EXISTS daily_stats_booking_insert AFTER INSERT ON bookings BEGIN "
+    f"{_mark_sql('new.created_at')}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS daily_stats_booking_update "
+    "AFTER UPDATE OF booking_status, client_status, total_price, slot_id, created_at ON bookings BEGIN "
+    f"{_mark_sql('old.created_at')}; {_mark_sql('new.created_at')}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS daily_stats_booking_delete AFTER DELETE ON bookings BEGIN "
+    f"{_mark_sql('old.created_at')}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS daily_stats_child_insert AFTER INSERT ON booking_children BEGIN "
+    f"{_mark_sql(_booking_date('new.booking_id'))}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS daily_stats_child_delete AFTER DELETE ON booking_children BEGIN "
+    f"{_mark_sql(_booking_date('old.booking_id'))}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS daily_stats_refund_insert AFTER INSERT ON refunds BEGIN "
+    f"{_mark_sql('new.created_at')}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS daily_stats_refund_update "
+    "AFTER UPDATE OF status, amount, booking_id, created_at ON refunds BEGIN "
+    f"{_mark_sql('old.created_at')}; {_mark_sql('new.created_at')}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS daily_stats_refund_delete AFTER DELETE ON refunds BEGIN "
+    f"{_mark_sql('old.created_at')}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS daily_stats_user_insert AFTER INSERT ON users BEGIN "
+    f"{_mark_sql('new.created_at')}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS daily_stats_user_delete AFTER DELETE ON users BEGIN "
+    f"{_mark_sql('old.created_at')}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS daily_stats_slot_status "
+    "AFTER UPDATE OF status, start_datetime ON excursion_slots "
+    "WHEN old.status = 'completed' OR new.status = 'completed' BEGIN "
+    f"{_mark_sql('old.start_datetime')}; {_mark_sql('new.start_datetime')}; END",
+
+    # Бронирования слота переходят к другой экскурсии
+    "CREATE TRIGGER IF NOT EXISTS daily_stats_slot_excursion "
+    "AFTER UPDATE OF excursion_id ON excursion_slots BEGIN "
+    f"{_mark_sql('old.start_datetime')}; "
+    "INSERT OR IGNORE INTO daily_stats_dirty (stat_date) "
+    "SELECT date(created_at) FROM bookings WHERE slot_id = new.id "
+    "UNION SELECT date(r.created_at) FROM refunds r JOIN bookings b ON b.id = r.booking_id "
+    "WHERE b.slot_id = new.id; END",
+]
+
+# Все дни, за которые есть исходные данные
+ALL_DATES_SQL = (
+    "SELECT date(created_at) FROM bookings WHERE created_at IS NOT NULL "
+    "UNION SELECT date(created_at) FROM refunds WHERE created_at IS NOT NULL "
+    "UNION SELECT date(created_at) FROM users WHERE created_at IS NOT NULL "
+    "UNION SELECT date(start_datetime) FROM excursion_slots WHERE status = 'completed'"
+)
+
+
+async def setup_daily_stats(conn: AsyncConnection) -> None:
+    """
+    Создать триггеры в существующей БД и заполнить очередь пересчета.
+
+    Вызывается из init_models после create_all. Если сводная таблица
+    и очередь пусты, в очередь ставятся все дни с данными - задача
+    планировщика построит статистику за всю историю.
+    """
+    for statement in DAILY_STATS_DDL:
+        await conn.execute(text(statement))
+
+    has_stats = (await conn.execute(text("SELECT 1 FROM daily_stats LIMIT 1"))).first()
+    has_dirty = (await conn.execute(text("SELECT 1 FROM daily_stats_dirty LIMIT 1"))).first()
+    if has_stats or has_dirty:
+        return
+
+    result = await conn.execute(text(f"INSERT OR IGNORE INTO daily_stats_dirty (stat_date) {ALL_DATES_SQL}"))
+    if result.rowcount:
+        logger.info(f"Дневная статистика: в очередь поставлено дней: {result.rowcount}")
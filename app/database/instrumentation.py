@@ -0,0 +1,256 @@
+"""
+Инструментирование SQL запросов.
+
+Хуки движка SQLAlchemy считают каждый выполненный запрос и относят его
+к текущей единице работы (апдейт Telegram или задача планировщика),
+которая задается через contextvar в track_queries().
+
+Для каждой единицы работы считаются количество запросов, суммарное время
+и самые медленные запросы; итоги копятся по меткам (query_totals).
+Запросы дольше порога пишутся в лог медленных запросов с параметрами
+и, если включено, с планом EXPLAIN QUERY PLAN.
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+slow_query_logger = get_logger("app.database.slow_queries")
+
+# Метка для запросов вне апдейтов и задач (старт бота, скрипты)
+UNTRACKED_LABEL = "untracked"
+SLOWEST_LIMIT = 3
+
+
+class QueryStats:
+    """Статистика запросов одной единицы работы"""
+
+    __slots__ = ("label", "count", "total_time", "slowest")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+
+    def add(self, duration: float, statement: str) -> None:
+        self.count += 1
+        self.total_time += duration
+
+        if len(self.slowest) < SLOWEST_LIMIT or duration > self.slowest[-1][0]:
+            self.slowest.append((duration, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_LIMIT:]
+
+
+class QueryTotals:
+    """Накопленная статистика запросов по метке"""
+
+    __slots__ = ("units", "statements", "total_time", "max_statements", "slowest")
+
+    def __init__(self):
+        self.units = 0
+        self.statements = 0
+        self.total_time = 0.0
+        self.max_statements = 0
+        self.slowest: List[Tuple[float, str]] = []
+
+    def add(self, stats: QueryStats) -> None:
+        self.units += 1
+        self.statements += stats.count
+        self.total_time += stats.total_time
+        self.max_statements = max(self.max_statements, stats.count)
+
+        self.slowest.extend(stats.slowest)
+        self.slowest.sort(key=lambda item: item[0], reverse=True)
+        del self.slowest[SLOWEST_LIMIT:]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "units": self.units,
+            "statements": self.statements,
+            "total_time": self.total_time,
+            "avg_statements": self.statements / self.units if self.units else 0,
+            "max_statements": self.max_statements,
+            "slowest": list(self.slowest),
+        }
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Итоги по меткам; хуки движка вызываются и из потоков драйвера
+_totals: Dict[str, QueryTotals] = {}
+_totals_lock = threading.Lock()
+
+_settings = {
+    "slow_query_seconds": 0.1,
+    "explain": False,
+}
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Статистика текущей единицы работы (None вне track_queries)"""
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries(label: str) -> Iterator[QueryStats]:
+    """
+    Отнести все запросы внутри блока к единице работы с меткой label.
+
+    Пример:
+        with track_queries("callback:public_book_slot"):
+            await handler(event, data)
+    """
+    stats = QueryStats(label)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        _record(stats)
+
+
+def with_query_tracking(label: str):
+    """Декоратор для корутин: запросы внутри относятся к метке label"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with track_queries(label):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _record(stats: QueryStats) -> None:
+    """Добавить статистику единицы работы в итоги по метке"""
+    if stats.count:
+        logger.debug(
+            f"SQL [{stats.label}]: {stats.count} запросов, "
+            f"{stats.total_time * 1000:.1f} мс"
+        )
+
+    with _totals_lock:
+        totals = _totals.get(stats.label)
+        if totals is None:
+            totals = _totals[stats.label] = QueryTotals()
+        totals.add(stats)
+
+
+def get_query_totals() -> Dict[str, Dict[str, Any]]:
+    """Снимок накопленной статистики по меткам"""
+    with _totals_lock:
+        return {label: totals.as_dict() for label, totals in _totals.items()}
+
+
+def get_worst_labels(limit: int = 10, by: str = "avg_statements") -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Метки с наибольшей нагрузкой на БД.
+
+    Args:
+        limit: Количество меток
+        by: Ключ сортировки (avg_statements, total_time, max_statements, statements)
+    """
+    totals = get_query_totals()
+    return sorted(totals.items(), key=lambda item: item[1][by], reverse=True)[:limit]
+
+
+def reset_query_totals() -> None:
+    """Сбросить накопленную статистику"""
+    with _totals_lock:
+        _totals.clear()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    duration = time.perf_counter() - start_times.pop()
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add(duration, statement)
+    else:
+        with _totals_lock:
+            totals = _totals.get(UNTRACKED_LABEL)
+            if totals is None:
+                totals = _totals[UNTRACKED_LABEL] = QueryTotals()
+            totals.statements += 1
+            totals.total_time += duration
+
+    if duration >= _settings["slow_query_seconds"]:
+        _log_slow_query(conn, statement, parameters, executemany, duration, stats)
+
+
+def _log_slow_query(conn, statement, parameters, executemany, duration, stats) -> None:
+    """Записать медленный запрос с параметрами и планом"""
+    label = stats.label if stats is not None else UNTRACKED_LABEL
+    message = (
+        f"Медленный запрос {duration * 1000:.1f} мс [{label}]: {statement} | "
+        f"параметры: {parameters!r}"
+    )
+
+    if _settings["explain"] and not executemany and statement.lstrip().upper().startswith("SELECT"):
+        plan = _explain(conn, statement, parameters)
+        if plan:
+            message += "\nПлан:\n" + "\n".join(plan)
+
+    slow_query_logger.warning(message)
+
+
+def _explain(conn, statement, parameters) -> List[str]:
+    """EXPLAIN QUERY PLAN на том же соединении (только SQLite)"""
+    if conn.dialect.name != "sqlite":
+        return []
+
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return [str(row[-1]) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception as e:
+        logger.debug(f"Не удалось получить план запроса: {e}")
+        return []
+
+
+def setup_query_instrumentation(
+    engine: AsyncEngine | Engine,
+    slow_query_ms: int = 100,
+    explain: bool = False
+) -> None:
+    """
+    Подключить хуки к движку (повторный вызов только обновляет настройки).
+
+    Args:
+        engine: Движок SQLAlchemy (async или sync)
+        slow_query_ms: Порог медленного запроса в миллисекундах
+        explain: Добавлять EXPLAIN QUERY PLAN к медленным SELECT
+    """
+    _settings["slow_query_seconds"] = slow_query_ms / 1000
+    _settings["explain"] = explain
+
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+    logger.info(
+        f"Инструментирование SQL включено: порог медленных запросов {slow_query_ms} мс, "
+        f"EXPLAIN {'ВКЛ' if explain else 'ВЫКЛ'}"
+    )
@@ -16,10 +16,11 @@ from app.database.models import (
     ExcursionSlot, PaymentStatus
 )
 from app.database.managers import SlotManager
-from app.utils.calculators import PriceCalculator
+from app.utils.calculators import BookingCalculator
 from app.utils.logging_config import get_logger
 from app.utils.admin_notifications import notify_admins_about_refund_failure
 from app.services.scheduler.bot_instance import get_bot_instance
+from app.services.slot_capacity import slot_capacity, ReservationStatus
 
 
 logger = get_logger(__name__)
@@ -87,55 +88,28 @@ class BookingManager(BaseManager):
                 self.logger.warning(error_msg)
                 return None, error_msg
 
-            slot_manager = SlotManager(self.session)
-
-            # Проверяем количество мест
-            booked_places = await slot_manager.get_booked_places(slot_id)
             total_people = 1 + children_count  # 1 взрослый + дети
-            if booked_places + total_people > slot.max_people:
-                error_msg = f"Недостаточно свободных мест. Свободно: {slot.max_people - booked_places}, требуется: {total_people}"
-                self.logger.warning(error_msg)
+            status, error_msg = await self._reserve_capacity(slot, adult_user_id, total_people, total_weight)
+            if error_msg:
                 return None, error_msg
 
-            # Проверяем вес, если он передан
-            if total_weight is not None:
-                current_weight = await slot_manager.get_current_weight(slot_id)
-
-                if current_weight + total_weight > slot.max_weight:
-                    error_msg = f"Превышение допустимого веса. Доступно: {slot.max_weight - current_weight} кг, вес заявки: {total_weight} кг"
-                    self.logger.warning(error_msg)
-                    return None, error_msg
-
-                self.logger.info(f"Проверка веса пройдена: текущий {current_weight}кг + новый {total_weight}кг <= макс {slot.max_weight}кг")
-
-            # Создаем бронирование
-            booking = await self.booking_repo.create(
-                slot_id=slot_id,
-                adult_user_id=adult_user_id,
-                total_price=total_price,
-                admin_creator_id=admin_creator_id,
-                promo_code_id=promo_code_id
-            )
-
-            # Добавляем детей если есть данные
-            if children_data:
-                for child_data in children_data:
-                    # Проверяем, что age_category есть
-                    age_category = child_data.get('age_category')
-                    if not age_category:
-                        self.logger.error(f"Отсутствует age_category для ребенка {child_data.get('child_id')}")
-                        return None, "Ошибка: не указана возрастная категория ребенка"
-
-                    child = BookingChild(
-                        booking_id=booking.id,
-                        child_user_id=child_data['child_id'],
-                        age_category=age_category,
-                        calculated_price=child_data.get('price', 0)
-                    )
-                    self.session.add(child)
+            booking = None
+            try:
+                booking, error_msg = await self._create_booking_record(
+                    slot_id=slot_id,
+                    adult_user_id=adult_user_id,
+                    total_price=total_price,
+                    admin_creator_id=admin_creator_id,
+                    promo_code_id=promo_code_id,
+                    children_data=children_data
+                )
+            finally:
+                # Бронь не создана (ошибка или отказ) - возвращаем места в счетчик
+                if booking is None and status == ReservationStatus.reserved:
+                    await slot_capacity.release(slot_id, adult_user_id)
 
-                await self._commit()
-                await self._refresh(booking)
+            if not booking:
+                return None, error_msg
 
             self._log_operation_end("create_booking",
                                    success=True,
@@ -149,6 +123,120 @@ class BookingManager(BaseManager):
             self.logger.error(error_msg, exc_info=True)
             return None, error_msg
 
+    async def _reserve_capacity(
+        self,
+        slot: ExcursionSlot,
+        adult_user_id: int,
+        total_people: int,
+        total_weight: Optional[int]
+    ) -> Tuple[ReservationStatus, Optional[str]]:
+        """
+        Атомарно зарезервировать места и вес в счетчике слота (постоянный резерв).
+
+        Если счетчик недоступен, места и вес проверяются по БД.
+
+        Returns:
+            Tuple[ReservationStatus, Optional[str]]: (результат резерва, текст ошибки)
+        """
+        slot_manager = SlotManager(self.session)
+        weight_limit = None
+        if total_weight is not None:
+            weight_limit = slot.max_weight - await slot_manager.get_captain_weight(slot)
+
+        status, free_people, free_weight = await slot_capacity.reserve(
+            slot_id=slot.id,
+            user_id=adult_user_id,
+            people=total_people,
+            weight=total_weight or 0,
+            people_limit=slot.max_people,
+            weight_limit=weight_limit,
+            load_snapshot=lambda: slot_manager.get_capacity_snapshot(slot.id),
+            expire_at=slot.end_datetime
+        )
+
+        error_msg = None
+        if status == ReservationStatus.no_places:
+            error_msg = f"Недостаточно свободных мест. Свободно: {free_people}, требуется: {total_people}"
+        elif status == ReservationStatus.no_weight:
+            error_msg = f"Превышение допустимого веса. Доступно: {free_weight} кг, вес заявки: {total_weight} кг"
+        elif status == ReservationStatus.already_reserved:
+            # Параллельное бронирование того же клиента уже заняло места
+            error_msg = "У вас уже есть активная бронь на этот слот"
+        elif status == ReservationStatus.unavailable:
+            # Счетчик недоступен - проверяем по БД
+            return status, await self._check_capacity_in_db(slot_manager, slot, total_people, total_weight)
+
+        if error_msg:
+            self.logger.warning(error_msg)
+        return status, error_msg
+
+    async def _check_capacity_in_db(
+        self,
+        slot_manager: SlotManager,
+        slot: ExcursionSlot,
+        total_people: int,
+        total_weight: Optional[int]
+    ) -> Optional[str]:
+        """Проверить места и вес по БД (без атомарного резерва). Возвращает текст ошибки"""
+        booked_places = await slot_manager.get_booked_places(slot.id)
+        if booked_places + total_people > slot.max_people:
+            error_msg = f"Недостаточно свободных мест. Свободно: {slot.max_people - booked_places}, требуется: {total_people}"
+            self.logger.warning(error_msg)
+            return error_msg
+
+        # Проверяем вес, если он передан
+        if total_weight is not None:
+            current_weight = await slot_manager.get_current_weight(slot.id)
+
+            if current_weight + total_weight > slot.max_weight:
+                error_msg = f"Превышение допустимого веса. Доступно: {slot.max_weight - current_weight} кг, вес заявки: {total_weight} кг"
+                self.logger.warning(error_msg)
+                return error_msg
+
+            self.logger.info(f"Проверка веса пройдена: текущий {current_weight}кг + новый {total_weight}кг <= макс {slot.max_weight}кг")
+
+        return None
+
+    async def _create_booking_record(
+        self,
+        slot_id: int,
+        adult_user_id: int,
+        total_price: int,
+        admin_creator_id: Optional[int],
+        promo_code_id: Optional[int],
+        children_data: Optional[list]
+    ) -> Tuple[Optional[Booking], str]:
+        """Создать запись бронирования с детьми"""
+        # Проверяем данные детей до создания брони
+        for child_data in children_data or []:
+            if not child_data.get('age_category'):
+                self.logger.error(f"Отсутствует age_category для ребенка {child_data.get('child_id')}")
+                return None, "Ошибка: не указана возрастная категория ребенка"
+
+        booking = await self.booking_repo.create(
+            slot_id=slot_id,
+            adult_user_id=adult_user_id,
+            total_price=total_price,
+            admin_creator_id=admin_creator_id,
+            promo_code_id=promo_code_id
+        )
+
+        # Добавляем детей если есть данные
+        if children_data:
+            for child_data in children_data:
+                child = BookingChild(
+                    booking_id=booking.id,
+                    child_user_id=child_data['child_id'],
+                    age_category=child_data['age_category'],
+                    calculated_price=child_data.get('price', 0)
+                )
+                self.session.add(child)
+
+            await self._commit()
+            await self._refresh(booking)
+
+        return booking, ""
+
     async def create_booking_with_token(
         self,
         user_id: int,
@@ -190,13 +278,24 @@ class BookingManager(BaseManager):
                 self._log_operation_end("create_booking_with_token", success=False, error="duplicate_booking")
                 return None
 
+            # Резервируем место в счетчике слота, как и для обычной брони
+            status, error_msg = await self._reserve_capacity(slot, user_id, 1, user.weight)
+            if error_msg:
+                self._log_operation_end("create_booking_with_token", success=False, error="no_capacity")
+                return None
+
             # Создаем бронирование через репозиторий
-            booking = await self.booking_repo.create_booking_with_token(
-                user_id=user_id,
-                slot_id=slot_id,
-                token=token,
-                booked_by_id=booked_by_id
-            )
+            booking = None
+            try:
+                booking = await self.booking_repo.create_booking_with_token(
+                    user_id=user_id,
+                    slot_id=slot_id,
+                    token=token,
+                    booked_by_id=booked_by_id
+                )
+            finally:
+                if booking is None and status == ReservationStatus.reserved:
+                    await slot_capacity.release(slot_id, user_id)
 
             if booking:
                 self._log_operation_end("create_booking_with_token", success=True, booking_id=booking.id)
@@ -219,28 +318,24 @@ class BookingManager(BaseManager):
     ) -> Tuple[int, Dict]:
         """Рассчитать стоимость бронирования"""
         try:
-            # Получаем слот и экскурсию
-            slot = await self.slot_repo.get_with_bookings(slot_id)
+            # Получаем слот и экскурсию (без графа бронирований)
+            slot = await self.slot_repo.get_by_id(slot_id)
             if not slot or not slot.excursion:
                 return 0, {}
 
             base_price = slot.excursion.base_price
             total_price = base_price  # Взрослый
 
-            # Расчет для детей
+            # Расчет для детей (все дети - одним запросом)
             children_prices = {}
             if child_user_ids:
-                for child_id in child_user_ids:
-                    child = await self.user_repo.get_by_id(child_id)
-                    if child and child.date_of_birth:
-                        child_price, category = PriceCalculator.calculate_child_price(
-                            base_price, child.date_of_birth
-                        )
-                        children_prices[child_id] = {
-                            'price': child_price,
-                            'category': category
-                        }
-                        total_price += child_price
+                children = await self.user_repo.get_by_ids(child_user_ids)
+                for child_data in BookingCalculator.price_children(base_price, children, child_user_ids):
+                    children_prices[child_data['id']] = {
+                        'price': child_data['price'],
+                        'category': child_data['category']
+                    }
+                    total_price += child_data['price']
 
             # Применение промокода
             discount_info = {}
@@ -640,6 +735,7 @@ class BookingManager(BaseManager):
                 booking_status=BookingStatus.cancelled,
                 cancelled_at=cancelled_at
             )
+            await slot_capacity.release(booking.slot_id, booking.adult_user_id)
 
             self._log_business_event(
                 "booking_cancelled",
@@ -708,11 +804,10 @@ class BookingManager(BaseManager):
                             bot = get_bot_instance()
                             if bot:
                                 await notify_admins_about_refund_failure(
-                                    bot,
-                                    self.session,
-                                    refund.id if refund else 0,
-                                    booking_id,
-                                    refund_msg
+                                    bot=bot,
+                                    booking_id=booking_id,
+                                    error_message=refund_msg,
+                                    refund_id=refund.id if refund else None
                                 )
                         except ImportError:
                             self.logger.warning("Не удалось импортировать функции уведомления админов")
@@ -15,6 +15,8 @@ from app.database.models import (
     SchedulePeriod, Excursion
 )
 from app.utils.datetime_utils import get_weekday_name
+from app.services.slot_capacity import slot_capacity, CapacitySnapshot
+from app.services.invoice_descriptors import invoice_descriptors
 
 
 class SlotManager(BaseManager):
@@ -161,6 +163,7 @@ class SlotManager(BaseManager):
             )
 
             if updated:
+                await invoice_descriptors.bump_slot_version(slot_id)
                 self._log_operation_end("reschedule_slot", success=True)
                 return True, ""
             else:
@@ -190,57 +193,87 @@ class SlotManager(BaseManager):
                     booking.booking_status = BookingStatus.cancelled
 
         await self.slot_repo.update(slot)
+        await slot_capacity.invalidate(slot_id)
+        await invoice_descriptors.bump_slot_version(slot_id)
         return True, slot
 
-    async def get_booked_places(self, slot_id: int) -> int:
-        """Получить количество забронированных мест для слота"""
-        try:
-            # Получаем слот с бронированиями
-            slot = await self.slot_repo.get_with_bookings(slot_id)
-            if not slot:
-                return 0
+    async def get_capacity_snapshot(self, slot_id: int) -> CapacitySnapshot:
+        """
+        Получить занятость слота по клиентам для заполнения счетчика.
 
-            # Считаем активные бронирования
-            total = 0
-            for booking in slot.bookings:
-                if booking.booking_status == BookingStatus.active:
-                    total += booking.people_count  # взрослые
-                    # дети считаются отдельно через BookingChild
+        В отличие от get_booked_places ошибки не скрываются:
+        пустой снимок при сбое БД привел бы к перебронированию.
+
+        Returns:
+            Dict[int, Tuple[int, int]]: adult_user_id -> (людей, вес клиентов)
+        """
+        slot = await self.slot_repo.get_with_bookings(slot_id)
+        if not slot:
+            return {}
+
+        snapshot = {}
+        for booking in slot.bookings:
+            if booking.booking_status != BookingStatus.active:
+                continue
+
+            weight = booking.adult_user.weight if booking.adult_user and booking.adult_user.weight else 0
+            for booking_child in booking.booking_children or []:
+                if booking_child.child and booking_child.child.weight:
+                    weight += booking_child.child.weight
+
+            snapshot[booking.adult_user_id] = (booking.people_count, weight)
+
+        return snapshot
 
-            return total
+    async def get_captain_weight(self, slot: ExcursionSlot) -> int:
+        """Получить вес капитана слота (0 если капитан не назначен)"""
+        if not slot.captain_id:
+            return 0
+
+        captain = await self.user_repo.get_by_id(slot.captain_id)
+        return captain.weight if captain and captain.weight else 0
+
+    async def get_occupied_places(self, slot: ExcursionSlot) -> int:
+        """Занятые места с учетом временных резервов (из счетчика слота, иначе по БД)"""
+        usage = await slot_capacity.get_usage(
+            slot.id,
+            load_snapshot=lambda: self.get_capacity_snapshot(slot.id),
+            expire_at=slot.end_datetime
+        )
+        if usage is None:
+            return await self.get_booked_places(slot.id)
+        return usage[0]
+
+    async def get_occupied_weight(self, slot: ExcursionSlot) -> int:
+        """Занятый вес с учетом капитана и временных резервов"""
+        usage = await slot_capacity.get_usage(
+            slot.id,
+            load_snapshot=lambda: self.get_capacity_snapshot(slot.id),
+            expire_at=slot.end_datetime
+        )
+        if usage is None:
+            return await self.get_current_weight(slot.id)
+        return usage[1] + await self.get_captain_weight(slot)
+
+    async def get_booked_places(self, slot_id: int) -> int:
+        """Получить количество забронированных мест для слота (взрослые и дети)"""
+        try:
+            occupancy = await self.slot_repo.get_occupancy(slot_id)
+            return occupancy[0] if occupancy else 0
 
         except Exception as e:
             self.logger.error(f"Ошибка расчета занятых мест для слота {slot_id}: {e}")
             return 0
 
     async def get_current_weight(self, slot_id: int) -> int:
-        """Получить текущий вес для слота с учетом детей"""
+        """Получить текущий вес для слота с учетом детей и капитана"""
         try:
-            # Получаем слот с бронированиями
-            slot = await self.slot_repo.get_with_bookings(slot_id)
-            if not slot:
+            occupancy = await self.slot_repo.get_occupancy(slot_id)
+            if not occupancy:
                 return 0
 
-            total_weight = 0
-
-            # Вес капитана
-            if slot.captain and slot.captain.weight:
-                total_weight += slot.captain.weight
-
-            # Вес клиентов из активных бронирований
-            for booking in slot.bookings:
-                if booking.booking_status == BookingStatus.active:
-                    # Вес взрослого клиента
-                    if booking.adult_user and booking.adult_user.weight:
-                        total_weight += booking.adult_user.weight
-
-                    # Вес детей из этого бронирования
-                    if hasattr(booking, 'booking_children') and booking.booking_children:
-                        for booking_child in booking.booking_children:
-                            if booking_child.child and booking_child.child.weight:
-                                total_weight += booking_child.child.weight
-
-            return total_weight
+            booked_weight, captain_weight = occupancy[1], occupancy[2]
+            return booked_weight + captain_weight
 
         except Exception as e:
             self.logger.error(f"Ошибка расчета веса для слота {slot_id}: {e}")
@@ -457,7 +490,7 @@ class SlotManager(BaseManager):
             start_time = slot.start_datetime.strftime("%H:%M")
             end_time = slot.end_datetime.strftime("%H:%M")
 
-            booked = await self.get_booked_places(slot.id)
+            booked = await self.get_occupied_places(slot)
             free_places = slot.max_people - booked
             places_text = f"({free_places} мест)" if free_places > 0 else "(Мест нет)"
 
@@ -540,7 +573,7 @@ class SlotManager(BaseManager):
                 start_time = slot.start_datetime.strftime("%H:%M")
                 end_time = slot.end_datetime.strftime("%H:%M")
 
-                booked = await self.get_booked_places(slot.id)
+                booked = await self.get_occupied_places(slot)
                 free_places = slot.max_people - booked
                 places_text = f"({free_places} мест)" if free_places > 0 else "(Мест нет)"
 
@@ -644,10 +677,10 @@ class SlotManager(BaseManager):
                 start_time = slot.start_datetime.strftime("%H:%M")
                 end_time = slot.end_datetime.strftime("%H:%M")
 
-                booked = await self.get_booked_places(slot.id)
+                booked = await self.get_occupied_places(slot)
                 free_places = slot.max_people - booked
 
-                current_weight = await self.get_current_weight(slot.id)
+                current_weight = await self.get_occupied_weight(slot)
                 free_weight = slot.max_weight - current_weight
 
                 if free_places > 0 and free_weight > 0:
@@ -684,7 +717,7 @@ class SlotManager(BaseManager):
                     start_time = slot.start_datetime.strftime("%H:%M")
                     end_time = slot.end_datetime.strftime("%H:%M")
 
-                    booked = await self.get_booked_places(slot.id)
+                    booked = await self.get_occupied_places(slot)
                     free_places = slot.max_people - booked
                     places_text = f"({free_places} мест)" if free_places > 0 else "(Мест нет)"
 
@@ -13,7 +13,7 @@ from ..models import (
     Excursion, Booking, BookingStatus, ExcursionSlot, User, UserRole,
     BookingChild, Payment, YooKassaStatus, SlotStatus
 )
-from ..repositories import StatisticsRepository
+from ..repositories import StatisticsRepository, DailyStatsRepository
 
 from app.utils.logging_config import get_logger
 
@@ -27,6 +27,7 @@ class StatisticsManager(BaseManager):
     def __init__(self, session: AsyncSession):
         super().__init__(session)
         self.stats_repo = StatisticsRepository(session)
+        self.daily_stats_repo = DailyStatsRepository(session)
 
     async def get_daily_stats(self, date_val: datetime) -> Dict:
         """Статистика за день"""
@@ -62,12 +63,16 @@ class StatisticsManager(BaseManager):
                                  end_date=end_date.date())
 
         try:
-            total_bookings = await self.stats_repo.get_period_bookings_count(start_date, end_date)
-            total_revenue = await self.stats_repo.get_period_revenue(start_date, end_date)
-            new_users = await self.stats_repo.get_period_new_users(start_date, end_date)
-            completed_excursions = await self.stats_repo.get_period_completed_excursions(start_date, end_date)
-            total_people = await self.stats_repo.get_period_total_people(start_date, end_date)
-            popular_excursion, booking_count = await self.stats_repo.get_popular_excursion(start_date, end_date)
+            # Суммы по сводной таблице daily_stats (не более строки на день и экскурсию)
+            totals = await self.daily_stats_repo.get_totals(start_date.date(), end_date.date())
+            popular_excursion, booking_count = await self.daily_stats_repo.get_popular_excursion(
+                start_date.date(), end_date.date()
+            )
+            total_bookings = totals['bookings']
+            total_revenue = totals['revenue']
+            new_users = totals['new_users']
+            completed_excursions = totals['completed_slots']
+            total_people = totals['people']
 
             # Бизнес-логика: расчет среднего чека
             avg_check = total_revenue / total_bookings if total_bookings > 0 else 0
@@ -362,7 +367,12 @@ class StatisticsManager(BaseManager):
                                   end_date=end_date.date())
 
         try:
-            stats = await self.stats_repo.get_cancelled_stats(start_date, end_date)
+            totals = await self.daily_stats_repo.get_totals(start_date.date(), end_date.date())
+            stats = {
+                'cancelled': totals['cancellations'],
+                'refunds_amount': totals['refunds_amount'],
+                'not_arrived': totals['no_shows']
+            }
             self._log_operation_end("get_cancelled_stats", success=True, stats=stats)
             return stats
 
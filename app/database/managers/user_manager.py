@@ -7,13 +7,14 @@ import secrets
 
 from datetime import datetime, date, timedelta
 from typing import Optional, Tuple, List
-from sqlalchemy import select
+from sqlalchemy import select, text
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .base import BaseManager
 from ..repositories.user_repository import UserRepository
 from ..models import User, UserRole, RegistrationType
+from ..user_search import build_match_query, users_fts
 
 from app.schemas.user import UserRegistrationData, ChildRegistrationData
 from app.utils.validation import generate_virtual_phone
@@ -437,27 +438,38 @@ class UserManager(BaseManager):
         """
         Поиск пользователей по имени или телефону (все роли)
 
+        Используется полнотекстовый индекс users_fts: слова ищутся по
+        префиксу в ФИО, номер телефона - по префиксу цифр в любом формате.
+
         Args:
             search_query: строка поиска
             limit: максимальное количество результатов
 
         Returns:
-            List[User]: список найденных пользователей
+            List[User]: список найденных пользователей, лучшие совпадения первыми
         """
         self._log_operation_start("search_users", query=search_query, limit=limit)
 
+        match_query = build_match_query(search_query)
+        if not match_query:
+            self._log_operation_end("search_users", success=True, total=0)
+            return []
+
         try:
-            result = await self.session.execute(
+            query = (
                 select(User)
-                .where(
-                    (User.full_name.ilike(f"%{search_query}%")) |
-                    (User.phone_number.ilike(f"%{search_query}%"))
-                )
+                .join(users_fts, users_fts.c.rowid == User.id)
+                .where(text("users_fts MATCH :match_query").bindparams(match_query=match_query))
                 .order_by(
-                    User.role,  # Сначала клиенты (порядок в Enum: client, captain, admin)
+                    users_fts.c.rank,
+                    User.role,  # При равной релевантности сначала клиенты
                     User.full_name
                 )
             )
+            if limit:
+                query = query.limit(limit)
+
+            result = await self.session.execute(query)
             users = result.scalars().all()
 
             # Логируем результаты по ролям
@@ -474,7 +486,7 @@ class UserManager(BaseManager):
                 **roles_count
             )
 
-            return users[:limit] if limit else users
+            return users
 
         except Exception as e:
             self._log_operation_end("search_users", success=False)
@@ -4,12 +4,15 @@ from datetime import datetime, date
 
 from sqlalchemy import (
     BigInteger, String, Integer, Boolean, Text, Date, DateTime, Enum,
-    ForeignKey, text
+    ForeignKey, text, event, DDL
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy.ext.asyncio import AsyncAttrs
+from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncEngine
 
 from app.database.session import engine
+from app.database.user_search import USER_SEARCH_DDL, setup_user_search
+from app.database.slot_occupancy import SLOT_OCCUPANCY_DDL, setup_slot_occupancy
+from app.database.daily_stats import DAILY_STATS_DDL, setup_daily_stats
 
 from app.utils.logging_config import get_logger
 from app.utils.datetime_utils import calculate_age
@@ -110,6 +113,12 @@ class NotificationStatus(enum.Enum):
     FAILED = "failed"
     CANCELLED = "cancelled"
 
+class OutboxStatus(enum.Enum):
+    """Статусы исходящих сообщений (outbox)"""
+    pending = "pending"
+    sent = "sent"
+    failed = "failed"
+
 # Логирование создания enum классов
 logger.debug("Созданы enum классы для статусов и типов")
 
@@ -283,6 +292,9 @@ class ExcursionSlot(Base):
     max_people: Mapped[int] = mapped_column(Integer, nullable=False)
     max_weight: Mapped[int] = mapped_column(Integer, nullable=False)
     status: Mapped[SlotStatus] = mapped_column(Enum(SlotStatus), default=SlotStatus.scheduled, index=True)
+    # Занятость по активным бронированиям, поддерживается триггерами (см. slot_occupancy)
+    booked_people: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    booked_weight: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
 
     # Relationships
     excursion: Mapped["Excursion"] = relationship("Excursion", back_populates="slots")
@@ -441,6 +453,17 @@ class Payment(Base):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class PaymentCharge(Base):
+    """Обработанное списание Telegram (идемпотентность successful_payment)"""
+    __tablename__ = 'payment_charges'
+
+    telegram_payment_charge_id: Mapped[str] = mapped_column(String(100), primary_key=True)
+    payment_id: Mapped[int] = mapped_column(ForeignKey("payments.id"), nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    def __repr__(self) -> str:
+        return f"PaymentCharge(charge={self.telegram_payment_charge_id}, payment={self.payment_id})"
+
 class Refund(Base):
     """Модель возврата средств"""
     __tablename__ = 'refunds'
@@ -672,15 +695,92 @@ class SystemSetting(Base):
             'updated_by': self.updated_by
         }
 
+class OutboxMessage(Base):
+    """
+    Исходящее сообщение клиенту (transactional outbox).
+
+    Записывается в той же транзакции, что и бизнес-изменение,
+    отправляется фоновым OutboxDispatcher после commit.
+    """
+    __tablename__ = 'outbox'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    # Ключ дедупликации (например, slot_cancel:<booking_id>)
+    dedup_key: Mapped[Optional[str]] = mapped_column(String(200), unique=True, nullable=True)
+    status: Mapped[OutboxStatus] = mapped_column(Enum(OutboxStatus), default=OutboxStatus.pending, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"OutboxMessage(id={self.id}, chat={self.chat_id}, status={self.status.value})"
+
+
+class DailyStats(Base):
+    """
+    Дневная статистика по экскурсии (сводная таблица).
+
+    Бронирования, отмены и неявки относятся к дню создания бронирования,
+    возвраты - к дню создания возврата, проведенные слоты - к дню начала.
+    Новые пользователи не привязаны к экскурсии и хранятся в строке
+    с excursion_id = NO_EXCURSION.
+    """
+    __tablename__ = 'daily_stats'
+
+    NO_EXCURSION = 0
+
+    stat_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    excursion_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    bookings: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    people: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    cancellations: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    no_shows: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    refunds_amount: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    new_users: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    completed_slots: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"DailyStats(date={self.stat_date}, excursion={self.excursion_id}, bookings={self.bookings})"
+
+
+class DailyStatsDirty(Base):
+    """Дни, статистику которых нужно пересчитать (заполняется триггерами)"""
+    __tablename__ = 'daily_stats_dirty'
+
+    stat_date: Mapped[date] = mapped_column(Date, primary_key=True)
+
+
+# Полнотекстовый индекс пользователей создается вместе с таблицей users
+for _statement in USER_SEARCH_DDL:
+    event.listen(User.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+# Триггеры занятости слотов: booking_children создается последней из нужных таблиц
+for _statement in SLOT_OCCUPANCY_DDL:
+    event.listen(BookingChild.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+# Триггеры очереди дневной статистики затрагивают несколько таблиц - создаются после всех
+for _statement in DAILY_STATS_DDL:
+    event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
 
 
 # Функция для создания всех таблиц
-async def init_models():
-    """Инициализация базы данных"""
+async def init_models(bind: Optional[AsyncEngine] = None):
+    """
+    Инициализация базы данных
+
+    Args:
+        bind: Движок БД (по умолчанию основной engine приложения)
+    """
     logger.info("Инициализация базы данных...")
+    db_engine = bind or engine
     try:
         # Открываем транзакцию для инициализации
-        async with engine.begin() as conn:
+        async with db_engine.begin() as conn:
             # Создаем таблицы
             await conn.run_sync(Base.metadata.create_all)
             logger.info("Таблицы созданы/проверены")
@@ -691,6 +791,7 @@ async def init_models():
                 "CREATE INDEX IF NOT EXISTS idx_excursion_slots_start_status ON excursion_slots(start_datetime, status)",
                 "CREATE INDEX IF NOT EXISTS idx_payments_created_at_status ON payments(created_at, status)",
                 "CREATE INDEX IF NOT EXISTS idx_users_role_created_at ON users(role, created_at)",
+                "CREATE INDEX IF NOT EXISTS idx_outbox_status_next_attempt ON outbox(status, next_attempt_at)",
             ]
 
             for index_sql in indexes_sql:
@@ -699,8 +800,17 @@ async def init_models():
                 except Exception as e:
                     logger.warning(f"Не удалось создать индекс: {e}")
 
+            # Поиск пользователей (FTS5) для БД, созданных до появления индекса
+            await setup_user_search(conn)
+
+            # Столбцы и триггеры занятости слотов для существующих БД
+            await setup_slot_occupancy(conn)
+
+            # Триггеры и первичное заполнение очереди дневной статистики
+            await setup_daily_stats(conn)
+
         # Проверяем созданные таблицы
-        async with engine.connect() as conn:
+        async with db_engine.connect() as conn:
             result = await conn.execute(
                 text("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
             )
@@ -9,6 +9,8 @@ from .file_repository import FileRepository
 from .statistic_repository import StatisticsRepository
 from .settings_repository import SettingsRepository
 from .refund_repository import RefundRepository
+from .outbox_repository import OutboxRepository
+from .daily_stats_repository import DailyStatsRepository
 
 __all__ = [
     'UserRepository',
@@ -21,5 +23,7 @@ __all__ = [
     'FileRepository',
     'StatisticsRepository',
     'SettingsRepository',
-    'RefundRepository'
+    'RefundRepository',
+    'OutboxRepository',
+    'DailyStatsRepository'
 ]
\ No newline at end of file
@@ -3,16 +3,28 @@
 Содержит общие CRUD операции с обработкой ошибок и логированием.
 """
 
-from typing import Type, TypeVar, Any, Optional, List
+import logging
+from typing import Type, TypeVar, Any, Optional, List, Dict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete, func
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.utils.logging_config import get_logger
+from app.utils.logging_config import get_logger, LogSampler
 
 # Тип для моделей SQLAlchemy
 Model = TypeVar('Model')
 
+# Сообщение о числе найденных записей пишется для каждого N-го списка модели
+GET_MANY_LOG_EVERY = 100
+_get_many_samplers: Dict[str, LogSampler] = {}
+
+
+def _get_many_sampler(model_name: str) -> LogSampler:
+    sampler = _get_many_samplers.get(model_name)
+    if sampler is None:
+        sampler = _get_many_samplers[model_name] = LogSampler(GET_MANY_LOG_EVERY)
+    return sampler
+
 
 class BaseRepository:
     """Базовый класс репозитория для операций с БД"""
@@ -47,14 +59,18 @@ class BaseRepository:
             if conditions:
                 query = query.where(*conditions)
 
-            self.logger.debug(f"Поиск одной записи {model_class.__name__}: {conditions}")
+            # Условия компилируются в SQL при форматировании - только при DEBUG
+            debug = self.logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                self.logger.debug(f"Поиск одной записи {model_class.__name__}: {conditions}")
             result = await self.session.execute(query)
             entity = result.scalar_one_or_none()
 
-            if entity:
-                self.logger.debug(f"Запись {model_class.__name__} найдена: ID={entity.id}")
-            else:
-                self.logger.debug(f"Запись {model_class.__name__} не найдена по условиям: {conditions}")
+            if debug:
+                if entity:
+                    self.logger.debug(f"Запись {model_class.__name__} найдена: ID={entity.id}")
+                else:
+                    self.logger.debug(f"Запись {model_class.__name__} не найдена по условиям: {conditions}")
 
             return entity
 
@@ -93,15 +109,20 @@ class BaseRepository:
             if limit:
                 query = query.limit(limit)
 
-            self.logger.debug(
-                f"Поиск записей {model_class.__name__}: "
-                f"conditions={conditions}, limit={limit}"
-            )
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(
+                    f"Поиск записей {model_class.__name__}: "
+                    f"conditions={conditions}, limit={limit}"
+                )
 
             result = await self.session.execute(query)
             entities = result.scalars().all()
 
-            self.logger.info(f"Найдено записей {model_class.__name__}: {len(entities)}")
+            if self.logger.isEnabledFor(logging.INFO) and _get_many_sampler(model_class.__name__).ready():
+                self.logger.info(
+                    f"Найдено записей {model_class.__name__}: {len(entities)} "
+                    f"(пишется каждый {GET_MANY_LOG_EVERY}-й список)"
+                )
             return list(entities)
 
         except SQLAlchemyError as e:
@@ -122,7 +143,9 @@ class BaseRepository:
             Результат выполнения запроса
         """
         try:
-            self.logger.debug(f"Выполнение запроса: {str(query)[:100]}...")
+            # str(query) компилирует SQL - только при DEBUG
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Выполнение запроса: {str(query)[:100]}...")
             result = await self.session.execute(query)
             return result
 
@@ -194,10 +217,11 @@ class BaseRepository:
                 .values(**data)
             )
 
-            self.logger.info(
-                f"Обновление {model_class.__name__}: "
-                f"conditions={conditions}, fields={list(data.keys())}"
-            )
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info(
+                    f"Обновление {model_class.__name__}: "
+                    f"conditions={conditions}, fields={list(data.keys())}"
+                )
 
             result = await self.session.execute(stmt)
             await self.session.commit()
@@ -231,7 +255,8 @@ class BaseRepository:
         try:
             stmt = delete(model_class).where(*conditions)
 
-            self.logger.info(f"Удаление {model_class.__name__}: conditions={conditions}")
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info(f"Удаление {model_class.__name__}: conditions={conditions}")
 
             result = await self.session.execute(stmt)
             await self.session.commit()
@@ -263,7 +288,8 @@ class BaseRepository:
         try:
             query = select(1).select_from(model_class).where(*conditions).limit(1)
 
-            self.logger.debug(f"Проверка существования {model_class.__name__}: {conditions}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Проверка существования {model_class.__name__}: {conditions}")
 
             result = await self.session.execute(query)
             exists = result.first() is not None
@@ -294,7 +320,8 @@ class BaseRepository:
             if conditions:
                 query = query.where(*conditions)
 
-            self.logger.debug(f"Подсчет {model_class.__name__}: {conditions}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Подсчет {model_class.__name__}: {conditions}")
 
             result = await self.session.execute(query)
             count = result.scalar() or 0
@@ -3,7 +3,7 @@
 import os
 
 from typing import List, Optional
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, update
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,6 +12,10 @@ from app.database.models import (
     Booking, User, ExcursionSlot,
     BookingStatus, ClientStatus, PaymentStatus
 )
+from app.services.invoice_descriptors import invoice_descriptors
+
+# Поля, изменение которых делает недействительными выставленные счета
+INVOICE_FIELDS = frozenset({'booking_status', 'payment_status', 'total_price', 'slot_id'})
 
 
 class BookingRepository(BaseRepository):
@@ -102,7 +106,7 @@ class BookingRepository(BaseRepository):
         """Получить бронирования для отправки напоминаний"""
         try:
             from datetime import datetime, timedelta
-            from sqlalchemy import select, and_
+            from sqlalchemy import select, and_, update
             from sqlalchemy.orm import selectinload
             from app.database.models import BookingStatus, PaymentStatus, ExcursionSlot
 
@@ -135,25 +139,10 @@ class BookingRepository(BaseRepository):
     async def get_booked_people_count(self, slot_id: int) -> int:
         """Получить количество забронированных людей в слоте"""
         try:
-            # Получаем все активные брони на слот
-            query = (
-                select(Booking)
-                .options(
-                    selectinload(Booking.booking_children)
-                )
-                .where(
-                    and_(
-                        Booking.slot_id == slot_id,
-                        Booking.booking_status == BookingStatus.active
-                    )
-                )
-            )
-
+            # Занятость хранится в слоте и обновляется триггерами
+            query = select(ExcursionSlot.booked_people).where(ExcursionSlot.id == slot_id)
             result = await self._execute_query(query)
-            bookings = result.scalars().all()
-
-            total_people = sum(booking.people_count for booking in bookings)
-            return total_people
+            return result.scalar_one_or_none() or 0
 
         except Exception as e:
             self.logger.error(f"Ошибка получения количества забронированных людей: {e}")
@@ -276,6 +265,8 @@ class BookingRepository(BaseRepository):
             return False
 
         updated = await self._update(Booking, Booking.id == booking_id, **update_data)
+        if updated and payment_status:
+            await invoice_descriptors.bump_status_version(booking_id)
         return updated > 0
 
     async def cancel(self, booking_id: int) -> bool:
@@ -289,12 +280,31 @@ class BookingRepository(BaseRepository):
             return False
 
         updated = await self._update(Booking, Booking.id == booking_id, **clean_data)
+        if updated and INVOICE_FIELDS.intersection(clean_data):
+            await invoice_descriptors.bump_status_version(booking_id)
         return updated > 0
 
+    async def mark_paid(self, booking_id: int) -> bool:
+        """
+        Отметить бронь оплаченной в текущей транзакции (без commit).
+
+        Версию статуса брони для выставленных счетов вызывающий код
+        увеличивает после commit (invoice_descriptors.bump_status_version).
+        """
+        result = await self._execute_query(
+            update(Booking)
+            .where(Booking.id == booking_id)
+            .values(payment_status=PaymentStatus.paid)
+        )
+        return result.rowcount > 0
+
     async def update_payment_status(self, booking_id: int, payment_status: PaymentStatus) -> bool:
         """Обновить статус оплаты бронирования"""
-        return await self._update(
+        updated = await self._update(
             Booking,
             Booking.id == booking_id,
             payment_status=payment_status
-        ) > 0
\ No newline at end of file
+        )
+        if updated:
+            await invoice_descriptors.bump_status_version(booking_id)
+        return updated > 0
\ No newline at end of file
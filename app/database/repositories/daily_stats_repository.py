@@ -0,0 +1,172 @@
+"""Репозиторий сводной таблицы дневной статистики"""
+
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select, func, case, and_, delete, insert, literal, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .base import BaseRepository
+from app.database.models import (
+    DailyStats, DailyStatsDirty, Booking, BookingChild, BookingStatus, ClientStatus,
+    Excursion, ExcursionSlot, Refund, RefundStatus, SlotStatus, User
+)
+
+
+class DailyStatsRepository(BaseRepository):
+    """
+    Пересчет и чтение таблицы daily_stats.
+
+    rebuild и mark_dirty не делают commit: пересчет дней и очистка
+    очереди сохраняются одним commit вызывающего кода.
+    """
+
+    TOTAL_FIELDS = (
+        'bookings', 'revenue', 'people', 'cancellations',
+        'no_shows', 'refunds_amount', 'new_users', 'completed_slots'
+    )
+
+    def __init__(self, session):
+        super().__init__(session)
+
+    async def get_dirty_dates(self, limit: int) -> List[date]:
+        """Дни, ожидающие пересчета, от старых к новым"""
+        query = select(DailyStatsDirty.stat_date).order_by(DailyStatsDirty.stat_date).limit(limit)
+        result = await self._execute_query(query)
+        return list(result.scalars().all())
+
+    async def mark_dirty(self, date_from: date, date_to: date) -> int:
+        """
+        Поставить дни периода в очередь пересчета (backfill, без commit).
+
+        Returns:
+            int: Количество дней периода
+        """
+        days = [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+        if not days:
+            return 0
+        await self._execute_query(
+            sqlite_insert(DailyStatsDirty)
+            .values([{'stat_date': day} for day in days])
+            .on_conflict_do_nothing()
+        )
+        return len(days)
+
+    async def rebuild(self, days: List[date]) -> None:
+        """
+        Пересчитать статистику за дни по исходным таблицам (без commit).
+
+        Строки этих дней заменяются целиком, дни убираются из очереди.
+        """
+        if not days:
+            return
+
+        day_keys = [day.isoformat() for day in days]
+        await self._execute_query(delete(DailyStatsDirty).where(DailyStatsDirty.stat_date.in_(days)))
+        await self._execute_query(delete(DailyStats).where(DailyStats.stat_date.in_(days)))
+
+        rows = self._source_rows(day_keys).subquery()
+        aggregated = select(
+            rows.c.stat_date,
+            rows.c.excursion_id,
+            *(func.sum(rows.c[field]) for field in self.TOTAL_FIELDS)
+        ).group_by(rows.c.stat_date, rows.c.excursion_id)
+
+        await self._execute_query(
+            insert(DailyStats).from_select(['stat_date', 'excursion_id', *self.TOTAL_FIELDS], aggregated)
+        )
+        self.logger.debug(f"Дневная статистика пересчитана за дни: {len(days)}")
+
+    def _source_rows(self, day_keys: List[str]):
+        """Строки-вклады исходных таблиц: один вклад на бронирование, возврат, пользователя и слот"""
+        zero = literal(0)
+        counted = Booking.booking_status.in_([BookingStatus.active, BookingStatus.completed])
+        booking_day = func.date(Booking.created_at)
+        children = (
+            select(func.count(BookingChild.id))
+            .where(BookingChild.booking_id == Booking.id)
+            .scalar_subquery()
+        )
+
+        bookings = (
+            select(
+                booking_day.label('stat_date'),
+                ExcursionSlot.excursion_id.label('excursion_id'),
+                case((counted, 1), else_=0).label('bookings'),
+                case((counted, Booking.total_price), else_=0).label('revenue'),
+                case((counted, 1 + children), else_=0).label('people'),
+                case((Booking.booking_status == BookingStatus.cancelled, 1), else_=0).label('cancellations'),
+                case(
+                    (and_(
+                        Booking.booking_status == BookingStatus.completed,
+                        Booking.client_status == ClientStatus.not_arrived
+                    ), 1),
+                    else_=0
+                ).label('no_shows'),
+                zero.label('refunds_amount'),
+                zero.label('new_users'),
+                zero.label('completed_slots'),
+            )
+            .join(ExcursionSlot, Booking.slot_id == ExcursionSlot.id)
+            .where(booking_day.in_(day_keys))
+        )
+
+        refund_day = func.date(Refund.created_at)
+        refunds = (
+            select(
+                refund_day, ExcursionSlot.excursion_id,
+                zero, zero, zero, zero, zero,
+                Refund.amount,
+                zero, zero,
+            )
+            .join(Booking, Refund.booking_id == Booking.id)
+            .join(ExcursionSlot, Booking.slot_id == ExcursionSlot.id)
+            .where(refund_day.in_(day_keys), Refund.status == RefundStatus.SUCCEEDED)
+        )
+
+        user_day = func.date(User.created_at)
+        users = (
+            select(
+                user_day, literal(DailyStats.NO_EXCURSION),
+                zero, zero, zero, zero, zero, zero,
+                literal(1),
+                zero,
+            )
+            .where(user_day.in_(day_keys))
+        )
+
+        slot_day = func.date(ExcursionSlot.start_datetime)
+        slots = (
+            select(
+                slot_day, ExcursionSlot.excursion_id,
+                zero, zero, zero, zero, zero, zero, zero,
+                literal(1),
+            )
+            .where(slot_day.in_(day_keys), ExcursionSlot.status == SlotStatus.completed)
+        )
+
+        return union_all(bookings, refunds, users, slots)
+
+    async def get_totals(self, date_from: date, date_to: date) -> Dict[str, int]:
+        """Суммы показателей за период по всем экскурсиям"""
+        query = select(
+            *(func.coalesce(func.sum(getattr(DailyStats, field)), 0) for field in self.TOTAL_FIELDS)
+        ).where(DailyStats.stat_date.between(date_from, date_to))
+        result = await self._execute_query(query)
+        return dict(zip(self.TOTAL_FIELDS, result.one()))
+
+    async def get_popular_excursion(self, date_from: date, date_to: date) -> Tuple[str, int]:
+        """Экскурсия с наибольшим числом бронирований за период"""
+        total = func.sum(DailyStats.bookings)
+        query = (
+            select(Excursion.name, total)
+            .join(Excursion, DailyStats.excursion_id == Excursion.id)
+            .where(DailyStats.stat_date.between(date_from, date_to))
+            .group_by(Excursion.id, Excursion.name)
+            .having(total > 0)
+            .order_by(total.desc())
+            .limit(1)
+        )
+        result = await self._execute_query(query)
+        row = result.first()
+        return (row[0], row[1]) if row else ("Нет данных", 0)
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from .base import BaseRepository
 from app.database.models import Excursion
+from app.services.excursion_catalog import excursion_catalog
 
 
 class ExcursionRepository(BaseRepository):
@@ -34,7 +35,7 @@ class ExcursionRepository(BaseRepository):
     async def create(self, name: str, base_duration_minutes: int,
                     base_price: int, description: str = None,
                     is_active: bool = True) -> Excursion:
-        """Создать новую экскурсию"""
+        """Создать новую экскурсию (сбрасывает снимок каталога)"""
         excursion_data = {
             'name': name,
             'description': description,
@@ -42,17 +43,21 @@ class ExcursionRepository(BaseRepository):
             'base_price': base_price,
             'is_active': is_active
         }
-        return await self._create(Excursion, **excursion_data)
+        excursion = await self._create(Excursion, **excursion_data)
+        await excursion_catalog.invalidate()
+        return excursion
 
 
     async def update(self, excursion_id: int, **update_data) -> bool:
-        """Обновить данные экскурсии"""
+        """Обновить данные экскурсии (сбрасывает снимок каталога)"""
         clean_data = {k: v for k, v in update_data.items() if v is not None}
         if not clean_data:
             self.logger.warning("Нет данных для обновления экскурсии")
             return False
 
         updated_count = await self._update(Excursion, Excursion.id == excursion_id, **clean_data)
+        if updated_count > 0:
+            await excursion_catalog.invalidate()
         return updated_count > 0
 
 
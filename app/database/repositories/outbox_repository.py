@@ -0,0 +1,100 @@
+"""Репозиторий исходящих сообщений (transactional outbox)"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select
+
+from .base import BaseRepository
+from app.database.models import OutboxMessage, OutboxStatus
+
+
+class OutboxRepository(BaseRepository):
+    """
+    Запись и выборка исходящих сообщений клиентам.
+
+    enqueue не делает commit: сообщение сохраняется тем же commit,
+    что и бизнес-изменение (или при выходе из UnitOfWork), и откатывается
+    вместе с ним.
+    """
+
+    def __init__(self, session):
+        super().__init__(session)
+
+    async def enqueue(
+        self,
+        chat_id: int,
+        text: str,
+        dedup_key: Optional[str] = None
+    ) -> Optional[OutboxMessage]:
+        """
+        Добавить сообщение в outbox в текущей транзакции (без commit).
+
+        Args:
+            chat_id: ID чата получателя
+            text: Текст сообщения
+            dedup_key: Ключ дедупликации, повторное сообщение с тем же ключом не создается
+
+        Returns:
+            OutboxMessage или None если сообщение с таким ключом уже есть
+        """
+        if dedup_key and await self._exists(OutboxMessage, OutboxMessage.dedup_key == dedup_key):
+            self.logger.debug(f"Сообщение {dedup_key} уже в outbox, пропуск")
+            return None
+
+        message = OutboxMessage(chat_id=chat_id, text=text, dedup_key=dedup_key)
+        self.session.add(message)
+        self.logger.debug(f"Сообщение для чата {chat_id} добавлено в outbox")
+        return message
+
+    async def get_due(self, limit: int, now: Optional[datetime] = None) -> List[OutboxMessage]:
+        """Получить сообщения, готовые к отправке, в порядке постановки"""
+        query = (
+            select(OutboxMessage)
+            .where(
+                OutboxMessage.status == OutboxStatus.pending,
+                OutboxMessage.next_attempt_at <= (now or datetime.now())
+            )
+            .order_by(OutboxMessage.id)
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def mark_sent(self, message_ids: List[int], sent_at: Optional[datetime] = None) -> int:
+        """Отметить сообщения отправленными одним запросом"""
+        if not message_ids:
+            return 0
+        return await self._update(
+            OutboxMessage,
+            OutboxMessage.id.in_(message_ids),
+            status=OutboxStatus.sent,
+            sent_at=sent_at or datetime.now(),
+            last_error=None
+        )
+
+    async def schedule_retry(
+        self,
+        message_id: int,
+        attempts: int,
+        next_attempt_at: datetime,
+        error: str
+    ) -> bool:
+        """Запланировать повторную отправку"""
+        return await self._update(
+            OutboxMessage,
+            OutboxMessage.id == message_id,
+            attempts=attempts,
+            next_attempt_at=next_attempt_at,
+            last_error=error[:500]
+        ) > 0
+
+    async def mark_failed(self, message_id: int, attempts: int, error: str) -> bool:
+        """Отметить сообщение недоставляемым"""
+        return await self._update(
+            OutboxMessage,
+            OutboxMessage.id == message_id,
+            status=OutboxStatus.failed,
+            attempts=attempts,
+            last_error=error[:500]
+        ) > 0
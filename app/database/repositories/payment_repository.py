@@ -2,14 +2,16 @@
 
 from typing import Optional, List
 from sqlalchemy.orm import selectinload
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_, func, update
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
 from .base import BaseRepository
 from app.database.models import (
-    Payment, PaymentMethod, YooKassaStatus, PaymentStatus, Booking
+    Payment, PaymentMethod, YooKassaStatus, PaymentStatus, Booking, PaymentCharge
 )
 from app.database.repositories.booking_repository import BookingRepository
+from app.services.invoice_descriptors import invoice_descriptors
 
 
 class PaymentRepository(BaseRepository):
@@ -81,12 +83,54 @@ class PaymentRepository(BaseRepository):
     ) -> bool:
         """Обновить платеж по его ID"""
         try:
-            await self._update(Payment, Payment.id == payment_id, **kwargs)
+            updated = await self._update(Payment, Payment.id == payment_id, **kwargs)
+            if updated and 'status' in kwargs:
+                # Счет по платежу, вышедшему из pending, нельзя подтверждать по дескриптору
+                await invoice_descriptors.invalidate(payment_id)
             return True
         except Exception as e:
             self.logger.error(f"Ошибка обновления платежа {payment_id}: {e}")
             return False
 
+    async def register_charge(self, charge_id: str, payment_id: int) -> bool:
+        """
+        Зарегистрировать списание Telegram в текущей транзакции (без commit).
+
+        Запись сохраняется вместе с подтверждением платежа, поэтому повторная
+        обработка того же списания невозможна даже без Redis.
+
+        Returns:
+            False если списание уже обработано
+        """
+        existing = await self._get_one(
+            PaymentCharge, PaymentCharge.telegram_payment_charge_id == charge_id
+        )
+        if existing:
+            return False
+
+        self.session.add(PaymentCharge(telegram_payment_charge_id=charge_id, payment_id=payment_id))
+        try:
+            await self.session.flush()
+        except IntegrityError:
+            await self.session.rollback()
+            self.logger.info(f"Списание {charge_id} уже зарегистрировано параллельно")
+            return False
+        return True
+
+    async def mark_succeeded(self, payment_id: int, yookassa_payment_id: str) -> bool:
+        """
+        Отметить платеж успешным в текущей транзакции (без commit).
+
+        Фиксируется вызывающим кодом вместе с записью PaymentCharge
+        и статусом брони.
+        """
+        result = await self._execute_query(
+            update(Payment)
+            .where(Payment.id == payment_id)
+            .values(status=YooKassaStatus.succeeded, yookassa_payment_id=yookassa_payment_id)
+        )
+        return result.rowcount > 0
+
     async def get_payment_by_yookassa_id(self, yookassa_payment_id: str) -> Optional[Payment]:
         """Получить платеж по ID YooKassa"""
         return await self._get_one(Payment, Payment.yookassa_payment_id == yookassa_payment_id)
@@ -5,6 +5,7 @@ from sqlalchemy import select
 
 from .base import BaseRepository
 from app.database.models import SystemSetting
+from app.services.settings_cache import settings_cache
 
 
 class SettingsRepository(BaseRepository):
@@ -34,7 +35,12 @@ class SettingsRepository(BaseRepository):
             return {}
 
     async def set(self, key: str, value: str, description: str = None, updated_by: int = None) -> bool:
-        """Установить значение настройки (создать или обновить)"""
+        """
+        Установить значение настройки (создать или обновить).
+
+        После сохранения обновляется снимок настроек (settings_cache)
+        и остальные процессы получают уведомление.
+        """
         try:
             existing = await self.get_by_key(key)
 
@@ -50,6 +56,8 @@ class SettingsRepository(BaseRepository):
                     SystemSetting.key == key,
                     **update_data
                 )
+                if updated > 0:
+                    await settings_cache.apply(key, value)
                 return updated > 0
             else:
                 setting_data = {
@@ -59,6 +67,7 @@ class SettingsRepository(BaseRepository):
                     'updated_by': updated_by
                 }
                 await self._create(SystemSetting, **setting_data)
+                await settings_cache.apply(key, value)
                 return True
 
         except Exception as e:
@@ -1,9 +1,9 @@
 """Репозиторий для работы со слотами (CRUD операции)"""
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, date, timedelta
-from sqlalchemy import select, and_, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, and_, or_, func
+from sqlalchemy.orm import selectinload, aliased
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .base import BaseRepository
@@ -147,6 +147,28 @@ class SlotRepository(BaseRepository):
         result = await self._execute_query(query)
         return result.scalar_one_or_none()
 
+    async def get_occupancy(self, slot_id: int) -> Optional[Tuple[int, int, int]]:
+        """
+        Получить занятость слота одной строкой.
+
+        Returns:
+            (людей, вес клиентов, вес капитана) по активным бронированиям
+            или None, если слота нет
+        """
+        captain = aliased(User)
+        query = (
+            select(
+                ExcursionSlot.booked_people,
+                ExcursionSlot.booked_weight,
+                func.coalesce(captain.weight, 0)
+            )
+            .outerjoin(captain, captain.id == ExcursionSlot.captain_id)
+            .where(ExcursionSlot.id == slot_id)
+        )
+        result = await self._execute_query(query)
+        row = result.one_or_none()
+        return tuple(row) if row else None
+
     async def get_captain_slots(
         self,
         captain_telegram_id: int,
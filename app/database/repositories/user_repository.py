@@ -9,6 +9,7 @@ from .base import BaseRepository
 from app.database.models import User, UserRole, ExcursionSlot, SlotStatus
 from app.utils.validation import validate_phone
 from app.utils.logging_config import get_logger
+from app.services.admin_roster import admin_roster
 
 logger = get_logger(__name__)
 
@@ -27,6 +28,12 @@ class UserRepository(BaseRepository):
         """Получить пользователя по ID"""
         return await self._get_one(User, User.id == user_id)
 
+    async def get_by_ids(self, user_ids: List[int]) -> List[User]:
+        """Получить пользователей по списку ID одним запросом"""
+        if not user_ids:
+            return []
+        return await self._get_many(User, User.id.in_(set(user_ids)))
+
     async def get_by_telegram_id(self, telegram_id: int) -> Optional[User]:
         """Получить пользователя по telegram_id"""
         return await self._get_one(User, User.telegram_id == telegram_id)
@@ -108,7 +115,10 @@ class UserRepository(BaseRepository):
 
     async def create(self, **user_data) -> User:
         """Создать пользователя (базовая версия, без токенов)"""
-        return await self._create(User, **user_data)
+        user = await self._create(User, **user_data)
+        if user.role == UserRole.admin:
+            await admin_roster.invalidate()
+        return user
 
 
 # ===== Обновление записей =====
@@ -123,6 +133,8 @@ class UserRepository(BaseRepository):
             return False
 
         updated_count = await self._update(User, User.id == user_id, **clean_data)
+        if updated_count and ('role' in clean_data or 'telegram_id' in clean_data):
+            await admin_roster.invalidate()
         return updated_count > 0
 
 
@@ -133,18 +145,24 @@ class UserRepository(BaseRepository):
         """Повысить пользователя до администратора"""
         updated_count = await self._update(User, User.telegram_id == telegram_id,
                                           role=UserRole.admin)
+        if updated_count:
+            await admin_roster.invalidate()
         return updated_count > 0
 
     async def promote_to_captain(self, telegram_id: int) -> bool:
         """Повысить пользователя до капитана"""
         updated_count = await self._update(User, User.telegram_id == telegram_id,
                                           role=UserRole.captain)
+        if updated_count:
+            await admin_roster.invalidate()
         return updated_count > 0
 
     async def promote_to_client(self, telegram_id: int) -> bool:
         """Понизить пользователя до клиента"""
         updated_count = await self._update(User, User.telegram_id == telegram_id,
                                           role=UserRole.client)
+        if updated_count:
+            await admin_roster.invalidate()
         return updated_count > 0
 
 
@@ -232,4 +250,6 @@ class UserRepository(BaseRepository):
     async def delete(self, user_id: int) -> bool:
         """Удалить пользователя по ID"""
         deleted_count = await self._delete(User, User.id == user_id)
+        if deleted_count:
+            await admin_roster.invalidate()
         return deleted_count > 0
\ No newline at end of file
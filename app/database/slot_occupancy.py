@@ -0,0 +1,195 @@
+"""
+Занятость слотов: столбцы excursion_slots.booked_people и booked_weight.
+
+Столбцы хранят число людей (взрослый + дети) и вес клиентов всех активных
+бронирований слота. Их поддерживают триггеры SQLite в той же транзакции,
+что и изменение исходных строк:
+
+- bookings: создание, отмена/завершение (смена booking_status), перенос
+  на другой слот, смена взрослого, удаление;
+- booking_children: добавление, удаление и изменение ребенка;
+- users: изменение веса участника активных бронирований.
+
+Триггеры срабатывают и для ORM flush, и для массовых UPDATE репозиториев,
+поэтому доступность слота читается одной строкой. Вес капитана в столбец
+не входит - он добавляется при расчете (SlotManager.get_current_weight).
+
+Триггеры создаются вместе с booking_children (событие after_create),
+для существующих БД столбцы и триггеры досоздаются в init_models через
+setup_slot_occupancy(). Задача планировщика reconcile_slot_occupancy
+сверяет столбцы с исходными строками и исправляет расхождения.
+"""
+
+from typing import Dict, List, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ACTIVE = "'active'"
+
+
+def _people_sql(booking: str) -> str:
+    """Люди бронирования: взрослый + дети"""
+    return f"(1 + (SELECT count(*) FROM booking_children WHERE booking_id = {booking}.id))"
+
+
+def _weight_sql(booking: str) -> str:
+    """Вес клиентов бронирования: взрослый + дети"""
+    return (
+        f"(coalesce((SELECT weight FROM users WHERE id = {booking}.adult_user_id), 0) + "
+        f"coalesce((SELECT sum(u.weight) FROM booking_children bc JOIN users u ON u.id = bc.child_user_id "
+        f"WHERE bc.booking_id = {booking}.id), 0))"
+    )
+
+
+def _apply_booking_sql(booking: str, sign: str) -> str:
+    """Добавить (+) или вычесть (-) вклад активного бронирования в его слот"""
+    return (
+        f"UPDATE excursion_slots SET "
+        f"booked_people = booked_people {sign} {_people_sql(booking)}, "
+        f"booked_weight = booked_weight {sign} {_weight_sql(booking)} "
+        f"WHERE id = {booking}.slot_id AND {booking}.booking_status = {ACTIVE}"
+    )
+
+
+def _apply_child_sql(child: str, sign: str) -> str:
+    """Добавить (+) или вычесть (-) ребенка в слоте активного бронирования"""
+    return (
+        f"UPDATE excursion_slots SET "
+        f"booked_people = booked_people {sign} 1, "
+        f"booked_weight = booked_weight {sign} coalesce((SELECT weight FROM users WHERE id = {child}.child_user_id), 0) "
+        f"WHERE id = (SELECT slot_id FROM bookings WHERE id = {child}.booking_id AND booking_status = {ACTIVE})"
+    )
+
+
+# Сколько раз пользователь участвует в активных бронированиях слота excursion_slots.id
+_USER_SLOT_ENTRIES_SQL = (
+    f"((SELECT count(*) FROM bookings b WHERE b.slot_id = excursion_slots.id "
+    f"AND b.booking_status = {ACTIVE} AND b.adult_user_id = new.id) + "
+    f"(SELECT count(*) FROM booking_children bc JOIN bookings b ON b.id = bc.booking_id "
+    f"WHERE b.slot_id = excursion_slots.id AND b.booking_status = {ACTIVE} AND bc.child_user_id = new.id))"
+)
+
+SLOT_OCCUPANCY_DDL: List[str] = [
+    "CREATE TRIGGER IF NOT EXISTS slot_occupancy_booking_insert AFTER INSERT ON bookings BEGIN "
+    f"{_apply_booking_sql('new', '+')}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS slot_occupancy_booking_delete AFTER DELETE ON bookings BEGIN "
+    f"{_apply_booking_sql('old', '-')}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS slot_occupancy_booking_update "
+    "AFTER UPDATE OF booking_status, slot_id, adult_user_id ON bookings "
+    "WHEN old.booking_status IS NOT new.booking_status OR old.slot_id IS NOT new.slot_id "
+    "OR old.adult_user_id IS NOT new.adult_user_id BEGIN "
+    f"{_apply_booking_sql('old', '-')}; "
+    f"{_apply_booking_sql('new', '+')}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS slot_occupancy_child_insert AFTER INSERT ON booking_children BEGIN "
+    f"{_apply_child_sql('new', '+')}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS slot_occupancy_child_delete AFTER DELETE ON booking_children BEGIN "
+    f"{_apply_child_sql('old', '-')}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS slot_occupancy_child_update "
+    "AFTER UPDATE OF booking_id, child_user_id ON booking_children BEGIN "
+    f"{_apply_child_sql('old', '-')}; {_apply_child_sql('new', '+')}; END",
+
+    "CREATE TRIGGER IF NOT EXISTS slot_occupancy_user_weight AFTER UPDATE OF weight ON users "
+    "WHEN old.weight IS NOT new.weight BEGIN "
+    "UPDATE excursion_slots SET booked_weight = booked_weight + "
+    f"(coalesce(new.weight, 0) - coalesce(old.weight, 0)) * {_USER_SLOT_ENTRIES_SQL} "
+    "WHERE id IN ("
+    f"SELECT slot_id FROM bookings WHERE booking_status = {ACTIVE} AND adult_user_id = new.id "
+    "UNION SELECT b.slot_id FROM booking_children bc JOIN bookings b ON b.id = bc.booking_id "
+    f"WHERE b.booking_status = {ACTIVE} AND bc.child_user_id = new.id); END",
+]
+
+def _actual_sql(slot: str, expression: str) -> str:
+    """Сумма по активным бронированиям слота (0, если бронирований нет)"""
+    return (
+        f"(SELECT coalesce(sum({expression}), 0) FROM bookings b "
+        f"WHERE b.slot_id = {slot}.id AND b.booking_status = {ACTIVE})"
+    )
+
+
+# Фактическая занятость слотов по исходным строкам
+ACTUAL_OCCUPANCY_SQL = (
+    "SELECT s.id, s.booked_people, s.booked_weight, "
+    f"{_actual_sql('s', _people_sql('b'))} AS actual_people, "
+    f"{_actual_sql('s', _weight_sql('b'))} AS actual_weight "
+    "FROM excursion_slots s {where}"
+)
+
+# Пересчет занятости выбранных слотов одним UPDATE по исходным строкам
+RECOMPUTE_OCCUPANCY_SQL = (
+    "UPDATE excursion_slots SET "
+    f"booked_people = {_actual_sql('excursion_slots', _people_sql('b'))}, "
+    f"booked_weight = {_actual_sql('excursion_slots', _weight_sql('b'))} "
+    "WHERE id IN :ids"
+)
+
+SLOT_COLUMNS = {
+    "booked_people": "ALTER TABLE excursion_slots ADD COLUMN booked_people INTEGER NOT NULL DEFAULT 0",
+    "booked_weight": "ALTER TABLE excursion_slots ADD COLUMN booked_weight INTEGER NOT NULL DEFAULT 0",
+}
+
+
+async def find_drift(connection, where: str = "") -> Dict[int, Tuple[int, int, int, int]]:
+    """
+    Найти слоты, у которых столбцы занятости расходятся с бронированиями.
+
+    Args:
+        connection: AsyncConnection или AsyncSession
+        where: дополнительное условие на слоты (например, "WHERE s.start_datetime >= :since")
+
+    Returns:
+        slot_id -> (booked_people, booked_weight, actual_people, actual_weight)
+    """
+    result = await connection.execute(text(ACTUAL_OCCUPANCY_SQL.format(where=where)))
+    drift = {}
+    for slot_id, people, weight, actual_people, actual_weight in result:
+        if (people, weight) != (actual_people, actual_weight):
+            drift[slot_id] = (people, weight, actual_people, actual_weight)
+    return drift
+
+
+async def fix_drift(connection, drift: Dict[int, Tuple[int, int, int, int]]) -> None:
+    """
+    Пересчитать занятость слотов с расхождениями.
+
+    Значения вычисляются заново внутри самого UPDATE, а не берутся из
+    find_drift: бронирование, созданное между поиском и записью, уже
+    учтено триггером и не будет потеряно.
+    """
+    if not drift:
+        return
+    await connection.execute(
+        text(RECOMPUTE_OCCUPANCY_SQL).bindparams(bindparam("ids", expanding=True)),
+        {"ids": list(drift)}
+    )
+
+
+async def setup_slot_occupancy(conn: AsyncConnection) -> None:
+    """
+    Добавить столбцы и триггеры в существующую БД и заполнить столбцы.
+
+    Вызывается из init_models после create_all.
+    """
+    result = await conn.execute(text("PRAGMA table_info(excursion_slots)"))
+    existing = {row[1] for row in result}
+    for column_name, statement in SLOT_COLUMNS.items():
+        if column_name not in existing:
+            await conn.execute(text(statement))
+            logger.info(f"Добавлен столбец excursion_slots.{column_name}")
+
+    for statement in SLOT_OCCUPANCY_DDL:
+        await conn.execute(text(statement))
+
+    drift = await find_drift(conn)
+    if drift:
+        await fix_drift(conn, drift)
+        logger.info(f"Занятость слотов пересчитана: {len(drift)}")
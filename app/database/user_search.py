@@ -0,0 +1,115 @@
+"""
+Полнотекстовый поиск пользователей (SQLite FTS5).
+
+Виртуальная таблица users_fts хранит ФИО и цифры телефона; rowid совпадает
+с users.id. Триггеры на users поддерживают индекс при вставке, изменении
+ФИО/телефона и удалении. Телефон индексируется двумя токенами: все цифры
+(79121234567, номер на 8 приводится к 7) и без первой цифры (9121234567),
+чтобы находить номер и по «+7912...», и по «912...», и по «8912...».
+
+Таблица создается вместе с users (событие after_create) и досоздается
+для существующих БД в init_models через setup_user_search().
+"""
+
+import re
+from typing import List, Optional
+
+from sqlalchemy import column, table, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+FTS_TABLE = "users_fts"
+
+# Таблица для запросов через SQLAlchemy Core (rowid = users.id, rank = bm25)
+users_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+
+def _phone_tokens_sql(phone: str) -> str:
+    """SQL выражение: цифры телефона и они же без первой цифры"""
+    digits = phone
+    for char in ("+", " ", "-", "(", ")"):
+        digits = f"replace({digits}, '{char}', '')"
+    digits = f"coalesce({digits}, '')"
+    # 8XXXXXXXXXX хранится как 7XXXXXXXXXX
+    digits = (
+        f"(CASE WHEN length({digits}) = 11 AND substr({digits}, 1, 1) = '8' "
+        f"THEN '7' || substr({digits}, 2) ELSE {digits} END)"
+    )
+    return f"{digits} || ' ' || substr({digits}, 2)"
+
+
+def _index_row_sql(alias: str) -> str:
+    return (
+        f"INSERT INTO {FTS_TABLE}(rowid, full_name, phone_digits) "
+        f"VALUES ({alias}.id, coalesce({alias}.full_name, ''), {_phone_tokens_sql(f'{alias}.phone_number')})"
+    )
+
+
+USER_SEARCH_DDL: List[str] = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "full_name, phone_digits, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+
+    f"CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN "
+    f"{_index_row_sql('new')}; END",
+
+    f"CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END",
+
+    f"CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF full_name, phone_number ON users BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; {_index_row_sql('new')}; END",
+]
+
+REBUILD_SQL = [
+    f"DELETE FROM {FTS_TABLE}",
+    f"INSERT INTO {FTS_TABLE}(rowid, full_name, phone_digits) "
+    f"SELECT id, coalesce(full_name, ''), {_phone_tokens_sql('phone_number')} FROM users",
+]
+
+
+async def setup_user_search(conn: AsyncConnection) -> None:
+    """
+    Создать индекс поиска в существующей БД и заполнить его при расхождении.
+
+    Вызывается из init_models после create_all.
+    """
+    for statement in USER_SEARCH_DDL:
+        await conn.execute(text(statement))
+
+    users_count = (await conn.execute(text("SELECT count(*) FROM users"))).scalar()
+    indexed_count = (await conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}"))).scalar()
+    if users_count != indexed_count:
+        for statement in REBUILD_SQL:
+            await conn.execute(text(statement))
+        logger.info(f"Индекс поиска пользователей перестроен: {users_count} записей")
+
+
+def _quote(token: str) -> str:
+    return '"' + token.replace('"', '""') + '"'
+
+
+def build_match_query(search_query: str) -> Optional[str]:
+    """
+    Строка MATCH для FTS5 по вводу администратора.
+
+    Номер телефона в любом формате («+7 (912) 123-45-67», «8912...») ищется
+    по префиксу цифр. Иначе каждое слово - префикс в ФИО, отдельные числа -
+    префиксы телефона; все условия должны выполняться.
+
+    Returns:
+        Строка запроса или None, если искать нечего
+    """
+    phone = re.sub(r"[\s+\-()]", "", search_query)
+    if phone.isdigit():
+        if len(phone) > 1 and phone.startswith("8"):
+            phone = "7" + phone[1:]
+        return f"phone_digits : {_quote(phone)} *"
+
+    terms = []
+    for token in re.findall(r"\w+", search_query):
+        column_name = "phone_digits" if token.isdigit() else "full_name"
+        terms.append(f"{column_name} : {_quote(token)} *")
+    return " AND ".join(terms) or None
@@ -1,4 +1,7 @@
 from .admin_middleware import AdminMiddleware
 from .captain_middleware import CaptainMiddleware
+from .query_tracking import QueryTrackingMiddleware
+from .metrics import MetricsMiddleware, RouterLabelMiddleware
 
-__all__ = ['AdminMiddleware', 'CaptainMiddleware']
\ No newline at end of file
+__all__ = ['AdminMiddleware', 'CaptainMiddleware', 'QueryTrackingMiddleware',
+           'MetricsMiddleware', 'RouterLabelMiddleware']
\ No newline at end of file
@@ -0,0 +1,89 @@
+import time
+from aiogram import BaseMiddleware
+from aiogram.types import Update, TelegramObject
+from typing import Callable, Dict, Any, Awaitable
+
+from app.database.instrumentation import current_query_stats
+from app.middlewares.query_tracking import describe_update
+from app.services.metrics import metrics
+
+# Ключ в data, через который внутренняя мидлварь сообщает роутер обработчика
+TRACE_KEY = "metrics_trace"
+# Роутер для апдейтов, не дошедших ни до одного обработчика
+UNHANDLED_ROUTER = "unhandled"
+
+update_duration = metrics.histogram(
+    "bot_update_duration_seconds",
+    "Время обработки апдейта",
+    ("router", "handler")
+)
+update_errors = metrics.counter(
+    "bot_update_errors_total",
+    "Исключения при обработке апдейтов",
+    ("router", "handler", "error")
+)
+updates_in_flight = metrics.gauge(
+    "bot_updates_in_flight",
+    "Апдейты в обработке"
+)
+update_db_seconds = metrics.histogram(
+    "bot_update_db_seconds",
+    "Время SQL запросов за один апдейт",
+    ("router", "handler")
+)
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Внешняя мидлварь: латентность, ошибки и число апдейтов в обработке.
+
+    Регистрируется после QueryTrackingMiddleware, чтобы учесть время БД
+    текущего апдейта.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        # Для апдейтов без обработчика остается ограниченная метка апдейта
+        trace = {"router": UNHANDLED_ROUTER, "handler": describe_update(event, data)}
+        data[TRACE_KEY] = trace
+
+        updates_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            update_errors.inc(router=trace["router"], handler=trace["handler"], error=type(e).__name__)
+            raise
+        finally:
+            updates_in_flight.dec()
+            labels = dict(router=trace["router"], handler=trace["handler"])
+            update_duration.observe(time.perf_counter() - start, **labels)
+
+            stats = current_query_stats()
+            if stats is not None:
+                update_db_seconds.observe(stats.total_time, **labels)
+
+
+class RouterLabelMiddleware(BaseMiddleware):
+    """Внутренняя мидлварь: запоминает роутер и имя функции сработавшего обработчика"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        trace = data.get(TRACE_KEY)
+        router = data.get("event_router")
+        if trace is not None:
+            if router is not None:
+                trace["router"] = router.name
+            handler_object = data.get("handler")
+            callback = getattr(handler_object, "callback", None)
+            if callback is not None:
+                trace["handler"] = getattr(callback, "__name__", type(callback).__name__)
+        return await handler(event, data)
@@ -0,0 +1,64 @@
+import re
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from typing import Callable, Dict, Any, Awaitable
+
+from app.database.instrumentation import track_queries
+
+# Команды, для которых зарегистрированы обработчики
+KNOWN_COMMANDS = frozenset({
+    "/start", "/help", "/stop", "/admin", "/adminhelp", "/captain",
+    "/dashboard", "/first_admin", "/jobs", "/promote",
+})
+
+# Параметры callback_data: все после ":" или ";" и числовой хвост "_<id>"
+_CALLBACK_PARAMS = re.compile(r"[:;].*$|_?\d+$", re.DOTALL)
+
+
+def callback_label(callback_data: str) -> str:
+    """Префикс callback_data без идентификаторов и параметров"""
+    return _CALLBACK_PARAMS.sub("", callback_data, count=1) or "empty"
+
+
+def command_label(text: str) -> str:
+    """Команда сообщения или "command" для незарегистрированных команд"""
+    command = text.split(maxsplit=1)[0].split("@", 1)[0]
+    return command if command in KNOWN_COMMANDS else "command"
+
+
+def describe_update(update: Update, data: Dict[str, Any]) -> str:
+    """
+    Короткая метка апдейта для статистики и метрик.
+
+    Для callback - префикс callback_data без идентификаторов,
+    для сообщений - зарегистрированная команда или текущее состояние FSM.
+    Число различных меток ограничено: свободный текст пользователя,
+    id из callback_data и неизвестные команды в метку не попадают.
+    """
+    if update.callback_query:
+        return f"callback:{callback_label(update.callback_query.data or '')}"
+
+    message = update.message
+    if message:
+        if message.text and message.text.startswith("/"):
+            return f"message:{command_label(message.text)}"
+        raw_state = data.get("raw_state")
+        if raw_state:
+            return f"message:{raw_state}"
+        content_type = message.content_type
+        return f"message:{getattr(content_type, 'value', content_type)}"
+
+    return update.event_type
+
+
+class QueryTrackingMiddleware(BaseMiddleware):
+    """Внешняя мидлварь: относит SQL запросы к обрабатываемому апдейту"""
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        with track_queries(describe_update(event, data)):
+            return await handler(event, data)
@@ -59,6 +59,7 @@ async def adminhelp_command(message: Message):
             '/admin - админ-панель\n'
             '/promote (номер телефона) - назначить пользователя админом, капитаном, или разжаловать в клиенты\n'
             '/dashboard - дашборд админа\n'
+            '/jobs - состояние фоновых задач\n'
             '/statistic_today - детальная статистика за сегодня\n'
             '/report - генерация отчета за период',
             reply_markup=main_menu()
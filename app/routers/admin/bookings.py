@@ -3,12 +3,13 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 
 from app.database.models import PaymentStatus
-from app.database.repositories import BookingRepository
+from app.database.repositories import BookingRepository, OutboxRepository
 from app.database.managers import SlotManager, BookingManager, PaymentManager
 from app.database.session import async_session
 from app.database.unit_of_work import UnitOfWork
 
 from app.middlewares import AdminMiddleware
+from app.services.outbox import outbox_dispatcher
 from app.utils.logging_config import get_logger
 from app.admin_panel.keyboards_adm import (
     bookings_submenu, cancel_button, admin_cancel_booking_no_refund_menu,
@@ -237,31 +238,30 @@ async def admin_cancel_booking_callback(callback: CallbackQuery):
 
                     await callback.message.edit_text(response_text)
 
-                    # Отправляем уведомление клиенту
-                    bot = callback.bot
+                    # Уведомление клиенту уходит из outbox после commit
                     if booking.adult_user.telegram_id:
-                        try:
-                            slot = booking.slot
-                            excursion = slot.excursion if slot else None
-                            notification_text = (
-                                f"Ваше бронирование #{booking.id} было отменено администратором.\n\n"
-                                f"Экскурсия: {excursion.name if excursion else 'Неизвестно'}\n"
-                                f"Дата и время: {slot.start_datetime.strftime('%d.%m.%Y %H:%M') if slot else 'Неизвестно'}"
-                            )
-
-                            if auto_refund:
-                                notification_text += "\n\nСредства будут возвращены на вашу карту в течение 5-10 рабочих дней."
-                                if force_refund:
-                                    notification_text += "\nВозврат средств выполнен принудительно по решению администратора."
-                            else:
-                                notification_text += "\n\nОплата не производилась, возврат не требуется."
-
-                            await bot.send_message(
-                                chat_id=booking.adult_user.telegram_id,
-                                text=notification_text
-                            )
-                        except Exception as e:
-                            logger.error(f"Ошибка отправки уведомления клиенту: {e}")
+                        slot = booking.slot
+                        excursion = slot.excursion if slot else None
+                        notification_text = (
+                            f"Ваше бронирование #{booking.id} было отменено администратором.\n\n"
+                            f"Экскурсия: {excursion.name if excursion else 'Неизвестно'}\n"
+                            f"Дата и время: {slot.start_datetime.strftime('%d.%m.%Y %H:%M') if slot else 'Неизвестно'}"
+                        )
+
+                        if auto_refund:
+                            notification_text += "\n\nСредства будут возвращены на вашу карту в течение 5-10 рабочих дней."
+                            if force_refund:
+                                notification_text += "\nВозврат средств выполнен принудительно по решению администратора."
+                        else:
+                            notification_text += "\n\nОплата не производилась, возврат не требуется."
+
+                        await OutboxRepository(uow.session).enqueue(
+                            chat_id=booking.adult_user.telegram_id,
+                            text=notification_text,
+                            dedup_key=f"admin_cancel:{booking.id}"
+                        )
+                        await uow.commit()
+                        outbox_dispatcher.wake()
                 else:
                     await callback.message.edit_text(f"Ошибка отмены: {message}")
 
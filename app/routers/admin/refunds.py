@@ -10,7 +10,7 @@ from datetime import datetime
 from app.database.session import async_session
 from app.database.unit_of_work import UnitOfWork
 from app.database.managers import PaymentManager, BookingManager
-from app.database.repositories import RefundRepository, BookingRepository, UserRepository
+from app.database.repositories import RefundRepository, BookingRepository, UserRepository, OutboxRepository
 from app.database.models import RefundStatus, PaymentStatus
 from app.utils.logging_config import get_logger
 from app.admin_panel.keyboards_adm import (
@@ -19,7 +19,7 @@ from app.admin_panel.keyboards_adm import (
     admin_mark_refund_successful_menu
 )
 from app.admin_panel.states_adm import RefundActions
-from app.services.scheduler.bot_instance import get_bot_instance
+from app.services.outbox import outbox_dispatcher
 
 router = Router(name="admin_refunds")
 logger = get_logger(__name__)
@@ -204,14 +204,16 @@ async def process_refund_amount(message: Message, state: FSMContext):
                     user = await user_repo.get_by_id(booking.adult_user_id)
 
                     if user and user.telegram_id:
-                        bot = get_bot_instance()
-                        if bot:
-                            await bot.send_message(
-                                user.telegram_id,
+                        await OutboxRepository(uow.session).enqueue(
+                            chat_id=user.telegram_id,
+                            text=(
                                 f"Администратор оформил возврат средств за бронирование #{booking_id} через ЮKassa.\n"
                                 f"Сумма: {refund_amount} руб.\n"
                                 f"Деньги поступят на карту в течение 5-10 рабочих дней."
                             )
+                        )
+                        await uow.commit()
+                        outbox_dispatcher.wake()
                 else:
                     # Если через ЮKassa не получилось, предлагаем отметить возврат вручную
                     await message.answer(
@@ -289,15 +291,18 @@ async def mark_booking_refunded(callback: CallbackQuery):
 
                 await callback.message.edit_text(response_text, reply_markup=finances_submenu())
 
-                # Уведомляем пользователя (опционально)
+                # Уведомляем пользователя через outbox (сохраняется вместе со статусами)
                 if booking.adult_user.telegram_id:
-                    bot = callback.bot
-                    if bot:
-                        await bot.send_message(
-                            booking.adult_user.telegram_id,
+                    await OutboxRepository(uow.session).enqueue(
+                        chat_id=booking.adult_user.telegram_id,
+                        text=(
                             f"Администратор подтвердил возврат средств за бронирование #{booking_id}.\n"
                             f"Если у вас есть вопросы, свяжитесь с администратором."
-                        )
+                        ),
+                        dedup_key=f"manual_refund:{booking_id}"
+                    )
+                    await uow.commit()
+                    outbox_dispatcher.wake()
 
                 logger.info(f"Администратор {callback.from_user.id} отметил бронирование #{booking_id} как возвращенное вручную")
 
@@ -12,6 +12,7 @@ from app.database.session import async_session
 
 from app.admin_panel.states_adm import UploadConcent
 from app.middlewares import AdminMiddleware
+from app.services.settings_cache import settings_cache
 from app.utils.logging_config import get_logger
 
 import app.admin_panel.keyboards_adm as kb
@@ -577,19 +578,17 @@ DEFAULT_VAT_RATE = "0"
 DEFAULT_TAX_SYSTEM = "1"
 
 
-async def _get_receipt_settings(session) -> tuple:
-    """Получить текущие настройки чеков"""
-    settings_repo = SettingsRepository(session)
-
-    send_receipt = await settings_repo.get_bool(
+async def _get_receipt_settings() -> tuple:
+    """Получить текущие настройки чеков (из снимка настроек)"""
+    send_receipt = await settings_cache.get_bool(
         SETTING_SEND_RECEIPT,
         default=False
     )
-    vat_rate = await settings_repo.get_int(
+    vat_rate = await settings_cache.get_int(
         SETTING_VAT_RATE,
         default=0
     )
-    tax_system = await settings_repo.get_int(
+    tax_system = await settings_cache.get_int(
         SETTING_TAX_SYSTEM,
         default=1
     )
@@ -602,23 +601,22 @@ async def receipt_settings_menu(message: Message):
     logger.info(f"Администратор {message.from_user.id} открыл настройки чеков")
 
     try:
-        async with async_session() as session:
-            send_receipt, vat_rate, tax_system = await _get_receipt_settings(session)
+        send_receipt, vat_rate, tax_system = await _get_receipt_settings()
 
-            text = (
-                "Настройки чеков по 54-ФЗ\n\n"
-                "Здесь можно настроить параметры отправки чеков через YooKassa.\n\n"
-                "Доступные опции:\n"
-                "• Отправка чеков - включить/выключить\n"
-                "• Ставка НДС - выбор ставки для экскурсионных услуг\n"
-                "• Система налогообложения - выбор режима для чека\n\n"
-                "Текущие настройки:"
-            )
+        text = (
+            "Настройки чеков по 54-ФЗ\n\n"
+            "Здесь можно настроить параметры отправки чеков через YooKassa.\n\n"
+            "Доступные опции:\n"
+            "• Отправка чеков - включить/выключить\n"
+            "• Ставка НДС - выбор ставки для экскурсионных услуг\n"
+            "• Система налогообложения - выбор режима для чека\n\n"
+            "Текущие настройки:"
+        )
 
-            await message.answer(
-                text,
-                reply_markup=kb.receipt_settings_menu(send_receipt, vat_rate, tax_system)
-            )
+        await message.answer(
+            text,
+            reply_markup=kb.receipt_settings_menu(send_receipt, vat_rate, tax_system)
+        )
 
     except Exception as e:
         logger.error(f"Ошибка открытия настроек чеков: {e}", exc_info=True)
@@ -634,18 +632,17 @@ async def receipt_settings_callback(callback: CallbackQuery):
     await callback.answer()
 
     try:
-        async with async_session() as session:
-            send_receipt, vat_rate, tax_system = await _get_receipt_settings(session)
-
-            await callback.message.edit_text(
-                "Настройки чеков по 54-ФЗ\n\n"
-                "Доступные опции:\n"
-                "• Отправка чеков - включить/выключить\n"
-                "• Ставка НДС - выбор ставки для экскурсионных услуг\n"
-                "• Система налогообложения - выбор режима для чека\n\n"
-                "Текущие настройки:",
-                reply_markup=kb.receipt_settings_menu(send_receipt, vat_rate, tax_system)
-            )
+        send_receipt, vat_rate, tax_system = await _get_receipt_settings()
+
+        await callback.message.edit_text(
+            "Настройки чеков по 54-ФЗ\n\n"
+            "Доступные опции:\n"
+            "• Отправка чеков - включить/выключить\n"
+            "• Ставка НДС - выбор ставки для экскурсионных услуг\n"
+            "• Система налогообложения - выбор режима для чека\n\n"
+            "Текущие настройки:",
+            reply_markup=kb.receipt_settings_menu(send_receipt, vat_rate, tax_system)
+        )
 
     except Exception as e:
         logger.error(f"Ошибка возврата в настройки чеков: {e}", exc_info=True)
@@ -680,7 +677,7 @@ async def receipt_toggle_send(callback: CallbackQuery):
 
                 logger.info(f"Отправка чеков изменена: {current} -> {not current}")
 
-                send_receipt, vat_rate, tax_system = await _get_receipt_settings(session)
+                send_receipt, vat_rate, tax_system = await _get_receipt_settings()
 
                 await callback.message.edit_text(
                     "Настройки чеков по 54-ФЗ\n\n"
@@ -703,24 +700,22 @@ async def receipt_set_vat_menu(callback: CallbackQuery):
     await callback.answer()
 
     try:
-        async with async_session() as session:
-            settings_repo = SettingsRepository(session)
-            current_rate = await settings_repo.get_int(SETTING_VAT_RATE, default=0)
+        current_rate = await settings_cache.get_int(SETTING_VAT_RATE, default=0)
 
-            text = (
-                "Выберите ставку НДС для экскурсионных услуг:\n\n"
-                "• 0% - без НДС (освобождение, упрощенка)\n"
-                "• 5% - пониженная ставка (УСН)\n"
-                "• 7% - пониженная ставка (УСН)\n"
-                "• 10% - льготная ставка\n"
-                "• 22% - основная ставка с 2026 года\n\n"
-                f"Текущая ставка: {current_rate}%"
-            )
+        text = (
+            "Выберите ставку НДС для экскурсионных услуг:\n\n"
+            "• 0% - без НДС (освобождение, упрощенка)\n"
+            "• 5% - пониженная ставка (УСН)\n"
+            "• 7% - пониженная ставка (УСН)\n"
+            "• 10% - льготная ставка\n"
+            "• 22% - основная ставка с 2026 года\n\n"
+            f"Текущая ставка: {current_rate}%"
+        )
 
-            await callback.message.edit_text(
-                text,
-                reply_markup=kb.vat_rate_selection_menu(current_rate)
-            )
+        await callback.message.edit_text(
+            text,
+            reply_markup=kb.vat_rate_selection_menu(current_rate)
+        )
 
     except Exception as e:
         logger.error(f"Ошибка открытия выбора ставки НДС: {e}", exc_info=True)
@@ -748,7 +743,7 @@ async def receipt_set_vat_value(callback: CallbackQuery):
                     updated_by=admin_user_id
                 )
 
-                send_receipt, _, tax_system = await _get_receipt_settings(session)
+                send_receipt, _, tax_system = await _get_receipt_settings()
 
                 await callback.message.edit_text(
                     "Настройки чеков по 54-ФЗ\n\n"
@@ -771,25 +766,23 @@ async def receipt_set_tax_menu(callback: CallbackQuery):
     await callback.answer()
 
     try:
-        async with async_session() as session:
-            settings_repo = SettingsRepository(session)
-            current_code = await settings_repo.get_int(SETTING_TAX_SYSTEM, default=1)
+        current_code = await settings_cache.get_int(SETTING_TAX_SYSTEM, default=1)
 
-            text = (
-                "Выберите систему налогообложения:\n\n"
-                "1 - Общая система налогообложения (ОСН)\n"
-                "2 - Упрощенная (УСН, доходы)\n"
-                "3 - Упрощенная (УСН, доходы минус расходы)\n"
-                "4 - Единый налог на вмененный доход (ЕНВД)\n"
-                "5 - Единый сельскохозяйственный налог (ЕСН)\n"
-                "6 - Патентная система налогообложения\n\n"
-                f"Текущий режим: код {current_code}"
-            )
+        text = (
+            "Выберите систему налогообложения:\n\n"
+            "1 - Общая система налогообложения (ОСН)\n"
+            "2 - Упрощенная (УСН, доходы)\n"
+            "3 - Упрощенная (УСН, доходы минус расходы)\n"
+            "4 - Единый налог на вмененный доход (ЕНВД)\n"
+            "5 - Единый сельскохозяйственный налог (ЕСН)\n"
+            "6 - Патентная система налогообложения\n\n"
+            f"Текущий режим: код {current_code}"
+        )
 
-            await callback.message.edit_text(
-                text,
-                reply_markup=kb.tax_system_selection_menu(current_code)
-            )
+        await callback.message.edit_text(
+            text,
+            reply_markup=kb.tax_system_selection_menu(current_code)
+        )
 
     except Exception as e:
         logger.error(f"Ошибка открытия выбора системы налогообложения: {e}", exc_info=True)
@@ -817,7 +810,7 @@ async def receipt_set_tax_value(callback: CallbackQuery):
                     updated_by=admin_user_id
                 )
 
-                send_receipt, vat_rate, _ = await _get_receipt_settings(session)
+                send_receipt, vat_rate, _ = await _get_receipt_settings()
 
                 await callback.message.edit_text(
                     "Настройки чеков по 54-ФЗ\n\n"
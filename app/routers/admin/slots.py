@@ -11,7 +11,7 @@ from datetime import datetime, timedelta
 
 from app.database.unit_of_work import UnitOfWork
 from app.database.repositories import (
-    UserRepository, SlotRepository, ExcursionRepository
+    UserRepository, SlotRepository, ExcursionRepository, OutboxRepository
 )
 from app.database.managers import SlotManager, PaymentManager
 from app.database.models import PaymentStatus
@@ -26,7 +26,7 @@ from app.admin_panel.keyboards_adm import (
     schedule_date_management_menu
 )
 from app.middlewares import AdminMiddleware
-from app.services.redis import redis_client
+from app.services.outbox import outbox_dispatcher
 from app.utils.logging_config import get_logger
 from app.utils.validation import validate_slot_date, validate_slot_time
 from app.utils.admin_notifications import notify_admins_about_refund_failure
@@ -40,6 +40,64 @@ router.message.middleware(AdminMiddleware())
 router.callback_query.middleware(AdminMiddleware())
 
 
+def _client_info(client) -> str:
+    """Подпись клиента для ответа администратору"""
+    return client.full_name or client.phone_number or f"ID {client.id}"
+
+
+async def _enqueue_reschedule_notices(
+    outbox_repo: OutboxRepository,
+    active_bookings: list,
+    excursion_name: str,
+    old_datetime_str: str,
+    new_datetime: datetime
+) -> tuple:
+    """
+    Поставить уведомления клиентов о переносе в outbox (без commit).
+
+    Returns:
+        (клиенты, которым уведомление поставлено в очередь, клиенты без Telegram ID)
+    """
+    queued, no_telegram = [], []
+    new_datetime_str = new_datetime.strftime('%d.%m.%Y %H:%M')
+
+    for booking in active_bookings:
+        client = booking.adult_user
+        if not client or not client.telegram_id:
+            no_telegram.append(_client_info(client) if client else "Клиент не найден")
+            continue
+
+        notification_text = [
+            "ПЕРЕНОС ЭКСКУРСИИ",
+            "",
+            f"Уважаемый клиент, время проведения экскурсии изменено:",
+            f"",
+            f"Экскурсия: {excursion_name}",
+            f"Было запланировано: {old_datetime_str}",
+            f"Перенесено на: {new_datetime_str}",
+            f"",
+            f"Приносим извинения за возможные неудобства."
+        ]
+
+        children_names = [
+            bc.child.full_name for bc in booking.booking_children or []
+            if bc.child and bc.child.full_name
+        ]
+        if children_names:
+            notification_text.insert(5, f"Дети: {', '.join(children_names)}")
+
+        message = await outbox_repo.enqueue(
+            chat_id=client.telegram_id,
+            text="\n".join(notification_text),
+            dedup_key=f"slot_reschedule:{booking.id}:{new_datetime.isoformat()}"
+        )
+        if message:
+            logger.info(f"Уведомление о переносе поставлено в очередь для клиента {client.telegram_id} (бронь #{booking.id})")
+        queued.append(_client_info(client))
+
+    return queued, no_telegram
+
+
 # ===== УПРАВЛЕНИЕ СЛОТОМ =====
 
 
@@ -82,6 +140,7 @@ async def confirm_cancel_slot_callback(callback: CallbackQuery):
             async with UnitOfWork(session) as uow:
                 slot_manager = SlotManager(uow.session)
                 payment_manager = PaymentManager(uow.session)
+                outbox_repo = OutboxRepository(uow.session)
 
                 # Получаем полную информацию о слоте до отмены
                 slot_full_info = await slot_manager.get_slot_full_info(slot_id)
@@ -203,28 +262,20 @@ async def confirm_cancel_slot_callback(callback: CallbackQuery):
                         notification_text_lines.append(f"Если с вашей карты все же произошло списание средств,")
                         notification_text_lines.append(f"пожалуйста, свяжитесь с администратором для возврата денег.")
 
-                    # Отправляем уведомление клиенту (если есть telegram_id)
+                    # Уведомление клиенту уходит из outbox после commit
                     if client and client.telegram_id:
-                        try:
-                            # Проверяем, не отправляли ли уже уведомление
-                            notification_key = f"notification:slot_cancel:{booking.id}"
-                            already_sent = await redis_client.client.get(notification_key)
-
-                            if already_sent:
-                                logger.debug(f"Уведомление для брони #{booking.id} уже отправлено")
-                                continue
-
-                            await bot.send_message(
-                                chat_id=client.telegram_id,
-                                text="\n".join(notification_text_lines)
-                            )
-
-                            # Сохраняем флаг отправки на 24 часа
-                            await redis_client.client.setex(notification_key, 86400, "1")
-                            logger.info(f"Уведомление об отмене слота отправлено клиенту {client.telegram_id} (бронь #{booking.id})")
+                        message = await outbox_repo.enqueue(
+                            chat_id=client.telegram_id,
+                            text="\n".join(notification_text_lines),
+                            dedup_key=f"slot_cancel:{booking.id}"
+                        )
+                        if message:
+                            logger.info(f"Уведомление об отмене слота поставлено в очередь для клиента {client.telegram_id} (бронь #{booking.id})")
+                        else:
+                            logger.debug(f"Уведомление для брони #{booking.id} уже поставлено в очередь")
 
-                        except Exception as e:
-                            logger.error(f"Ошибка отправки уведомления клиенту {client.telegram_id} (бронь #{booking.id}): {e}", exc_info=True)
+                await uow.commit()
+                outbox_dispatcher.wake()
 
                 # Формируем ответ администратору
                 response_parts = [
@@ -796,101 +847,48 @@ async def confirm_reschedule(callback: CallbackQuery, state: FSMContext):
                         )
                     return
 
-                # Уведомляем клиентов о переносе
-                notified_count = 0
-                failed_notifications = []
-                no_telegram_clients = []
+                # Уведомления уходят из outbox после commit
+                outbox_repo = OutboxRepository(uow.session)
+                old_datetime_str = old_datetime.strftime('%d.%m.%Y %H:%M')
+                new_datetime_str = new_datetime.strftime('%d.%m.%Y %H:%M')
+                excursion_name = slot_before.excursion.name if slot_before.excursion else "Экскурсия"
 
                 # Используем активные бронирования из slot_info_before
                 active_bookings = slot_info_before.get('active_bookings', [])
+                logger.info(f"Слот {slot_id} перенесен. Активных бронирований для уведомления: {len(active_bookings)}")
 
-                if active_bookings:
-                    logger.info(f"Слот {slot_id} перенесен. Активных бронирований для уведомления: {len(active_bookings)}")
-
-                    bot = callback.bot
-                    old_datetime_str = old_datetime.strftime('%d.%m.%Y %H:%M')
-                    new_datetime_str = new_datetime.strftime('%d.%m.%Y %H:%M')
-                    excursion_name = slot_before.excursion.name if slot_before.excursion else "Экскурсия"
-
-                    for booking in active_bookings:
-                        # Получаем клиента из бронирования
-                        client = booking.adult_user
-
-                        if client and client.telegram_id:
-                            try:
-                                # Формируем текст уведомления
-                                notification_text = [
-                                    "ПЕРЕНОС ЭКСКУРСИИ",
-                                    "",
-                                    f"Уважаемый клиент, время проведения экскурсии изменено:",
-                                    f"",
-                                    f"Экскурсия: {excursion_name}",
-                                    f"Было запланировано: {old_datetime_str}",
-                                    f"Перенесено на: {new_datetime_str}",
-                                    f"",
-                                    f"Приносим извинения за возможные неудобства."
-                                ]
-
-                                # Добавляем информацию о детях, если они есть
-                                if booking.booking_children:
-                                    children_names = []
-                                    for bc in booking.booking_children:
-                                        if bc.child and bc.child.full_name:
-                                            children_names.append(bc.child.full_name)
-
-                                    if children_names:
-                                        notification_text.insert(5, f"Дети: {', '.join(children_names)}")
-
-                                await bot.send_message(
-                                    chat_id=client.telegram_id,
-                                    text="\n".join(notification_text)
-                                )
-
-                                notified_count += 1
-                                logger.info(f"Уведомление о переносе отправлено клиенту {client.telegram_id} (бронь #{booking.id})")
-
-                            except Exception as e:
-                                error_msg = f"Ошибка отправки уведомления клиенту {client.telegram_id} (бронь #{booking.id}): {e}"
-                                logger.error(error_msg, exc_info=True)
-                                client_info = client.full_name or client.phone_number or f"ID {client.id}"
-                                failed_notifications.append(client_info)
-                        else:
-                            # Клиент без telegram_id
-                            if client:
-                                client_info = client.full_name or client.phone_number or f"ID {client.id}"
-                            else:
-                                client_info = "Клиент не найден"
-                            no_telegram_clients.append(client_info)
+                queued_clients, no_telegram_clients = await _enqueue_reschedule_notices(
+                    outbox_repo, active_bookings, excursion_name, old_datetime_str, new_datetime
+                )
 
                 # Уведомляем капитана, если он назначен
                 captain_notification_status = ""
                 if slot_before.captain_id:
-                    try:
-                        captain = await slot_manager.user_repo.get_by_id(slot_before.captain_id)
-                        if captain and captain.telegram_id:
-                            captain_text = [
-                                "ПЕРЕНОС ЭКСКУРСИИ",
-                                "",
-                                f"Уважаемый {captain.full_name}, время проведения экскурсии изменено:",
-                                f"",
-                                f"Экскурсия: {excursion_name}",
-                                f"Было запланировано: {old_datetime_str}",
-                                f"Перенесено на: {new_datetime_str}",
-                                f"",
-                                f"Пожалуйста, скорректируйте свои планы."
-                            ]
+                    captain = await slot_manager.user_repo.get_by_id(slot_before.captain_id)
+                    if captain and captain.telegram_id:
+                        captain_text = [
+                            "ПЕРЕНОС ЭКСКУРСИИ",
+                            "",
+                            f"Уважаемый {captain.full_name}, время проведения экскурсии изменено:",
+                            f"",
+                            f"Экскурсия: {excursion_name}",
+                            f"Было запланировано: {old_datetime_str}",
+                            f"Перенесено на: {new_datetime_str}",
+                            f"",
+                            f"Пожалуйста, скорректируйте свои планы."
+                        ]
 
-                            await bot.send_message(
-                                chat_id=captain.telegram_id,
-                                text="\n".join(captain_text)
-                            )
-                            captain_notification_status = "Капитан уведомлен"
-                            logger.info(f"Уведомление о переносе отправлено капитану {captain.telegram_id}")
-                        elif captain and not captain.telegram_id:
-                            captain_notification_status = "У капитана нет Telegram ID"
-                    except Exception as e:
-                        logger.error(f"Ошибка отправки уведомления капитану: {e}", exc_info=True)
-                        captain_notification_status = "Ошибка уведомления капитана"
+                        await outbox_repo.enqueue(
+                            chat_id=captain.telegram_id,
+                            text="\n".join(captain_text),
+                            dedup_key=f"slot_reschedule_captain:{slot_id}:{captain.id}:{new_datetime.isoformat()}"
+                        )
+                        captain_notification_status = "Уведомление капитану поставлено в очередь"
+                    elif captain and not captain.telegram_id:
+                        captain_notification_status = "У капитана нет Telegram ID"
+
+                await uow.commit()
+                outbox_dispatcher.wake()
 
                 # Формируем ответ администратору
                 response_parts = [
@@ -898,16 +896,9 @@ async def confirm_reschedule(callback: CallbackQuery, state: FSMContext):
                     f"Новое время: {new_datetime_str}"
                 ]
 
-                if notified_count > 0:
-                    response_parts.append(f"")
-                    response_parts.append(f"Уведомления клиентам отправлены: {notified_count}")
-
-                if failed_notifications:
-                    failed_unique = list(set(failed_notifications))
+                if queued_clients:
                     response_parts.append(f"")
-                    response_parts.append(f"Не удалось отправить уведомления:")
-                    for client_info in failed_unique:
-                        response_parts.append(f"• {client_info}")
+                    response_parts.append(f"Уведомления клиентам поставлены в очередь: {len(queued_clients)}")
 
                 if no_telegram_clients:
                     no_telegram_unique = list(set(no_telegram_clients))
@@ -923,7 +914,7 @@ async def confirm_reschedule(callback: CallbackQuery, state: FSMContext):
                 await callback.message.answer("\n".join(response_parts))
 
                 logger.info(f"Слот {slot_id} перенесен администратором {callback.from_user.id}. "
-                          f"Уведомлено клиентов: {notified_count}")
+                          f"Уведомлений клиентам в очереди: {len(queued_clients)}")
 
         await callback.message.answer(
             "Выберите действие:",
@@ -1166,64 +1157,19 @@ async def select_captain_for_reschedule(callback: CallbackQuery, state: FSMConte
                 new_captain = await user_repo.get_by_id(captain_id)
                 new_captain_name = new_captain.full_name if new_captain else f"ID {captain_id}"
 
-                # Уведомляем клиентов о переносе
-                notified_clients = []
-                failed_client_notifications = []
-                no_telegram_clients = []
+                # Уведомления уходят из outbox после commit
+                outbox_repo = OutboxRepository(uow.session)
+                old_datetime_str = old_datetime.strftime('%d.%m.%Y %H:%M')
+                new_datetime_str = new_datetime.strftime('%d.%m.%Y %H:%M')
+                excursion_name = slot_before.excursion.name if slot_before.excursion else "Экскурсия"
 
                 # Используем активные бронирования из slot_info_before
                 active_bookings = slot_info_before.get('active_bookings', [])
+                logger.info(f"Слот {slot_id} перенесен. Активных бронирований для уведомления: {len(active_bookings)}")
 
-                if active_bookings:
-                    logger.info(f"Слот {slot_id} перенесен. Активных бронирований для уведомления: {len(active_bookings)}")
-
-                    bot = callback.bot
-                    old_datetime_str = old_datetime.strftime('%d.%m.%Y %H:%M')
-                    new_datetime_str = new_datetime.strftime('%d.%m.%Y %H:%M')
-                    excursion_name = slot_before.excursion.name if slot_before.excursion else "Экскурсия"
-
-                    for booking in active_bookings:
-                        client = booking.adult_user
-
-                        if client and client.telegram_id:
-                            try:
-                                notification_text = [
-                                    "ПЕРЕНОС ЭКСКУРСИИ",
-                                    "",
-                                    f"Уважаемый клиент, время проведения экскурсии изменено:",
-                                    f"",
-                                    f"Экскурсия: {excursion_name}",
-                                    f"Было запланировано: {old_datetime_str}",
-                                    f"Перенесено на: {new_datetime_str}",
-                                    f"",
-                                    f"Приносим извинения за возможные неудобства."
-                                ]
-
-                                if booking.booking_children:
-                                    children_names = []
-                                    for bc in booking.booking_children:
-                                        if bc.child and bc.child.full_name:
-                                            children_names.append(bc.child.full_name)
-
-                                    if children_names:
-                                        notification_text.insert(5, f"Дети: {', '.join(children_names)}")
-
-                                await bot.send_message(
-                                    chat_id=client.telegram_id,
-                                    text="\n".join(notification_text)
-                                )
-
-                                notified_clients.append(client.full_name or client.phone_number or f"ID {client.id}")
-                                logger.info(f"Уведомление о переносе отправлено клиенту {client.telegram_id} (бронь #{booking.id})")
-
-                            except Exception as e:
-                                logger.error(f"Ошибка отправки уведомления клиенту {client.telegram_id}: {e}")
-                                client_info = client.full_name or client.phone_number or f"ID {client.id}"
-                                failed_client_notifications.append(client_info)
-                        else:
-                            if client:
-                                client_info = client.full_name or client.phone_number or f"ID {client.id}"
-                                no_telegram_clients.append(client_info)
+                queued_clients, no_telegram_clients = await _enqueue_reschedule_notices(
+                    outbox_repo, active_bookings, excursion_name, old_datetime_str, new_datetime
+                )
 
                 # Уведомления капитанам
                 captain_notifications = []
@@ -1232,67 +1178,62 @@ async def select_captain_for_reschedule(callback: CallbackQuery, state: FSMConte
                 if old_captain_id and old_captain_id != captain_id:
                     old_captain = await user_repo.get_by_id(old_captain_id)
                     if old_captain and old_captain.telegram_id:
-                        try:
-                            old_captain_text = [
-                                "ОТМЕНА НАЗНАЧЕНИЯ",
-                                "",
-                                f"Уважаемый {old_captain.full_name}, ваше назначение на экскурсию отменено:",
-                                f"",
-                                f"Экскурсия: {excursion_name}",
-                                f"Ранее запланированное время: {old_datetime_str}",
-                                f"",
-                                f"Экскурсия перенесена на другое время и назначен другой капитан."
-                            ]
-
-                            await bot.send_message(
-                                chat_id=old_captain.telegram_id,
-                                text="\n".join(old_captain_text)
-                            )
-                            captain_notifications.append(f"Старый капитан {old_captain.full_name} уведомлен")
-                            logger.info(f"Уведомление об отмене отправлено старому капитану {old_captain.telegram_id}")
-                        except Exception as e:
-                            logger.error(f"Ошибка уведомления старого капитана: {e}")
-                            captain_notifications.append(f"Ошибка уведомления старого капитана {old_captain.full_name}")
-                    elif old_captain and not old_captain.telegram_id:
-                        captain_notifications.append(f"У старого капитана {old_captain.full_name} нет Telegram ID")
-
-                # Уведомляем нового капитана
-                if new_captain and new_captain.telegram_id:
-                    try:
-                        # Получаем информацию о слоте после переноса
-                        slot_info_after = await slot_manager.get_slot_full_info(slot_id)
-                        booked_places = slot_info_after.get('booked_places', 0) if slot_info_after else 0
-                        current_weight = slot_info_after.get('current_weight', 0) if slot_info_after else 0
-
-                        new_captain_text = [
-                            "НАЗНАЧЕНИЕ НА ЭКСКУРСИЮ (ПЕРЕНОС)",
+                        old_captain_text = [
+                            "ОТМЕНА НАЗНАЧЕНИЯ",
                             "",
-                            f"Уважаемый {new_captain.full_name}, вы назначены капитаном на перенесенную экскурсию:",
+                            f"Уважаемый {old_captain.full_name}, ваше назначение на экскурсию отменено:",
                             f"",
                             f"Экскурсия: {excursion_name}",
-                            f"Дата и время: {new_datetime_str}",
+                            f"Ранее запланированное время: {old_datetime_str}",
                             f"",
-                            f"Информация о слоте:",
-                            f"• Всего мест: {slot_before.max_people}",
-                            f"• Забронировано мест: {booked_places}",
-                            f"• Максимальный вес: {slot_before.max_weight} кг",
-                            f"• Текущий вес: {current_weight} кг",
-                            f"",
-                            f"Пожалуйста, будьте готовы провести экскурсию."
+                            f"Экскурсия перенесена на другое время и назначен другой капитан."
                         ]
 
-                        await bot.send_message(
-                            chat_id=new_captain.telegram_id,
-                            text="\n".join(new_captain_text)
+                        await outbox_repo.enqueue(
+                            chat_id=old_captain.telegram_id,
+                            text="\n".join(old_captain_text),
+                            dedup_key=f"slot_reschedule_unassign:{slot_id}:{old_captain.id}:{new_datetime.isoformat()}"
                         )
-                        captain_notifications.append(f"Новый капитан {new_captain.full_name} уведомлен")
-                        logger.info(f"Уведомление о назначении отправлено новому капитану {new_captain.telegram_id}")
-                    except Exception as e:
-                        logger.error(f"Ошибка уведомления нового капитана: {e}")
-                        captain_notifications.append(f"Ошибка уведомления нового капитана {new_captain.full_name}")
+                        captain_notifications.append(f"Старому капитану {old_captain.full_name} уведомление поставлено в очередь")
+                    elif old_captain and not old_captain.telegram_id:
+                        captain_notifications.append(f"У старого капитана {old_captain.full_name} нет Telegram ID")
+
+                # Уведомляем нового капитана
+                if new_captain and new_captain.telegram_id:
+                    # Получаем информацию о слоте после переноса
+                    slot_info_after = await slot_manager.get_slot_full_info(slot_id)
+                    booked_places = slot_info_after.get('booked_places', 0) if slot_info_after else 0
+                    current_weight = slot_info_after.get('current_weight', 0) if slot_info_after else 0
+
+                    new_captain_text = [
+                        "НАЗНАЧЕНИЕ НА ЭКСКУРСИЮ (ПЕРЕНОС)",
+                        "",
+                        f"Уважаемый {new_captain.full_name}, вы назначены капитаном на перенесенную экскурсию:",
+                        f"",
+                        f"Экскурсия: {excursion_name}",
+                        f"Дата и время: {new_datetime_str}",
+                        f"",
+                        f"Информация о слоте:",
+                        f"• Всего мест: {slot_before.max_people}",
+                        f"• Забронировано мест: {booked_places}",
+                        f"• Максимальный вес: {slot_before.max_weight} кг",
+                        f"• Текущий вес: {current_weight} кг",
+                        f"",
+                        f"Пожалуйста, будьте готовы провести экскурсию."
+                    ]
+
+                    await outbox_repo.enqueue(
+                        chat_id=new_captain.telegram_id,
+                        text="\n".join(new_captain_text),
+                        dedup_key=f"slot_reschedule_captain:{slot_id}:{new_captain.id}:{new_datetime.isoformat()}"
+                    )
+                    captain_notifications.append(f"Новому капитану {new_captain.full_name} уведомление поставлено в очередь")
                 elif new_captain and not new_captain.telegram_id:
                     captain_notifications.append(f"У нового капитана {new_captain.full_name} нет Telegram ID")
 
+                await uow.commit()
+                outbox_dispatcher.wake()
+
                 # Формируем ответ администратору
                 response_parts = [
                     f"Слот #{slot_id} успешно перенесен.",
@@ -1306,16 +1247,10 @@ async def select_captain_for_reschedule(callback: CallbackQuery, state: FSMConte
                     for notification in captain_notifications:
                         response_parts.append(f"  • {notification}")
 
-                if notified_clients:
-                    response_parts.append(f"")
-                    response_parts.append(f"Уведомления клиентам отправлены ({len(notified_clients)}):")
-                    for client_info in notified_clients:
-                        response_parts.append(f"  • {client_info}")
-
-                if failed_client_notifications:
+                if queued_clients:
                     response_parts.append(f"")
-                    response_parts.append(f"Не удалось отправить уведомления клиентам ({len(failed_client_notifications)}):")
-                    for client_info in failed_client_notifications:
+                    response_parts.append(f"Уведомления клиентам поставлены в очередь ({len(queued_clients)}):")
+                    for client_info in queued_clients:
                         response_parts.append(f"  • {client_info}")
 
                 if no_telegram_clients:
@@ -1327,7 +1262,7 @@ async def select_captain_for_reschedule(callback: CallbackQuery, state: FSMConte
                 await callback.message.answer("\n".join(response_parts))
 
                 logger.info(f"Слот {slot_id} перенесен администратором {callback.from_user.id}. "
-                          f"Новый капитан: {captain_id}, уведомлено клиентов: {len(notified_clients)}")
+                          f"Новый капитан: {captain_id}, уведомлений клиентам в очереди: {len(queued_clients)}")
 
         await state.clear()
 
@@ -1492,42 +1427,17 @@ async def reschedule_without_captain(callback: CallbackQuery, state: FSMContext)
                 old_datetime_str = slot.start_datetime.strftime('%d.%m.%Y %H:%M')
                 new_datetime_str = new_datetime.strftime('%d.%m.%Y %H:%M')
 
+                # Бронирования до переноса - для уведомлений клиентам
+                slot_info_before = await slot_manager.get_slot_full_info(slot_id)
+                active_bookings = slot_info_before.get('active_bookings', []) if slot_info_before else []
+
+                captain = None
                 if captain_was_assigned:
                     captain = await user_repo.get_by_id(original_captain_id)
                     captain_name = captain.full_name if captain else f"ID {original_captain_id}"
 
                     await slot_repo.assign_captain(slot_id, None)
 
-                    if captain and captain.telegram_id:
-                        try:
-                            notification_text = [
-                                "ОТМЕНА НАЗНАЧЕНИЯ",
-                                "",
-                                f"Уважаемый {captain.full_name}, ваше назначение на экскурсию отменено:",
-                                f"",
-                                f"Экскурсия: {excursion_name}",
-                                f"Дата и время: {old_datetime_str}",
-                                f"",
-                                f"Причина: перенос экскурсии на другое время.",
-                                f"Новое время: {new_datetime_str}",
-                                f"",
-                                f"Экскурсия будет проведена с другим капитаном либо вас переназначат."
-                            ]
-
-                            await callback.bot.send_message(
-                                chat_id=captain.telegram_id,
-                                text="\n".join(notification_text)
-                            )
-
-                            captain_notification_status = f"Капитан {captain_name} уведомлен об отмене"
-                            logger.info(f"Уведомление об отмене отправлено капитану {captain.telegram_id} (слот #{slot_id})")
-
-                        except Exception as e:
-                            logger.error(f"Ошибка отправки уведомления капитану {captain.telegram_id}: {e}", exc_info=True)
-                            captain_notification_status = f"Ошибка уведомления капитана {captain_name}"
-                    else:
-                        captain_notification_status = f"У капитана {captain_name} нет Telegram ID"
-
                 success, error_message = await slot_manager.reschedule_slot(slot_id, new_datetime)
 
                 if not success:
@@ -1541,11 +1451,47 @@ async def reschedule_without_captain(callback: CallbackQuery, state: FSMContext)
                     )
                     return
 
+                # Уведомления уходят из outbox после commit
+                outbox_repo = OutboxRepository(uow.session)
+                queued_clients, _ = await _enqueue_reschedule_notices(
+                    outbox_repo, active_bookings, excursion_name, old_datetime_str, new_datetime
+                )
+
+                if captain and captain.telegram_id:
+                    notification_text = [
+                        "ОТМЕНА НАЗНАЧЕНИЯ",
+                        "",
+                        f"Уважаемый {captain.full_name}, ваше назначение на экскурсию отменено:",
+                        f"",
+                        f"Экскурсия: {excursion_name}",
+                        f"Дата и время: {old_datetime_str}",
+                        f"",
+                        f"Причина: перенос экскурсии на другое время.",
+                        f"Новое время: {new_datetime_str}",
+                        f"",
+                        f"Экскурсия будет проведена с другим капитаном либо вас переназначат."
+                    ]
+
+                    await outbox_repo.enqueue(
+                        chat_id=captain.telegram_id,
+                        text="\n".join(notification_text),
+                        dedup_key=f"slot_reschedule_unassign:{slot_id}:{captain.id}:{new_datetime.isoformat()}"
+                    )
+                    captain_notification_status = f"Уведомление капитану {captain_name} поставлено в очередь"
+                elif captain_was_assigned:
+                    captain_notification_status = f"У капитана {captain_name} нет Telegram ID"
+
+                await uow.commit()
+                outbox_dispatcher.wake()
+
                 # Формируем ответ администратору
                 response_parts = [
                     f"Слот #{slot_id} перенесен на {new_datetime_str}"
                 ]
 
+                if queued_clients:
+                    response_parts.append(f"Уведомления клиентам поставлены в очередь: {len(queued_clients)}")
+
                 if captain_was_assigned:
                     response_parts.append(f"")
                     response_parts.append(f"Капитан {captain_name} был снят со слота.")
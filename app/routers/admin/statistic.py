@@ -20,6 +20,7 @@ from app.middlewares import AdminMiddleware
 
 from app.routers.admin.bookings import show_active_bookings, show_unpaid_bookings
 from app.routers.admin.clients import show_new_clients
+from app.services.scheduler.telemetry import get_job_stats
 from app.utils.logging_config import get_logger
 
 
@@ -113,6 +114,43 @@ async def dashboard_handler(message: Message):
         logger.error(f"Ошибка получения дашборда: {e}", exc_info=True)
         await message.answer("Ошибка при получении данных дашборда", reply_markup=statistics_submenu())
 
+
+@router.message(Command("jobs"))
+async def jobs_handler(message: Message):
+    """Телеметрия фоновых задач планировщика"""
+    logger.info(f"Администратор {message.from_user.id} запросил статистику задач")
+
+    job_stats = get_job_stats()
+    if not job_stats:
+        await message.answer("Задачи планировщика еще не запускались")
+        return
+
+    lines = ["ФОНОВЫЕ ЗАДАЧИ\n"]
+    for job_id, stats in job_stats.items():
+        last = f"{stats['last_duration']:.1f} с" if stats['last_duration'] is not None else "—"
+        interval = f" / интервал {stats['interval']:.0f} с" if stats['interval'] else ""
+        lines.append(f"{job_id}{' [ДОЛЬШЕ ИНТЕРВАЛА]' if stats['overrun'] else ''}")
+        lines.append(
+            f"• Запусков: {stats['runs']}, ошибок: {stats['errors']}, "
+            f"сейчас выполняется: {stats['running']}"
+        )
+        lines.append(
+            f"• Последний: {last}{interval}, среднее {stats['avg_duration']:.1f} с, "
+            f"максимум {stats['max_duration']:.1f} с"
+        )
+        lines.append(f"• Обработано: {stats['last_items']} (всего {stats['items']})")
+        if stats['lock_failures'] or stats['misfires'] or stats['skipped']:
+            lines.append(
+                f"• Без блокировки: {stats['lock_failures']}, пропущено: {stats['misfires']}, "
+                f"отброшено (max_instances): {stats['skipped']}"
+            )
+        if stats['last_status'] == "error" and stats['last_error']:
+            lines.append(f"• Последняя ошибка: {stats['last_error']}")
+        lines.append("")
+
+    await message.answer("\n".join(lines))
+
+
 @router.message(F.text == "Сегодня")
 async def statistics_today(message: Message):
     """Статистика за сегодня с использованием StatisticsManager"""
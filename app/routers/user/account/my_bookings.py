@@ -888,7 +888,7 @@ async def confirm_refund_request(callback: CallbackQuery):
                         f"Статус: успешно\n\n"
                         f"{refund_msg}"
                     )
-                    await notify_admins(bot, session, admin_message)
+                    await notify_admins(bot, admin_message)
 
             else:
                 await callback.message.delete()
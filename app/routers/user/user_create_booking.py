@@ -1,3 +1,5 @@
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
@@ -13,6 +15,7 @@ from app.database.models import SlotStatus, DiscountType
 from app.database.session import async_session
 
 from app.schemas.booking import BookingCreationData, BookingChildData
+from app.services.slot_capacity import slot_capacity, ReservationStatus
 from app.utils.logging_config import get_logger
 from app.user_panel.states import UserBookingStates
 from app.utils.datetime_utils import get_weekday_name
@@ -30,6 +33,65 @@ router = Router(name="user_create_booking")
 logger = get_logger(__name__)
 
 
+async def _load_capacity_snapshot(slot_id: int):
+    """Загрузить занятость слота из БД для счетчика резервов"""
+    async with async_session() as session:
+        return await SlotManager(session).get_capacity_snapshot(slot_id)
+
+
+async def _hold_seats(
+    state: FSMContext,
+    people: Optional[int] = None,
+    weight: Optional[int] = None
+) -> ReservationStatus:
+    """
+    Продлить временный резерв мест и веса на время оформления брони.
+
+    Если резерв не был создан на старте (счетчик недоступен), возвращает
+    unavailable, и шаги проверяют места по данным из state, как раньше.
+    """
+    data = await state.get_data()
+    slot_id = data.get("slot_id")
+    if not slot_id or not data.get("seat_hold"):
+        return ReservationStatus.unavailable
+
+    if people is None:
+        people = 1
+        if data.get("selected_participants") == "with_children":
+            people += len(data.get("selected_children_ids", []))
+    if weight is None:
+        weight = data.get("total_weight") or data.get("adult_weight") or 0
+
+    status, _, _ = await slot_capacity.hold(
+        slot_id=slot_id,
+        user_id=data.get("user_id"),
+        people=people,
+        weight=weight,
+        people_limit=data.get("max_people"),
+        weight_limit=data.get("weight_limit"),
+        load_snapshot=lambda: _load_capacity_snapshot(slot_id)
+    )
+    return status
+
+
+async def _release_seats(state: FSMContext):
+    """Снять временный резерв мест (при отмене оформления)"""
+    data = await state.get_data()
+    if data.get("seat_hold"):
+        await slot_capacity.release_hold(data.get("slot_id"), data.get("user_id"))
+
+
+async def _seats_taken(message: Message, state: FSMContext):
+    """Сообщить, что места закончились, и завершить оформление"""
+    await message.answer(
+        "К сожалению, свободные места на этот слот уже заняты.\n"
+        "Пожалуйста, выберите другой слот.",
+        reply_markup=public_schedule_options()
+    )
+    await _release_seats(state)
+    await state.clear()
+
+
 @router.callback_query(F.data.startswith("public_book_slot:"))
 async def start_booking(callback: CallbackQuery, state: FSMContext):
     user_telegram_id = callback.from_user.id
@@ -63,8 +125,13 @@ async def start_booking(callback: CallbackQuery, state: FSMContext):
                 )
                 return
 
-            # Получаем количество забронированных мест
-            booked_places = await slot_manager.get_booked_places(slot.id)
+            # Занятость из счетчика слота (с учетом временных резервов), иначе по БД
+            usage = await slot_capacity.get_usage(
+                slot.id,
+                load_snapshot=lambda: slot_manager.get_capacity_snapshot(slot.id),
+                expire_at=slot.end_datetime
+            )
+            booked_places = usage[0] if usage else await slot_manager.get_booked_places(slot.id)
             if booked_places >= slot.max_people:
                 logger.info(f"Нет свободных мест в слоте {slot_id} для пользователя {user_telegram_id}")
                 await callback.message.answer(
@@ -100,8 +167,42 @@ async def start_booking(callback: CallbackQuery, state: FSMContext):
                 )
                 return
 
-            current_weight = await slot_manager.get_current_weight(slot.id)
-            available_weight = slot.max_weight - current_weight
+            # Временно резервируем место взрослого на время оформления
+            status = ReservationStatus.unavailable
+            weight_limit = None
+            if usage is not None:
+                weight_limit = slot.max_weight - await slot_manager.get_captain_weight(slot)
+                status, free_people, free_weight = await slot_capacity.hold(
+                    slot_id=slot.id,
+                    user_id=user.id,
+                    people=1,
+                    weight=0,
+                    people_limit=slot.max_people,
+                    weight_limit=weight_limit,
+                    load_snapshot=lambda: slot_manager.get_capacity_snapshot(slot.id),
+                    expire_at=slot.end_datetime
+                )
+                if status in (ReservationStatus.no_places, ReservationStatus.no_weight):
+                    logger.info(f"Не удалось зарезервировать место в слоте {slot_id} для пользователя {user_telegram_id}")
+                    await callback.message.answer(
+                        "На этот слот нет свободных мест.",
+                        reply_markup=public_schedule_options()
+                    )
+                    return
+                if status == ReservationStatus.already_reserved:
+                    logger.info(f"Места в слоте {slot_id} уже заняты подтвержденной бронью пользователя {user.id}")
+                    await callback.message.answer(
+                        "У вас уже есть активное бронирование на этот слот.",
+                        reply_markup=public_schedule_options()
+                    )
+                    return
+
+            if status == ReservationStatus.reserved:
+                booked_places = slot.max_people - free_people - 1
+                available_weight = free_weight
+            else:
+                current_weight = await slot_manager.get_current_weight(slot.id)
+                available_weight = slot.max_weight - current_weight
 
             user_has_children = await user_repo.user_has_children(user.id)
 
@@ -131,7 +232,10 @@ async def start_booking(callback: CallbackQuery, state: FSMContext):
                 "user_has_children": user_has_children,
                 "available_weight": available_weight,
                 "max_weight": slot.max_weight,
-                "adult_price": excursion.base_price
+                "adult_price": excursion.base_price,
+                "max_people": slot.max_people,
+                "weight_limit": weight_limit,
+                "seat_hold": status == ReservationStatus.reserved
             })
 
             await callback.message.edit_text(excursion_info, reply_markup=booking_start())
@@ -199,8 +303,14 @@ async def check_adult_weight(callback: CallbackQuery, state: FSMContext):
                 )
                 return
 
+            # Продлеваем резерв с учетом веса взрослого
+            status = await _hold_seats(state, people=1, weight=adult_weight)
+            if status == ReservationStatus.no_places:
+                await _seats_taken(callback.message, state)
+                return
+
             # Проверяем вес взрослого
-            if adult_weight > available_weight:
+            if adult_weight > available_weight or status == ReservationStatus.no_weight:
                 logger.warning(
                     f"Превышение веса: пользователь {user_telegram_id} вес {adult_weight}кг, "
                     f"доступно {available_weight}кг"
@@ -219,6 +329,7 @@ async def check_adult_weight(callback: CallbackQuery, state: FSMContext):
                     f"Пожалуйста, выберите другой слот или обратитесь к администратору.",
                     reply_markup=public_schedule_options()
                 )
+                await _release_seats(state)
                 await state.clear()
                 return
             logger.info(f"Вес пользователя {user_telegram_id} проверен: {adult_weight}кг из {available_weight}кг доступно")
@@ -274,6 +385,7 @@ async def request_adult_weight(message: Message, state: FSMContext):
                 "Бронирование отменено.",
                 reply_markup=main_menu()
             )
+            await _release_seats(state)
             await state.clear()
             return
 
@@ -327,6 +439,13 @@ async def handle_booking_alone(callback: CallbackQuery, state: FSMContext):
             "selected_participants": "alone"
         })
 
+        # Резерв только на взрослого (мог быть расширен при выборе детей)
+        status = await _hold_seats(state, people=1)
+        if status in (ReservationStatus.no_places, ReservationStatus.no_weight):
+            await _seats_taken(callback.message, state)
+            await callback.answer()
+            return
+
         # Переходим к вводу промокода
         await state.set_state(UserBookingStates.applying_promo_code)
 
@@ -429,6 +548,13 @@ async def handle_child_selection(callback: CallbackQuery, state: FSMContext):
             if child_id in children_weights:
                 del children_weights[child_id]
 
+            # Уменьшаем временный резерв
+            await _hold_seats(
+                state,
+                people=len(selected_ids) + 1,
+                weight=(data.get("adult_weight") or 0) + sum(children_weights.values())
+            )
+
             logger.info(f"Пользователь {user_telegram_id} отменил выбор ребенка {child_id}")
             message_text = f"Ребенок удален из списка. Выбрано: {len(selected_ids)}/5"
         else:
@@ -440,6 +566,16 @@ async def handle_child_selection(callback: CallbackQuery, state: FSMContext):
                 )
                 return
 
+            # Резервируем место под ребенка сразу при выборе
+            known_weight = (data.get("adult_weight") or 0) + sum(children_weights.values())
+            status = await _hold_seats(state, people=len(selected_ids) + 2, weight=known_weight)
+            if status in (ReservationStatus.no_places, ReservationStatus.no_weight):
+                await callback.answer(
+                    "В слоте не осталось места еще для одного участника.",
+                    show_alert=True
+                )
+                return
+
             # Добавляем ребенка в выбранные
             selected_ids.append(child_id)
 
@@ -503,8 +639,15 @@ async def process_to_promo_code(message: Message, state: FSMContext):
     total_children_weight = sum(children_weights.values())
     total_weight = adult_weight + total_children_weight
 
+    # Продлеваем резерв на итоговый состав и вес
+    total_people = 1 + len(data.get("selected_children_ids", []))
+    status = await _hold_seats(state, people=total_people, weight=total_weight)
+    if status == ReservationStatus.no_places:
+        await _seats_taken(message, state)
+        return
+
     # Проверяем, не превышает ли общий вес доступный
-    if total_weight > available_weight:
+    if total_weight > available_weight or status == ReservationStatus.no_weight:
         await message.answer(
             f"Превышение общего допустимого веса:\n\n"
             f"Общий вес участников: {total_weight} кг\n"
@@ -512,6 +655,7 @@ async def process_to_promo_code(message: Message, state: FSMContext):
             f"Пожалуйста, уменьшите количество участников или выберите другой слот.",
             reply_markup=public_schedule_options()
         )
+        await _release_seats(state)
         await state.clear()
         return
 
@@ -617,6 +761,7 @@ async def cancel_booking(callback: CallbackQuery, state: FSMContext):
     logger.info(f"Пользователь {user_telegram_id} отменил бронирование")
 
     try:
+        await _release_seats(state)
         await state.clear()
         await callback.message.answer(
             "Бронирование отменено.",
@@ -644,6 +789,7 @@ async def request_child_weight(message: Message, state: FSMContext):
                 "Бронирование отменено.",
                 reply_markup=main_menu()
             )
+            await _release_seats(state)
             await state.clear()
             return
 
@@ -836,6 +982,7 @@ async def process_promo_code(message: Message, state: FSMContext):
                 "Бронирование отменено.",
                 reply_markup=main_menu()
             )
+            await _release_seats(state)
             await state.clear()
             return
 
@@ -984,6 +1131,12 @@ async def skip_promo_code(callback: CallbackQuery, state: FSMContext):
 async def calculate_total_from_message(message: Message, state: FSMContext):
     """Расчет стоимости из message-хэндлера"""
     try:
+        # Продлеваем резерв, пока пользователь проверяет итог
+        status = await _hold_seats(state)
+        if status in (ReservationStatus.no_places, ReservationStatus.no_weight):
+            await _seats_taken(message, state)
+            return
+
         data = await state.get_data()
 
         adult_price = data.get("adult_price", 0)
@@ -1143,6 +1296,7 @@ async def confirm_booking(callback: CallbackQuery, state: FSMContext):
                         f"Ошибка при создании бронирования: {error_msg}",
                         reply_markup=main_menu()
                     )
+                    await _release_seats(state)
                     await state.clear()
                     return
 
@@ -11,9 +11,9 @@ from app.user_panel.keyboards import(
 )
 from app.user_panel.states import UserScheduleStates
 
-from app.database.repositories import ExcursionRepository
 from app.database.managers import SlotManager
 from app.database.session import async_session
+from app.services.excursion_catalog import excursion_catalog
 
 from app.utils.logging_config import get_logger
 from app.utils.datetime_utils import get_weekday_name
@@ -28,9 +28,32 @@ logger = get_logger(__name__)
 # ===== НАЧАЛЬНОЕ МЕНЮ ВЫБОРА РАСПИСАНИЯ =====
 
 
+def excursions_list_text(excursions_list) -> str:
+    """Текст списка экскурсий с условиями для детей"""
+    excursions_text = "Наши экскурсии:\n\n"
+    for i, excursion in enumerate(excursions_list, 1):
+        excursions_text += (
+            f"{i}. {excursion.name}\n"
+            f"   Стоимость: {excursion.base_price} руб.\n"
+            f"   Продолжительность: {excursion.base_duration_minutes} мин.\n"
+        )
+        if excursion.description and len(excursion.description) < 100:
+            excursions_text += f"   {excursion.description}\n"
+
+    excursions_text += (
+        "\nСкидки для детей:\n"
+        "   - до 3 лет: бесплатно\n"
+        "   - 4-7 лет: скидка 60%\n"
+        "   - 8-12 лет: скидка 40%\n"
+        "   - 13 лет и старше: полная стоимость\n\n"
+        "Выберите экскурсию для подробной информации или посмотрите общее расписание:"
+    )
+    return excursions_text
+
+
 @router.message(F.text == 'Наши экскурсии и запись')
 async def excursions(message: Message):
-    """Показать список экскурсий из базы данных"""
+    """Показать список экскурсий (из снимка каталога)"""
     logger.info(f"Пользователь {message.from_user.id} запросил список экскурсий")
     try:
         # Отправляем временное сообщение, которое убирает реплай-клавиатуру
@@ -39,42 +62,21 @@ async def excursions(message: Message):
             reply_markup=ReplyKeyboardRemove()
         )
 
-        async with async_session() as session:
-            exc_repo = ExcursionRepository(session)
-            excursions_list = await exc_repo.get_all(active_only=True)
-
-            if not excursions_list:
-                logger.warning(f"Нет доступных экскурсий для пользователя {message.from_user.id}")
-                await message.answer(
-                    "В настоящее время нет доступных экскурсий. Пожалуйста, проверьте позже.",
-                    reply_markup=main_menu()
-                )
-                return
-
-            excursions_text = "Наши экскурсии:\n\n"
-            for i, excursion in enumerate(excursions_list, 1):
-                excursions_text += (
-                    f"{i}. {excursion.name}\n"
-                    f"   Стоимость: {excursion.base_price} руб.\n"
-                    f"   Продолжительность: {excursion.base_duration_minutes} мин.\n"
-                )
-                if excursion.description and len(excursion.description) < 100:
-                    excursions_text += f"   {excursion.description}\n"
-
-            excursions_text += (
-                "\nСкидки для детей:\n"
-                "   - до 3 лет: бесплатно\n"
-                "   - 4-7 лет: скидка 60%\n"
-                "   - 8-12 лет: скидка 40%\n"
-                "   - 13 лет и старше: полная стоимость\n\n"
-                "Выберите экскурсию для подробной информации или посмотрите общее расписание:"
-            )
+        excursions_list = await excursion_catalog.active()
 
+        if not excursions_list:
+            logger.warning(f"Нет доступных экскурсий для пользователя {message.from_user.id}")
             await message.answer(
-                excursions_text,
-                reply_markup=await all_excursions()
+                "В настоящее время нет доступных экскурсий. Пожалуйста, проверьте позже.",
+                reply_markup=main_menu()
             )
-            logger.debug(f"Список экскурсий отправлен пользователю {message.from_user.id}")
+            return
+
+        await message.answer(
+            excursions_list_text(excursions_list),
+            reply_markup=await all_excursions(excursions=excursions_list)
+        )
+        logger.debug(f"Список экскурсий отправлен пользователю {message.from_user.id}")
 
     except Exception as e:
         logger.error(f"Ошибка показа экскурсий для пользователя {message.from_user.id}: {e}", exc_info=True)
@@ -101,41 +103,19 @@ async def back_to_excursions_list_public(callback: CallbackQuery):
     """Вернуться к списку экскурсий (публичная версия)"""
     await callback.answer()
     try:
-        async with async_session() as session:
-            exc_repo = ExcursionRepository(session)
-            excursions_list = await exc_repo.get_all(active_only=True)
+        excursions_list = await excursion_catalog.active()
 
-            if not excursions_list:
-                await callback.message.answer(
-                    "В настоящее время нет доступных экскурсий.",
-                    reply_markup=main_menu()
-                )
-                return
-
-            excursions_text = "Наши экскурсии:\n\n"
-            for i, excursion in enumerate(excursions_list, 1):
-                excursions_text += (
-                    f"{i}. {excursion.name}\n"
-                    f"   Стоимость: {excursion.base_price} руб.\n"
-                    f"   Продолжительность: {excursion.base_duration_minutes} мин.\n"
-                )
-            if excursion.description and len(excursion.description) < 100:
-                excursions_text += f"   {excursion.description}\n"
-            excursions_text += ("\n"
-                                f"   Скидки для детей:\n"
-                                f"     - до 3 лет: бесплатно\n"
-                                f"     - 4-7 лет: скидка 60%\n"
-                                f"     - 8-12 лет: скидка 40%\n"
-                                f"     - 13 лет и старше: полная стоимость\n"
-                )
-
-            excursions_text += "Выберите экскурсию для подробной информации или посмотрите общее расписание:"
-
-            keyboard = await all_excursions()
-            await callback.message.edit_text(
-                excursions_text,
-                reply_markup=keyboard
+        if not excursions_list:
+            await callback.message.answer(
+                "В настоящее время нет доступных экскурсий.",
+                reply_markup=main_menu()
             )
+            return
+
+        await callback.message.edit_text(
+            excursions_list_text(excursions_list),
+            reply_markup=await all_excursions(excursions=excursions_list)
+        )
 
     except Exception as e:
         logger.error(f"Ошибка возврата к списку экскурсий: {e}", exc_info=True)
@@ -347,31 +327,29 @@ async def public_back_to_schedule_options(callback: CallbackQuery):
 @router.callback_query(F.data.startswith("public_exc_detail:"))
 async def show_excursion_public_detail(callback: CallbackQuery):
     """Показать детали экскурсии для пользователя"""
-    callback.answer()
+    await callback.answer()
     try:
         exc_id = int(callback.data.split(":")[-1])
 
-        async with async_session() as session:
-            exc_repo = ExcursionRepository(session)
-            excursion = await exc_repo.get_by_id(exc_id)
+        excursion = await excursion_catalog.get(exc_id)
 
-            if not excursion:
-                await callback.message.answer("Экскурсия не найдена", reply_markup=all_excursions())
-                return
+        if not excursion:
+            await callback.message.answer("Экскурсия не найдена", reply_markup=await all_excursions())
+            return
 
-            details = (
-                f"{excursion.name}\n\n"
-                f"Стоимость:\n"
-                f"   • Взрослый: {excursion.base_price} руб.\n"
-                f"   • Детский: до 3 лет - бесплатно, 4-7 лет скидка 60%, 8-12 лет скидка 40%, 13+ лет - полная цена\n\n"
-                f"\nПродолжительность: {excursion.base_duration_minutes} минут\n\n"
-            )
-            if excursion.description:
-                details += f"Описание:\n{excursion.description}\n\n"
-            await callback.message.edit_text(
-                details,
-                reply_markup=excursion_details(exc_id)
-            )
+        details = (
+            f"{excursion.name}\n\n"
+            f"Стоимость:\n"
+            f"   • Взрослый: {excursion.base_price} руб.\n"
+            f"   • Детский: до 3 лет - бесплатно, 4-7 лет скидка 60%, 8-12 лет скидка 40%, 13+ лет - полная цена\n\n"
+            f"\nПродолжительность: {excursion.base_duration_minutes} минут\n\n"
+        )
+        if excursion.description:
+            details += f"Описание:\n{excursion.description}\n\n"
+        await callback.message.edit_text(
+            details,
+            reply_markup=excursion_details(exc_id)
+        )
 
     except Exception as e:
         logger.error(f"Ошибка показа деталей экскурсии: {e}", exc_info=True)
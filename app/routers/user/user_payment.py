@@ -15,12 +15,17 @@ from dotenv import load_dotenv
 from app.database.session import async_session
 from app.database.unit_of_work import UnitOfWork
 from app.database.repositories import (
-    BookingRepository, UserRepository, PaymentRepository, SettingsRepository
+    BookingRepository, UserRepository, PaymentRepository
 )
 from app.database.managers import PaymentManager
 from app.database.models import (
     PaymentStatus, YooKassaStatus, BookingStatus, User
 )
+from app.services.invoice_descriptors import invoice_descriptors, InvoiceCheck
+from app.services.payment_confirmations import (
+    payment_confirmations, PaymentConfirmation, SubmitResult
+)
+from app.services.settings_cache import settings_cache
 from app.utils.logging_config import get_logger
 from app.user_panel.keyboards import (
     main_menu,
@@ -44,27 +49,32 @@ logger = get_logger(__name__)
 # Константа для проверки срока оплаты (сама отмена происходит через scheduler)
 PAYMENT_TIMEOUT_HOURS = 24
 
+# Отказы pre-checkout по дескриптору счета (без обращения к БД)
+PRE_CHECKOUT_REJECTIONS = {
+    InvoiceCheck.invalid: "Ошибка: платеж не найден",
+    InvoiceCheck.wrong_user: "У вас нет прав на оплату этого бронирования",
+    InvoiceCheck.wrong_amount: "Ошибка: неверная сумма платежа",
+    InvoiceCheck.slot_started: "Экскурсия уже началась",
+}
+
 
-async def build_receipt_data(user: User, booking, excursion, session) -> Optional[Dict]:
+async def build_receipt_data(user: User, booking, excursion) -> Optional[Dict]:
     """
     Формирует данные для чека по 54-ФЗ.
 
-    Настройки чеков читаются из БД (таблица system_settings).
+    Настройки чеков берутся из снимка system_settings в памяти (settings_cache).
     Администратор может изменять их через админ-панель.
 
     Args:
         user: Объект пользователя
         booking: Объект бронирования
         excursion: Объект экскурсии
-        session: Асинхронная сессия SQLAlchemy
 
     Returns:
         Dict с данными для чека или None, если отправка чеков отключена
         или у пользователя нет email
     """
-    settings_repo = SettingsRepository(session)
-
-    send_receipt = await settings_repo.get_bool("send_receipt", default=False)
+    send_receipt = await settings_cache.get_bool("send_receipt", default=False)
 
     if not send_receipt:
         return None
@@ -74,8 +84,8 @@ async def build_receipt_data(user: User, booking, excursion, session) -> Optiona
         logger.warning(f"Невозможно отправить чек: у пользователя {user.id} нет email")
         return None
 
-    vat_rate = await settings_repo.get_int("vat_rate", default=0)
-    tax_system_code = await settings_repo.get_int("tax_system_code", default=1)
+    vat_rate = await settings_cache.get_int("vat_rate", default=0)
+    tax_system_code = await settings_cache.get_int("tax_system_code", default=1)
 
     # Определяем код ставки НДС по документации YooKassa
     vat_code_map = {
@@ -251,10 +261,20 @@ async def initiate_payment(callback: CallbackQuery):
             payload = f"booking:{booking_id}:{payment.id}"
 
             # Формируем данные для чека (если включено)
-            provider_data = await build_receipt_data(user, booking, excursion, session)
+            provider_data = await build_receipt_data(user, booking, excursion)
             if provider_data:
                 logger.info(f"Для платежа #{payment.id} будут отправлены чеки по 54-ФЗ")
 
+            # Дескриптор счета для быстрой проверки pre-checkout
+            await invoice_descriptors.store(
+                payment_id=payment.id,
+                booking_id=booking_id,
+                user_telegram_id=user_telegram_id,
+                amount=price.amount,
+                slot_id=slot.id,
+                slot_start=slot.start_datetime
+            )
+
             # Отправляем инвойс
             await callback.bot.send_invoice(
                 chat_id=callback.message.chat.id,
@@ -303,6 +323,10 @@ async def pre_checkout_query_handler(pre_checkout_q: PreCheckoutQuery):
     """
     Обработка предварительного запроса на оплату.
     Проверяет, что бронирование всё ещё доступно для оплаты.
+
+    Сначала проверка идет по дескриптору счета в Redis (один запрос);
+    бронирование проверяется по БД, только если дескриптора нет
+    или статус брони менялся после выставления счета.
     """
     user_id = pre_checkout_q.from_user.id
     payload = pre_checkout_q.invoice_payload
@@ -327,6 +351,25 @@ async def pre_checkout_query_handler(pre_checkout_q: PreCheckoutQuery):
         booking_id = int(booking_id_str)
         payment_id = int(payment_id_str)
 
+        check = await invoice_descriptors.check(
+            payment_id, booking_id, user_id, pre_checkout_q.total_amount
+        )
+        if check == InvoiceCheck.ok:
+            await pre_checkout_q.bot.answer_pre_checkout_query(
+                pre_checkout_q.id,
+                ok=True
+            )
+            logger.info(f"Pre-checkout запрос подтвержден по дескриптору для бронирования {booking_id}")
+            return
+        if check in PRE_CHECKOUT_REJECTIONS:
+            logger.warning(f"Pre-checkout для бронирования {booking_id} отклонен: {check.value}")
+            await pre_checkout_q.bot.answer_pre_checkout_query(
+                pre_checkout_q.id,
+                ok=False,
+                error_message=PRE_CHECKOUT_REJECTIONS[check]
+            )
+            return
+
         async with async_session() as session:
             booking_repo = BookingRepository(session)
             payment_repo = PaymentRepository(session)
@@ -437,7 +480,9 @@ async def pre_checkout_query_handler(pre_checkout_q: PreCheckoutQuery):
 async def successful_payment_handler(message: Message):
     """
     Обработка успешного платежа.
-    Обновляет статус брони и платежа в базе данных.
+
+    Только ставит подтверждение в очередь (PaymentConfirmationService):
+    статусы платежа и брони обновляет воркер, он же присылает итог.
     """
     user_id = message.from_user.id
     logger.info(f"Успешный платеж от пользователя {user_id}")
@@ -473,43 +518,26 @@ async def successful_payment_handler(message: Message):
         booking_id = int(booking_id_str)
         payment_id = int(payment_id_str)
 
-        async with async_session() as session:
-            async with UnitOfWork(session) as uow:
-                booking_repo = BookingRepository(uow.session)
-                payment_manager = PaymentManager(uow.session)
-
-                # Подтверждаем платеж через менеджер
-                success = await payment_manager.confirm_payment_success(
-                    payment_id=payment_id,
-                    yookassa_payment_id=provider_payment_id,
-                    booking_repo=booking_repo
-                )
-
-                if not success:
-                    logger.error(f"Не удалось подтвердить платеж {payment_id}")
-                    await message.answer(
-                        "Платеж прошел успешно, но произошла ошибка при обновлении статуса.\n"
-                        "Пожалуйста, свяжитесь с администратором.",
-                        reply_markup=main_menu()
-                    )
-                    return
-
-            # Отправляем подтверждение пользователю
-            amount_rub = total_amount // 100
-
-            success_text = (
-                f"Оплата прошла успешно!\n\n"
-                f"Сумма: {amount_rub} {currency}\n"
-                f"Бронирование #{booking_id} подтверждено.\n\n"
-                f"Вы можете посмотреть детали в разделе 'Мои бронирования'."
-            )
+        # Подтверждение выполняет воркер; повторная доставка апдейта отсекается
+        result = await payment_confirmations.submit(
+            PaymentConfirmation(
+                charge_id=telegram_payment_id,
+                provider_charge_id=provider_payment_id,
+                payment_id=payment_id,
+                booking_id=booking_id,
+                chat_id=message.chat.id,
+                total_amount=total_amount,
+                currency=currency
+            ),
+            bot=message.bot
+        )
 
+        if result == SubmitResult.queued:
             await message.answer(
-                success_text,
-                reply_markup=back_to_booking(booking_id)
+                f"Оплата получена! Подтверждаем бронирование #{booking_id}, "
+                f"это займет несколько секунд."
             )
-
-            logger.info(f"Подтверждение оплаты отправлено пользователю {user_id}")
+        logger.info(f"Успешный платеж {payment_id} принят: {result.value}")
 
     except Exception as e:
         logger.error(f"Ошибка обработки успешного платежа: {e}", exc_info=True)
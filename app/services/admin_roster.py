@@ -0,0 +1,48 @@
+"""
+Список администраторов в памяти процесса.
+
+notify_admins вызывается часто (в том числе в циклах по бронированиям),
+а состав администраторов меняется редко. Telegram ID администраторов
+загружаются из БД один раз и хранятся кортежем.
+
+UserRepository после смены роли, telegram_id или удаления пользователя
+сбрасывает список и увеличивает версию в Redis (Cache.ADMIN_ROSTER_VERSION).
+Другие процессы сверяют версию не чаще раза в VERSION_CHECK_INTERVAL
+секунд и перечитывают список, если она изменилась.
+"""
+
+from typing import Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import User, UserRole
+from app.services.redis.keys import Cache
+from app.services.versioned_snapshot import VersionedSnapshot
+
+
+class AdminRoster(VersionedSnapshot[Tuple[int, ...]]):
+    """Telegram ID администраторов с версионированием через Redis"""
+
+    VERSION_KEY = Cache.ADMIN_ROSTER_VERSION
+    NAME = "списка администраторов"
+
+    async def telegram_ids(self) -> Tuple[int, ...]:
+        """Telegram ID всех администраторов"""
+        return await self._current()
+
+    async def _fetch(self, session: AsyncSession, version: int) -> Tuple[int, ...]:
+        result = await session.execute(
+            select(User.telegram_id)
+            .where(User.role == UserRole.admin, User.telegram_id.is_not(None))
+            .order_by(User.id)
+        )
+        return tuple(result.scalars())
+
+    async def invalidate(self) -> None:
+        """Сбросить список после изменения ролей пользователей"""
+        self._reset()
+        await self._bump_version()
+
+
+admin_roster = AdminRoster()
@@ -0,0 +1,103 @@
+"""
+Снимок каталога экскурсий в памяти процесса.
+
+Экскурсий единицы, меняются они редко, а публичные экраны каталога
+(список, карточка, клавиатура списка) открываются постоянно. Каталог
+загружается из БД целиком один раз и хранится как кортеж неизменяемых
+карточек ExcursionCard - экраны рендерятся без обращения к SQLite.
+
+ExcursionRepository.create/update (а значит и activate/deactivate)
+после сохранения сбрасывают снимок и увеличивают версию каталога
+в Redis (Cache.CATALOG_VERSION). Другие процессы сверяют версию
+не чаще раза в VERSION_CHECK_INTERVAL секунд и перечитывают каталог,
+если она изменилась.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import Excursion
+from app.services.redis.keys import Cache
+from app.services.versioned_snapshot import VersionedSnapshot
+
+
+@dataclass(frozen=True, slots=True)
+class ExcursionCard:
+    """Неизменяемая карточка экскурсии для публичных экранов"""
+    id: int
+    name: str
+    description: Optional[str]
+    base_duration_minutes: int
+    base_price: int
+    is_active: bool
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogSnapshot:
+    """Версия каталога: все карточки, активные карточки и индекс по ID"""
+    version: int
+    cards: Tuple[ExcursionCard, ...]
+    active: Tuple[ExcursionCard, ...]
+    by_id: Dict[int, ExcursionCard]
+
+
+class ExcursionCatalog(VersionedSnapshot[CatalogSnapshot]):
+    """Каталог экскурсий с версионированием через Redis"""
+
+    VERSION_KEY = Cache.CATALOG_VERSION
+    NAME = "каталога экскурсий"
+
+    @property
+    def version(self) -> Optional[int]:
+        """Версия загруженного снимка (None - снимок не загружен)"""
+        return self._data.version if self._data else None
+
+    # ========== ЧТЕНИЕ ==========
+
+    async def active(self) -> Tuple[ExcursionCard, ...]:
+        """Активные экскурсии в порядке ID"""
+        snapshot = await self._current()
+        return snapshot.active
+
+    async def get(self, excursion_id: int) -> Optional[ExcursionCard]:
+        """Карточка экскурсии по ID (в том числе неактивной)"""
+        snapshot = await self._current()
+        return snapshot.by_id.get(excursion_id)
+
+    # ========== ЗАГРУЗКА И ИНВАЛИДАЦИЯ ==========
+
+    async def _fetch(self, session: AsyncSession, version: int) -> CatalogSnapshot:
+        result = await session.execute(select(Excursion).order_by(Excursion.id))
+        cards = tuple(
+            ExcursionCard(
+                id=excursion.id,
+                name=excursion.name,
+                description=excursion.description,
+                base_duration_minutes=excursion.base_duration_minutes,
+                base_price=excursion.base_price,
+                is_active=bool(excursion.is_active)
+            )
+            for excursion in result.scalars()
+        )
+        return CatalogSnapshot(
+            version=version,
+            cards=cards,
+            active=tuple(card for card in cards if card.is_active),
+            by_id={card.id: card for card in cards}
+        )
+
+    async def invalidate(self) -> None:
+        """
+        Сбросить снимок после изменения экскурсии в БД.
+
+        Следующее чтение в этом процессе загрузит каталог заново,
+        остальные процессы увидят новую версию в Redis.
+        """
+        self._reset()
+        await self._bump_version()
+
+
+excursion_catalog = ExcursionCatalog()
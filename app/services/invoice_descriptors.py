@@ -0,0 +1,256 @@
+"""
+Подписанные дескрипторы выставленных счетов для быстрой проверки pre-checkout.
+
+Telegram ждет answer_pre_checkout_query не дольше 10 секунд, поэтому
+при отправке инвойса initiate_payment сохраняет в Redis дескриптор:
+бронирование, платеж, плательщик, сумма, начало слота и версия статуса
+брони на момент выставления счета. Дескриптор подписан HMAC-SHA256
+(ключ INVOICE_SIGNING_KEY, по умолчанию PAYMENTS_TOKEN) и живет
+DESCRIPTOR_TTL секунд.
+
+Версия статуса - два счетчика в Redis: брони (BookingRepository
+увеличивает его при изменении статуса, оплаты или суммы) и слота
+(SlotManager - при переносе и отмене). При смене статуса самого платежа
+(например, отмене) PaymentRepository удаляет дескриптор. Pre-checkout
+читает дескриптор и обе версии одним Lua скриптом; если дескриптора нет или версия
+изменилась, обработчик проверяет бронирование по БД, как раньше.
+"""
+
+import enum
+import hashlib
+import hmac
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript
+
+from app.services.redis import redis_client
+from app.services.redis.keys import Payments
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Дескриптор и текущие версии брони и слота за один запрос.
+# KEYS[1] - дескриптор, KEYS[2] - версия брони, ARGV[1] - префикс версии слота.
+READ_DESCRIPTOR_SCRIPT = """
+local raw = redis.call("get", KEYS[1])
+if not raw then
+    return {}
+end
+local booking_version = redis.call("get", KEYS[2]) or "0"
+local ok, data = pcall(cjson.decode, raw)
+local slot_version = "0"
+if ok and data["slot_id"] then
+    slot_version = redis.call("get", ARGV[1] .. data["slot_id"]) or "0"
+end
+return {raw, booking_version, slot_version}
+"""
+
+
+class InvoiceCheck(enum.Enum):
+    """Результат проверки pre-checkout по дескриптору"""
+    ok = "ok"
+    missing = "missing"              # дескриптора нет - нужна проверка по БД
+    stale = "stale"                  # статус брони менялся после выставления счета
+    invalid = "invalid"              # подпись не сходится или дескриптор другого платежа
+    wrong_user = "wrong_user"
+    wrong_amount = "wrong_amount"
+    slot_started = "slot_started"
+
+
+@dataclass(frozen=True)
+class InvoiceDescriptor:
+    """Данные выставленного счета"""
+    payment_id: int
+    booking_id: int
+    user_telegram_id: int
+    amount: int                      # в копейках, как total_amount в PreCheckoutQuery
+    slot_id: int
+    slot_start: datetime
+    status_version: int
+    slot_version: int
+
+    def canonical(self) -> str:
+        return (
+            f"{self.payment_id}:{self.booking_id}:{self.user_telegram_id}:{self.amount}:"
+            f"{self.slot_id}:{self.slot_start.isoformat()}:{self.status_version}:{self.slot_version}"
+        )
+
+
+class InvoiceDescriptorService:
+    """Хранение и проверка дескрипторов счетов"""
+
+    DESCRIPTOR_TTL = 3600
+    # Версия статуса живет дольше любого дескриптора, выданного при ней
+    VERSION_TTL = DESCRIPTOR_TTL * 2
+
+    def __init__(self, redis: Optional[aioredis.Redis] = None, secret: Optional[str] = None):
+        self._redis = redis
+        self._secret = secret
+        self._script_client: Optional[aioredis.Redis] = None
+        self._read_script: Optional[AsyncScript] = None
+
+    def _get_client(self) -> aioredis.Redis:
+        client = self._redis or redis_client.client
+        if self._script_client is not client:
+            self._read_script = client.register_script(READ_DESCRIPTOR_SCRIPT)
+            self._script_client = client
+        return client
+
+    def _sign(self, descriptor: InvoiceDescriptor) -> str:
+        # Ключ читается при подписи: .env загружается после импорта модуля
+        secret = self._secret or os.getenv("INVOICE_SIGNING_KEY") or os.getenv("PAYMENTS_TOKEN") or ""
+        return hmac.new(secret.encode(), descriptor.canonical().encode(), hashlib.sha256).hexdigest()
+
+    async def store(
+        self,
+        payment_id: int,
+        booking_id: int,
+        user_telegram_id: int,
+        amount: int,
+        slot_id: int,
+        slot_start: datetime
+    ) -> bool:
+        """
+        Сохранить дескриптор выставленного счета.
+
+        Returns:
+            True если дескриптор сохранен (иначе pre-checkout проверит по БД)
+        """
+        try:
+            client = self._get_client()
+            version_key = Payments.status_version(booking_id)
+            slot_version_key = Payments.slot_version(slot_id)
+            version, slot_version = await client.mget(version_key, slot_version_key)
+            descriptor = InvoiceDescriptor(
+                payment_id=payment_id,
+                booking_id=booking_id,
+                user_telegram_id=user_telegram_id,
+                amount=amount,
+                slot_id=slot_id,
+                slot_start=slot_start,
+                status_version=int(version or 0),
+                slot_version=int(slot_version or 0)
+            )
+            value = json.dumps({
+                "payment_id": payment_id,
+                "booking_id": booking_id,
+                "user": user_telegram_id,
+                "amount": amount,
+                "slot_id": slot_id,
+                "slot_start": slot_start.isoformat(),
+                "version": descriptor.status_version,
+                "slot_version": descriptor.slot_version,
+                "sig": self._sign(descriptor)
+            })
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.set(Payments.invoice(payment_id), value, ex=self.DESCRIPTOR_TTL)
+                pipe.expire(version_key, self.VERSION_TTL)
+                pipe.expire(slot_version_key, self.VERSION_TTL)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить дескриптор счета для платежа {payment_id}: {e}")
+            return False
+
+    async def check(
+        self,
+        payment_id: int,
+        booking_id: int,
+        user_telegram_id: int,
+        amount: int,
+        now: Optional[datetime] = None
+    ) -> InvoiceCheck:
+        """Проверить pre-checkout по дескриптору (один вызов скрипта в Redis)"""
+        try:
+            client = self._get_client()
+            result = await self._read_script(
+                keys=[Payments.invoice(payment_id), Payments.status_version(booking_id)],
+                args=[Payments.slot_version("")],
+                client=client
+            )
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать дескриптор счета {payment_id}: {e}")
+            return InvoiceCheck.missing
+
+        if not result:
+            return InvoiceCheck.missing
+        raw, current_version, current_slot_version = result
+
+        try:
+            data = json.loads(raw)
+            descriptor = InvoiceDescriptor(
+                payment_id=int(data["payment_id"]),
+                booking_id=int(data["booking_id"]),
+                user_telegram_id=int(data["user"]),
+                amount=int(data["amount"]),
+                slot_id=int(data["slot_id"]),
+                slot_start=datetime.fromisoformat(data["slot_start"]),
+                status_version=int(data["version"]),
+                slot_version=int(data["slot_version"])
+            )
+            signature = data["sig"]
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Поврежденный дескриптор счета {payment_id}: {e}")
+            return InvoiceCheck.invalid
+
+        if (
+            not hmac.compare_digest(signature, self._sign(descriptor))
+            or descriptor.payment_id != payment_id
+            or descriptor.booking_id != booking_id
+        ):
+            logger.error(f"Дескриптор счета {payment_id} не прошел проверку подписи")
+            return InvoiceCheck.invalid
+
+        if descriptor.user_telegram_id != user_telegram_id:
+            return InvoiceCheck.wrong_user
+        if descriptor.amount != amount:
+            return InvoiceCheck.wrong_amount
+        if descriptor.slot_start <= (now or datetime.now()):
+            return InvoiceCheck.slot_started
+        if (
+            int(current_version) != descriptor.status_version
+            or int(current_slot_version) != descriptor.slot_version
+        ):
+            return InvoiceCheck.stale
+        return InvoiceCheck.ok
+
+    async def bump_status_version(self, booking_id: int) -> None:
+        """Отметить изменение статуса брони: выданные дескрипторы устаревают"""
+        await self._bump(Payments.status_version(booking_id))
+
+    async def bump_slot_version(self, slot_id: int) -> None:
+        """Отметить перенос или отмену слота: дескрипторы его броней устаревают"""
+        await self._bump(Payments.slot_version(slot_id))
+
+    async def invalidate(self, payment_id: int) -> None:
+        """Удалить дескриптор счета: статус платежа изменился, нужна проверка по БД"""
+        try:
+            client = self._get_client()
+        except RuntimeError:
+            return
+        try:
+            await client.delete(Payments.invoice(payment_id))
+        except Exception as e:
+            logger.warning(f"Не удалось удалить дескриптор счета {payment_id}: {e}")
+
+    async def _bump(self, key: str) -> None:
+        try:
+            client = self._get_client()
+        except RuntimeError:
+            # Redis не инициализирован - дескрипторы тоже не сохранялись
+            return
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.incr(key)
+                pipe.expire(key, self.VERSION_TTL)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Не удалось обновить версию {key}: {e}")
+
+
+invoice_descriptors = InvoiceDescriptorService()
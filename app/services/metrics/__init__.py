@@ -0,0 +1,14 @@
+from .registry import Counter, Gauge, Histogram, MetricsRegistry, metrics
+from .server import MetricsServer, metrics_server
+from .database import register_database_metrics
+
+__all__ = [
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'MetricsRegistry',
+    'metrics',
+    'MetricsServer',
+    'metrics_server',
+    'register_database_metrics',
+]
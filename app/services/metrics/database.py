@@ -0,0 +1,29 @@
+"""Экспорт накопленной статистики SQL запросов в метрики."""
+
+from typing import List
+
+from app.database.instrumentation import get_query_totals
+from .registry import _format_labels, _format_value, metrics
+
+
+def collect_query_totals() -> List[str]:
+    """Счетчики запросов и времени БД по меткам апдейтов и задач"""
+    totals = get_query_totals()
+    statements = [
+        "# HELP bot_db_statements_total Выполненные SQL запросы по метке единицы работы",
+        "# TYPE bot_db_statements_total counter",
+    ]
+    seconds = [
+        "# HELP bot_db_seconds_total Суммарное время SQL запросов по метке единицы работы",
+        "# TYPE bot_db_seconds_total counter",
+    ]
+    for label, values in totals.items():
+        labels = _format_labels(("label",), (label,))
+        statements.append(f"bot_db_statements_total{labels} {values['statements']}")
+        seconds.append(f"bot_db_seconds_total{labels} {_format_value(values['total_time'])}")
+    return statements + seconds
+
+
+def register_database_metrics() -> None:
+    """Подключить статистику SQL к реестру метрик"""
+    metrics.add_collector(collect_query_totals)
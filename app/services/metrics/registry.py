@@ -0,0 +1,224 @@
+"""
+Минимальный реестр метрик в памяти процесса.
+
+Счетчики, gauge и гистограммы с метками, вывод в текстовом формате
+Prometheus. Внешние зависимости не нужны: метрики читаются локальным
+HTTP эндпоинтом (см. server.py).
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Границы бакетов по умолчанию (секунды)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Общая часть метрик: имя, описание, метки"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Монотонно растущий счетчик"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def items(self) -> List[Tuple[LabelValues, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in self.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Значение, которое может расти и уменьшаться"""
+
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными бакетами"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets) + 1)
+            series.counts[index] += 1
+            series.total += value
+            series.count += 1
+
+    def quantile(self, q: float, **labels: str) -> Optional[float]:
+        """Оценка квантиля по бакетам (верхняя граница бакета)"""
+        series = self._series.get(self._key(labels))
+        if series is None or not series.count:
+            return None
+
+        rank = q * series.count
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), series.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def series(self) -> List[Tuple[LabelValues, int, float]]:
+        """Список (метки, количество, сумма) по всем сериям"""
+        with self._lock:
+            return [(key, s.count, s.total) for key, s in self._series.items()]
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            snapshot = [(key, list(s.counts), s.total, s.count) for key, s in self._series.items()]
+
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """Функция, возвращающая готовые строки метрик при каждом запросе"""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+# Глобальный реестр метрик
+metrics = MetricsRegistry()
@@ -0,0 +1,59 @@
+"""
+Локальный HTTP эндпоинт с метриками в формате Prometheus.
+
+Слушает только указанный адрес (по умолчанию 127.0.0.1), отдает
+GET /metrics из глобального реестра.
+"""
+
+from typing import Optional
+
+from aiohttp import web
+
+from app.utils.logging_config import get_logger
+from .registry import MetricsRegistry, metrics
+
+logger = get_logger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsServer:
+    """HTTP сервер метрик"""
+
+    def __init__(self, registry: MetricsRegistry = metrics):
+        self.registry = registry
+        self._runner: Optional[web.AppRunner] = None
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        return app
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=self.registry.render().encode("utf-8"),
+            headers={"Content-Type": CONTENT_TYPE}
+        )
+
+    async def start(self, host: str = "127.0.0.1", port: int = 9100) -> None:
+        """Запустить сервер (повторный вызов ничего не делает)"""
+        if self._runner is not None:
+            return
+
+        runner = web.AppRunner(self.create_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        self._runner = runner
+        logger.info(f"Метрики доступны на http://{host}:{port}/metrics")
+
+    async def stop(self) -> None:
+        """Остановить сервер"""
+        if self._runner is None:
+            return
+        await self._runner.cleanup()
+        self._runner = None
+        logger.info("Сервер метрик остановлен")
+
+
+# Глобальный экземпляр сервера метрик
+metrics_server = MetricsServer()
@@ -1,9 +1,7 @@
 # app/services/notification_service.py
 
-"""Сервис для массовых рассылок с rate limiting"""
+"""Сервис для массовых рассылок (класс отправки broadcast)"""
 
-import asyncio
-import re
 from typing import Optional
 
 from aiogram import Bot
@@ -14,6 +12,7 @@ from app.database.repositories.notification_repository import NotificationReposi
 from app.database.models import NotificationStatus, UserRole
 from app.utils.logging_config import get_logger
 from app.utils.admin_notifications import notify_admins
+from app.services.send_scheduler import Priority, send_priority
 
 logger = get_logger(__name__)
 
@@ -21,12 +20,8 @@ logger = get_logger(__name__)
 class NotificationService:
     """Сервис для управления массовыми рассылками"""
 
-    MAX_MESSAGES_PER_SECOND = 25
-    RETRY_AFTER_DEFAULT = 60
-
     def __init__(self, bot: Bot):
         self.bot = bot
-        self._semaphore = asyncio.Semaphore(self.MAX_MESSAGES_PER_SECOND)
 
     async def send_mass_notification(
         self,
@@ -75,7 +70,7 @@ class NotificationService:
                 continue
 
             try:
-                await self._send_with_rate_limit(
+                await self._send(
                     chat_id=recipient.telegram_id,
                     text=notification.message
                 )
@@ -107,43 +102,30 @@ class NotificationService:
         logger.info(f"Рассылка #{notification_id} завершена. Отправлено: {sent_count}, ошибок: {failed_count}")
 
         # Уведомление администраторов
-        async with async_session() as session:
-            status_text = "завершена" if failed_count == 0 else "завершена с ошибками"
-            message = (
-                f"Массовая рассылка #{notification.id} {status_text}\n\n"
-                f"Аудитория: {notification.audience_type.value}\n"
-                f"Отправлено: {sent_count}\n"
-                f"Ошибок: {failed_count}\n"
-                f"Всего: {total}\n\n"
-                f"Текст сообщения:\n{notification.short_message}"
-            )
-            await notify_admins(self.bot, session, message)
-
-    async def _send_with_rate_limit(
+        status_text = "завершена" if failed_count == 0 else "завершена с ошибками"
+        message = (
+            f"Массовая рассылка #{notification.id} {status_text}\n\n"
+            f"Аудитория: {notification.audience_type.value}\n"
+            f"Отправлено: {sent_count}\n"
+            f"Ошибок: {failed_count}\n"
+            f"Всего: {total}\n\n"
+            f"Текст сообщения:\n{notification.short_message}"
+        )
+        await notify_admins(self.bot, message)
+
+    async def _send(
         self,
         chat_id: int,
         text: str,
         parse_mode: str = "HTML"
     ) -> None:
-        """Отправить сообщение с rate limiting"""
-        async with self._semaphore:
-            while True:
-                try:
-                    await self.bot.send_message(
-                        chat_id=chat_id,
-                        text=text,
-                        parse_mode=parse_mode
-                    )
-                    await asyncio.sleep(0.04)  # 25 сообщений/сек
-                    break
-                except Exception as e:
-                    if "429" in str(e):
-                        match = re.search(r'retry_after[=:]?\s*(\d+)', str(e), re.IGNORECASE)
-                        retry_after = int(match.group(1)) if match else self.RETRY_AFTER_DEFAULT
-                        logger.warning(f"Ошибка 429. Пауза {retry_after} сек")
-                        await asyncio.sleep(retry_after)
-                        continue
-                    raise
+        """Отправить сообщение рассылки (лимиты и 429 - в общем планировщике отправки)"""
+        with send_priority(Priority.broadcast):
+            await self.bot.send_message(
+                chat_id=chat_id,
+                text=text,
+                parse_mode=parse_mode
+            )
 
     async def cancel_notification(self, notification_id: int) -> bool:
         """Отменить рассылку"""
@@ -0,0 +1,181 @@
+"""
+Отправка сообщений из outbox.
+
+Бизнес-операции (отмена слота и бронирования, автоотмена, возвраты)
+не вызывают bot.send_message внутри транзакции, а добавляют сообщение
+в таблицу outbox через OutboxRepository.enqueue - оно сохраняется
+и откатывается вместе с изменением. Транзакция не ждет Telegram,
+а после rollback не остается уже отправленных сообщений.
+
+OutboxDispatcher работает в одном процессе (вместе с планировщиком):
+читает пачку готовых сообщений короткой сессией, отправляет их вне
+транзакции (лимиты Telegram соблюдает общий планировщик отправки
+send_scheduler) и одним запросом отмечает отправленные. Ошибки сети
+повторяются с экспоненциальной задержкой, сообщения заблокировавшим
+бота пользователям отмечаются failed.
+"""
+
+import asyncio
+import enum
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.database.models import OutboxMessage
+from app.database.repositories import OutboxRepository
+from app.database.session import async_session
+from app.database.unit_of_work import UnitOfWork
+from app.services.scheduler.bot_instance import get_bot_instance
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class DeliveryResult(enum.Enum):
+    """Итог попытки отправки"""
+    sent = "sent"
+    retry = "retry"
+    failed = "failed"
+
+
+class OutboxDispatcher:
+    """Фоновая отправка сообщений из outbox"""
+
+    BATCH_SIZE = 50
+    MAX_ATTEMPTS = 5
+    RETRY_BASE_SECONDS = 30
+    POLL_INTERVAL = 2.0
+
+    def __init__(self, session_factory: Optional[async_sessionmaker] = None):
+        self._session_factory = session_factory or async_session
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def wake(self) -> None:
+        """Разбудить диспетчер после commit с новыми сообщениями"""
+        self._wakeup.set()
+
+    def _retry_delay(self, attempts: int) -> timedelta:
+        return timedelta(seconds=self.RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+    async def drain_once(self, bot: Optional[Bot] = None, now: Optional[datetime] = None) -> int:
+        """
+        Отправить одну пачку готовых сообщений.
+
+        Returns:
+            Количество обработанных сообщений
+        """
+        bot = bot or get_bot_instance()
+        if bot is None:
+            logger.warning("Бот не инициализирован, отправка outbox отложена")
+            return 0
+
+        async with self._session_factory() as session:
+            messages = await OutboxRepository(session).get_due(self.BATCH_SIZE, now)
+        if not messages:
+            return 0
+
+        # Отправка вне транзакции: блокировка записи SQLite не удерживается
+        results: List[Tuple[OutboxMessage, DeliveryResult, str, Optional[float]]] = []
+        for index, message in enumerate(messages):
+            result, error, retry_after = await self._send(bot, message)
+            results.append((message, result, error, retry_after))
+            if retry_after is not None:
+                # Telegram ограничил отправку - остаток пачки переносим целиком
+                for rest in messages[index + 1:]:
+                    results.append((rest, DeliveryResult.retry, error, retry_after))
+                break
+
+        await self._store_results(results, now or datetime.now())
+        return len(results)
+
+    async def _send(
+        self,
+        bot: Bot,
+        message: OutboxMessage
+    ) -> Tuple[DeliveryResult, str, Optional[float]]:
+        try:
+            await bot.send_message(chat_id=message.chat_id, text=message.text)
+            return DeliveryResult.sent, "", None
+        except TelegramRetryAfter as e:
+            # Планировщик уже повторял запрос - переносим сообщение
+            logger.warning(f"Ошибка 429 при отправке outbox. Пауза {e.retry_after} сек")
+            return DeliveryResult.retry, str(e), float(e.retry_after)
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            logger.warning(f"Сообщение {message.id} не может быть доставлено в чат {message.chat_id}: {e}")
+            return DeliveryResult.failed, str(e), None
+        except Exception as e:
+            logger.error(f"Ошибка отправки сообщения {message.id} в чат {message.chat_id}: {e}")
+            return DeliveryResult.retry, str(e), None
+
+    async def _store_results(
+        self,
+        results: List[Tuple[OutboxMessage, DeliveryResult, str, Optional[float]]],
+        now: datetime
+    ) -> None:
+        async with self._session_factory() as session:
+            async with UnitOfWork(session) as uow:
+                repo = OutboxRepository(uow.session)
+                sent_ids = [message.id for message, result, _, _ in results if result == DeliveryResult.sent]
+                await repo.mark_sent(sent_ids, now)
+
+                for message, result, error, retry_after in results:
+                    if result == DeliveryResult.sent:
+                        continue
+                    if retry_after is not None:
+                        # Ограничение скорости - не ошибка сообщения, попытка не считается
+                        await repo.schedule_retry(
+                            message.id, message.attempts, now + timedelta(seconds=retry_after), error
+                        )
+                        continue
+                    attempts = message.attempts + 1
+                    if result == DeliveryResult.failed or attempts >= self.MAX_ATTEMPTS:
+                        await repo.mark_failed(message.id, attempts, error)
+                        logger.error(f"Сообщение outbox {message.id} не доставлено: {error}")
+                    else:
+                        await repo.schedule_retry(message.id, attempts, now + self._retry_delay(attempts), error)
+
+        if sent_ids:
+            logger.info(f"Отправлено сообщений из outbox: {len(sent_ids)}")
+
+    # ========== ФОНОВЫЙ ЦИКЛ ==========
+
+    async def start(self) -> None:
+        """Запустить фоновую отправку"""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("Отправка сообщений outbox запущена")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.drain_once()
+                if processed >= self.BATCH_SIZE:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка отправки outbox: {e}", exc_info=True)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def stop(self) -> None:
+        """Остановить фоновую отправку (неотправленные сообщения остаются в outbox)"""
+        task, self._task = self._task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+outbox_dispatcher = OutboxDispatcher()
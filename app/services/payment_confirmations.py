@@ -0,0 +1,340 @@
+"""
+Очередь подтверждения успешных платежей.
+
+successful_payment_handler только ставит подтверждение в очередь и сразу
+отвечает пользователю. Повторная доставка того же апдейта отсекается
+ключом идемпотентности Payments.charge(telegram_payment_charge_id)
+(SET NX в Redis), а в БД - записью PaymentCharge с тем же первичным ключом,
+которая сохраняется в одной транзакции с подтверждением платежа.
+
+Воркер забирает задачи из списка Queues.PAYMENT_CONFIRMATIONS командой
+BLMOVE в список обрабатываемых и удаляет их оттуда после обработки.
+Воркер запускается только в основном процессе (в режиме webhook
+остальные процессы лишь ставят задачи в очередь), поэтому отправки
+уведомлений о платежах идут через один планировщик отправки.
+Задачи, оставшиеся в обработке после падения процесса, возвращаются
+в очередь при следующем запуске - повторная обработка безопасна
+благодаря PaymentCharge. Если Redis недоступен, подтверждение
+выполняется сразу в обработчике, как раньше.
+
+Если транзакция подтверждения откатилась (например, "database is locked"),
+ключ идемпотентности удаляется, а задача откладывается в
+Queues.PAYMENT_CONFIRMATIONS_RETRY с экспоненциальной задержкой.
+После MAX_ATTEMPTS попыток задача переносится в
+Queues.PAYMENT_CONFIRMATIONS_DEAD, пользователь и администраторы
+получают уведомление.
+"""
+
+import asyncio
+import enum
+import json
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Optional
+
+import redis.asyncio as aioredis
+from aiogram import Bot
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.database.repositories import BookingRepository, PaymentRepository
+from app.database.session import async_session
+from app.database.unit_of_work import UnitOfWork
+from app.services.invoice_descriptors import invoice_descriptors
+from app.services.redis import redis_client
+from app.services.redis.keys import Payments, Queues
+from app.services.scheduler.bot_instance import get_bot_instance
+from app.user_panel.keyboards import back_to_booking, main_menu
+from app.utils.admin_notifications import notify_admins
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Перенести наступившие отложенные задачи из ZSET повторов в очередь атомарно
+PROMOTE_RETRIES_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+for _, raw in ipairs(due) do
+    redis.call('ZREM', KEYS[1], raw)
+    redis.call('LPUSH', KEYS[2], raw)
+end
+return #due
+"""
+
+
+@dataclass(frozen=True)
+class PaymentConfirmation:
+    """Данные успешного платежа из апдейта Telegram"""
+    charge_id: str
+    provider_charge_id: str
+    payment_id: int
+    booking_id: int
+    chat_id: int
+    total_amount: int
+    currency: str
+    # Число неудачных попыток подтверждения
+    attempts: int = 0
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, raw: str) -> 'PaymentConfirmation':
+        return cls(**json.loads(raw))
+
+
+class SubmitResult(enum.Enum):
+    """Результат постановки подтверждения"""
+    queued = "queued"            # в очереди, воркер пришлет итог пользователю
+    processed = "processed"      # Redis недоступен - обработано сразу
+    duplicate = "duplicate"      # списание уже принято ранее
+
+
+class ProcessResult(enum.Enum):
+    """Результат применения подтверждения"""
+    confirmed = "confirmed"
+    duplicate = "duplicate"
+    failed = "failed"
+
+
+class PaymentConfirmationService:
+    """Постановка подтверждений в очередь и фоновый воркер"""
+
+    IDEMPOTENCY_TTL = 7 * 24 * 3600
+    POLL_TIMEOUT = 5
+    MAX_ATTEMPTS = 5
+    RETRY_BASE_SECONDS = 5
+
+    def __init__(
+        self,
+        redis: Optional[aioredis.Redis] = None,
+        session_factory: Optional[async_sessionmaker] = None
+    ):
+        self._redis = redis
+        self._session_factory = session_factory or async_session
+        self._worker_task: Optional[asyncio.Task] = None
+
+    def _get_client(self) -> aioredis.Redis:
+        return self._redis or redis_client.client
+
+    # ========== ПОСТАНОВКА В ОЧЕРЕДЬ ==========
+
+    async def submit(self, confirmation: PaymentConfirmation, bot: Optional[Bot] = None) -> SubmitResult:
+        """Принять успешный платеж: отсечь повтор и поставить в очередь"""
+        try:
+            client = self._get_client()
+            accepted = await client.set(
+                Payments.charge(confirmation.charge_id),
+                confirmation.payment_id,
+                nx=True,
+                ex=self.IDEMPOTENCY_TTL
+            )
+            if not accepted:
+                logger.info(f"Повторная доставка списания {confirmation.charge_id}, пропуск")
+                return SubmitResult.duplicate
+            await client.lpush(Queues.PAYMENT_CONFIRMATIONS, confirmation.to_json())
+            logger.info(f"Подтверждение платежа {confirmation.payment_id} поставлено в очередь")
+            return SubmitResult.queued
+        except Exception as e:
+            logger.warning(f"Очередь подтверждений недоступна, обработка сразу: {e}")
+
+        result = await self.process(confirmation, bot)
+        if result == ProcessResult.duplicate:
+            return SubmitResult.duplicate
+        return SubmitResult.processed
+
+    # ========== ОБРАБОТКА ==========
+
+    async def process(
+        self,
+        confirmation: PaymentConfirmation,
+        bot: Optional[Bot] = None,
+        notify_failure: bool = True
+    ) -> ProcessResult:
+        """
+        Подтвердить платеж в одной транзакции и уведомить пользователя.
+
+        Args:
+            notify_failure: Сообщить пользователю об ошибке (False, если будет повтор)
+        """
+        result = await self._apply(confirmation)
+        if result == ProcessResult.failed:
+            await self._release_charge(confirmation)
+            if not notify_failure:
+                return result
+        if result != ProcessResult.duplicate:
+            await self._notify(confirmation, result, bot or get_bot_instance())
+        return result
+
+    async def _release_charge(self, confirmation: PaymentConfirmation) -> None:
+        """Снять ключ идемпотентности после отката, чтобы повторная доставка не отсекалась"""
+        try:
+            await self._get_client().delete(Payments.charge(confirmation.charge_id))
+        except Exception as e:
+            logger.warning(f"Не удалось снять ключ списания {confirmation.charge_id}: {e}")
+
+    async def _apply(self, confirmation: PaymentConfirmation) -> ProcessResult:
+        """
+        Записать списание, платеж и статус брони одним commit.
+
+        Если любое из обновлений не прошло, откатываются все три,
+        поэтому повтор задачи не примет списание за уже обработанное.
+        """
+        try:
+            async with self._session_factory() as session:
+                async with UnitOfWork(session) as uow:
+                    payment_repo = PaymentRepository(uow.session)
+                    if not await payment_repo.register_charge(confirmation.charge_id, confirmation.payment_id):
+                        logger.info(f"Списание {confirmation.charge_id} уже обработано")
+                        return ProcessResult.duplicate
+
+                    payment = await payment_repo.get_payment_by_id(confirmation.payment_id)
+                    if (
+                        not payment
+                        or not await payment_repo.mark_succeeded(payment.id, confirmation.provider_charge_id)
+                        or not await BookingRepository(uow.session).mark_paid(payment.booking_id)
+                    ):
+                        await uow.rollback()
+                        logger.error(f"Не удалось подтвердить платеж {confirmation.payment_id}")
+                        return ProcessResult.failed
+                    booking_id = payment.booking_id
+
+            await invoice_descriptors.bump_status_version(booking_id)
+            logger.info(f"Платеж {confirmation.payment_id} подтвержден, бронь {booking_id} оплачена")
+            return ProcessResult.confirmed
+        except Exception as e:
+            logger.error(f"Ошибка подтверждения платежа {confirmation.payment_id}: {e}", exc_info=True)
+            return ProcessResult.failed
+
+    async def _notify(self, confirmation: PaymentConfirmation, result: ProcessResult, bot: Optional[Bot]) -> None:
+        if bot is None:
+            logger.warning(f"Бот не инициализирован, уведомление о платеже {confirmation.payment_id} не отправлено")
+            return
+        try:
+            if result == ProcessResult.confirmed:
+                await bot.send_message(
+                    confirmation.chat_id,
+                    f"Оплата прошла успешно!\n\n"
+                    f"Сумма: {confirmation.total_amount // 100} {confirmation.currency}\n"
+                    f"Бронирование #{confirmation.booking_id} подтверждено.\n\n"
+                    f"Вы можете посмотреть детали в разделе 'Мои бронирования'.",
+                    reply_markup=back_to_booking(confirmation.booking_id)
+                )
+                logger.info(f"Подтверждение оплаты отправлено в чат {confirmation.chat_id}")
+            else:
+                await bot.send_message(
+                    confirmation.chat_id,
+                    "Платеж прошел успешно, но произошла ошибка при обновлении статуса.\n"
+                    "Пожалуйста, свяжитесь с администратором.",
+                    reply_markup=main_menu()
+                )
+        except Exception as e:
+            logger.error(f"Не удалось уведомить о платеже {confirmation.payment_id}: {e}")
+
+    # ========== ВОРКЕР ==========
+
+    async def start(self) -> None:
+        """Вернуть незавершенные задачи в очередь и запустить воркер"""
+        if self._worker_task and not self._worker_task.done():
+            return
+        try:
+            client = self._get_client()
+            restored = 0
+            while await client.lmove(
+                Queues.PAYMENT_CONFIRMATIONS_PROCESSING, Queues.PAYMENT_CONFIRMATIONS, "LEFT", "RIGHT"
+            ):
+                restored += 1
+            if restored:
+                logger.info(f"Возвращено в очередь незавершенных подтверждений: {restored}")
+        except Exception as e:
+            logger.warning(f"Воркер подтверждений платежей не запущен: {e}")
+            return
+        self._worker_task = asyncio.create_task(self._run(client))
+        logger.info("Воркер подтверждений платежей запущен")
+
+    async def _run(self, client: aioredis.Redis) -> None:
+        while True:
+            try:
+                await self._promote_due_retries(client)
+                raw = await client.blmove(
+                    Queues.PAYMENT_CONFIRMATIONS,
+                    Queues.PAYMENT_CONFIRMATIONS_PROCESSING,
+                    self.POLL_TIMEOUT,
+                    "RIGHT",
+                    "LEFT"
+                )
+                if raw is None:
+                    # Очередь пуста; уступаем цикл, если клиент вернул ответ без ожидания
+                    await asyncio.sleep(0)
+                    continue
+                try:
+                    confirmation = PaymentConfirmation.from_json(raw)
+                except (ValueError, TypeError) as e:
+                    logger.error(f"Некорректная задача подтверждения платежа {raw}: {e}")
+                    await client.lrem(Queues.PAYMENT_CONFIRMATIONS_PROCESSING, 1, raw)
+                    continue
+
+                last_attempt = confirmation.attempts + 1 >= self.MAX_ATTEMPTS
+                result = await self.process(confirmation, notify_failure=last_attempt)
+                if result == ProcessResult.failed:
+                    await self._reschedule(client, raw, confirmation)
+                else:
+                    await client.lrem(Queues.PAYMENT_CONFIRMATIONS_PROCESSING, 1, raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка воркера подтверждений платежей: {e}", exc_info=True)
+                await asyncio.sleep(1)
+
+    async def _reschedule(self, client: aioredis.Redis, raw: str, confirmation: PaymentConfirmation) -> None:
+        """Отложить неудавшуюся задачу или перенести ее в dead-letter"""
+        attempts = confirmation.attempts + 1
+        retry = replace(confirmation, attempts=attempts)
+        pipe = client.pipeline(transaction=True)
+        pipe.lrem(Queues.PAYMENT_CONFIRMATIONS_PROCESSING, 1, raw)
+        if attempts < self.MAX_ATTEMPTS:
+            delay = self.RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+            pipe.zadd(Queues.PAYMENT_CONFIRMATIONS_RETRY, {retry.to_json(): time.time() + delay})
+            await pipe.execute()
+            logger.warning(
+                f"Подтверждение платежа {confirmation.payment_id} не удалось "
+                f"(попытка {attempts}/{self.MAX_ATTEMPTS}), повтор через {delay} с"
+            )
+            return
+
+        pipe.lpush(Queues.PAYMENT_CONFIRMATIONS_DEAD, retry.to_json())
+        await pipe.execute()
+        logger.error(
+            f"Подтверждение платежа {confirmation.payment_id} не удалось после {attempts} попыток, "
+            f"задача перенесена в {Queues.PAYMENT_CONFIRMATIONS_DEAD}"
+        )
+        bot = get_bot_instance()
+        if bot is not None:
+            await notify_admins(
+                bot,
+                "Не удалось подтвердить оплаченный платеж\n\n"
+                f"Платеж: #{confirmation.payment_id}\n"
+                f"Бронирование: #{confirmation.booking_id}\n"
+                f"Списание Telegram: {confirmation.charge_id}\n\n"
+                "Требуется ручное подтверждение."
+            )
+
+    async def _promote_due_retries(self, client: aioredis.Redis) -> None:
+        """Вернуть в очередь отложенные задачи, время которых наступило"""
+        promoted = await client.eval(
+            PROMOTE_RETRIES_SCRIPT, 2,
+            Queues.PAYMENT_CONFIRMATIONS_RETRY, Queues.PAYMENT_CONFIRMATIONS, time.time()
+        )
+        if promoted:
+            logger.info(f"Возвращено в очередь отложенных подтверждений: {promoted}")
+
+    async def stop(self) -> None:
+        """Остановить воркер (текущая задача останется в обработке до перезапуска)"""
+        task, self._worker_task = self._worker_task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+payment_confirmations = PaymentConfirmationService()
@@ -1,8 +1,10 @@
-from .client import redis_client
+from .client import redis_client, LockLostError, WatchedLock
 from .serializers import dumps, loads, simple_dumps
 
 __all__ = [
     'redis_client',
+    'LockLostError',
+    'WatchedLock',
     'dumps',      # полный цикл (с восстановлением)
     'loads',       # полный цикл (с восстановлением)
     'simple_dumps', # только сериализация (без восстановления)
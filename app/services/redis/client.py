@@ -1,19 +1,99 @@
 import redis.asyncio as aioredis
-from typing import Optional, Union
+from redis.commands.core import AsyncScript
+from typing import Dict, List, Optional, Union
 from contextlib import asynccontextmanager
 import uuid
 import asyncio
 from app.utils.logging_config import get_logger
+from .keys import Locks
+from .timing import TimedRedis
 import os
 
 logger = get_logger(__name__)
 
 
+# Lua скрипт для атомарного удаления только если значение совпадает.
+# Это защищает от освобождения чужой блокировки.
+# После удаления публикуем уведомление, чтобы ожидающие не опрашивали ключ.
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    redis.call("del", KEYS[1])
+    redis.call("publish", ARGV[2], "1")
+    return 1
+else
+    return 0
+end
+"""
+
+# Lua скрипт для продления только если блокировка наша
+EXTEND_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+else
+    return 0
+end
+"""
+
+
+class LockLostError(Exception):
+    """Блокировка потеряна: TTL истек или ключ перехвачен другим процессом"""
+
+
+class WatchedLock:
+    """
+    Удерживаемая блокировка, которую продлевает watchdog.
+
+    Владелец периодически проверяет lost (или вызывает ensure_held)
+    и прекращает работу, если блокировку продлить не удалось.
+    """
+
+    def __init__(self, key: str, token: str):
+        self.key = key
+        self.token = token
+        self._lost = asyncio.Event()
+
+    @property
+    def lost(self) -> bool:
+        """Потеряна ли блокировка"""
+        return self._lost.is_set()
+
+    def mark_lost(self) -> None:
+        """Отметить блокировку как потерянную"""
+        self._lost.set()
+
+    def ensure_held(self) -> None:
+        """
+        Проверить, что блокировка все еще наша.
+
+        Raises:
+            LockLostError: Если watchdog не смог продлить блокировку
+        """
+        if self.lost:
+            raise LockLostError(f"Блокировка {self.key} потеряна")
+
+    async def wait_lost(self) -> None:
+        """Дождаться потери блокировки"""
+        await self._lost.wait()
+
+
 class RedisClient:
     """Клиент для работы с Redis"""
 
+    # Начальный и максимальный интервал повторной попытки при ожидании блокировки.
+    # Основной механизм - уведомление через pub/sub, опрос нужен только на случай
+    # потерянного сообщения или истечения TTL чужой блокировки (истечение не публикуется).
+    LOCK_RETRY_INTERVAL = 0.05
+    LOCK_RETRY_INTERVAL_MAX = 1.0
+
     def __init__(self):
         self._redis: Optional[aioredis.Redis] = None
+        self._release_script: Optional[AsyncScript] = None
+        self._extend_script: Optional[AsyncScript] = None
+
+        # Ожидающие блокировок в этом процессе: ключ -> очередь событий (FIFO)
+        self._lock_waiters: Dict[str, List[asyncio.Event]] = {}
+        self._lock_pubsub = None
+        self._lock_listener_task: Optional[asyncio.Task] = None
 
     async def initialize(self):
         """Инициализация подключения к Redis"""
@@ -32,7 +112,7 @@ class RedisClient:
 
             logger.info(f"Подключение к Redis: {host}:{port}/{db}")
 
-            self._redis = aioredis.from_url(
+            self._redis = TimedRedis.from_url(
                 redis_url,
                 decode_responses=True
             )
@@ -41,6 +121,8 @@ class RedisClient:
             await self._redis.ping()
             logger.info("Redis подключен успешно")
 
+            self._register_scripts()
+
         except Exception as e:
             logger.error(f"Ошибка подключения к Redis: {e}")
             self._redis = None
@@ -48,6 +130,7 @@ class RedisClient:
 
     async def close(self):
         """Закрытие подключения"""
+        await self._stop_lock_listener()
         if self._redis:
             await self._redis.close()
             logger.info("Redis соединение закрыто")
@@ -105,20 +188,14 @@ class RedisClient:
         Returns:
             bool: True если блокировка освобождена
         """
-        if not self._redis:
+        if not self._redis or not token:
             return False
 
-        # Lua скрипт для атомарного удаления только если значение совпадает
-        # Это защищает от освобождения чужой блокировки
-        lua_script = """
-        if redis.call("get", KEYS[1]) == ARGV[1] then
-            return redis.call("del", KEYS[1])
-        else
-            return 0
-        end
-        """
-
-        result = await self._redis.eval(lua_script, 1, key, token)
+        self._register_scripts()
+        result = await self._release_script(
+            keys=[key],
+            args=[token, Locks.released_channel(key)]
+        )
         success = bool(result)
 
         if success:
@@ -143,16 +220,8 @@ class RedisClient:
         if not self._redis:
             return False
 
-        # Lua скрипт для продления только если блокировка наша
-        lua_script = """
-        if redis.call("get", KEYS[1]) == ARGV[1] then
-            return redis.call("pexpire", KEYS[1], ARGV[2])
-        else
-            return 0
-        end
-        """
-
-        result = await self._redis.eval(lua_script, 1, key, token, extra_time * 1000)
+        self._register_scripts()
+        result = await self._extend_script(keys=[key], args=[token, extra_time * 1000])
         return bool(result)
 
     @asynccontextmanager
@@ -160,6 +229,11 @@ class RedisClient:
         """
         Контекстный менеджер для блокировки.
 
+        Ожидание не опрашивает Redis в цикле: ожидающий подписывается на уведомление
+        об освобождении ключа и просыпается сразу после release. Редкие повторные
+        попытки (с нарастающим интервалом до LOCK_RETRY_INTERVAL_MAX) остаются
+        только как страховка.
+
         Args:
             key: Ключ блокировки
             timeout: Время жизни блокировки в секундах
@@ -175,34 +249,249 @@ class RedisClient:
                 await create_booking(...)
         """
         token = str(uuid.uuid4())
-        start_time = asyncio.get_event_loop().time()
-
-        try:
-            # Пытаемся получить блокировку
-            acquired = False
-            while not acquired:
-                token = await self.acquire_lock(key, timeout, token)
+        acquired = await self.acquire_lock(key, timeout, token) is not None
 
-                if token:
-                    acquired = True
-                    break
+        if not acquired:
+            acquired = await self._wait_for_lock(key, token, timeout, blocking_timeout)
 
-                if blocking_timeout is not None:
-                    elapsed = asyncio.get_event_loop().time() - start_time
-                    if elapsed >= blocking_timeout:
-                        raise TimeoutError(f"Не удалось получить блокировку {key} за {blocking_timeout} сек")
-
-                # Ждем немного перед следующей попыткой
-                await asyncio.sleep(0.1)
+        if not acquired:
+            raise TimeoutError(f"Не удалось получить блокировку {key} за {blocking_timeout} сек")
 
+        try:
             logger.debug(f"Блокировка получена: {key}")
             yield
-
         finally:
-            # Всегда пытаемся освободить блокировку
+            # Освобождаем только свою блокировку
             await self.release_lock(key, token)
             logger.debug(f"Блокировка освобождена: {key}")
 
+    @asynccontextmanager
+    async def held_lock(
+        self,
+        key: str,
+        timeout: int = 60,
+        blocking_timeout: Union[int, float, None] = 0,
+        extend_interval: Optional[float] = None
+    ):
+        """
+        Контекстный менеджер блокировки с watchdog.
+
+        Пока владелец жив, фоновая задача продлевает TTL блокировки каждые
+        extend_interval секунд (по умолчанию треть TTL), поэтому TTL можно
+        держать коротким: при падении процесса блокировка освободится быстро,
+        а длинная задача не потеряет ее посреди работы.
+
+        Если продлить блокировку не удалось, она отмечается потерянной
+        (WatchedLock.lost), и владелец должен прервать работу.
+
+        Args:
+            key: Ключ блокировки
+            timeout: Время жизни блокировки в секундах
+            blocking_timeout: Максимальное время ожидания в секундах.
+                            0 - одна попытка без ожидания, None - ждать бесконечно.
+            extend_interval: Интервал продления в секундах
+
+        Yields:
+            WatchedLock если блокировка получена, иначе None
+
+        Пример:
+            async with redis_client.held_lock("scheduler:lock:cancel_unpaid") as lock:
+                if not lock:
+                    return
+                for item in items:
+                    lock.ensure_held()
+                    await process(item)
+        """
+        token = str(uuid.uuid4())
+        acquired = await self.acquire_lock(key, timeout, token) is not None
+
+        if not acquired and blocking_timeout != 0:
+            acquired = await self._wait_for_lock(key, token, timeout, blocking_timeout)
+
+        if not acquired:
+            yield None
+            return
+
+        handle = WatchedLock(key, token)
+        interval = extend_interval or max(timeout / 3, 0.1)
+        watchdog = asyncio.create_task(self._lock_watchdog(handle, timeout, interval))
+
+        try:
+            yield handle
+        finally:
+            watchdog.cancel()
+            try:
+                await watchdog
+            except (asyncio.CancelledError, Exception):
+                pass
+
+            if handle.lost:
+                logger.warning(f"Блокировка {key} была потеряна во время работы")
+            else:
+                await self.release_lock(key, token)
+
+    async def _lock_watchdog(self, handle: WatchedLock, timeout: int, interval: float) -> None:
+        """Фоновая задача: продлевает блокировку, пока владелец работает"""
+        loop = asyncio.get_running_loop()
+        last_extended = loop.time()
+
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                extended = await self.extend_lock(handle.key, handle.token, timeout)
+            except Exception as e:
+                # Временная ошибка Redis: блокировка еще может быть жива до истечения TTL
+                logger.warning(f"Ошибка продления блокировки {handle.key}: {e}")
+                if loop.time() - last_extended < timeout:
+                    continue
+                extended = False
+
+            if not extended:
+                logger.error(f"Блокировка {handle.key} потеряна: продлить не удалось")
+                handle.mark_lost()
+                return
+
+            last_extended = loop.time()
+            logger.debug(f"Блокировка {handle.key} продлена на {timeout} сек")
+
+    async def _wait_for_lock(
+        self,
+        key: str,
+        token: str,
+        timeout: int,
+        blocking_timeout: Union[int, float, None]
+    ) -> bool:
+        """
+        Дождаться освобождения блокировки и захватить ее.
+
+        Returns:
+            bool: True если блокировка получена, False если истек blocking_timeout
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if blocking_timeout is None else loop.time() + blocking_timeout
+
+        waiter = asyncio.Event()
+        self._lock_waiters.setdefault(key, []).append(waiter)
+
+        try:
+            await self._ensure_lock_listener()
+
+            retry_interval = self.LOCK_RETRY_INTERVAL
+            while True:
+                # Повторная попытка сразу после подписки закрывает окно,
+                # в котором уведомление могло прийти до регистрации ожидающего
+                if await self.acquire_lock(key, timeout, token):
+                    return True
+
+                wait_time = retry_interval
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        return False
+                    wait_time = min(wait_time, remaining)
+
+                try:
+                    await asyncio.wait_for(waiter.wait(), timeout=wait_time)
+                except asyncio.TimeoutError:
+                    retry_interval = min(retry_interval * 2, self.LOCK_RETRY_INTERVAL_MAX)
+                waiter.clear()
+
+        finally:
+            waiters = self._lock_waiters.get(key)
+            if waiters is not None:
+                if waiter in waiters:
+                    waiters.remove(waiter)
+                if not waiters:
+                    del self._lock_waiters[key]
+                elif waiter.is_set():
+                    # Уведомление досталось нам, но мы выходим (таймаут или отмена) -
+                    # передаем его следующему в очереди
+                    self._wake_lock_waiter(key)
+
+    def _wake_lock_waiter(self, key: str) -> None:
+        """
+        Разбудить первого ожидающего блокировку в этом процессе.
+
+        Будим только одного, чтобы освобождение не вызывало лавину
+        одновременных SET NX от всех ожидающих.
+        """
+        for waiter in self._lock_waiters.get(key, ()):
+            if not waiter.is_set():
+                waiter.set()
+                return
+
+    def _wake_all_lock_waiters(self) -> None:
+        """Разбудить всех ожидающих (при потере подписки они перейдут на опрос)"""
+        for waiters in self._lock_waiters.values():
+            for waiter in waiters:
+                waiter.set()
+
+    async def _ensure_lock_listener(self) -> None:
+        """Запустить (один раз на процесс) подписку на уведомления об освобождении блокировок"""
+        if self._lock_listener_task and not self._lock_listener_task.done():
+            return
+
+        try:
+            pubsub = self._redis.pubsub()
+            await pubsub.psubscribe(f"{Locks.RELEASED_CHANNEL}:*")
+        except Exception as e:
+            # Без подписки ожидание продолжит работать через опрос
+            logger.warning(f"Не удалось подписаться на освобождение блокировок: {e}")
+            return
+
+        self._lock_pubsub = pubsub
+        self._lock_listener_task = asyncio.create_task(self._listen_lock_releases(pubsub))
+        logger.debug("Подписка на освобождение блокировок запущена")
+
+    async def _listen_lock_releases(self, pubsub) -> None:
+        """Фоновая задача: раздает уведомления об освобождении ожидающим"""
+        prefix_len = len(Locks.RELEASED_CHANNEL) + 1
+        try:
+            async for message in pubsub.listen():
+                if message.get('type') != 'pmessage':
+                    continue
+                channel = message['channel']
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                self._wake_lock_waiter(channel[prefix_len:])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Подписка на освобождение блокировок прервана: {e}")
+            self._wake_all_lock_waiters()
+
+    async def _stop_lock_listener(self) -> None:
+        """Остановить подписку на уведомления об освобождении блокировок"""
+        task, self._lock_listener_task = self._lock_listener_task, None
+        pubsub, self._lock_pubsub = self._lock_pubsub, None
+
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+        if pubsub is not None:
+            try:
+                await pubsub.aclose()
+            except Exception as e:
+                logger.debug(f"Ошибка закрытия pub/sub блокировок: {e}")
+
+    def _register_scripts(self) -> None:
+        """
+        Зарегистрировать Lua скрипты блокировок (один раз на подключение).
+
+        Скрипты выполняются через EVALSHA; текст скрипта отправляется
+        на сервер только если он там еще не загружен (NOSCRIPT).
+        """
+        if self._release_script is not None and self._release_script.registered_client is self._redis:
+            return
+
+        self._release_script = self._redis.register_script(RELEASE_LOCK_SCRIPT)
+        self._extend_script = self._redis.register_script(EXTEND_LOCK_SCRIPT)
+
     async def is_locked(self, key: str) -> bool:
         """
         Проверить, существует ли блокировка.
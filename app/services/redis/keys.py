@@ -16,19 +16,83 @@ FSM_STATE_KEY = "state"
 class Locks:
     """Блокировки (добавлять по мере внедрения)"""
     PREFIX = "lock"
-    pass
+
+    # Канал pub/sub, в который публикуется ключ освобожденной блокировки.
+    # Ожидающие подписаны на шаблон RELEASED_CHANNEL:* и просыпаются сразу после release.
+    RELEASED_CHANNEL = "lock_released"
+
+    @staticmethod
+    def released_channel(key: str) -> str:
+        """Канал уведомления об освобождении конкретной блокировки"""
+        return f"{Locks.RELEASED_CHANNEL}:{key}"
 
 
 class Cache:
     """Кэширование (добавлять по мере внедрения)"""
     PREFIX = "cache"
-    pass
+
+    # Версия системных настроек (INCR при каждом изменении) и канал pub/sub,
+    # в который публикуется новая версия
+    SETTINGS_VERSION = f"{PREFIX}:settings:version"
+    SETTINGS_CHANNEL = f"{PREFIX}:settings:changed"
+
+    # Версия каталога экскурсий (INCR при каждом изменении экскурсии)
+    CATALOG_VERSION = f"{PREFIX}:catalog:version"
+
+    # Версия списка администраторов (INCR при смене ролей)
+    ADMIN_ROSTER_VERSION = f"{PREFIX}:admins:version"
+
+
+class Capacity:
+    """Счетчики занятости слотов (места и вес)"""
+    PREFIX = "capacity"
+
+    @staticmethod
+    def slot(slot_id: int) -> str:
+        """Hash счетчиков слота: people, weight и резервы участников u:<user_id>"""
+        return f"{Capacity.PREFIX}:slot:{slot_id}"
+
+    @staticmethod
+    def holds(slot_id: int) -> str:
+        """Sorted set временных резервов слота (score - время истечения)"""
+        return f"{Capacity.PREFIX}:holds:{slot_id}"
+
+
+class Payments:
+    """Дескрипторы выставленных счетов и версии статусов броней"""
+    PREFIX = "payment"
+
+    @staticmethod
+    def invoice(payment_id: int) -> str:
+        """Подписанный дескриптор счета (JSON)"""
+        return f"{Payments.PREFIX}:invoice:{payment_id}"
+
+    @staticmethod
+    def status_version(booking_id: int) -> str:
+        """Счетчик изменений статуса брони"""
+        return f"{Payments.PREFIX}:status_version:{booking_id}"
+
+    @staticmethod
+    def slot_version(slot_id: int) -> str:
+        """Счетчик изменений слота (перенос, отмена)"""
+        return f"{Payments.PREFIX}:slot_version:{slot_id}"
+
+    @staticmethod
+    def charge(charge_id: str) -> str:
+        """Ключ идемпотентности списания Telegram (telegram_payment_charge_id)"""
+        return f"{Payments.PREFIX}:charge:{charge_id}"
 
 
 class Queues:
     """Очереди задач (добавлять по мере внедрения)"""
     PREFIX = "queue"
-    pass
+
+    # Подтверждения успешных платежей и задачи, взятые воркером в работу
+    PAYMENT_CONFIRMATIONS = f"{PREFIX}:payment_confirmations"
+    PAYMENT_CONFIRMATIONS_PROCESSING = f"{PREFIX}:payment_confirmations:processing"
+    # Отложенные повторы (ZSET, score - время следующей попытки) и исчерпавшие попытки
+    PAYMENT_CONFIRMATIONS_RETRY = f"{PREFIX}:payment_confirmations:retry"
+    PAYMENT_CONFIRMATIONS_DEAD = f"{PREFIX}:payment_confirmations:dead"
 
 
 class Scheduled:
@@ -58,6 +122,8 @@ class RedisKeys:
 
     locks = Locks
     cache = Cache
+    capacity = Capacity
+    payments = Payments
     queues = Queues
     scheduled = Scheduled
     temp = Temp
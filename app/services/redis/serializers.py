@@ -33,14 +33,53 @@ def redis_object_hook(obj: Dict) -> Dict:
     return obj
 
 
+# Метка помеченных дат в JSON. Если ее нет в строке, object_hook не нужен:
+# проверка подстроки выполняется в C и дешевле вызова hook на каждый dict.
+DATE_TAG = '"__type__"'
+
+
+def _encode_default(obj: Any) -> Any:
+    """Преобразование date/datetime в помеченный dict (формат RedisJSONEncoder)"""
+    if isinstance(obj, (date, datetime)):
+        return {
+            '__type__': 'date',
+            'value': obj.isoformat()
+        }
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+# Энкодер и декодеры создаются один раз, а не на каждый вызов dumps/loads
+_encoder = json.JSONEncoder(
+    default=_encode_default,
+    ensure_ascii=False,
+    separators=(',', ':')
+)
+_decoder = json.JSONDecoder()
+_tagged_decoder = json.JSONDecoder(object_hook=redis_object_hook)
+
+
 def dumps(obj: Any) -> str:
-    """Сериализация объекта в JSON строку для Redis"""
-    return json.dumps(obj, cls=RedisJSONEncoder)
+    """
+    Сериализация объекта в JSON строку для Redis.
+
+    Компактный JSON без экранирования кириллицы; date/datetime
+    помечаются так же, как в RedisJSONEncoder.
+    """
+    return _encoder.encode(obj)
 
 
-def loads(data: str) -> Any:
-    """Десериализация JSON строки из Redis в объект Python"""
-    return json.loads(data, object_hook=redis_object_hook)
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Десериализация JSON строки из Redis в объект Python.
+
+    Понимает и прежний формат (RedisJSONEncoder с пробелами и \\u-экранированием).
+    object_hook подключается только если в данных есть помеченные даты.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode('utf-8')
+    if DATE_TAG in data:
+        return _tagged_decoder.decode(data)
+    return _decoder.decode(data)
 
 
 # Для обратной совместимости (если нужен простой encoder без object_hook)
@@ -0,0 +1,34 @@
+"""Клиент Redis с замером времени команд."""
+
+import time
+
+import redis.asyncio as aioredis
+
+from app.services.metrics.registry import metrics
+
+redis_command_duration = metrics.histogram(
+    "bot_redis_command_duration_seconds",
+    "Время выполнения команд Redis",
+    ("command",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+redis_command_errors = metrics.counter(
+    "bot_redis_command_errors_total",
+    "Ошибки команд Redis",
+    ("command",)
+)
+
+
+class TimedRedis(aioredis.Redis):
+    """Redis, который пишет время каждой команды в гистограмму"""
+
+    async def execute_command(self, *args, **options):
+        command = str(args[0]).upper() if args else "UNKNOWN"
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        except Exception:
+            redis_command_errors.inc(command=command)
+            raise
+        finally:
+            redis_command_duration.observe(time.perf_counter() - start, command=command)
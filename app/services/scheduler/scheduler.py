@@ -22,9 +22,11 @@ from .tasks import (
     send_excursion_reminder, send_payment_reminder,
     notify_admins_about_slots_without_captain, check_pending_refunds,
     retry_failed_refunds, check_and_complete_active_bookings,
-    process_pending_notifications, cancel_empty_slots
+    process_pending_notifications, cancel_empty_slots,
+    reconcile_slot_occupancy, rollup_daily_stats
 )
 from .bot_instance import set_bot_instance
+from .telemetry import setup_job_listeners, set_job_interval
 
 logger = get_logger(__name__)
 
@@ -188,9 +190,35 @@ class SchedulerService:
             next_run_time=datetime.now()
         )
 
+        # Сверка занятости слотов с бронированиями - каждый час
+        self.scheduler.add_job(
+            reconcile_slot_occupancy,
+            trigger=IntervalTrigger(hours=1),
+            id='reconcile_slot_occupancy',
+            replace_existing=True
+        )
+
+        # Пересчет дневной статистики за измененные дни - каждые 5 минут
+        self.scheduler.add_job(
+            rollup_daily_stats,
+            trigger=IntervalTrigger(minutes=5),
+            id='rollup_daily_stats',
+            replace_existing=True,
+            next_run_time=datetime.now()
+        )
+
+        self._record_job_intervals()
+        setup_job_listeners(self.scheduler)
+
         self.scheduler.start()
         logger.info("Планировщик запущен")
 
+    def _record_job_intervals(self):
+        """Передать интервалы задач в телеметрию"""
+        for job in self.scheduler.get_jobs():
+            interval = getattr(job.trigger, 'interval', None)
+            set_job_interval(job.id, interval.total_seconds() if interval else None)
+
 
     async def shutdown(self):
         """Остановка планировщика"""
@@ -1,59 +1,74 @@
 from datetime import datetime
 
 from .bot_instance import get_bot_instance
+from .telemetry import scheduled_job, record_items, record_lock_failure
 
-from app.services.redis import redis_client
+from app.services.redis import redis_client, LockLostError
 from app.database.unit_of_work import UnitOfWork
 from app.database.managers import (
     BookingManager, SlotManager, UserManager, PaymentManager
 )
 from app.database.repositories import (
-    RefundRepository, BookingRepository, SlotRepository, NotificationRepository
+    RefundRepository, BookingRepository, SlotRepository, NotificationRepository,
+    OutboxRepository, DailyStatsRepository
 )
 from app.database.models import SlotStatus, BookingStatus
 from app.database.session import async_session
+from app.database.slot_occupancy import find_drift, fix_drift
 from app.utils.logging_config import get_logger
 from app.utils.admin_notifications import notify_admins_about_refund_failure
 from app.services.notification_service import get_notification_service
+from app.services.outbox import outbox_dispatcher
+from app.services.send_scheduler import Priority, send_priority
 
 logger = get_logger(__name__)
 
+# TTL блокировок задач. Пока задача работает, блокировку продлевает watchdog,
+# поэтому TTL не зависит от длительности задачи и нужен только на случай падения процесса
+SCHEDULER_LOCK_TTL = 60
 
+# Сколько дней дневной статистики пересчитывается в одной транзакции
+DAILY_STATS_BATCH_DAYS = 31
+
+
+@scheduled_job("cancel_unpaid_bookings")
 async def auto_cancel_unpaid_bookings():
     """Автоотмена неоплаченных бронирований"""
     logger.info("Запуск автоотмены неоплаченных бронирований")
 
     lock_key = "scheduler:lock:cancel_unpaid"
-    token = await redis_client.acquire_lock(lock_key, timeout=300)
-
-    if not token:
-        logger.warning("Не удалось получить блокировку для автоотмены")
-        return
+    async with redis_client.held_lock(lock_key, timeout=SCHEDULER_LOCK_TTL) as lock:
+        if not lock:
+            record_lock_failure()
+            logger.warning("Не удалось получить блокировку для автоотмены")
+            return
 
-    async with async_session() as session:
-        async with UnitOfWork(session) as uow:
-            try:
-                booking_manager = BookingManager(session)
-                bookings = await booking_manager.get_expired_unpaid_bookings()
+        async with async_session() as session:
+            async with UnitOfWork(session) as uow:
+                try:
+                    booking_manager = BookingManager(session)
+                    outbox_repo = OutboxRepository(session)
+                    bookings = await booking_manager.get_expired_unpaid_bookings()
 
-                if not bookings:
-                    logger.debug("Нет просроченных неоплаченных бронирований")
-                    return
+                    if not bookings:
+                        logger.debug("Нет просроченных неоплаченных бронирований")
+                        return
 
-                logger.info(f"Найдено бронирований для отмены: {len(bookings)}")
+                    logger.info(f"Найдено бронирований для отмены: {len(bookings)}")
+                    record_items(len(bookings))
 
-                for booking in bookings:
-                    success, message, refund_data = await booking_manager.cancel_booking(
-                        booking_id=booking.id,
-                        auto_refund=False
-                    )
+                    for booking in bookings:
+                        lock.ensure_held()
+                        success, message, refund_data = await booking_manager.cancel_booking(
+                            booking_id=booking.id,
+                            auto_refund=False
+                        )
 
-                    if success:
-                        logger.info(f"Отменено бронирование #{booking.id}")
-                        _bot_instance = get_bot_instance()
-                        if booking.adult_user.telegram_id and _bot_instance:
-                            try:
-                                await _bot_instance.send_message(
+                        if success:
+                            logger.info(f"Отменено бронирование #{booking.id}")
+                            if booking.adult_user.telegram_id:
+                                # Уведомление уходит из outbox после commit
+                                await outbox_repo.enqueue(
                                     chat_id=booking.adult_user.telegram_id,
                                     text=(
                                         f"Бронирование отменено\n\n"
@@ -62,187 +77,201 @@ async def auto_cancel_unpaid_bookings():
                                         f"{booking.slot.start_datetime.strftime('%d.%m.%Y %H:%M')} "
                                         f"было автоматически отменено, так как не было оплачено "
                                         f"в течение 24 часов."
-                                    )
+                                    ),
+                                    dedup_key=f"auto_cancel:{booking.id}"
                                 )
-                            except Exception as e:
-                                logger.error(f"Ошибка отправки уведомления: {e}")
+                            else:
+                                logger.info(f"Ошибка отправки уведомления:"
+                                            f"Клиент с номером телефона {booking.adult_user.phone_number} "
+                                            f"не имеет TelegramID в базе данных")
                         else:
-                            logger.info(f"Ошибка отправки уведомления:"
-                                        f"Клиент с номером телефона {booking.adult_user.phone_number} "
-                                        f"не имеет TelegramID в базе данных")
-                    else:
-                        logger.error(f"Не удалось отменить бронирование #{booking.id}: {message}")
+                            logger.error(f"Не удалось отменить бронирование #{booking.id}: {message}")
 
-                logger.info(f"Автоотмена неоплаченных бронирований завершена, обработано: {len(bookings)}")
+                    logger.info(f"Автоотмена неоплаченных бронирований завершена, обработано: {len(bookings)}")
+                    await uow.commit()
+                    outbox_dispatcher.wake()
 
-            except Exception as e:
-                logger.error(f"Ошибка при автоотмене: {e}", exc_info=True)
-                raise
-            finally:
-                await redis_client.release_lock(lock_key, token)
+                except LockLostError as e:
+                    logger.warning(f"Автоотмена прервана: {e}")
+                except Exception as e:
+                    logger.error(f"Ошибка при автоотмене: {e}", exc_info=True)
+                    raise
 
 
+@scheduled_job("send_payment_reminder")
 async def send_payment_reminder():
     """Напоминание об оплате за час до дедлайна"""
     logger.info("Запуск напоминаний об оплате")
 
     lock_key = "scheduler:lock:payment_reminder"
-    token = await redis_client.acquire_lock(lock_key, timeout=300)
+    async with redis_client.held_lock(lock_key, timeout=SCHEDULER_LOCK_TTL) as lock:
+        if not lock:
+            record_lock_failure()
+            logger.warning("Не удалось получить блокировку для напоминаний об оплате")
+            return
 
-    if not token:
-        logger.warning("Не удалось получить блокировку для напоминаний об оплате")
-        return
-
-    async with async_session() as session:
-        async with UnitOfWork(session) as uow:
-            try:
-                booking_manager = BookingManager(session)
-                bookings_with_deadline = await booking_manager.get_bookings_for_payment_reminder()
+        async with async_session() as session:
+            async with UnitOfWork(session) as uow:
+                try:
+                    booking_manager = BookingManager(session)
+                    bookings_with_deadline = await booking_manager.get_bookings_for_payment_reminder()
 
-                if not bookings_with_deadline:
-                    logger.debug("Нет бронирований для напоминания об оплате")
-                    return
+                    if not bookings_with_deadline:
+                        logger.debug("Нет бронирований для напоминания об оплате")
+                        return
 
-                logger.info(f"Найдено бронирований для напоминания: {len(bookings_with_deadline)}")
+                    logger.info(f"Найдено бронирований для напоминания: {len(bookings_with_deadline)}")
+                    record_items(len(bookings_with_deadline))
 
-                for booking, deadline in bookings_with_deadline:
-                    # Проверяем, не отправляли ли уже напоминание для этого бронирования
-                    reminder_key = f"reminder:payment:{booking.id}"
-                    already_sent = await redis_client.client.get(reminder_key)
+                    for booking, deadline in bookings_with_deadline:
+                        lock.ensure_held()
+                        # Проверяем, не отправляли ли уже напоминание для этого бронирования
+                        reminder_key = f"reminder:payment:{booking.id}"
+                        already_sent = await redis_client.client.get(reminder_key)
 
-                    if already_sent:
-                        logger.debug(f"Напоминание об оплате #{booking.id} уже отправлено ранее")
-                        continue
-                    _bot_instance = get_bot_instance()
-                    if booking.adult_user.telegram_id and _bot_instance:
-                        try:
-                            minutes_until_deadline = int((deadline - datetime.now()).total_seconds() / 60)
-
-                            await _bot_instance.send_message(
-                                chat_id=booking.adult_user.telegram_id,
-                                text=(
-                                    f"Напоминание об оплате\n\n"
-                                    f"У вас осталось {minutes_until_deadline} минут на оплату экскурсии "
-                                    f"{booking.slot.excursion.name} "
-                                    f"{booking.slot.start_datetime.strftime('%d.%m.%Y %H:%M')}.\n\n"
-                                    f"Если не оплатить вовремя, бронь будет автоматически отменена."
-                                )
-                            )
+                        if already_sent:
+                            logger.debug(f"Напоминание об оплате #{booking.id} уже отправлено ранее")
+                            continue
+                        _bot_instance = get_bot_instance()
+                        if booking.adult_user.telegram_id and _bot_instance:
+                            try:
+                                minutes_until_deadline = int((deadline - datetime.now()).total_seconds() / 60)
+
+                                with send_priority(Priority.reminder):
+                                    await _bot_instance.send_message(
+                                        chat_id=booking.adult_user.telegram_id,
+                                        text=(
+                                            f"Напоминание об оплате\n\n"
+                                            f"У вас осталось {minutes_until_deadline} минут на оплату экскурсии "
+                                            f"{booking.slot.excursion.name} "
+                                            f"{booking.slot.start_datetime.strftime('%d.%m.%Y %H:%M')}.\n\n"
+                                            f"Если не оплатить вовремя, бронь будет автоматически отменена."
+                                        )
+                                    )
 
-                            # Сохраняем флаг отправки на 24 часа
-                            await redis_client.client.setex(reminder_key, 86400, "1")
-                            logger.info(f"Напоминание об оплате отправлено #{booking.id}")
+                                # Сохраняем флаг отправки на 24 часа
+                                await redis_client.client.setex(reminder_key, 86400, "1")
+                                logger.info(f"Напоминание об оплате отправлено #{booking.id}")
 
-                        except Exception as e:
-                            logger.error(f"Ошибка отправки напоминания: {e}")
+                            except Exception as e:
+                                logger.error(f"Ошибка отправки напоминания: {e}")
 
-            except Exception as e:
-                logger.error(f"Ошибка при отправке напоминаний об оплате: {e}", exc_info=True)
-            finally:
-                await redis_client.release_lock(lock_key, token)
+                except LockLostError as e:
+                    logger.warning(f"Напоминания об оплате прерваны: {e}")
+                except Exception as e:
+                    logger.error(f"Ошибка при отправке напоминаний об оплате: {e}", exc_info=True)
 
 
+@scheduled_job("send_excursion_reminder")
 async def send_excursion_reminder():
     """Напоминание об экскурсии за 24 часа"""
     logger.info("Запуск напоминаний об экскурсиях")
 
     lock_key = "scheduler:lock:excursion_reminder"
-    token = await redis_client.acquire_lock(lock_key, timeout=300)
+    async with redis_client.held_lock(lock_key, timeout=SCHEDULER_LOCK_TTL) as lock:
+        if not lock:
+            record_lock_failure()
+            logger.warning("Не удалось получить блокировку для напоминаний об экскурсиях")
+            return
 
-    if not token:
-        logger.warning("Не удалось получить блокировку для напоминаний об экскурсиях")
-        return
+        async with async_session() as session:
+            async with UnitOfWork(session) as uow:
+                try:
+                    booking_manager = BookingManager(session)
+                    bookings = await booking_manager.get_paid_bookings_for_reminder(hours_before=24)
 
-    async with async_session() as session:
-        async with UnitOfWork(session) as uow:
-            try:
-                booking_manager = BookingManager(session)
-                bookings = await booking_manager.get_paid_bookings_for_reminder(hours_before=24)
+                    if not bookings:
+                        logger.debug("Нет бронирований для напоминания об экскурсиях")
+                        return
 
-                if not bookings:
-                    logger.debug("Нет бронирований для напоминания об экскурсиях")
-                    return
+                    logger.info(f"Найдено бронирований для напоминания: {len(bookings)}")
+                    record_items(len(bookings))
 
-                logger.info(f"Найдено бронирований для напоминания: {len(bookings)}")
+                    for booking in bookings:
+                        lock.ensure_held()
+                        # Проверяем, не отправляли ли уже напоминание
+                        reminder_key = f"reminder:excursion:{booking.id}"
+                        already_sent = await redis_client.client.get(reminder_key)
 
-                for booking in bookings:
-                    # Проверяем, не отправляли ли уже напоминание
-                    reminder_key = f"reminder:excursion:{booking.id}"
-                    already_sent = await redis_client.client.get(reminder_key)
+                        if already_sent:
+                            logger.debug(f"Напоминание об экскурсии #{booking.id} уже отправлено ранее")
+                            continue
 
-                    if already_sent:
-                        logger.debug(f"Напоминание об экскурсии #{booking.id} уже отправлено ранее")
-                        continue
-
-                    _bot_instance = get_bot_instance()
-                    if booking.adult_user.telegram_id and _bot_instance:
-                        try:
-                            excursion_time = booking.slot.start_datetime.strftime('%d.%m.%Y %H:%M')
-
-                            await _bot_instance.send_message(
-                                chat_id=booking.adult_user.telegram_id,
-                                text=(
-                                    f"Напоминание об экскурсии\n\n"
-                                    f"Завтра в {excursion_time} у вас запланирована экскурсия "
-                                    f"{booking.slot.excursion.name}.\n\n"
-                                    f"Не забудьте прийти вовремя!"
-                                )
-                            )
+                        _bot_instance = get_bot_instance()
+                        if booking.adult_user.telegram_id and _bot_instance:
+                            try:
+                                excursion_time = booking.slot.start_datetime.strftime('%d.%m.%Y %H:%M')
+
+                                with send_priority(Priority.reminder):
+                                    await _bot_instance.send_message(
+                                        chat_id=booking.adult_user.telegram_id,
+                                        text=(
+                                            f"Напоминание об экскурсии\n\n"
+                                            f"Завтра в {excursion_time} у вас запланирована экскурсия "
+                                            f"{booking.slot.excursion.name}.\n\n"
+                                            f"Не забудьте прийти вовремя!"
+                                        )
+                                    )
 
-                            # Сохраняем флаг отправки на 24 часа
-                            await redis_client.client.setex(reminder_key, 86400, "1")
-                            logger.info(f"Напоминание об экскурсии отправлено #{booking.id}")
+                                # Сохраняем флаг отправки на 24 часа
+                                await redis_client.client.setex(reminder_key, 86400, "1")
+                                logger.info(f"Напоминание об экскурсии отправлено #{booking.id}")
 
-                        except Exception as e:
-                            logger.error(f"Ошибка отправки напоминания: {e}")
+                            except Exception as e:
+                                logger.error(f"Ошибка отправки напоминания: {e}")
 
-            except Exception as e:
-                logger.error(f"Ошибка при отправке напоминаний об экскурсиях: {e}", exc_info=True)
-            finally:
-                await redis_client.release_lock(lock_key, token)
+                except LockLostError as e:
+                    logger.warning(f"Напоминания об экскурсиях прерваны: {e}")
+                except Exception as e:
+                    logger.error(f"Ошибка при отправке напоминаний об экскурсиях: {e}", exc_info=True)
 
 
+@scheduled_job("auto_complete_excursions")
 async def auto_complete_excursions():
     """Автозавершение слотов"""
     logger.info("Запуск автозавершения слотов")
 
     lock_key = "scheduler:lock:auto_complete"
-    token = await redis_client.acquire_lock(lock_key, timeout=300)
-
-    if not token:
-        logger.warning("Не удалось получить блокировку для автозавершения слотов")
-        return
+    async with redis_client.held_lock(lock_key, timeout=SCHEDULER_LOCK_TTL) as lock:
+        if not lock:
+            record_lock_failure()
+            logger.warning("Не удалось получить блокировку для автозавершения слотов")
+            return
 
-    async with async_session() as session:
-        async with UnitOfWork(session) as uow:
-            try:
-                slot_manager = SlotManager(session)
-
-                # Слоты для перевода в in_progress
-                slots_to_start = await slot_manager.get_slots_to_start()
-                for slot in slots_to_start:
-                    await slot_manager.slot_repo.update_status(slot.id, SlotStatus.in_progress)
-                    logger.info(f"Слот #{slot.id} переведен в статус in_progress")
-
-                # Слоты для перевода в completed
-                slots_to_complete = await slot_manager.get_slots_to_complete()
-                for slot in slots_to_complete:
-                    old_status = slot.status
-                    await slot_manager.slot_repo.update_status(slot.id, SlotStatus.completed)
-                    logger.info(f"Слот #{slot.id} переведен из {old_status} в completed")
-
-                if slots_to_start or slots_to_complete:
-                    logger.info(f"Автозавершение слотов выполнено: {len(slots_to_start)} в in_progress, {len(slots_to_complete)} в completed")
-                else:
-                    logger.debug("Нет слотов для обновления статуса")
+        async with async_session() as session:
+            async with UnitOfWork(session) as uow:
+                try:
+                    slot_manager = SlotManager(session)
+
+                    # Слоты для перевода в in_progress
+                    slots_to_start = await slot_manager.get_slots_to_start()
+                    for slot in slots_to_start:
+                        lock.ensure_held()
+                        await slot_manager.slot_repo.update_status(slot.id, SlotStatus.in_progress)
+                        logger.info(f"Слот #{slot.id} переведен в статус in_progress")
+
+                    # Слоты для перевода в completed
+                    slots_to_complete = await slot_manager.get_slots_to_complete()
+                    for slot in slots_to_complete:
+                        lock.ensure_held()
+                        old_status = slot.status
+                        await slot_manager.slot_repo.update_status(slot.id, SlotStatus.completed)
+                        logger.info(f"Слот #{slot.id} переведен из {old_status} в completed")
+
+                    record_items(len(slots_to_start) + len(slots_to_complete))
+                    if slots_to_start or slots_to_complete:
+                        logger.info(f"Автозавершение слотов выполнено: {len(slots_to_start)} в in_progress, {len(slots_to_complete)} в completed")
+                    else:
+                        logger.debug("Нет слотов для обновления статуса")
 
-            except Exception as e:
-                logger.error(f"Ошибка при автозавершении слотов: {e}", exc_info=True)
-                raise
-            finally:
-                await redis_client.release_lock(lock_key, token)
+                except LockLostError as e:
+                    logger.warning(f"Автозавершение слотов прервано: {e}")
+                except Exception as e:
+                    logger.error(f"Ошибка при автозавершении слотов: {e}", exc_info=True)
+                    raise
 
 
+@scheduled_job("notify_admins_about_slots_without_captain")
 async def notify_admins_about_slots_without_captain():
     """
     Уведомление администраторов о слотах без капитана за 48 часов до начала
@@ -251,95 +280,99 @@ async def notify_admins_about_slots_without_captain():
     logger.info("Запуск проверки слотов без капитана")
 
     lock_key = "scheduler:lock:no_captain_notify"
-    token = await redis_client.acquire_lock(lock_key, timeout=300)
+    async with redis_client.held_lock(lock_key, timeout=SCHEDULER_LOCK_TTL) as lock:
+        if not lock:
+            record_lock_failure()
+            logger.warning("Не удалось получить блокировку для уведомлений о слотах без капитана")
+            return
 
-    if not token:
-        logger.warning("Не удалось получить блокировку для уведомлений о слотах без капитана")
-        return
+        async with async_session() as session:
+            async with UnitOfWork(session) as uow:
+                try:
+                    slot_manager = SlotManager(session)
+                    user_manager = UserManager(session)
 
-    async with async_session() as session:
-        async with UnitOfWork(session) as uow:
-            try:
-                slot_manager = SlotManager(session)
-                user_manager = UserManager(session)
+                    # Ищем слоты без капитана за 48 часов до начала
+                    slots_without_captain = await slot_manager.get_slots_without_captain(hours_before=48)
 
-                # Ищем слоты без капитана за 48 часов до начала
-                slots_without_captain = await slot_manager.get_slots_without_captain(hours_before=48)
+                    if not slots_without_captain:
+                        logger.debug("Нет слотов без капитана для уведомления")
+                        return
 
-                if not slots_without_captain:
-                    logger.debug("Нет слотов без капитана для уведомления")
-                    return
+                    logger.info(f"Найдено слотов без капитана: {len(slots_without_captain)}")
+                    record_items(len(slots_without_captain))
 
-                logger.info(f"Найдено слотов без капитана: {len(slots_without_captain)}")
+                    # Получаем всех администраторов
+                    admins = await user_manager.get_all_admins()
 
-                # Получаем всех администраторов
-                admins = await user_manager.get_all_admins()
+                    if not admins:
+                        logger.warning("Нет администраторов для отправки уведомлений")
+                        return
 
-                if not admins:
-                    logger.warning("Нет администраторов для отправки уведомлений")
-                    return
+                    # Группируем слоты по датам для более компактного сообщения
+                    slots_by_date = {}
+                    for slot in slots_without_captain:
+                        date_key = slot.start_datetime.strftime('%d.%m.%Y')
+                        if date_key not in slots_by_date:
+                            slots_by_date[date_key] = []
+                        slots_by_date[date_key].append(slot)
 
-                # Группируем слоты по датам для более компактного сообщения
-                slots_by_date = {}
-                for slot in slots_without_captain:
-                    date_key = slot.start_datetime.strftime('%d.%m.%Y')
-                    if date_key not in slots_by_date:
-                        slots_by_date[date_key] = []
-                    slots_by_date[date_key].append(slot)
-
-                _bot_instance = get_bot_instance()
-                if not _bot_instance:
-                    logger.error("Не удалось получить экземпляр бота")
-                    return
+                    _bot_instance = get_bot_instance()
+                    if not _bot_instance:
+                        logger.error("Не удалось получить экземпляр бота")
+                        return
 
-                # Формируем и отправляем сообщение каждому администратору
-                for admin in admins:
-                    if not admin.telegram_id:
-                        logger.debug(f"Администратор {admin.id} не имеет telegram_id")
-                        continue
+                    # Формируем и отправляем сообщение каждому администратору
+                    for admin in admins:
+                        lock.ensure_held()
+                        if not admin.telegram_id:
+                            logger.debug(f"Администратор {admin.id} не имеет telegram_id")
+                            continue
 
-                    # Проверяем, не отправляли ли уже уведомление для этих слотов
-                    # Ключ обновляется раз в 6 часов
-                    notification_key = f"notification:no_captain:{datetime.now().strftime('%Y%m%d%H')}"
-                    already_sent = await redis_client.client.get(notification_key)
+                        # Проверяем, не отправляли ли уже уведомление для этих слотов
+                        # Ключ обновляется раз в 6 часов
+                        notification_key = f"notification:no_captain:{datetime.now().strftime('%Y%m%d%H')}"
+                        already_sent = await redis_client.client.get(notification_key)
 
-                    if already_sent:
-                        logger.debug("Уведомление о слотах без капитана уже отправлено в последние 6 часов")
-                        return
+                        if already_sent:
+                            logger.debug("Уведомление о слотах без капитана уже отправлено в последние 6 часов")
+                            return
 
-                    # Формируем текст сообщения
-                    message_text = "ВНИМАНИЕ! Слоты без капитана\n\n"
-                    message_text += "Следующие экскурсии начнутся менее чем через 48 часов, но на них не назначен капитан:\n\n"
+                        # Формируем текст сообщения
+                        message_text = "ВНИМАНИЕ! Слоты без капитана\n\n"
+                        message_text += "Следующие экскурсии начнутся менее чем через 48 часов, но на них не назначен капитан:\n\n"
 
-                    for date_key, slots in slots_by_date.items():
-                        message_text += f"{date_key}:\n"
-                        for slot in slots:
-                            time_str = slot.start_datetime.strftime('%H:%M')
-                            message_text += f"  • {time_str} - {slot.excursion.name} "
-                            message_text += f"(ID: {slot.id})\n"
-                        message_text += "\n"
+                        for date_key, slots in slots_by_date.items():
+                            message_text += f"{date_key}:\n"
+                            for slot in slots:
+                                time_str = slot.start_datetime.strftime('%H:%M')
+                                message_text += f"  • {time_str} - {slot.excursion.name} "
+                                message_text += f"(ID: {slot.id})\n"
+                            message_text += "\n"
 
-                    message_text += "Не забудьте назначить капитанов!"
+                        message_text += "Не забудьте назначить капитанов!"
 
-                    try:
-                        await _bot_instance.send_message(
-                            chat_id=admin.telegram_id,
-                            text=message_text
-                        )
-                        logger.info(f"Уведомление о слотах без капитана отправлено администратору {admin.telegram_id}")
+                        try:
+                            with send_priority(Priority.reminder):
+                                await _bot_instance.send_message(
+                                    chat_id=admin.telegram_id,
+                                    text=message_text
+                                )
+                            logger.info(f"Уведомление о слотах без капитана отправлено администратору {admin.telegram_id}")
 
-                        # Сохраняем флаг отправки на 6 часов (21600 секунд)
-                        await redis_client.client.setex(notification_key, 21600, "1")
+                            # Сохраняем флаг отправки на 6 часов (21600 секунд)
+                            await redis_client.client.setex(notification_key, 21600, "1")
 
-                    except Exception as e:
-                        logger.error(f"Ошибка отправки уведомления администратору {admin.telegram_id}: {e}")
+                        except Exception as e:
+                            logger.error(f"Ошибка отправки уведомления администратору {admin.telegram_id}: {e}")
 
-            except Exception as e:
-                logger.error(f"Ошибка при уведомлении о слотах без капитана: {e}", exc_info=True)
-            finally:
-                await redis_client.release_lock(lock_key, token)
+                except LockLostError as e:
+                    logger.warning(f"Уведомления о слотах без капитана прерваны: {e}")
+                except Exception as e:
+                    logger.error(f"Ошибка при уведомлении о слотах без капитана: {e}", exc_info=True)
 
 
+@scheduled_job("check_pending_refunds")
 async def check_pending_refunds():
     """
     Периодическая проверка статусов возвратов.
@@ -362,6 +395,7 @@ async def check_pending_refunds():
                 return
 
             logger.info(f"Найдено {len(processing_refunds)} возвратов для проверки")
+            record_items(len(processing_refunds))
 
             for refund in processing_refunds:
                 try:
@@ -379,6 +413,7 @@ async def check_pending_refunds():
         logger.error(f"Ошибка в задаче проверки возвратов: {e}", exc_info=True)
 
 
+@scheduled_job("retry_failed_refunds")
 async def retry_failed_refunds():
     """
     Повторная обработка возвратов, которые не удалось создать.
@@ -398,6 +433,7 @@ async def retry_failed_refunds():
                 return
 
             logger.info(f"Найдено {len(failed_refunds)} возвратов для повторной обработки")
+            record_items(len(failed_refunds))
 
             bot = get_bot_instance()
 
@@ -433,10 +469,9 @@ async def retry_failed_refunds():
                         if bot:
                             await notify_admins_about_refund_failure(
                                 bot=bot,
-                                session=session,
-                                refund_id=refund.id,
                                 booking_id=refund.booking_id,
-                                error_message=message
+                                error_message=message,
+                                refund_id=refund.id
                             )
 
                 except Exception as e:
@@ -448,6 +483,7 @@ async def retry_failed_refunds():
         logger.error(f"Ошибка в задаче повторной обработки возвратов: {e}", exc_info=True)
 
 
+@scheduled_job("check_and_complete_active_bookings")
 async def check_and_complete_active_bookings():
     """
     Проверяет активные бронирования и переводит в статус completed,
@@ -488,80 +524,163 @@ async def check_and_complete_active_bookings():
                     logger.info(f"Бронирование {booking.id} переведено в статус completed (слот {slot.id} закончился в {slot.end_datetime})")
 
             await uow.commit()
+            record_items(completed_count)
             logger.info(f"Проверка завершена. Переведено в completed: {completed_count} бронирований")
 
 
+@scheduled_job("process_pending_notifications")
 async def process_pending_notifications():
     """Обработка ожидающих массовых рассылок"""
     logger.info("Запуск обработки ожидающих рассылок")
 
     lock_key = "scheduler:lock:pending_notifications"
-    token = await redis_client.acquire_lock(lock_key, timeout=600)  # 10 минут на всю рассылку
+    async with redis_client.held_lock(lock_key, timeout=SCHEDULER_LOCK_TTL) as lock:
+        if not lock:
+            record_lock_failure()
+            logger.warning("Не удалось получить блокировку для обработки рассылок")
+            return
 
-    if not token:
-        logger.warning("Не удалось получить блокировку для обработки рассылок")
-        return
-
-    async with async_session() as session:
-        try:
-            repo = NotificationRepository(session)
-            pending = await repo.get_pending_notifications()
+        async with async_session() as session:
+            try:
+                repo = NotificationRepository(session)
+                pending = await repo.get_pending_notifications()
 
-            if not pending:
-                logger.debug("Нет ожидающих рассылок")
-                return
+                if not pending:
+                    logger.debug("Нет ожидающих рассылок")
+                    return
 
-            logger.info(f"Найдено {len(pending)} ожидающих рассылок")
+                logger.info(f"Найдено {len(pending)} ожидающих рассылок")
+                record_items(len(pending))
 
-            notification_service = get_notification_service()
-            if not notification_service:
-                logger.error("NotificationService не инициализирован")
-                return
+                notification_service = get_notification_service()
+                if not notification_service:
+                    logger.error("NotificationService не инициализирован")
+                    return
 
-            for notification in pending:
-                logger.info(f"Запуск рассылки #{notification.id} для аудитории {notification.audience_type.value}")
-                await notification_service.send_mass_notification(
-                    notification_id=notification.id,
-                    audience_type=notification.audience_type
-                )
+                for notification in pending:
+                    lock.ensure_held()
+                    logger.info(f"Запуск рассылки #{notification.id} для аудитории {notification.audience_type.value}")
+                    await notification_service.send_mass_notification(
+                        notification_id=notification.id,
+                        audience_type=notification.audience_type
+                    )
 
-        except Exception as e:
-            logger.error(f"Ошибка при обработке рассылок: {e}", exc_info=True)
-        finally:
-            await redis_client.release_lock(lock_key, token)
+            except LockLostError as e:
+                logger.warning(f"Обработка рассылок прервана: {e}")
+            except Exception as e:
+                logger.error(f"Ошибка при обработке рассылок: {e}", exc_info=True)
 
 
+@scheduled_job("cancel_empty_slots")
 async def cancel_empty_slots():
     """Отмена слотов без активных бронирований"""
     logger.info("Запуск отмены пустых слотов")
 
     lock_key = "scheduler:lock:cancel_empty_slots"
-    token = await redis_client.acquire_lock(lock_key, timeout=300)
+    async with redis_client.held_lock(lock_key, timeout=SCHEDULER_LOCK_TTL) as lock:
+        if not lock:
+            record_lock_failure()
+            logger.warning("Не удалось получить блокировку для отмены пустых слотов")
+            return
+
+        async with async_session() as session:
+            async with UnitOfWork(session) as uow:
+                try:
+                    slot_manager = SlotManager(session)
+                    empty_slots = await slot_manager.get_empty_slots_to_cancel()
 
-    if not token:
-        logger.warning("Не удалось получить блокировку для отмены пустых слотов")
-        return
+                    if not empty_slots:
+                        logger.debug("Нет пустых слотов для отмены")
+                        return
 
-    async with async_session() as session:
-        async with UnitOfWork(session) as uow:
-            try:
-                slot_manager = SlotManager(session)
-                empty_slots = await slot_manager.get_empty_slots_to_cancel()
+                    logger.info(f"Найдено пустых слотов для отмены: {len(empty_slots)}")
+                    record_items(len(empty_slots))
 
-                if not empty_slots:
-                    logger.debug("Нет пустых слотов для отмены")
-                    return
+                    for slot in empty_slots:
+                        lock.ensure_held()
+                        await slot_manager.slot_repo.update_status(slot.id, SlotStatus.cancelled)
+                        logger.info(f"Слот #{slot.id} ({slot.excursion.name}, {slot.start_datetime}) отменён: нет активных бронирований")
 
-                logger.info(f"Найдено пустых слотов для отмены: {len(empty_slots)}")
+                    logger.info(f"Отмена пустых слотов завершена, обработано: {len(empty_slots)}")
 
-                for slot in empty_slots:
-                    await slot_manager.slot_repo.update_status(slot.id, SlotStatus.cancelled)
-                    logger.info(f"Слот #{slot.id} ({slot.excursion.name}, {slot.start_datetime}) отменён: нет активных бронирований")
+                except LockLostError as e:
+                    logger.warning(f"Отмена пустых слотов прервана: {e}")
+                except Exception as e:
+                    logger.error(f"Ошибка при отмене пустых слотов: {e}", exc_info=True)
+                    raise
 
-                logger.info(f"Отмена пустых слотов завершена, обработано: {len(empty_slots)}")
 
-            except Exception as e:
-                logger.error(f"Ошибка при отмене пустых слотов: {e}", exc_info=True)
-                raise
-            finally:
-                await redis_client.release_lock(lock_key, token)
\ No newline at end of file
+@scheduled_job("reconcile_slot_occupancy")
+async def reconcile_slot_occupancy():
+    """Сверка столбцов занятости слотов с активными бронированиями"""
+    logger.info("Запуск сверки занятости слотов")
+
+    lock_key = "scheduler:lock:reconcile_slot_occupancy"
+    async with redis_client.held_lock(lock_key, timeout=SCHEDULER_LOCK_TTL) as lock:
+        if not lock:
+            record_lock_failure()
+            logger.warning("Не удалось получить блокировку для сверки занятости слотов")
+            return
+
+        async with async_session() as session:
+            async with UnitOfWork(session):
+                try:
+                    drift = await find_drift(session)
+                    if not drift:
+                        logger.debug("Занятость слотов совпадает с бронированиями")
+                        return
+
+                    record_items(len(drift))
+                    for slot_id, (people, weight, actual_people, actual_weight) in drift.items():
+                        logger.warning(
+                            f"Расхождение занятости слота #{slot_id}: "
+                            f"людей {people} -> {actual_people}, вес {weight} -> {actual_weight}"
+                        )
+
+                    lock.ensure_held()
+                    await fix_drift(session, drift)
+                    logger.info(f"Занятость исправлена для слотов: {len(drift)}")
+
+                except LockLostError as e:
+                    logger.warning(f"Сверка занятости слотов прервана: {e}")
+                except Exception as e:
+                    logger.error(f"Ошибка при сверке занятости слотов: {e}", exc_info=True)
+                    raise
+
+
+@scheduled_job("rollup_daily_stats")
+async def rollup_daily_stats():
+    """Пересчет дневной статистики за дни из очереди daily_stats_dirty"""
+    logger.debug("Запуск пересчета дневной статистики")
+
+    lock_key = "scheduler:lock:rollup_daily_stats"
+    async with redis_client.held_lock(lock_key, timeout=SCHEDULER_LOCK_TTL) as lock:
+        if not lock:
+            record_lock_failure()
+            logger.warning("Не удалось получить блокировку для пересчета дневной статистики")
+            return
+
+        total = 0
+        try:
+            while True:
+                lock.ensure_held()
+                async with async_session() as session:
+                    async with UnitOfWork(session):
+                        stats_repo = DailyStatsRepository(session)
+                        days = await stats_repo.get_dirty_dates(DAILY_STATS_BATCH_DAYS)
+                        if not days:
+                            break
+                        await stats_repo.rebuild(days)
+
+                total += len(days)
+                record_items(len(days))
+                logger.debug(f"Дневная статистика пересчитана: {days[0]} - {days[-1]}")
+
+            if total:
+                logger.info(f"Пересчет дневной статистики завершен, дней: {total}")
+
+        except LockLostError as e:
+            logger.warning(f"Пересчет дневной статистики прерван: {e}")
+        except Exception as e:
+            logger.error(f"Ошибка при пересчете дневной статистики: {e}", exc_info=True)
+            raise
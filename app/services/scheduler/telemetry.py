@@ -0,0 +1,266 @@
+"""
+Телеметрия задач планировщика.
+
+Обертка scheduled_job() вокруг каждой задачи считает длительность запуска,
+обработанные элементы, неудачные попытки взять блокировку и исключения.
+Слушатели APScheduler добавляют пропущенные запуски (misfire), запуски,
+отброшенные из-за max_instances, и задержку старта относительно расписания.
+
+Данные попадают в реестр метрик и в снимок get_job_stats() для команды /jobs.
+"""
+
+import functools
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from apscheduler.events import (
+    EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+)
+
+from app.database.instrumentation import track_queries
+from app.services.metrics import metrics
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Статусы запуска
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_LOCKED = "lock_failed"
+
+JOB_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+job_duration = metrics.histogram(
+    "bot_job_duration_seconds", "Длительность запуска задачи", ("job",), buckets=JOB_BUCKETS
+)
+job_start_delay = metrics.histogram(
+    "bot_job_start_delay_seconds", "Задержка старта задачи относительно расписания", ("job",)
+)
+job_runs = metrics.counter(
+    "bot_job_runs_total", "Запуски задач по статусу", ("job", "status")
+)
+job_items = metrics.counter(
+    "bot_job_items_total", "Элементы, обработанные задачей", ("job",)
+)
+job_lock_failures = metrics.counter(
+    "bot_job_lock_failures_total", "Не удалось получить блокировку задачи", ("job",)
+)
+job_misfires = metrics.counter(
+    "bot_job_misfires_total", "Пропущенные запуски (misfire)", ("job",)
+)
+job_skipped = metrics.counter(
+    "bot_job_skipped_total", "Запуски, отброшенные из-за max_instances", ("job",)
+)
+job_running = metrics.gauge(
+    "bot_job_running", "Выполняющиеся экземпляры задачи", ("job",)
+)
+job_last_duration = metrics.gauge(
+    "bot_job_last_duration_seconds", "Длительность последнего запуска", ("job",)
+)
+job_interval = metrics.gauge(
+    "bot_job_interval_seconds", "Интервал запуска задачи", ("job",)
+)
+
+
+class JobStats:
+    """Накопленная статистика одной задачи"""
+
+    __slots__ = (
+        "runs", "errors", "total_time", "last_duration", "max_duration",
+        "last_started", "last_status", "last_error", "last_items", "items",
+        "lock_failures", "misfires", "skipped", "running", "interval"
+    )
+
+    def __init__(self):
+        self.runs = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.last_duration: Optional[float] = None
+        self.max_duration = 0.0
+        self.last_started: Optional[datetime] = None
+        self.last_status: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_items = 0
+        self.items = 0
+        self.lock_failures = 0
+        self.misfires = 0
+        self.skipped = 0
+        self.running = 0
+        self.interval: Optional[float] = None
+
+    @property
+    def overrun(self) -> bool:
+        """Последний запуск длился дольше интервала задачи"""
+        return bool(self.interval and self.last_duration and self.last_duration > self.interval)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "errors": self.errors,
+            "avg_duration": self.total_time / self.runs if self.runs else 0,
+            "last_duration": self.last_duration,
+            "max_duration": self.max_duration,
+            "last_started": self.last_started,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+            "last_items": self.last_items,
+            "items": self.items,
+            "lock_failures": self.lock_failures,
+            "misfires": self.misfires,
+            "skipped": self.skipped,
+            "running": self.running,
+            "interval": self.interval,
+            "overrun": self.overrun,
+        }
+
+
+class JobRun:
+    """Текущий запуск задачи"""
+
+    __slots__ = ("job_id", "items", "lock_failed")
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.items = 0
+        self.lock_failed = False
+
+
+_current_run: ContextVar[Optional[JobRun]] = ContextVar("job_run", default=None)
+_stats: Dict[str, JobStats] = {}
+
+
+def _get_stats(job_id: str) -> JobStats:
+    stats = _stats.get(job_id)
+    if stats is None:
+        stats = _stats[job_id] = JobStats()
+    return stats
+
+
+def record_items(count: int) -> None:
+    """Учесть обработанные элементы в текущем запуске"""
+    run = _current_run.get()
+    if run is not None and count:
+        run.items += count
+
+
+def record_lock_failure() -> None:
+    """Отметить, что текущий запуск не получил блокировку"""
+    run = _current_run.get()
+    if run is not None:
+        run.lock_failed = True
+
+
+def scheduled_job(job_id: str):
+    """
+    Декоратор задачи планировщика: телеметрия запуска и учет SQL запросов.
+
+    job_id совпадает с id задачи в SchedulerService, чтобы события
+    APScheduler и интервал задачи относились к той же статистике.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            stats = _get_stats(job_id)
+            run = JobRun(job_id)
+            token = _current_run.set(run)
+
+            stats.running += 1
+            stats.last_started = datetime.now()
+            job_running.inc(job=job_id)
+            start = time.perf_counter()
+            status = STATUS_OK
+            try:
+                with track_queries(f"job:{job_id}"):
+                    return await func(*args, **kwargs)
+            except Exception as e:
+                status = STATUS_ERROR
+                stats.errors += 1
+                stats.last_error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                duration = time.perf_counter() - start
+                _current_run.reset(token)
+                if run.lock_failed and status == STATUS_OK:
+                    status = STATUS_LOCKED
+                _finish_run(stats, run, status, duration)
+        return wrapper
+    return decorator
+
+
+def _finish_run(stats: JobStats, run: JobRun, status: str, duration: float) -> None:
+    """Записать итоги запуска в статистику и метрики"""
+    job_id = run.job_id
+    stats.running -= 1
+    job_running.dec(job=job_id)
+    job_runs.inc(job=job_id, status=status)
+
+    if status == STATUS_LOCKED:
+        stats.lock_failures += 1
+        job_lock_failures.inc(job=job_id)
+        stats.last_status = status
+        return
+
+    stats.runs += 1
+    stats.total_time += duration
+    stats.last_duration = duration
+    stats.max_duration = max(stats.max_duration, duration)
+    stats.last_status = status
+    stats.last_items = run.items
+    stats.items += run.items
+
+    job_duration.observe(duration, job=job_id)
+    job_last_duration.set(duration, job=job_id)
+    if run.items:
+        job_items.inc(run.items, job=job_id)
+
+    if stats.overrun:
+        logger.warning(
+            f"Задача {job_id} выполнялась {duration:.1f} с - дольше интервала {stats.interval:.0f} с"
+        )
+
+
+def set_job_interval(job_id: str, seconds: Optional[float]) -> None:
+    """Запомнить интервал задачи для сравнения с длительностью"""
+    _get_stats(job_id).interval = seconds
+    if seconds:
+        job_interval.set(seconds, job=job_id)
+
+
+def _on_scheduler_event(event) -> None:
+    """Слушатель событий APScheduler"""
+    job_id = event.job_id
+
+    if event.code == EVENT_JOB_MISSED:
+        _get_stats(job_id).misfires += 1
+        job_misfires.inc(job=job_id)
+        logger.warning(f"Задача {job_id} пропустила запуск в {event.scheduled_run_time}")
+
+    elif event.code == EVENT_JOB_MAX_INSTANCES:
+        _get_stats(job_id).skipped += 1
+        job_skipped.inc(job=job_id)
+        logger.warning(f"Запуск задачи {job_id} отброшен: предыдущие экземпляры еще работают")
+
+    elif event.code == EVENT_JOB_SUBMITTED and event.scheduled_run_times:
+        scheduled = event.scheduled_run_times[-1]
+        delay = (datetime.now(scheduled.tzinfo) - scheduled).total_seconds()
+        job_start_delay.observe(max(delay, 0.0), job=job_id)
+
+
+def setup_job_listeners(scheduler) -> None:
+    """Подключить слушатели событий к планировщику"""
+    scheduler.add_listener(
+        _on_scheduler_event,
+        EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES | EVENT_JOB_SUBMITTED
+    )
+
+
+def get_job_stats() -> Dict[str, Dict[str, Any]]:
+    """Снимок статистики по задачам"""
+    return {job_id: stats.as_dict() for job_id, stats in sorted(_stats.items())}
+
+
+def reset_job_stats() -> None:
+    """Сбросить статистику (для тестов)"""
+    _stats.clear()
@@ -0,0 +1,282 @@
+"""
+Общий планировщик исходящих сообщений бота.
+
+Все отправки (ответы обработчиков, outbox, напоминания, уведомления
+администраторам, массовые рассылки) проходят через мидлварь сессии бота
+SendSchedulerMiddleware, поэтому лимиты Telegram соблюдаются сообща:
+
+- один глобальный token bucket на процесс (GLOBAL_RATE сообщений/сек);
+- token bucket на каждый чат (личные чаты и группы - разные лимиты);
+- классы приоритета: transactional > reminder > broadcast. Пока есть
+  ожидающие отправки более высокого класса, рассылка не получает токены;
+- общая обработка 429: retry_after приостанавливает выдачу токенов
+  для всех отправителей, запрос повторяется после паузы.
+
+Класс отправки задается контекстом: with send_priority(Priority.broadcast).
+По умолчанию - transactional (ответы пользователю).
+
+Лимиты и пауза 429 действуют в пределах процесса. В режиме webhook
+с несколькими воркерами фоновые отправители (outbox, планировщик,
+подтверждения платежей) работают только в основном процессе, остальные
+воркеры отвечают на свои апдейты.
+"""
+
+import asyncio
+import enum
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    CopyMessage, ForwardMessage, SendAnimation, SendAudio, SendContact, SendDice,
+    SendDocument, SendInvoice, SendLocation, SendMediaGroup, SendMessage, SendPhoto,
+    SendPoll, SendSticker, SendVenue, SendVideo, SendVideoNote, SendVoice, TelegramMethod
+)
+from aiogram.methods.base import Response, TelegramType
+
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ChatId = Union[int, str]
+
+# Методы, на которые распространяются лимиты отправки сообщений
+SEND_METHODS = (
+    SendMessage, SendPhoto, SendDocument, SendVideo, SendAudio, SendAnimation, SendVoice,
+    SendVideoNote, SendMediaGroup, SendLocation, SendVenue, SendContact, SendPoll, SendDice,
+    SendSticker, SendInvoice, CopyMessage, ForwardMessage
+)
+
+
+class Priority(enum.IntEnum):
+    """Класс отправки (меньше - важнее)"""
+    transactional = 0   # ответы и уведомления по операциям пользователя
+    reminder = 1        # напоминания планировщика
+    broadcast = 2       # массовые рассылки
+
+
+_current_priority: ContextVar[Priority] = ContextVar("send_priority", default=Priority.transactional)
+
+
+@contextmanager
+def send_priority(priority: Priority) -> Iterator[None]:
+    """Отправки внутри блока получают указанный класс приоритета"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class TokenBucket:
+    """Token bucket: rate токенов в секунду, не больше capacity"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Сколько секунд ждать до следующего токена (0 - токен есть)"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class SendScheduler:
+    """Выдача разрешений на отправку по приоритету и лимитам"""
+
+    GLOBAL_RATE = 30
+    GLOBAL_BURST = 30
+    # Личный чат: около 1 сообщения в секунду, короткие серии допустимы
+    CHAT_RATE = 1.0
+    CHAT_BURST = 3
+    # Группы и каналы: не больше 20 сообщений в минуту
+    GROUP_RATE = 20 / 60
+    GROUP_BURST = 3
+    # Бакеты неактивных чатов удаляются, когда их становится больше
+    MAX_CHAT_BUCKETS = 10000
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._global: Optional[TokenBucket] = None
+        self._chats: Dict[ChatId, TokenBucket] = {}
+        self._waiting: Dict[Priority, Deque[Tuple[ChatId, asyncio.Future]]] = {
+            priority: deque() for priority in Priority
+        }
+        self._paused_until = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ========== ПУБЛИЧНЫЙ ИНТЕРФЕЙС ==========
+
+    async def acquire(self, chat_id: ChatId, priority: Optional[Priority] = None) -> None:
+        """Дождаться разрешения на отправку сообщения в чат"""
+        priority = _current_priority.get() if priority is None else priority
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[priority].append((chat_id, future))
+        self._ensure_running()
+        self._wakeup.set()
+        await future
+
+    def pause(self, seconds: float) -> None:
+        """Приостановить все отправки (ответ 429 с retry_after)"""
+        until = self._clock() + seconds
+        if until > self._paused_until:
+            self._paused_until = until
+            logger.warning(f"Telegram ограничил отправку, пауза {seconds} сек для всех отправителей")
+
+    def pending(self) -> Dict[Priority, int]:
+        """Число ожидающих отправок по классам"""
+        return {priority: len(waiters) for priority, waiters in self._waiting.items()}
+
+    async def stop(self) -> None:
+        """Остановить выдачу разрешений (ожидающие получат CancelledError)"""
+        task, self._task = self._task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        for waiters in self._waiting.values():
+            while waiters:
+                _, future = waiters.popleft()
+                future.cancel()
+
+    # ========== ВЫДАЧА РАЗРЕШЕНИЙ ==========
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def _chat_bucket(self, chat_id: ChatId, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self.MAX_CHAT_BUCKETS:
+                self._chats = {key: value for key, value in self._chats.items() if not value.is_full(now)}
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            bucket = self._chats[chat_id] = TokenBucket(
+                self.GROUP_RATE if is_group else self.CHAT_RATE,
+                self.GROUP_BURST if is_group else self.CHAT_BURST,
+                now
+            )
+        return bucket
+
+    def _grant_next(self, now: float) -> Optional[float]:
+        """
+        Выдать одно разрешение.
+
+        Returns:
+            0 если разрешение выдано, иначе через сколько секунд повторить
+            (None - ожидающих нет)
+        """
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        if self._global is None:
+            self._global = TokenBucket(self.GLOBAL_RATE, self.GLOBAL_BURST, now)
+        global_delay = self._global.delay(now)
+
+        next_delay: Optional[float] = None
+        for priority in Priority:
+            waiters = self._waiting[priority]
+            skipped: List[Tuple[ChatId, asyncio.Future]] = []
+            granted = False
+            while waiters:
+                chat_id, future = waiters.popleft()
+                if future.done():
+                    continue
+                chat_delay = self._chat_bucket(chat_id, now).delay(now)
+                if chat_delay == 0 and global_delay == 0:
+                    self._global.consume(now)
+                    self._chats[chat_id].consume(now)
+                    future.set_result(None)
+                    granted = True
+                    break
+                skipped.append((chat_id, future))
+                delay = max(chat_delay, global_delay)
+                next_delay = delay if next_delay is None else min(next_delay, delay)
+            # Порядок внутри класса сохраняется
+            waiters.extendleft(reversed(skipped))
+            if granted:
+                return 0.0
+            if skipped and global_delay == 0:
+                # Класс ждет только лимитов своих чатов - младшие классы могут идти
+                continue
+            if skipped:
+                return next_delay
+        return next_delay
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            delay = self._grant_next(self._clock())
+            if delay == 0:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+class SendSchedulerMiddleware(BaseRequestMiddleware):
+    """Мидлварь сессии бота: каждая отправка ждет разрешения планировщика"""
+
+    MAX_RETRIES = 3
+
+    def __init__(self, scheduler: SendScheduler):
+        self.scheduler = scheduler
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if not isinstance(method, SEND_METHODS) or chat_id is None:
+            return await make_request(bot, method)
+
+        attempt = 0
+        while True:
+            await self.scheduler.acquire(chat_id)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.scheduler.pause(e.retry_after)
+                attempt += 1
+                if attempt > self.MAX_RETRIES:
+                    raise
+
+
+send_scheduler = SendScheduler()
+
+
+def setup_send_scheduler(bot: Bot) -> None:
+    """Подключить общий планировщик к сессии бота"""
+    bot.session.middleware(SendSchedulerMiddleware(send_scheduler))
@@ -0,0 +1,205 @@
+"""
+Снимок системных настроек (system_settings) в памяти процесса.
+
+Настройки меняются редко, а читаются на каждом счете (параметры чеков),
+поэтому все значения загружаются один раз при старте и отдаются из памяти.
+
+Запись идет сквозь кеш: SettingsRepository.set() после сохранения в БД
+обновляет снимок своего процесса, увеличивает версию в Redis
+(Cache.SETTINGS_VERSION) и публикует ее в канал Cache.SETTINGS_CHANNEL.
+Остальные процессы (воркеры webhook) получают сообщение и перечитывают
+настройки из БД. На случай потерянного сообщения версия сверяется
+с Redis раз в VERSION_CHECK_INTERVAL секунд. При ошибке Redis подписка
+восстанавливается с растущей паузой, сверка версии при этом продолжается.
+"""
+
+import asyncio
+from typing import Dict, Optional
+
+import redis.asyncio as aioredis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database.models import SystemSetting
+from app.services.redis.keys import Cache
+from app.services.versioned_snapshot import VersionedSnapshot
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+TRUE_VALUES = ('true', '1', 'yes', 'on')
+
+
+class SettingsCache(VersionedSnapshot[Dict[str, str]]):
+    """Снимок настроек с инвалидацией между процессами"""
+
+    VERSION_KEY = Cache.SETTINGS_VERSION
+    NAME = "настроек"
+    VERSION_CHECK_INTERVAL = 60.0
+    # Пауза перед повторной подпиской после ошибки Redis (удваивается)
+    RESUBSCRIBE_MIN_DELAY = 1.0
+    RESUBSCRIBE_MAX_DELAY = 30.0
+
+    def __init__(
+        self,
+        redis: Optional[aioredis.Redis] = None,
+        session_factory: Optional[async_sessionmaker] = None
+    ):
+        super().__init__(redis=redis, session_factory=session_factory)
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @property
+    def version(self) -> int:
+        """Версия настроек, с которой загружен снимок"""
+        return self._version
+
+    # ========== ЧТЕНИЕ ==========
+
+    async def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Значение настройки (из памяти; БД - только при первом обращении)"""
+        values = self._data
+        if values is None:
+            values = await self.load()
+        return values.get(key, default)
+
+    async def get_int(self, key: str, default: int = 0) -> int:
+        """Целочисленное значение настройки"""
+        value = await self.get(key)
+        if value is None:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            logger.warning(f"Не удалось преобразовать настройку {key}={value} в int")
+            return default
+
+    async def get_bool(self, key: str, default: bool = False) -> bool:
+        """Булево значение настройки"""
+        value = await self.get(key)
+        if value is None:
+            return default
+        return value.lower() in TRUE_VALUES
+
+    # ========== ЗАГРУЗКА И ИНВАЛИДАЦИЯ ==========
+
+    async def _fetch(self, session: AsyncSession, version: int) -> Dict[str, str]:
+        result = await session.execute(select(SystemSetting.key, SystemSetting.value))
+        return {key: value for key, value in result.all()}
+
+    async def apply(self, key: str, value: str) -> None:
+        """
+        Запись сквозь кеш: значение уже сохранено в БД.
+
+        Обновляет снимок процесса и оповещает остальные процессы.
+        """
+        if self.loaded:
+            self._data[key] = value
+
+        version = await self._bump_version()
+        if version is None:
+            return
+        if self.loaded:
+            self._version = version
+        try:
+            await self._redis().publish(Cache.SETTINGS_CHANNEL, str(version))
+        except Exception as e:
+            logger.warning(f"Не удалось оповестить об изменении настройки {key}: {e}")
+
+    async def refresh_if_stale(self) -> bool:
+        """Перечитать настройки, если версия в Redis новее снимка"""
+        version = await self._remote_version()
+        if self.loaded and version == self._version:
+            return False
+        await self.load()
+        return True
+
+    def invalidate(self) -> None:
+        """Сбросить снимок: следующее чтение загрузит настройки из БД"""
+        self._reset()
+
+    # ========== ПОДПИСКА ==========
+
+    async def start(self) -> None:
+        """Загрузить снимок и подписаться на изменения из других процессов"""
+        await self.load()
+
+        if self._redis() is None or (self._listener_task and not self._listener_task.done()):
+            return
+        try:
+            pubsub = await self._subscribe()
+        except Exception as e:
+            # Подписку повторит фоновая задача, сверка версии работает и без нее
+            logger.warning(f"Не удалось подписаться на изменения настроек: {e}")
+            pubsub = None
+        self._listener_task = asyncio.create_task(self._listen(pubsub))
+
+    async def _subscribe(self):
+        pubsub = self._redis().pubsub()
+        try:
+            await pubsub.subscribe(Cache.SETTINGS_CHANNEL)
+        except Exception:
+            await self._close(pubsub)
+            raise
+        return pubsub
+
+    async def _listen(self, pubsub) -> None:
+        """
+        Фоновая задача: перезагрузка при изменении версии.
+
+        Ошибка Redis не останавливает задачу: подписка восстанавливается
+        с растущей паузой, а версия сверяется и во время пауз.
+        """
+        delay = self.RESUBSCRIBE_MIN_DELAY
+        try:
+            while True:
+                try:
+                    if pubsub is None:
+                        pubsub = await self._subscribe()
+                        logger.info("Подписка на изменения настроек восстановлена")
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True,
+                        timeout=self.VERSION_CHECK_INTERVAL
+                    )
+                    delay = self.RESUBSCRIBE_MIN_DELAY
+                except Exception as e:
+                    logger.warning(f"Подписка на изменения настроек прервана: {e}, повтор через {delay:.0f} с")
+                    await self._close(pubsub)
+                    pubsub = None
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.RESUBSCRIBE_MAX_DELAY)
+                    message = None
+
+                try:
+                    if message is None:
+                        # Тишина в канале: сверяем версию на случай потерянного сообщения
+                        if await self.refresh_if_stale():
+                            logger.info(f"Настройки обновлены по версии {self._version}")
+                    elif int(message['data']) != self._version:
+                        await self.load()
+                        logger.info(f"Настройки обновлены из другого процесса, версия {self._version}")
+                except Exception as e:
+                    logger.warning(f"Ошибка обновления настроек: {e}")
+        finally:
+            await self._close(pubsub)
+
+    @staticmethod
+    async def _close(pubsub) -> None:
+        if pubsub is None:
+            return
+        try:
+            await pubsub.aclose()
+        except Exception:
+            pass
+
+    async def stop(self) -> None:
+        """Остановить подписку"""
+        task, self._listener_task = self._listener_task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+settings_cache = SettingsCache()
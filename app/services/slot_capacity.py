@@ -0,0 +1,443 @@
+# app/services/slot_capacity.py
+
+"""
+Атомарные счетчики занятости слотов (места и вес).
+
+Для каждого слота в Redis хранится hash с полями:
+- people: занято мест
+- weight: занятый вес клиентов (без капитана)
+- u:<user_id>: резерв участника в формате "<people>:<weight>"
+
+Временные резервы (пока пользователь проходит шаги бронирования)
+хранятся в тех же полях, а время их истечения - в отдельном sorted set.
+Истекшие резервы снимаются каждым скриптом перед проверкой лимитов,
+поэтому занятость слота читается за O(1) без отдельной фоновой задачи.
+
+Проверка лимита и увеличение счетчика выполняются одним Lua скриптом,
+поэтому параллельные бронирования одного слота не могут превысить
+вместимость, а бронирования разных слотов не ждут друг друга.
+Если счетчика нет (первое обращение, истек TTL или слот отменен),
+он заполняется из активных бронирований в БД, действующие временные
+резервы при этом сохраняются.
+"""
+
+import enum
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript
+
+from app.services.redis import redis_client
+from app.services.redis.keys import Capacity
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+# Общие функции скриптов: освобождение резерва участника и очистка
+# истекших временных резервов (KEYS[2] - sorted set с временем истечения)
+CAPACITY_LUA_HELPERS = """
+local function release_field(counter_key, field)
+    local value = redis.call("hget", counter_key, field)
+    if not value then
+        return 0
+    end
+    local sep = string.find(value, ":")
+    redis.call("hincrby", counter_key, "people", -tonumber(string.sub(value, 1, sep - 1)))
+    redis.call("hincrby", counter_key, "weight", -tonumber(string.sub(value, sep + 1)))
+    redis.call("hdel", counter_key, field)
+    return 1
+end
+
+local function purge_expired_holds(counter_key, holds_key, now)
+    local expired = redis.call("zrangebyscore", holds_key, "-inf", now)
+    for _, field in ipairs(expired) do
+        release_field(counter_key, field)
+    end
+    if #expired > 0 then
+        redis.call("zremrangebyscore", holds_key, "-inf", now)
+    end
+end
+"""
+
+# Заполнить счетчик из снимка БД, если его еще нет (нет поля people).
+# Временные резервы, пережившие сброс счетчика, сохраняются и добавляются
+# к занятости; резерв клиента, бронь которого уже есть в снимке, заменяется.
+# ARGV: ttl, people, weight, текущее время, затем пары поле/значение резервов.
+SEED_CAPACITY_SCRIPT = """
+if redis.call("hexists", KEYS[1], "people") == 1 then
+    return 0
+end
+local expired = redis.call("zrangebyscore", KEYS[2], "-inf", ARGV[4])
+for _, field in ipairs(expired) do
+    redis.call("hdel", KEYS[1], field)
+end
+redis.call("zremrangebyscore", KEYS[2], "-inf", ARGV[4])
+local people = tonumber(ARGV[2])
+local weight = tonumber(ARGV[3])
+local permanent = {}
+for i = 5, #ARGV, 2 do
+    permanent[ARGV[i]] = true
+end
+for _, field in ipairs(redis.call("hkeys", KEYS[1])) do
+    if permanent[field] or not redis.call("zscore", KEYS[2], field) then
+        redis.call("hdel", KEYS[1], field)
+        redis.call("zrem", KEYS[2], field)
+    else
+        local value = redis.call("hget", KEYS[1], field)
+        local sep = string.find(value, ":")
+        people = people + tonumber(string.sub(value, 1, sep - 1))
+        weight = weight + tonumber(string.sub(value, sep + 1))
+    end
+end
+redis.call("hset", KEYS[1], "people", people, "weight", weight)
+for i = 5, #ARGV, 2 do
+    redis.call("hset", KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call("expire", KEYS[1], ARGV[1])
+return 1
+"""
+
+# Сбросить счетчик слота: итоги и постоянные резервы удаляются
+# (будут заполнены из БД), временные резервы остаются.
+# ARGV: текущее время.
+INVALIDATE_CAPACITY_SCRIPT = CAPACITY_LUA_HELPERS + """
+purge_expired_holds(KEYS[1], KEYS[2], ARGV[1])
+for _, field in ipairs(redis.call("hkeys", KEYS[1])) do
+    if field == "people" or field == "weight" or not redis.call("zscore", KEYS[2], field) then
+        redis.call("hdel", KEYS[1], field)
+    end
+end
+return 1
+"""
+
+# Проверить лимиты и зарезервировать места/вес участника.
+# ARGV: поле участника, people, weight, лимит мест, лимит веса (-1 без проверки),
+# время истечения временного резерва (0 - постоянный), текущее время.
+# Повторный резерв того же участника заменяет только его временный резерв,
+# постоянный резерв (подтвержденная бронь) не перезаписывается.
+# Возвращает {код, свободно мест, свободно веса}:
+# 1 - зарезервировано, 0 - нет мест, 2 - превышен вес,
+# 3 - у участника уже есть постоянный резерв, -1 - счетчика нет.
+RESERVE_CAPACITY_SCRIPT = CAPACITY_LUA_HELPERS + """
+if redis.call("hexists", KEYS[1], "people") == 0 then
+    return {-1, 0, 0}
+end
+purge_expired_holds(KEYS[1], KEYS[2], ARGV[7])
+local people = tonumber(redis.call("hget", KEYS[1], "people") or "0")
+local weight = tonumber(redis.call("hget", KEYS[1], "weight") or "0")
+local need_people = tonumber(ARGV[2])
+local need_weight = tonumber(ARGV[3])
+local people_limit = tonumber(ARGV[4])
+local weight_limit = tonumber(ARGV[5])
+local previous = redis.call("hget", KEYS[1], ARGV[1])
+if previous then
+    if not redis.call("zscore", KEYS[2], ARGV[1]) then
+        return {3, people_limit - people, weight_limit >= 0 and weight_limit - weight or -1}
+    end
+    local sep = string.find(previous, ":")
+    people = people - tonumber(string.sub(previous, 1, sep - 1))
+    weight = weight - tonumber(string.sub(previous, sep + 1))
+end
+local free_weight = -1
+if weight_limit >= 0 then
+    free_weight = weight_limit - weight
+end
+if people + need_people > people_limit then
+    return {0, people_limit - people, free_weight}
+end
+if weight_limit >= 0 and weight + need_weight > weight_limit then
+    return {2, people_limit - people, free_weight}
+end
+redis.call("hset", KEYS[1],
+    "people", people + need_people,
+    "weight", weight + need_weight,
+    ARGV[1], need_people .. ":" .. need_weight)
+if tonumber(ARGV[6]) > 0 then
+    redis.call("zadd", KEYS[2], ARGV[6], ARGV[1])
+    redis.call("pexpire", KEYS[2], math.max(redis.call("pttl", KEYS[1]), 1))
+else
+    redis.call("zrem", KEYS[2], ARGV[1])
+end
+if weight_limit >= 0 then
+    free_weight = free_weight - need_weight
+end
+return {1, people_limit - people - need_people, free_weight}
+"""
+
+# Освободить резерв участника (повторный вызов ничего не меняет).
+# ARGV: поле участника, "1" - только временный резерв, текущее время.
+RELEASE_CAPACITY_SCRIPT = CAPACITY_LUA_HELPERS + """
+purge_expired_holds(KEYS[1], KEYS[2], ARGV[3])
+if ARGV[2] == "1" and not redis.call("zscore", KEYS[2], ARGV[1]) then
+    return 0
+end
+redis.call("zrem", KEYS[2], ARGV[1])
+return release_field(KEYS[1], ARGV[1])
+"""
+
+# Текущая занятость слота с учетом действующих временных резервов.
+# Возвращает {1, people, weight} или {-1, 0, 0}, если счетчика нет.
+USAGE_CAPACITY_SCRIPT = CAPACITY_LUA_HELPERS + """
+if redis.call("hexists", KEYS[1], "people") == 0 then
+    return {-1, 0, 0}
+end
+purge_expired_holds(KEYS[1], KEYS[2], ARGV[1])
+local values = redis.call("hmget", KEYS[1], "people", "weight")
+return {1, tonumber(values[1] or "0"), tonumber(values[2] or "0")}
+"""
+
+
+class ReservationStatus(enum.Enum):
+    """Результат резервирования мест в слоте"""
+    reserved = "reserved"
+    no_places = "no_places"
+    no_weight = "no_weight"
+    already_reserved = "already_reserved"  # у участника уже есть подтвержденная бронь
+    unavailable = "unavailable"  # Redis недоступен, нужна проверка по БД
+
+
+# user_id -> (количество людей, вес)
+CapacitySnapshot = Dict[int, Tuple[int, int]]
+
+_RESERVE_CODES = {
+    1: ReservationStatus.reserved,
+    0: ReservationStatus.no_places,
+    2: ReservationStatus.no_weight,
+    3: ReservationStatus.already_reserved,
+}
+
+
+class SlotCapacityService:
+    """Сервис атомарного резервирования мест и веса в слотах"""
+
+    # Счетчик живет до конца слота плюс запас
+    TTL_MARGIN = 24 * 60 * 60
+    # Временный резерв на время оформления брони (продлевается на каждом шаге)
+    HOLD_TTL = 15 * 60
+
+    def __init__(self, redis: Optional[aioredis.Redis] = None):
+        self._redis = redis
+        self._scripts_client: Optional[aioredis.Redis] = None
+        self._seed_script: Optional[AsyncScript] = None
+        self._reserve_script: Optional[AsyncScript] = None
+        self._release_script: Optional[AsyncScript] = None
+        self._usage_script: Optional[AsyncScript] = None
+        self._invalidate_script: Optional[AsyncScript] = None
+
+    def _get_client(self) -> aioredis.Redis:
+        """Получить подключение к Redis и зарегистрировать скрипты"""
+        client = self._redis or redis_client.client
+        if self._scripts_client is not client:
+            self._seed_script = client.register_script(SEED_CAPACITY_SCRIPT)
+            self._reserve_script = client.register_script(RESERVE_CAPACITY_SCRIPT)
+            self._release_script = client.register_script(RELEASE_CAPACITY_SCRIPT)
+            self._usage_script = client.register_script(USAGE_CAPACITY_SCRIPT)
+            self._invalidate_script = client.register_script(INVALIDATE_CAPACITY_SCRIPT)
+            self._scripts_client = client
+        return client
+
+    @staticmethod
+    def _field(user_id: int) -> str:
+        return f"u:{user_id}"
+
+    @staticmethod
+    def _keys(slot_id: int) -> List[str]:
+        return [Capacity.slot(slot_id), Capacity.holds(slot_id)]
+
+    async def reserve(
+        self,
+        slot_id: int,
+        user_id: int,
+        people: int,
+        weight: int,
+        people_limit: int,
+        weight_limit: Optional[int],
+        load_snapshot: Callable[[], Awaitable[CapacitySnapshot]],
+        expire_at: Optional[datetime] = None
+    ) -> Tuple[ReservationStatus, int, int]:
+        """
+        Атомарно зарезервировать места и вес участника в слоте.
+
+        Постоянный резерв заменяет временный, созданный через hold().
+        Если у участника уже есть постоянный резерв, возвращается
+        already_reserved и счетчик не меняется.
+
+        Args:
+            slot_id: ID слота
+            user_id: ID взрослого клиента (один резерв на клиента)
+            people: Количество людей в бронировании
+            weight: Вес заявки
+            people_limit: Максимум мест в слоте
+            weight_limit: Допустимый вес клиентов (None - вес не проверяется)
+            load_snapshot: Загрузка активных бронирований из БД, если счетчика нет
+            expire_at: Время окончания слота (для TTL счетчика)
+
+        Returns:
+            Tuple[ReservationStatus, int, int]: (результат, свободно мест, свободно веса)
+        """
+        return await self._reserve(
+            slot_id, user_id, people, weight, people_limit, weight_limit,
+            load_snapshot, expire_at, hold_ttl=0
+        )
+
+    async def hold(
+        self,
+        slot_id: int,
+        user_id: int,
+        people: int,
+        weight: int,
+        people_limit: int,
+        weight_limit: Optional[int],
+        load_snapshot: Callable[[], Awaitable[CapacitySnapshot]],
+        expire_at: Optional[datetime] = None
+    ) -> Tuple[ReservationStatus, int, int]:
+        """
+        Временно зарезервировать места на время оформления брони.
+
+        Резерв истекает через HOLD_TTL секунд, повторный вызов продлевает
+        его и обновляет количество людей и вес. Аргументы как у reserve().
+        """
+        return await self._reserve(
+            slot_id, user_id, people, weight, people_limit, weight_limit,
+            load_snapshot, expire_at, hold_ttl=self.HOLD_TTL
+        )
+
+    async def _reserve(
+        self,
+        slot_id: int,
+        user_id: int,
+        people: int,
+        weight: int,
+        people_limit: int,
+        weight_limit: Optional[int],
+        load_snapshot: Callable[[], Awaitable[CapacitySnapshot]],
+        expire_at: Optional[datetime],
+        hold_ttl: int
+    ) -> Tuple[ReservationStatus, int, int]:
+        keys = self._keys(slot_id)
+
+        try:
+            self._get_client()
+            now = time.time()
+            args = [
+                self._field(user_id), people, weight, people_limit,
+                -1 if weight_limit is None else weight_limit,
+                now + hold_ttl if hold_ttl else 0, now
+            ]
+            code, free_people, free_weight = await self._reserve_script(keys=keys, args=args)
+
+            if code == -1:
+                snapshot = await load_snapshot()
+                await self._seed(keys, snapshot, expire_at)
+                code, free_people, free_weight = await self._reserve_script(keys=keys, args=args)
+
+        except Exception as e:
+            logger.error(f"Ошибка резервирования мест в слоте {slot_id}: {e}")
+            return ReservationStatus.unavailable, 0, 0
+
+        status = _RESERVE_CODES.get(code, ReservationStatus.unavailable)
+        logger.debug(
+            f"Резерв слота {slot_id} для пользователя {user_id}: {status.value}"
+            f"{' (временный)' if hold_ttl else ''}, свободно мест {free_people}, веса {free_weight}"
+        )
+        return status, int(free_people), int(free_weight)
+
+    async def release(self, slot_id: int, user_id: int) -> bool:
+        """
+        Освободить резерв участника в слоте (постоянный или временный).
+
+        Returns:
+            bool: True если резерв был и освобожден
+        """
+        return await self._release(slot_id, user_id, holds_only=False)
+
+    async def release_hold(self, slot_id: int, user_id: int) -> bool:
+        """
+        Освободить временный резерв участника.
+
+        Постоянный резерв подтвержденной брони не затрагивается.
+        """
+        return await self._release(slot_id, user_id, holds_only=True)
+
+    async def _release(self, slot_id: int, user_id: int, holds_only: bool) -> bool:
+        try:
+            self._get_client()
+            released = await self._release_script(
+                keys=self._keys(slot_id),
+                args=[self._field(user_id), "1" if holds_only else "0", time.time()]
+            )
+            return bool(released)
+        except Exception as e:
+            logger.error(f"Ошибка освобождения мест в слоте {slot_id}: {e}")
+            return False
+
+    async def get_usage(
+        self,
+        slot_id: int,
+        load_snapshot: Callable[[], Awaitable[CapacitySnapshot]],
+        expire_at: Optional[datetime] = None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Получить занятость слота с учетом временных резервов.
+
+        Returns:
+            Optional[Tuple[int, int]]: (занято мест, вес клиентов) или None,
+            если Redis недоступен и занятость нужно считать по БД
+        """
+        keys = self._keys(slot_id)
+
+        try:
+            self._get_client()
+            exists, people, weight = await self._usage_script(keys=keys, args=[time.time()])
+
+            if exists == -1:
+                snapshot = await load_snapshot()
+                await self._seed(keys, snapshot, expire_at)
+                exists, people, weight = await self._usage_script(keys=keys, args=[time.time()])
+
+        except Exception as e:
+            logger.error(f"Ошибка получения занятости слота {slot_id}: {e}")
+            return None
+
+        return int(people), int(weight)
+
+    async def invalidate(self, slot_id: int) -> None:
+        """
+        Сбросить счетчик слота при изменении самого слота (отмена).
+
+        Итоги и постоянные резервы заново заполняются из БД, временные
+        резервы оформляющих бронь пользователей сохраняются. Для отдельных
+        броней не используется: снимок БД не видит еще не записанных броней,
+        их места резервируются через reserve().
+        """
+        try:
+            self._get_client()
+            await self._invalidate_script(keys=self._keys(slot_id), args=[time.time()])
+        except Exception as e:
+            logger.error(f"Ошибка сброса счетчика слота {slot_id}: {e}")
+
+    async def _seed(
+        self,
+        keys: List[str],
+        snapshot: CapacitySnapshot,
+        expire_at: Optional[datetime]
+    ) -> None:
+        """Заполнить счетчик из снимка активных бронирований"""
+        ttl = self.TTL_MARGIN
+        if expire_at:
+            ttl += max(int((expire_at - datetime.now()).total_seconds()), 0)
+
+        people = sum(p for p, _ in snapshot.values())
+        weight = sum(w for _, w in snapshot.values())
+        args = [ttl, people, weight, time.time()]
+        for user_id, (user_people, user_weight) in snapshot.items():
+            args.extend([self._field(user_id), f"{user_people}:{user_weight}"])
+
+        await self._seed_script(keys=keys, args=args)
+
+
+# Глобальный экземпляр сервиса
+slot_capacity = SlotCapacityService()
@@ -0,0 +1,116 @@
+"""
+Порядок обработки апдейтов: последовательно внутри чата, параллельно между чатами.
+
+ChatEventIsolation подключается к Dispatcher как events_isolation. aiogram берет
+эту блокировку в FSMContextMiddleware до чтения состояния, поэтому повторное
+нажатие кнопки (например, «Подтвердить» в confirm_booking) обрабатывается
+только после первого и видит уже обновленное состояние FSM.
+
+Поверх блокировок чатов действует общий лимит одновременно выполняемых
+обработчиков. Слот лимита занимается только после блокировки чата, поэтому
+всплеск апдейтов от одного пользователя не вытесняет остальные чаты.
+
+Для нескольких процессов (webhook с WEBHOOK_WORKERS > 1) дополнительно
+берется межпроцессная блокировка из Redis (RedisEventIsolation).
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Dict, Optional
+
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+
+from app.services.metrics import metrics
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_IN_FLIGHT = 100
+
+updates_waiting = metrics.gauge(
+    "bot_updates_waiting",
+    "Апдейты, ожидающие очереди своего чата или общего лимита"
+)
+update_wait_seconds = metrics.histogram(
+    "bot_update_wait_seconds",
+    "Ожидание апдейта перед обработкой"
+)
+
+
+class _ChatLock:
+    """Блокировка чата со счетчиком ожидающих"""
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class ChatEventIsolation(BaseEventIsolation):
+    """
+    Изоляция событий aiogram по чату с общим лимитом параллельности.
+
+    Блокировки чатов создаются по требованию и удаляются, когда их
+    никто не ждет, поэтому словарь не растет с числом пользователей.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        shared: Optional[BaseEventIsolation] = None
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._locks: Dict[Any, _ChatLock] = {}
+        self._shared = shared
+
+    @staticmethod
+    def chat_key(key: StorageKey) -> Any:
+        """Ключ очереди: чат (в личке совпадает с id пользователя)"""
+        return (key.bot_id, key.chat_id)
+
+    @property
+    def active_chats(self) -> int:
+        """Чаты, у которых есть обрабатываемые или ожидающие апдейты"""
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        chat_key = self.chat_key(key)
+        chat_lock = self._locks.get(chat_key)
+        if chat_lock is None:
+            chat_lock = self._locks[chat_key] = _ChatLock()
+        chat_lock.users += 1
+
+        updates_waiting.inc()
+        start = time.perf_counter()
+        waiting = True
+        try:
+            async with chat_lock.lock:
+                async with self._shared_lock(key):
+                    async with self._semaphore:
+                        updates_waiting.dec()
+                        waiting = False
+                        update_wait_seconds.observe(time.perf_counter() - start)
+                        yield
+        finally:
+            if waiting:
+                updates_waiting.dec()
+            chat_lock.users -= 1
+            if chat_lock.users == 0:
+                del self._locks[chat_key]
+
+    @asynccontextmanager
+    async def _shared_lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        """Межпроцессная блокировка, если задана"""
+        if self._shared is None:
+            yield
+            return
+        async with self._shared.lock(key):
+            yield
+
+    async def close(self) -> None:
+        if self._shared is not None:
+            await self._shared.close()
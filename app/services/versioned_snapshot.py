@@ -0,0 +1,121 @@
+"""
+Основа снимков данных БД в памяти процесса с версией в Redis.
+
+Снимок загружается из БД целиком и отдается из памяти. Код, изменивший
+исходные данные, сбрасывает снимок своего процесса и увеличивает версию
+в Redis (VERSION_KEY); другие процессы сравнивают ее с версией своего
+снимка и перечитывают его. Без Redis снимок работает в пределах процесса
+(версия всегда 0).
+
+Подкласс задает VERSION_KEY, NAME (название данных в родительном падеже
+для логов) и _fetch() - чтение данных в открытой сессии.
+"""
+
+import asyncio
+import time
+from typing import Generic, Optional, TypeVar
+
+import redis.asyncio as aioredis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database.session import async_session
+from app.services.redis import redis_client
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class VersionedSnapshot(Generic[T]):
+    """Снимок данных БД с версионированием через Redis"""
+
+    VERSION_KEY: str = ""
+    NAME: str = "снимка"
+    VERSION_CHECK_INTERVAL = 10.0
+
+    def __init__(
+        self,
+        redis: Optional[aioredis.Redis] = None,
+        session_factory: Optional[async_sessionmaker] = None
+    ):
+        self._redis_override = redis
+        self._session_factory = session_factory or async_session
+        self._data: Optional[T] = None
+        self._version = 0
+        self._checked_at = 0.0
+        # Счетчик сбросов: загрузка, начатая до сброса, не сохраняет снимок
+        self._generation = 0
+        self._load_lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    async def load(self) -> T:
+        """Загрузить снимок из БД"""
+        async with self._load_lock:
+            generation = self._generation
+            version = await self._remote_version()
+            async with self._session_factory() as session:
+                data = await self._fetch(session, version)
+            if generation == self._generation:
+                self._data = data
+                self._version = version
+                self._checked_at = time.monotonic()
+            logger.debug(f"Снимок {self.NAME} загружен, версия {version}")
+            return data
+
+    async def _fetch(self, session: AsyncSession, version: int) -> T:
+        """Прочитать данные снимка (version - версия, с которой он будет сохранен)"""
+        raise NotImplementedError
+
+    async def _current(self) -> T:
+        """Снимок из памяти; загрузка, если он сброшен или версия в Redis изменилась"""
+        data = self._data
+        if data is None:
+            return await self.load()
+
+        if time.monotonic() - self._checked_at < self.VERSION_CHECK_INTERVAL:
+            return data
+
+        self._checked_at = time.monotonic()
+        if await self._remote_version() != self._version:
+            logger.info(f"Версия {self.NAME} изменилась в другом процессе, перезагрузка")
+            return await self.load()
+        return data
+
+    def _reset(self) -> None:
+        """Сбросить снимок процесса: следующее чтение загрузит его из БД"""
+        self._generation += 1
+        self._data = None
+
+    async def _bump_version(self) -> Optional[int]:
+        """Увеличить версию в Redis (None - Redis недоступен)"""
+        redis = self._redis()
+        if redis is None:
+            return None
+        try:
+            return await redis.incr(self.VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Не удалось обновить версию {self.NAME}: {e}")
+            return None
+
+    async def _remote_version(self) -> int:
+        redis = self._redis()
+        if redis is None:
+            return 0
+        try:
+            return int(await redis.get(self.VERSION_KEY) or 0)
+        except Exception as e:
+            logger.warning(f"Не удалось получить версию {self.NAME}: {e}")
+            return self._version
+
+    def _redis(self) -> Optional[aioredis.Redis]:
+        """Подключение к Redis или None, если Redis не инициализирован"""
+        if self._redis_override is not None:
+            return self._redis_override
+        try:
+            return redis_client.client
+        except RuntimeError:
+            return None
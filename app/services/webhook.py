@@ -0,0 +1,133 @@
+"""
+Режим webhook: прием апдейтов через aiohttp сервер вместо long polling.
+
+Используется интеграция aiogram (SimpleRequestHandler + setup_application):
+апдейт приходит POST запросом от Telegram, проверяется секретный токен
+(заголовок X-Telegram-Bot-Api-Secret-Token), обработка идет в фоне.
+Обработчики startup/shutdown диспетчера вызываются при старте и остановке
+aiohttp приложения - так же, как при polling.
+
+Несколько процессов-воркеров слушают один порт (SO_REUSEPORT) и используют
+общее FSM хранилище в Redis, поэтому апдейты одного пользователя можно
+обрабатывать в любом воркере.
+"""
+
+import asyncio
+import os
+import signal
+from typing import Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from app.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class WebhookConfig:
+    """Настройки webhook режима"""
+
+    def __init__(
+        self,
+        base_url: str,
+        path: str = "/webhook",
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        secret: Optional[str] = None,
+        workers: int = 1
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.path = path if path.startswith("/") else f"/{path}"
+        self.host = host
+        self.port = port
+        self.secret = secret or None
+        self.workers = max(1, workers)
+
+    @property
+    def url(self) -> str:
+        """Публичный адрес webhook для setWebhook"""
+        return f"{self.base_url}{self.path}"
+
+    @classmethod
+    def from_env(cls) -> "WebhookConfig":
+        """Настройки из переменных окружения WEBHOOK_*"""
+        return cls(
+            base_url=os.getenv('WEBHOOK_BASE_URL', ''),
+            path=os.getenv('WEBHOOK_PATH', '/webhook'),
+            host=os.getenv('WEBHOOK_HOST', '127.0.0.1'),
+            port=int(os.getenv('WEBHOOK_PORT', 8080)),
+            secret=os.getenv('WEBHOOK_SECRET', '').strip(),
+            workers=int(os.getenv('WEBHOOK_WORKERS', 1))
+        )
+
+
+async def health_handler(request: web.Request) -> web.Response:
+    """Проверка живости воркера для балансировщика"""
+    return web.Response(text="ok")
+
+
+def create_webhook_app(dp: Dispatcher, bot: Bot, config: WebhookConfig) -> web.Application:
+    """
+    aiohttp приложение, принимающее апдейты на config.path.
+
+    Запросы без правильного секретного токена отклоняются (401), поэтому
+    без секрета приложение не создается: иначе принимался бы любой POST.
+    """
+    if not config.secret:
+        raise ValueError("Секрет webhook не задан: апдейты нельзя проверить")
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=config.secret
+    ).register(app, path=config.path)
+    app.router.add_get("/healthz", health_handler)
+
+    # Привязываем startup/shutdown диспетчера к жизненному циклу приложения
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def set_webhook(dp: Dispatcher, bot: Bot, config: WebhookConfig) -> None:
+    """Зарегистрировать webhook в Telegram (вызывается одним воркером)"""
+    await bot.set_webhook(
+        url=config.url,
+        secret_token=config.secret,
+        allowed_updates=dp.resolve_used_update_types(),
+        drop_pending_updates=False
+    )
+    logger.info(f"Webhook установлен: {config.url}")
+
+
+async def start_webhook_server(app: web.Application, config: WebhookConfig) -> web.AppRunner:
+    """
+    Запустить сервер и выполнить startup диспетчера.
+
+    При нескольких воркерах порт открывается с SO_REUSEPORT.
+    """
+    runner = web.AppRunner(app, access_log=None, handle_signals=False)
+    await runner.setup()
+    site = web.TCPSite(
+        runner,
+        config.host,
+        config.port,
+        reuse_port=config.workers > 1 or None
+    )
+    await site.start()
+    logger.info(f"Webhook сервер слушает {config.host}:{config.port}{config.path} (pid {os.getpid()})")
+    return runner
+
+
+async def wait_for_stop_signal() -> None:
+    """Ждать SIGINT/SIGTERM"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows: сигналы через add_signal_handler недоступны
+            pass
+    await stop.wait()
@@ -1,18 +1,23 @@
 from datetime import date
-from typing import List, Optional, Dict
+from functools import cache, lru_cache
+from typing import List, Optional, Dict, Sequence
 from aiogram.types import (
     ReplyKeyboardMarkup, KeyboardButton,
     InlineKeyboardMarkup, InlineKeyboardButton
 )
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
 
-from app.database.repositories import ExcursionRepository
-from app.database.session import async_session
+from app.services.excursion_catalog import excursion_catalog
 from app.utils.datetime_utils import get_weekday_short_name
 
+# Статические клавиатуры строятся один раз, параметризованные - через LRU
+# (см. app/admin_panel/keyboards_adm.py). Разметку нельзя изменять.
+KEYBOARD_CACHE_SIZE = 1024
+
 
 # ===== ГЛАВНЫЕ КЛАВИАТУРЫ =====
 
+@cache
 def main_menu() -> ReplyKeyboardMarkup:
     """Главное меню пользователя"""
     builder = ReplyKeyboardBuilder()
@@ -31,6 +36,7 @@ def main_menu() -> ReplyKeyboardMarkup:
     builder.adjust(1, 2, 2)
     return builder.as_markup(resize_keyboard=True)
 
+@cache
 def inline_navigation() -> InlineKeyboardMarkup:
     """Инлайн-кнопки навигации (в кабинет/главное)"""
     builder = InlineKeyboardBuilder()
@@ -42,6 +48,7 @@ def inline_navigation() -> InlineKeyboardMarkup:
 
 # ===== ЛИЧНЫЙ КАБИНЕТ И РЕГИСТРАЦИЯ =====
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def registration_data_menu(has_children: bool = False) -> InlineKeyboardMarkup:
     """Меню личного кабинета"""
     builder = InlineKeyboardBuilder()
@@ -57,6 +64,7 @@ def registration_data_menu(has_children: bool = False) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def error_registration_menu() -> ReplyKeyboardMarkup:
     """Меню при ошибке регистрации"""
     builder = ReplyKeyboardBuilder()
@@ -65,6 +73,7 @@ def error_registration_menu() -> ReplyKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup(resize_keyboard=True)
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def notification_settings_keyboard(is_subscribed: bool):
     """Клавиатура настроек рассылки"""
     builder = InlineKeyboardBuilder()
@@ -89,6 +98,7 @@ def notification_settings_keyboard(is_subscribed: bool):
 
 # ===== КЛАВИАТУРЫ ДЛЯ БРОНИРОВАНИЙ ПОЛЬЗОВАТЕЛЯ =====
 
+@cache
 def bookings_main_menu() -> InlineKeyboardMarkup:
     """Главное меню раздела 'Мои бронирования'"""
     builder = InlineKeyboardBuilder()
@@ -99,6 +109,7 @@ def bookings_main_menu() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def empty_bookings(back_callback: str = "user_booking") -> InlineKeyboardMarkup:
     """Клавиатура для случая, когда бронирований нет"""
     builder = InlineKeyboardBuilder()
@@ -140,6 +151,7 @@ def bookings_list(
 
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def post_booking(booking_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура после успешного создания бронирования
@@ -151,6 +163,7 @@ def post_booking(booking_id: int) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def cancel_confirmation(booking_id: int) -> InlineKeyboardMarkup:
     """Клавиатура подтверждения отмены"""
     builder = InlineKeyboardBuilder()
@@ -165,6 +178,7 @@ def cancel_confirmation(booking_id: int) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def back_to_booking(booking_id: int) -> InlineKeyboardMarkup:
     """Клавиатура с кнопкой возврата к бронированию"""
     builder = InlineKeyboardBuilder()
@@ -172,6 +186,7 @@ def back_to_booking(booking_id: int) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def back_to_booking_menu() -> InlineKeyboardMarkup:
     """Кнопка возврата в меню бронирований"""
     builder = InlineKeyboardBuilder()
@@ -179,6 +194,7 @@ def back_to_booking_menu() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def active_booking_actions(booking_id: int) -> InlineKeyboardMarkup:
     """Клавиатура для активного неоплаченного бронирования"""
     builder = InlineKeyboardBuilder()
@@ -189,6 +205,7 @@ def active_booking_actions(booking_id: int) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def paid_booking_actions(booking_id: int) -> InlineKeyboardMarkup:
     """Клавиатура для оплаченного бронирования"""
     builder = InlineKeyboardBuilder()
@@ -211,6 +228,7 @@ def paid_booking_actions(booking_id: int) -> InlineKeyboardMarkup:
 # ===== РЕДАКТИРОВАНИЕ ДАННЫХ =====
 
 
+@cache
 def redaction_menu() -> InlineKeyboardMarkup:
     """Клавиатура для редактирования данных пользователя"""
     builder = InlineKeyboardBuilder()
@@ -225,6 +243,7 @@ def redaction_menu() -> InlineKeyboardMarkup:
     builder.adjust(2, 2, 2, 1)
     return builder.as_markup()
 
+@cache
 def redaction_child_menu() -> InlineKeyboardMarkup:
     """Клавиатура для редактирования данных ребенка"""
     builder = InlineKeyboardBuilder()
@@ -241,6 +260,7 @@ def redaction_child_menu() -> InlineKeyboardMarkup:
 
 # ===== СОГЛАСИЕ НА ОБРАБОТКУ ПД =====
 
+@cache
 def pd_consent() -> InlineKeyboardMarkup:
     """Согласие на обработку ПД (стандартное)"""
     builder = InlineKeyboardBuilder()
@@ -250,6 +270,7 @@ def pd_consent() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def pd_consent_token() -> InlineKeyboardMarkup:
     """Согласие на обработку ПД (для токена)"""
     builder = InlineKeyboardBuilder()
@@ -259,6 +280,7 @@ def pd_consent_token() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def pd_consent_child() -> InlineKeyboardMarkup:
     """Согласие на обработку ПД (для ребенка)"""
     builder = InlineKeyboardBuilder()
@@ -271,6 +293,7 @@ def pd_consent_child() -> InlineKeyboardMarkup:
 
 # ===== ТОКЕН АВТОРИЗАЦИИ =====
 
+@cache
 def token_check() -> InlineKeyboardMarkup:
     """Проверка наличия токена"""
     builder = InlineKeyboardBuilder()
@@ -280,6 +303,7 @@ def token_check() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def token_confirmation() -> InlineKeyboardMarkup:
     """Подтверждение токена"""
     builder = InlineKeyboardBuilder()
@@ -291,6 +315,7 @@ def token_confirmation() -> InlineKeyboardMarkup:
 
 
 # ===== ЭКСКУРСИИ =====
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def excursion_details(excursion_id: int) -> InlineKeyboardMarkup:
     """
     Инлайн-клавиатура с действиями для конкретной экскурсии
@@ -307,46 +332,55 @@ def excursion_details(excursion_id: int) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
-async def all_excursions() -> Optional[InlineKeyboardMarkup]:
+async def all_excursions(
+    excursions: Optional[Sequence] = None
+) -> Optional[InlineKeyboardMarkup]:
     """
     Инлайн-клавиатура со списком экскурсий и общим расписанием
-    Асинхронная, так как обращается к БД
+
+    Args:
+        excursions: уже полученные активные экскурсии; по умолчанию -
+            из снимка каталога (без обращения к БД)
     """
-    async with async_session() as session:
-        excursion_repo = ExcursionRepository(session)
-        excursions = await excursion_repo.get_all(active_only=True)
+    if excursions is None:
+        excursions = await excursion_catalog.active()
 
-        if not excursions:
-            return None
+    if not excursions:
+        return None
 
-        builder = InlineKeyboardBuilder()
+    return _excursions_keyboard(tuple((excursion.id, excursion.name) for excursion in excursions))
 
-        # Кнопка общего расписания
-        builder.button(
-            text="Расписание всех экскурсий",
-            callback_data="public_schedule_all"
-        )
+@lru_cache(maxsize=64)
+def _excursions_keyboard(items: tuple) -> InlineKeyboardMarkup:
+    """Клавиатура списка экскурсий по парам (id, название)"""
+    builder = InlineKeyboardBuilder()
 
-        # Разделитель
-        builder.button(
-            text="─────────────",
-            callback_data="no_action"
-        )
+    # Кнопка общего расписания
+    builder.button(
+        text="Расписание всех экскурсий",
+        callback_data="public_schedule_all"
+    )
 
-        # Список экскурсий
-        for excursion in excursions:
-            builder.button(
-                text=excursion.name,
-                callback_data=f"public_exc_detail:{excursion.id}"
-            )
+    # Разделитель
+    builder.button(
+        text="─────────────",
+        callback_data="no_action"
+    )
 
+    # Список экскурсий
+    for excursion_id, name in items:
         builder.button(
-            text="В главное меню",
-            callback_data="back_to_main"
+            text=name,
+            callback_data=f"public_exc_detail:{excursion_id}"
         )
 
-        builder.adjust(1)
-        return builder.as_markup()
+    builder.button(
+        text="В главное меню",
+        callback_data="back_to_main"
+    )
+
+    builder.adjust(1)
+    return builder.as_markup()
 
 def public_schedule_options() -> InlineKeyboardMarkup:
     """Опции просмотра расписания для пользователей"""
@@ -362,6 +396,7 @@ def public_schedule_options() -> InlineKeyboardMarkup:
     builder.adjust(2, 2, 1, 1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def public_slot_action(slot_id: int, available_places: int) -> InlineKeyboardMarkup:
     """
     Клавиатура для записи на слот
@@ -535,6 +570,7 @@ def excursion_schedule(slots: list) -> InlineKeyboardMarkup:
 
 # ===== 9. ИНФОРМАЦИЯ И FAQ =====
 
+@cache
 def feedback() -> InlineKeyboardMarkup:
     """Кнопка с ссылкой на группу отзывов"""
     builder = InlineKeyboardBuilder()
@@ -544,6 +580,7 @@ def feedback() -> InlineKeyboardMarkup:
     )
     return builder.as_markup()
 
+@cache
 def about_us() -> InlineKeyboardMarkup:
     """Кнопки с ссылками на соцсети"""
     builder = InlineKeyboardBuilder()
@@ -562,6 +599,7 @@ def about_us() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def questions() -> InlineKeyboardMarkup:
     """Клавиатура с часто задаваемыми вопросами"""
     builder = InlineKeyboardBuilder()
@@ -575,6 +613,7 @@ def questions() -> InlineKeyboardMarkup:
 
 
 # ===== 10. БРОНИРОВАНИЕ НА СЛОТ =====
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def participants(has_children: bool) -> InlineKeyboardMarkup:
     """Клавиатура выбора участников"""
     builder = InlineKeyboardBuilder()
@@ -598,6 +637,7 @@ def participants(has_children: bool) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def skip_promocode() -> InlineKeyboardMarkup:
     """Клавиатура для шага промокода"""
     builder = InlineKeyboardBuilder()
@@ -606,6 +646,7 @@ def skip_promocode() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def confirmation() -> InlineKeyboardMarkup:
     """Клавиатура подтверждения бронирования"""
     builder = InlineKeyboardBuilder()
@@ -642,6 +683,7 @@ def children_selection(children: list, selected_ids: list = None) -> InlineKeybo
 
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def child_weight(child_id: int) -> InlineKeyboardMarkup:
     """Клавиатура для ввода веса ребенка"""
     builder = InlineKeyboardBuilder()
@@ -653,6 +695,7 @@ def child_weight(child_id: int) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@cache
 def booking_start() -> InlineKeyboardMarkup:
     """Клавиатура для начала бронирования"""
     builder = InlineKeyboardBuilder()
@@ -664,6 +707,7 @@ def booking_start() -> InlineKeyboardMarkup:
 
 # ===== КНОПКИ ДЛЯ ВОЗВРАТА СРЕДСТВ =====
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def cancel_booking_button(booking_id: int) -> InlineKeyboardMarkup:
     """
     Кнопка отмены бронирования для сообщения о возврате (когда возврат возможен)
@@ -680,6 +724,7 @@ def cancel_booking_button(booking_id: int) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def cancel_booking_warning_button(booking_id: int) -> InlineKeyboardMarkup:
     """
     Кнопка отмены бронирования для сообщения о возврате (когда возврат невозможен)
@@ -696,6 +741,7 @@ def cancel_booking_warning_button(booking_id: int) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def cancel_with_refund_confirmation(booking_id: int, refund_amount: int) -> InlineKeyboardMarkup:
     """
     Клавиатура подтверждения отмены с информацией о возврате
@@ -716,6 +762,7 @@ def cancel_with_refund_confirmation(booking_id: int, refund_amount: int) -> Inli
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def cancel_without_refund_confirmation(booking_id: int, reason: str) -> InlineKeyboardMarkup:
     """
     Клавиатура подтверждения отмены без возврата
@@ -736,6 +783,7 @@ def cancel_without_refund_confirmation(booking_id: int, reason: str) -> InlineKe
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def refund_info_with_cancel(booking_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура для информации о возврате с кнопкой отмены
@@ -756,6 +804,7 @@ def refund_info_with_cancel(booking_id: int) -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def refund_info_no_refund(booking_id: int, reason: str) -> InlineKeyboardMarkup:
     """
     Клавиатура для информации о возврате когда возврат невозможен
@@ -800,6 +849,7 @@ def cancelled_paid_bookings_list(bookings: list) -> InlineKeyboardMarkup:
 
     return builder.as_markup()
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def refund_request_confirmation(booking_id: int) -> InlineKeyboardMarkup:
     """
     Клавиатура подтверждения запроса на возврат
@@ -1,93 +1,172 @@
 """
 Утилиты для отправки уведомлений администраторам
+
+Уведомления не отправляются сразу: за COALESCE_WINDOW секунд они
+собираются в один дайджест, который уходит всем администраторам
+параллельно. Список администраторов берется из кэша admin_roster,
+поэтому серия ошибок возврата в цикле не делает запрос к БД на каждую.
 """
-from typing import List
+import asyncio
+from typing import Dict, List, Optional
 
 from aiogram import Bot
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.repositories.user_repository import UserRepository
-from app.database.models import UserRole
+from app.services.admin_roster import AdminRoster, admin_roster
 from app.utils.logging_config import get_logger
 from app.admin_panel.keyboards_adm import admin_main_menu
 
 logger = get_logger(__name__)
 
 
+class AdminDigest:
+    """Сбор уведомлений администраторам в дайджест и параллельная отправка"""
+
+    COALESCE_WINDOW = 2.0
+    MAX_MESSAGE_LENGTH = 4096
+    SEPARATOR = "\n\n— — —\n\n"
+
+    def __init__(self, roster: Optional[AdminRoster] = None):
+        self._roster = roster or admin_roster
+        # parse_mode -> накопленные сообщения
+        self._pending: Dict[str, List[str]] = {}
+        self._bot: Optional[Bot] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def add(self, bot: Bot, message: str, parse_mode: str = "HTML") -> None:
+        """Добавить уведомление в текущий дайджест"""
+        self._bot = bot
+        self._pending.setdefault(parse_mode, []).append(message)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.COALESCE_WINDOW)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Ошибка при отправке уведомления администраторам: {e}", exc_info=True)
+
+    async def flush(self) -> List[int]:
+        """
+        Отправить накопленный дайджест.
+
+        Returns:
+            List[int]: Telegram ID администраторов, получивших все части дайджеста
+        """
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return []
+
+        admin_ids = await self._roster.telegram_ids()
+        if not admin_ids:
+            logger.warning("Нет администраторов для уведомления")
+            return []
+
+        delivered = set(admin_ids)
+        total = 0
+        for parse_mode, messages in pending.items():
+            total += len(messages)
+            for text in self._compose(messages):
+                results = await asyncio.gather(*(
+                    self._send(admin_id, text, parse_mode) for admin_id in admin_ids
+                ))
+                delivered.intersection_update(
+                    admin_id for admin_id, ok in zip(admin_ids, results) if ok
+                )
+
+        logger.info(
+            f"Уведомления ({total}) отправлены {len(delivered)} из {len(admin_ids)} администраторов"
+        )
+        return [admin_id for admin_id in admin_ids if admin_id in delivered]
+
+    async def stop(self) -> None:
+        """Отменить ожидание окна и отправить то, что накопилось"""
+        task, self._flush_task = self._flush_task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Ошибка при отправке уведомления администраторам: {e}", exc_info=True)
+
+    def _compose(self, messages: List[str]) -> List[str]:
+        """Собрать сообщения в части не длиннее лимита Telegram"""
+        if len(messages) == 1:
+            return messages
+
+        header = f"Уведомления для администраторов ({len(messages)})"
+        parts = []
+        current = header
+        for message in messages:
+            candidate = current + self.SEPARATOR + message
+            if len(candidate) > self.MAX_MESSAGE_LENGTH and current != header:
+                parts.append(current)
+                candidate = message
+            current = candidate
+        parts.append(current)
+        return parts
+
+    async def _send(self, admin_id: int, text: str, parse_mode: str) -> bool:
+        try:
+            await self._bot.send_message(
+                chat_id=admin_id,
+                text=text,
+                parse_mode=parse_mode,
+                reply_markup=admin_main_menu()
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Не удалось отправить сообщение админу {admin_id}: {e}")
+            return False
+
+
+admin_digest = AdminDigest()
+
+
 async def notify_admins(
     bot: Bot,
-    session: AsyncSession,
     message: str,
     parse_mode: str = "HTML"
-) -> List[int]:
+) -> None:
     """
     Отправить сообщение всем администраторам.
 
+    Сообщение ставится в дайджест и уходит в течение
+    AdminDigest.COALESCE_WINDOW секунд вместе с соседними уведомлениями.
+
     Args:
         bot: Экземпляр бота
-        session: Сессия базы данных
         message: Текст сообщения
         parse_mode: Режим парсинга сообщения
-
-    Returns:
-        List[int]: Список ID администраторов, которым удалось отправить сообщение
     """
-    user_repo = UserRepository(session)
-
-    try:
-        # Получаем всех администраторов
-        admins = await user_repo.get_users_by_role(UserRole.admin)
-
-        if not admins:
-            logger.warning("Нет администраторов для уведомления")
-            return []
-
-        success_ids = []
-
-        for admin in admins:
-            if admin.telegram_id:
-                try:
-                    await bot.send_message(
-                        chat_id=admin.telegram_id,
-                        text=message,
-                        parse_mode=parse_mode,
-                        reply_markup=admin_main_menu()
-                    )
-                    success_ids.append(admin.telegram_id)
-                except Exception as e:
-                    logger.error(f"Не удалось отправить сообщение админу {admin.telegram_id}: {e}")
-
-        logger.info(f"Уведомление отправлено {len(success_ids)} из {len(admins)} администраторов")
-        return success_ids
-
-    except Exception as e:
-        logger.error(f"Ошибка при отправке уведомления администраторам: {e}", exc_info=True)
-        return []
+    admin_digest.add(bot, message, parse_mode)
 
 
 async def notify_admins_about_refund_failure(
     bot: Bot,
-    session: AsyncSession,
-    refund_id: int,
     booking_id: int,
-    error_message: str
+    error_message: str,
+    refund_id: Optional[int] = None
 ) -> None:
     """
     Уведомить администраторов об ошибке возврата.
 
     Args:
         bot: Экземпляр бота
-        session: Сессия базы данных
-        refund_id: ID возврата в нашей системе
         booking_id: ID бронирования
         error_message: Сообщение об ошибке
+        refund_id: ID возврата в нашей системе (если возврат создан)
     """
     message = (
         "Ошибка возврата средств\n\n"
         f"Бронирование: #{booking_id}\n"
-        f"Возврат: #{refund_id}\n"
-        f"Ошибка: {error_message}\n\n"
+        + (f"Возврат: #{refund_id}\n" if refund_id else "")
+        + f"Ошибка: {error_message}\n\n"
         "Требуется ручное вмешательство."
     )
 
-    await notify_admins(bot, session, message)
\ No newline at end of file
+    await notify_admins(bot, message)
@@ -197,6 +197,59 @@ class WeightCalculator:
 class BookingCalculator:
     """Калькулятор для расчетов при бронировании"""
 
+    @staticmethod
+    def price_children(base_price: int, children: list, children_ids: list) -> List[Dict]:
+        """
+        Рассчитать цены детских билетов за один проход
+
+        Args:
+            base_price: базовая цена экскурсии
+            children: загруженные пользователи-дети
+            children_ids: ID детей в порядке выбора
+
+        Returns:
+            list: [{'id', 'name', 'price', 'category'}] в порядке children_ids,
+                  дети без даты рождения пропускаются
+        """
+        by_id = {child.id: child for child in children}
+        result = []
+        for child_id in children_ids:
+            child = by_id.get(child_id)
+            if child and child.date_of_birth:
+                child_price, category = PriceCalculator.calculate_child_price(
+                    base_price,
+                    child.date_of_birth
+                )
+                result.append({
+                    'id': child_id,
+                    'name': child.full_name,
+                    'price': child_price,
+                    'category': category
+                })
+        return result
+
+    @staticmethod
+    async def calculate_children_prices(base_price: int, children_ids: list, session=None) -> List[Dict]:
+        """
+        Загрузить детей одним запросом и рассчитать их цены
+
+        Args:
+            base_price: базовая цена экскурсии
+            children_ids: список ID детей
+            session: сессия БД вызывающего кода (без нее открывается новая)
+
+        Returns:
+            list: результат price_children
+        """
+        if not children_ids:
+            return []
+        if session is not None:
+            children = await UserRepository(session).get_by_ids(children_ids)
+        else:
+            async with async_session() as new_session:
+                children = await UserRepository(new_session).get_by_ids(children_ids)
+        return BookingCalculator.price_children(base_price, children, children_ids)
+
     @staticmethod
     async def calculate_booking_total(
         adult_price: int,
@@ -227,43 +280,16 @@ class BookingCalculator:
         children_prices = []
         children_details = []
 
-        # Функция для обработки одного ребенка
-        async def process_child(child_id, repo):
-            child = await repo.get_by_id(child_id)
-            if child and child.date_of_birth:
-                child_price, category = PriceCalculator.calculate_child_price(
-                    adult_price,
-                    child.date_of_birth
-                )
-                return {
-                    'id': child_id,
-                    'name': child.full_name,
-                    'price': child_price,
-                    'category': category
-                }, f"{child.full_name}: {child_price} руб. ({category})"
-            return None, None
-
-        # Если есть дети, добавляем их цены
+        # Если есть дети, добавляем их цены (все дети - одним запросом)
         if children_ids:
-            if session:
-                user_repo = UserRepository(session)
-                for child_id in children_ids:
-                    result = await process_child(child_id, user_repo)
-                    if result[0]:
-                        child_data, detail = result
-                        children_prices.append(child_data)
-                        children_details.append(detail)
-                        total += child_data['price']
-            else:
-                async with async_session() as new_session:
-                    user_repo = UserRepository(new_session)
-                    for child_id in children_ids:
-                        result = await process_child(child_id, user_repo)
-                        if result[0]:
-                            child_data, detail = result
-                            children_prices.append(child_data)
-                            children_details.append(detail)
-                            total += child_data['price']
+            children_prices = await BookingCalculator.calculate_children_prices(
+                adult_price, children_ids, session
+            )
+            for child_data in children_prices:
+                children_details.append(
+                    f"{child_data['name']}: {child_data['price']} руб. ({child_data['category']})"
+                )
+                total += child_data['price']
 
         # Применяем промокод, если есть
         promo_details = ""
@@ -1,11 +1,21 @@
 """
 Настройки логирования
+
+Обработчики (консоль, файлы) работают в отдельном потоке QueueListener:
+логгер приложения только кладет запись в очередь через QueueHandler,
+поэтому вызовы логирования не выполняют файловый ввод-вывод в event loop.
 """
 
+import atexit
 import logging
+import queue
 import sys
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+# Поток, записывающий логи из очереди (один на процесс)
+_listener: Optional[QueueListener] = None
 
 
 def setup_logging(
@@ -14,7 +24,8 @@ def setup_logging(
     file_logging: bool = True,
     log_dir: str = "logs",
     max_size_mb: int = 10,
-    backup_count: int = 5
+    backup_count: int = 5,
+    use_queue: bool = True
 ) -> logging.Logger:
     """
     Настройка логирования
@@ -26,6 +37,7 @@ def setup_logging(
         log_dir: директория для логов
         max_size_mb: максимальный размер файла в МБ
         backup_count: количество бэкапов
+        use_queue: писать логи в фоновом потоке через очередь
 
     Returns:
         Логгер приложения
@@ -49,18 +61,21 @@ def setup_logging(
     app_logger = logging.getLogger("app")
     app_logger.setLevel(log_level)
     app_logger.propagate = False
+    stop_logging()
     app_logger.handlers.clear()
 
     # Создаем директорию для логов
     log_path = Path(log_dir)
     log_path.mkdir(exist_ok=True)
 
+    handlers = []
+
     # Консольный обработчик
     if console:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(log_level)
         console_handler.setFormatter(formatter)
-        app_logger.addHandler(console_handler)
+        handlers.append(console_handler)
 
     # Файловые обработчики
     if file_logging:
@@ -74,7 +89,7 @@ def setup_logging(
         )
         main_handler.setLevel(log_level)
         main_handler.setFormatter(formatter)
-        app_logger.addHandler(main_handler)
+        handlers.append(main_handler)
 
         # Файл ошибок (только ERROR и выше)
         error_file = log_path / "errors.log"
@@ -86,7 +101,13 @@ def setup_logging(
         )
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(formatter)
-        app_logger.addHandler(error_handler)
+        handlers.append(error_handler)
+
+    if use_queue and handlers:
+        _start_listener(app_logger, handlers)
+    else:
+        for handler in handlers:
+            app_logger.addHandler(handler)
 
     # Заглушаем шумные логгеры
     noisy_loggers = {
@@ -110,6 +131,49 @@ def setup_logging(
     return app_logger
 
 
+def _start_listener(app_logger: logging.Logger, handlers: list) -> None:
+    """Подключить QueueHandler к логгеру и запустить поток записи"""
+    global _listener
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    app_logger.addHandler(QueueHandler(log_queue))
+
+    # respect_handler_level - файл ошибок по-прежнему получает только ERROR
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Дописать записи из очереди и остановить поток логирования"""
+    global _listener
+
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+class LogSampler:
+    """
+    Прореживание частых сообщений: пропускает первое и каждое N-е.
+
+    Используется для INFO сообщений на горячем пути (например, каждый
+    список из репозитория), чтобы лог не рос пропорционально трафику.
+    """
+
+    def __init__(self, every: int = 100):
+        self.every = max(1, every)
+        self._count = 0
+
+    def ready(self) -> bool:
+        """True, если текущее сообщение нужно записать"""
+        self._count += 1
+        return (self._count - 1) % self.every == 0
+
+
 def get_logger(name: str = None) -> logging.Logger:
     """
     Получить логгер для модуля
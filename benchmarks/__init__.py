@@ -0,0 +1,6 @@
+"""
+Бенчмарки производительности.
+
+Запускаются вручную как модули, например:
+    python -m benchmarks.lock_handoff
+"""
@@ -0,0 +1,314 @@
+"""
+Детерминированный генератор большого набора данных для бенчмарков.
+
+Один и тот же seed и масштаб всегда дают одинаковую БД: пользователи
+(клиенты с детьми, капитаны, администраторы), экскурсии, слоты за полгода
+назад и два месяца вперед, бронирования с детьми, платежи и возвраты.
+
+Данные пишутся пакетными INSERT (executemany) с заранее назначенными id,
+поэтому 100k бронирований генерируются за десятки секунд.
+
+Запуск отдельно (для переиспользования файла БД):
+    python -m benchmarks.data_generator --db bench.db --scale 1.0
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from dataclasses import dataclass, asdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database.models import (
+    User, Excursion, ExcursionSlot, Booking, BookingChild, Payment, Refund,
+    UserRole, RegistrationType, SlotStatus, BookingStatus, ClientStatus,
+    PaymentStatus, PaymentMethod, YooKassaStatus, RefundStatus, init_models
+)
+from app.database.session import DatabaseConfig
+
+CHUNK_SIZE = 5000
+
+LAST_NAMES = ["Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов", "Соколов", "Лебедев"]
+FIRST_NAMES = ["Иван", "Мария", "Алексей", "Ольга", "Дмитрий", "Анна", "Сергей", "Елена"]
+EXCURSION_NAMES = [
+    "Байкальская прогулка", "Закат на озере", "Острова и бухты", "Рыбалка с капитаном",
+    "Ночная прогулка", "Мыс Скрипер", "Большие Коты", "Чертова гора",
+]
+AGE_CATEGORIES = ["до 3 лет", "4-7 лет", "8-12 лет", "13+ лет"]
+
+
+@dataclass
+class DatasetSize:
+    """Размер набора данных"""
+
+    users: int = 50_000
+    captains: int = 50
+    admins: int = 5
+    excursions: int = 8
+    slots: int = 5_000
+    bookings: int = 100_000
+
+    @classmethod
+    def scaled(cls, scale: float) -> "DatasetSize":
+        base = cls()
+        return cls(
+            users=max(100, int(base.users * scale)),
+            captains=max(2, int(base.captains * scale)),
+            admins=base.admins,
+            excursions=base.excursions,
+            slots=max(50, int(base.slots * scale)),
+            bookings=max(200, int(base.bookings * scale)),
+        )
+
+
+async def _bulk_insert(engine: AsyncEngine, model, rows: List[Dict]) -> None:
+    """Пакетная вставка строк частями по CHUNK_SIZE"""
+    async with engine.begin() as conn:
+        for start in range(0, len(rows), CHUNK_SIZE):
+            await conn.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+def generate_rows(size: DatasetSize, seed: int, today: date) -> Dict[str, List[Dict]]:
+    """Построить строки всех таблиц (без обращения к БД)"""
+    rng = random.Random(seed)
+    now = datetime.combine(today, datetime.min.time()) + timedelta(hours=12)
+
+    def full_name() -> str:
+        return f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.randint(1, 9999)}"
+
+    users: List[Dict] = []
+    children_by_parent: Dict[int, List[int]] = {}
+    next_user_id = 1
+
+    def add_user(**fields) -> int:
+        nonlocal next_user_id
+        user_id = next_user_id
+        next_user_id += 1
+        row = {
+            "id": user_id,
+            "telegram_id": None,
+            "role": UserRole.client,
+            "full_name": full_name(),
+            "phone_number": f"+79{rng.randint(0, 999_999_999):09d}",
+            "date_of_birth": None,
+            "weight": rng.randint(45, 110),
+            "is_virtual": False,
+            "registration_type": RegistrationType.SELF,
+            "linked_to_parent_id": None,
+            "receive_mass_notifications": rng.random() > 0.1,
+            "created_at": now - timedelta(days=rng.randint(0, 720), minutes=rng.randint(0, 1440)),
+        }
+        row.update(fields)
+        users.append(row)
+        return user_id
+
+    admin_ids = [add_user(role=UserRole.admin, telegram_id=100 + i) for i in range(size.admins)]
+    captain_ids = [add_user(role=UserRole.captain, telegram_id=1000 + i, weight=90) for i in range(size.captains)]
+
+    adult_ids: List[int] = []
+    while next_user_id <= size.users:
+        parent_id = add_user(telegram_id=100_000 + next_user_id)
+        adult_ids.append(parent_id)
+
+        # Примерно у каждого пятого клиента 1-2 ребенка
+        if rng.random() < 0.2 and next_user_id <= size.users - 2:
+            children = []
+            for _ in range(rng.randint(1, 2)):
+                children.append(add_user(
+                    telegram_id=None,
+                    is_virtual=True,
+                    registration_type=RegistrationType.VIRTUAL_CHILD,
+                    linked_to_parent_id=parent_id,
+                    date_of_birth=today - timedelta(days=rng.randint(365, 14 * 365)),
+                    weight=rng.randint(12, 50),
+                    phone_number="",
+                ))
+            children_by_parent[parent_id] = children
+
+    excursions = [
+        {
+            "id": i + 1,
+            "name": EXCURSION_NAMES[i % len(EXCURSION_NAMES)],
+            "description": "Описание экскурсии",
+            "base_duration_minutes": rng.choice([60, 90, 120, 180]),
+            "base_price": rng.choice([2500, 3000, 3500, 4500, 6000]),
+            "is_active": True,
+        }
+        for i in range(size.excursions)
+    ]
+
+    # Слоты: полгода назад и два месяца вперед
+    slots: List[Dict] = []
+    first_day = today - timedelta(days=180)
+    total_days = 240
+    for slot_id in range(1, size.slots + 1):
+        excursion = rng.choice(excursions)
+        start = (
+            datetime.combine(first_day + timedelta(days=rng.randrange(total_days)), datetime.min.time())
+            + timedelta(hours=rng.randint(8, 20), minutes=rng.choice([0, 30]))
+        )
+        if start < now:
+            status = SlotStatus.completed if rng.random() > 0.05 else SlotStatus.cancelled
+        else:
+            status = SlotStatus.scheduled
+        slots.append({
+            "id": slot_id,
+            "excursion_id": excursion["id"],
+            "captain_id": rng.choice(captain_ids) if rng.random() > 0.05 else None,
+            "start_datetime": start,
+            "end_datetime": start + timedelta(minutes=excursion["base_duration_minutes"]),
+            "max_people": rng.choice([12, 20, 30]),
+            "max_weight": rng.choice([1200, 2000, 3000]),
+            "status": status,
+        })
+
+    bookings: List[Dict] = []
+    booking_children: List[Dict] = []
+    payments: List[Dict] = []
+    refunds: List[Dict] = []
+
+    for booking_id in range(1, size.bookings + 1):
+        slot = rng.choice(slots)
+        adult_id = rng.choice(adult_ids)
+        price = next(e["base_price"] for e in excursions if e["id"] == slot["excursion_id"])
+        created_at = min(slot["start_datetime"] - timedelta(hours=rng.randint(1, 24 * 20)), now)
+
+        if slot["start_datetime"] < now:
+            roll = rng.random()
+            if roll < 0.8:
+                booking_status, payment_status = BookingStatus.completed, PaymentStatus.paid
+            elif roll < 0.9:
+                booking_status, payment_status = BookingStatus.cancelled, PaymentStatus.refunded
+            else:
+                booking_status, payment_status = BookingStatus.cancelled, PaymentStatus.not_paid
+        else:
+            roll = rng.random()
+            if roll < 0.7:
+                booking_status, payment_status = BookingStatus.active, PaymentStatus.paid
+            elif roll < 0.9:
+                booking_status, payment_status = BookingStatus.active, PaymentStatus.not_paid
+            else:
+                booking_status, payment_status = BookingStatus.cancelled, PaymentStatus.not_paid
+
+        children = children_by_parent.get(adult_id, [])
+        selected = children if children and rng.random() < 0.5 else []
+        total_price = price
+        for child_id in selected:
+            child_price = price // 2
+            total_price += child_price
+            booking_children.append({
+                "booking_id": booking_id,
+                "child_user_id": child_id,
+                "age_category": rng.choice(AGE_CATEGORIES),
+                "calculated_price": child_price,
+                "created_at": created_at,
+            })
+
+        bookings.append({
+            "id": booking_id,
+            "slot_id": slot["id"],
+            "adult_user_id": adult_id,
+            "admin_creator_id": rng.choice(admin_ids) if rng.random() < 0.05 else None,
+            "total_price": total_price,
+            "booking_status": booking_status,
+            "client_status": ClientStatus.arrived if booking_status == BookingStatus.completed else ClientStatus.not_arrived,
+            "payment_status": payment_status,
+            "created_at": created_at,
+            "cancelled_at": created_at + timedelta(hours=2) if booking_status == BookingStatus.cancelled else None,
+        })
+
+        if payment_status in (PaymentStatus.paid, PaymentStatus.refunded):
+            payment_id = len(payments) + 1
+            payments.append({
+                "id": payment_id,
+                "booking_id": booking_id,
+                "amount": total_price,
+                "payment_method": PaymentMethod.online if rng.random() < 0.85 else PaymentMethod.cash,
+                "yookassa_payment_id": f"yk-{booking_id}",
+                "status": YooKassaStatus.succeeded,
+                "created_at": created_at + timedelta(minutes=rng.randint(1, 120)),
+            })
+            if payment_status == PaymentStatus.refunded:
+                refunds.append({
+                    "payment_id": payment_id,
+                    "booking_id": booking_id,
+                    "amount": total_price,
+                    "status": RefundStatus.SUCCEEDED,
+                    "yookassa_refund_id": f"rf-{booking_id}",
+                    "reason": "Отмена клиентом",
+                    "retry_count": 0,
+                    "created_at": created_at + timedelta(hours=3),
+                    "completed_at": created_at + timedelta(hours=4),
+                })
+
+    return {
+        "users": users,
+        "excursions": excursions,
+        "slots": slots,
+        "bookings": bookings,
+        "booking_children": booking_children,
+        "payments": payments,
+        "refunds": refunds,
+    }
+
+
+async def generate_dataset(
+    engine: AsyncEngine,
+    size: DatasetSize,
+    seed: int = 1,
+    today: date = None
+) -> Dict[str, int]:
+    """
+    Создать схему и заполнить БД.
+
+    Returns:
+        Количество строк по таблицам
+    """
+    await init_models(engine)
+    rows = generate_rows(size, seed, today or date.today())
+
+    await _bulk_insert(engine, User, rows["users"])
+    await _bulk_insert(engine, Excursion, rows["excursions"])
+    await _bulk_insert(engine, ExcursionSlot, rows["slots"])
+    await _bulk_insert(engine, Booking, rows["bookings"])
+    await _bulk_insert(engine, BookingChild, rows["booking_children"])
+    await _bulk_insert(engine, Payment, rows["payments"])
+    await _bulk_insert(engine, Refund, rows["refunds"])
+
+    return {table: len(table_rows) for table, table_rows in rows.items()}
+
+
+def create_engine_for(path: str) -> AsyncEngine:
+    """Движок SQLite с теми же параметрами, что у приложения"""
+    return create_async_engine(
+        f"sqlite+aiosqlite:///{path}",
+        poolclass=NullPool,
+        connect_args=DatabaseConfig.CONNECT_ARGS
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация набора данных для бенчмарков")
+    parser.add_argument("--db", required=True, help="Файл SQLite (должен не существовать)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Масштаб относительно 50k пользователей")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    async def run():
+        engine = create_engine_for(args.db)
+        start = time.perf_counter()
+        counts = await generate_dataset(engine, DatasetSize.scaled(args.scale), args.seed)
+        await engine.dispose()
+        print(f"Сгенерировано за {time.perf_counter() - start:.1f} с: {counts}")
+        print(f"Размер: {asdict(DatasetSize.scaled(args.scale))}")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Микробенчмарк сериализатора FSM для RedisStorage.
+
+На каждом апдейте aiogram читает и пишет данные FSM через json_loads/json_dumps.
+Payload'ы повторяют данные state на шагах пользовательского бронирования
+(app/routers/user/user_create_booking.py) и админского сценария с датой.
+
+Сравниваются:
+- legacy: json.dumps(cls=RedisJSONEncoder) + json.loads(object_hook=redis_object_hook)
+- current: app.services.redis.serializers.dumps/loads
+
+Redis не требуется.
+
+Запуск:
+    python -m benchmarks.fsm_serializer --number 20000
+"""
+
+import argparse
+import json
+import timeit
+from datetime import date, datetime
+
+from app.services.redis.serializers import (
+    RedisJSONEncoder, redis_object_hook, dumps, loads
+)
+
+
+def legacy_dumps(obj):
+    return json.dumps(obj, cls=RedisJSONEncoder)
+
+
+def legacy_loads(data):
+    return json.loads(data, object_hook=redis_object_hook)
+
+
+def booking_payloads() -> dict:
+    """Типичные данные state по шагам бронирования"""
+    start = {
+        "slot_id": 1842,
+        "user_id": 31577,
+        "adult_weight": 82,
+        "user_has_children": True,
+        "available_weight": 640,
+        "max_weight": 800,
+        "adult_price": 3500,
+        "max_people": 12,
+        "weight_limit": 720,
+        "seat_hold": True,
+    }
+
+    children = [
+        {"id": 31578 + i, "full_name": f"Иванова Мария Петровна {i}", "weight": 28 + i, "age": 6 + i}
+        for i in range(3)
+    ]
+    selecting = dict(
+        start,
+        total_weight=82,
+        adults_count=1,
+        available_children=children,
+        selected_children_ids=[31578, 31579],
+        children_weights={"31578": 28, "31579": 29},
+        selected_participants="with_children",
+    )
+
+    confirming = dict(
+        selecting,
+        total_children=2,
+        promo_code="SUMMER2024",
+        promo_id=17,
+        promo_discount_type="percent",
+        promo_discount_value=10,
+        promo_code_applied=True,
+        children_prices=[
+            {"id": 31578, "name": "Иванова Мария Петровна 0", "price": 1750, "category": "7-12"},
+            {"id": 31579, "name": "Иванова Мария Петровна 1", "price": 1750, "category": "7-12"},
+        ],
+        final_price=6300,
+    )
+
+    admin_with_dates = {
+        "excursion_id": 4,
+        "slot_date": date(2026, 7, 14),
+        "start_datetime": datetime(2026, 7, 14, 10, 30),
+        "max_people": 12,
+        "max_weight": 800,
+        "captain_id": 15,
+    }
+
+    return {
+        "start": start,
+        "selecting_children": selecting,
+        "confirming": confirming,
+        "admin_with_dates": admin_with_dates,
+    }
+
+
+def measure(func, arg, number: int) -> float:
+    """Среднее время одного вызова в микросекундах (лучший из 5 повторов)"""
+    best = min(timeit.repeat(lambda: func(arg), number=number, repeat=5))
+    return best / number * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк сериализатора FSM")
+    parser.add_argument("--number", type=int, default=20000, help="Вызовов в одном замере")
+    args = parser.parse_args()
+
+    print(f"{'payload':<20} {'bytes old/new':>14} {'dumps old/new, мкс':>20} {'loads old/new, мкс':>20}")
+
+    for name, payload in booking_payloads().items():
+        legacy_data = legacy_dumps(payload)
+        data = dumps(payload)
+
+        # Новый loads читает и старый формат
+        assert loads(legacy_data) == legacy_loads(legacy_data) == payload
+        assert loads(data) == payload
+
+        sizes = f"{len(legacy_data.encode())}/{len(data.encode())}"
+        dumps_times = f"{measure(legacy_dumps, payload, args.number):.2f}/{measure(dumps, payload, args.number):.2f}"
+        loads_times = f"{measure(legacy_loads, legacy_data, args.number):.2f}/{measure(loads, data, args.number):.2f}"
+
+        print(f"{name:<20} {sizes:>14} {dumps_times:>20} {loads_times:>20}")
+
+
+if __name__ == "__main__":
+    main()
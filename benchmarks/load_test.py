@@ -0,0 +1,505 @@
+"""
+Нагрузочный тест: синтетические апдейты Telegram через настоящий Dispatcher.
+
+Dispatcher собирается так же, как в run.py (setup_routers + RedisStorage
+с кастомными сериализаторами), но:
+- Bot работает через FakeTelegramSession: исходящие вызовы API записываются,
+  в ответ возвращаются заготовленные объекты;
+- БД - отдельный SQLite файл с засеянными данными (async_session
+  перенастраивается на него);
+- Redis - fakeredis в памяти или локальный Redis (--redis-url).
+
+Виртуальные пользователи параллельно проходят сценарии:
+- browse: просмотр расписания и карточки слота;
+- booking: полный FSM бронирования (только взрослый, без промокода);
+- payment: бронирование + инвойс + pre_checkout_query + successful_payment;
+- captain: отметка прибытия клиентов капитаном.
+
+Апдейты одного пользователя идут последовательно (как в Telegram),
+разные пользователи - параллельно. Отчет: апдейтов в секунду, перцентили
+латентности, SQL запросов на апдейт (в целом и по меткам обработчиков).
+
+Запуск:
+    python -m benchmarks.load_test --sessions 2000 --concurrency 200
+    python -m benchmarks.load_test --redis-url redis://localhost:6379/15 --json load.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+# Платежный токен нужен роутеру оплаты при импорте
+os.environ.setdefault("PAYMENTS_TOKEN", "000000:LOAD-TEST")
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.types import Chat, Message, Update, User as TgUser
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database.instrumentation import setup_query_instrumentation, track_queries
+from app.database.models import (
+    User, UserRole, Excursion, ExcursionSlot, Booking, SlotStatus, init_models
+)
+from app.database.session import async_session, DatabaseConfig
+from app.middlewares.query_tracking import describe_update
+from app.routers import setup_routers
+from app.services.redis import redis_client, dumps, loads
+from app.services.scheduler.bot_instance import set_bot_instance
+
+BOT_ID = 42
+CLIENT_TG_OFFSET = 1_000_000
+CAPTAIN_TG_OFFSET = 9_000_000
+
+SCENARIOS = ("browse", "booking", "payment", "captain")
+
+
+# ========== ФЕЙКОВЫЙ TELEGRAM ==========
+
+class FakeTelegramSession(BaseSession):
+    """
+    Сессия Bot без сети: записывает вызовы API и возвращает заготовленные ответы.
+
+    Для методов, возвращающих Message, создается сообщение в том же чате,
+    остальные получают True. Отправленные сообщения и инвойсы запоминаются
+    по чату, чтобы сценарии могли «нажимать» кнопки из ответов бота.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.calls: Counter = Counter()
+        self.last_markup: Dict[int, Any] = {}
+        self.invoices: Dict[int, str] = {}
+        self._message_id = 0
+
+    async def make_request(self, bot: Bot, method, timeout: Optional[int] = None):
+        name = type(method).__name__
+        self.calls[name] += 1
+
+        chat_id = getattr(method, "chat_id", None)
+        markup = getattr(method, "reply_markup", None)
+        if isinstance(chat_id, int) and markup is not None:
+            self.last_markup[chat_id] = markup
+        if name == "SendInvoice":
+            self.invoices[chat_id] = method.payload
+
+        if getattr(method, "__returning__", None) is Message and isinstance(chat_id, int):
+            self._message_id += 1
+            return Message(
+                message_id=self._message_id,
+                date=datetime.now(),
+                chat=Chat(id=chat_id, type="private"),
+                from_user=TgUser(id=BOT_ID, is_bot=True, first_name="Bot"),
+                text=getattr(method, "text", None)
+            )
+        return True
+
+    async def close(self):
+        pass
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    def find_callback(self, chat_id: int, prefix: str) -> Optional[str]:
+        """callback_data первой кнопки с префиксом в последней клавиатуре чата"""
+        markup = self.last_markup.get(chat_id)
+        for row in getattr(markup, "inline_keyboard", None) or []:
+            for button in row:
+                if button.callback_data and button.callback_data.startswith(prefix):
+                    return button.callback_data
+        return None
+
+
+# ========== СИНТЕТИЧЕСКИЕ АПДЕЙТЫ ==========
+
+class UpdateFactory:
+    """Построение апдейтов от имени пользователя"""
+
+    def __init__(self):
+        self._update_id = 0
+        self._message_id = 10_000_000
+
+    def _next_ids(self):
+        self._update_id += 1
+        self._message_id += 1
+        return self._update_id, self._message_id
+
+    @staticmethod
+    def _user(tg_id: int) -> dict:
+        return {"id": tg_id, "is_bot": False, "first_name": f"Load{tg_id}"}
+
+    @staticmethod
+    def _chat(tg_id: int) -> dict:
+        return {"id": tg_id, "type": "private"}
+
+    def message(self, tg_id: int, text: str) -> Update:
+        update_id, message_id = self._next_ids()
+        return Update.model_validate({
+            "update_id": update_id,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": self._chat(tg_id),
+                "from": self._user(tg_id),
+                "text": text,
+            },
+        })
+
+    def callback(self, tg_id: int, data: str) -> Update:
+        update_id, message_id = self._next_ids()
+        return Update.model_validate({
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": self._user(tg_id),
+                "chat_instance": str(tg_id),
+                "data": data,
+                "message": {
+                    "message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": self._chat(tg_id),
+                    "from": {"id": BOT_ID, "is_bot": True, "first_name": "Bot"},
+                    "text": "...",
+                },
+            },
+        })
+
+    def pre_checkout(self, tg_id: int, payload: str, amount: int = 100) -> Update:
+        update_id, _ = self._next_ids()
+        return Update.model_validate({
+            "update_id": update_id,
+            "pre_checkout_query": {
+                "id": str(update_id),
+                "from": self._user(tg_id),
+                "currency": "RUB",
+                "total_amount": amount,
+                "invoice_payload": payload,
+            },
+        })
+
+    def successful_payment(self, tg_id: int, payload: str, amount: int = 100) -> Update:
+        update_id, message_id = self._next_ids()
+        return Update.model_validate({
+            "update_id": update_id,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": self._chat(tg_id),
+                "from": self._user(tg_id),
+                "successful_payment": {
+                    "currency": "RUB",
+                    "total_amount": amount,
+                    "invoice_payload": payload,
+                    "telegram_payment_charge_id": f"tg-{update_id}",
+                    "provider_payment_charge_id": f"pr-{update_id}",
+                },
+            },
+        })
+
+
+# ========== ДАННЫЕ ==========
+
+async def seed_database(engine, clients: int, slots_per_day: int, days: int, seed: int) -> Dict[str, list]:
+    """Создать схему и засеять детерминированные данные"""
+    rng = random.Random(seed)
+
+    await init_models(engine)
+
+    async with async_session() as session:
+        captains = [
+            User(
+                telegram_id=CAPTAIN_TG_OFFSET + i, role=UserRole.captain,
+                full_name=f"Капитан {i}", phone_number=f"+7900000{i:04d}", weight=85
+            )
+            for i in range(max(1, slots_per_day))
+        ]
+        users = [
+            User(
+                telegram_id=CLIENT_TG_OFFSET + i, role=UserRole.client,
+                full_name=f"Клиент {i}", phone_number=f"+7911{i:07d}",
+                weight=rng.randint(50, 100)
+            )
+            for i in range(clients)
+        ]
+        excursions = [
+            Excursion(name=f"Экскурсия {i}", base_duration_minutes=90, base_price=3000 + 500 * i)
+            for i in range(3)
+        ]
+        session.add_all(captains + users + excursions)
+        await session.flush()
+
+        today = date.today()
+        slots = []
+        for day in range(days):
+            for n in range(slots_per_day):
+                start = datetime.combine(today + timedelta(days=day), datetime.min.time()) + timedelta(hours=10 + n)
+                if day == 0:
+                    # Слоты капитанов на сегодня - в конце дня, чтобы оставаться scheduled
+                    start = datetime.combine(today, datetime.min.time()) + timedelta(hours=23, minutes=n)
+                slots.append(ExcursionSlot(
+                    excursion_id=excursions[n % len(excursions)].id,
+                    captain_id=captains[n % len(captains)].id,
+                    start_datetime=start,
+                    end_datetime=start + timedelta(minutes=90),
+                    max_people=40,
+                    max_weight=4000,
+                    status=SlotStatus.scheduled
+                ))
+        session.add_all(slots)
+        await session.flush()
+
+        # Брони на сегодняшние слоты для сценария капитана
+        today_slots = [slot for slot in slots if slot.start_datetime.date() == today]
+        for i, user in enumerate(users[:len(today_slots) * 5]):
+            session.add(Booking(
+                slot_id=today_slots[i % len(today_slots)].id,
+                adult_user_id=user.id,
+                total_price=3000
+            ))
+
+        await session.commit()
+
+        return {
+            "captain_tg": [c.telegram_id for c in captains],
+            "client_tg": [u.telegram_id for u in users],
+            "excursion_ids": [e.id for e in excursions],
+            "future_slot_ids": [s.id for s in slots if s.start_datetime.date() > today],
+            "dates": [today + timedelta(days=d) for d in range(days)],
+        }
+
+
+# ========== ПРОГОН ==========
+
+class LoadRunner:
+    """Подача апдейтов в Dispatcher и сбор статистики"""
+
+    def __init__(self, dp: Dispatcher, bot: Bot, session: FakeTelegramSession, data: Dict[str, list], seed: int):
+        self.dp = dp
+        self.bot = bot
+        self.session = session
+        self.data = data
+        self.rng = random.Random(seed)
+        self.updates = UpdateFactory()
+
+        self.latencies: List[float] = []
+        self.statements: List[int] = []
+        self.by_label: Dict[str, Dict[str, list]] = defaultdict(lambda: {"latency": [], "statements": []})
+        self.errors: Counter = Counter()
+        self.scenarios: Counter = Counter()
+
+    async def feed(self, update: Update) -> None:
+        label = describe_update(update, {})
+        start = time.perf_counter()
+        with track_queries(label) as stats:
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception as e:
+                self.errors[f"{label}: {type(e).__name__}"] += 1
+        duration = time.perf_counter() - start
+
+        self.latencies.append(duration)
+        self.statements.append(stats.count)
+        self.by_label[label]["latency"].append(duration)
+        self.by_label[label]["statements"].append(stats.count)
+
+    async def browse(self, tg_id: int) -> None:
+        day = self.rng.choice(self.data["dates"])
+        await self.feed(self.updates.message(tg_id, "Наши экскурсии и запись"))
+        await self.feed(self.updates.callback(tg_id, "public_schedule_week"))
+        await self.feed(self.updates.callback(tg_id, f"public_view_date:{day.isoformat()}"))
+        await self.feed(self.updates.callback(tg_id, f"public_exc_detail:{self.rng.choice(self.data['excursion_ids'])}"))
+        await self.feed(self.updates.callback(tg_id, f"public_view_slot:{self.rng.choice(self.data['future_slot_ids'])}"))
+
+    async def booking(self, tg_id: int) -> None:
+        slot_id = self.rng.choice(self.data["future_slot_ids"])
+        await self.feed(self.updates.callback(tg_id, f"public_book_slot:{slot_id}"))
+        await self.feed(self.updates.callback(tg_id, "confirm_start_booking"))
+        await self.feed(self.updates.callback(tg_id, "booking_just_me"))
+        await self.feed(self.updates.callback(tg_id, "skip_promo_code"))
+        await self.feed(self.updates.callback(tg_id, "confirm_booking"))
+
+    async def payment(self, tg_id: int) -> None:
+        await self.booking(tg_id)
+        pay_data = self.session.find_callback(tg_id, "pay_booking:")
+        if not pay_data:
+            return
+
+        await self.feed(self.updates.callback(tg_id, pay_data))
+        payload = self.session.invoices.pop(tg_id, None)
+        if not payload:
+            return
+        await self.feed(self.updates.pre_checkout(tg_id, payload))
+        await self.feed(self.updates.successful_payment(tg_id, payload))
+
+    async def captain(self, tg_id: int) -> None:
+        await self.feed(self.updates.message(tg_id, "Отметить прибытие клиента"))
+        slot_data = self.session.find_callback(tg_id, "captain_arrival_slot:")
+        if not slot_data:
+            return
+        await self.feed(self.updates.callback(tg_id, slot_data))
+        arrived_data = self.session.find_callback(tg_id, "captain_mark_arrived:")
+        if arrived_data:
+            await self.feed(self.updates.callback(tg_id, arrived_data))
+
+    async def run(self, sessions: int, concurrency: int, weights: Dict[str, int]) -> float:
+        """Запустить sessions сценариев, не более concurrency одновременно"""
+        names = [name for name in SCENARIOS if weights.get(name)]
+        plan = self.rng.choices(names, weights=[weights[n] for n in names], k=sessions)
+
+        # Один пользователь не ведет два сценария одновременно
+        clients = list(self.data["client_tg"])
+        captains = list(self.data["captain_tg"])
+        busy_clients: asyncio.Queue = asyncio.Queue()
+        busy_captains: asyncio.Queue = asyncio.Queue()
+        for tg_id in clients:
+            busy_clients.put_nowait(tg_id)
+        for tg_id in captains:
+            busy_captains.put_nowait(tg_id)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def session_task(name: str) -> None:
+            async with semaphore:
+                pool = busy_captains if name == "captain" else busy_clients
+                tg_id = await pool.get()
+                try:
+                    await getattr(self, name)(tg_id)
+                    self.scenarios[name] += 1
+                finally:
+                    pool.put_nowait(tg_id)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(session_task(name) for name in plan))
+        return time.perf_counter() - start
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def build_report(runner: LoadRunner, elapsed: float) -> Dict[str, Any]:
+    """Итоговый отчет прогона"""
+    def summary(latencies: List[float], statements: List[int]) -> Dict[str, Any]:
+        return {
+            "updates": len(latencies),
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": max(latencies, default=0) * 1000,
+            "sql_avg": sum(statements) / len(statements) if statements else 0,
+            "sql_p95": percentile(statements, 0.95),
+        }
+
+    return {
+        "elapsed_s": elapsed,
+        "updates_per_s": len(runner.latencies) / elapsed if elapsed else 0,
+        "total": summary(runner.latencies, runner.statements),
+        "labels": {
+            label: summary(values["latency"], values["statements"])
+            for label, values in sorted(runner.by_label.items())
+        },
+        "scenarios": dict(runner.scenarios),
+        "api_calls": dict(runner.session.calls.most_common()),
+        "errors": dict(runner.errors),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    total = report["total"]
+    print(f"\nАпдейтов: {total['updates']} за {report['elapsed_s']:.2f} с "
+          f"-> {report['updates_per_s']:.1f} апдейтов/с")
+    print(f"Латентность: p50 {total['p50_ms']:.1f} мс, p95 {total['p95_ms']:.1f} мс, "
+          f"p99 {total['p99_ms']:.1f} мс, max {total['max_ms']:.1f} мс")
+    print(f"SQL на апдейт: в среднем {total['sql_avg']:.1f}, p95 {total['sql_p95']:.0f}")
+    print(f"Сценарии: {report['scenarios']}")
+
+    print(f"\n{'обработчик':<50} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'SQL':>6}")
+    for label, row in sorted(report["labels"].items(), key=lambda item: -item[1]["p95_ms"]):
+        print(f"{label[:50]:<50} {row['updates']:>6} {row['p50_ms']:>8.1f} "
+              f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['sql_avg']:>6.1f}")
+
+    print(f"\nВызовы Telegram API: {report['api_calls']}")
+    if report["errors"]:
+        print(f"Ошибки: {report['errors']}")
+
+
+async def run_load_test(args) -> Dict[str, Any]:
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="load_test_"), "load.db")
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}",
+        poolclass=NullPool,
+        connect_args=DatabaseConfig.CONNECT_ARGS
+    )
+    # Все модули используют общий async_session - перенаправляем его на тестовую БД
+    async_session.configure(bind=engine)
+    setup_query_instrumentation(engine, slow_query_ms=10_000)
+
+    if args.redis_url:
+        from app.services.redis.timing import TimedRedis
+        redis = TimedRedis.from_url(args.redis_url, decode_responses=True)
+        await redis.flushdb()
+    else:
+        from fakeredis.aioredis import FakeRedis
+        redis = FakeRedis(decode_responses=True)
+    redis_client._redis = redis
+    redis_client._register_scripts()
+
+    data = await seed_database(engine, args.clients, args.slots_per_day, args.days, args.seed)
+
+    session = FakeTelegramSession()
+    bot = Bot(token="123456:LOAD-TEST", session=session)
+    set_bot_instance(bot)
+
+    dp = Dispatcher(storage=RedisStorage(redis, json_loads=loads, json_dumps=dumps))
+    setup_routers(dp)
+
+    weights = {name: int(weight) for name, weight in (part.split("=") for part in args.mix.split(","))}
+    runner = LoadRunner(dp, bot, session, data, args.seed)
+    elapsed = await runner.run(args.sessions, args.concurrency, weights)
+
+    await engine.dispose()
+    return build_report(runner, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест Dispatcher на синтетических апдейтах")
+    parser.add_argument("--sessions", type=int, default=1000, help="Сценариев всего")
+    parser.add_argument("--concurrency", type=int, default=100, help="Сценариев одновременно")
+    parser.add_argument("--mix", default="browse=60,booking=20,payment=15,captain=5",
+                        help="Веса сценариев")
+    parser.add_argument("--clients", type=int, default=2000, help="Клиентов в БД")
+    parser.add_argument("--slots-per-day", type=int, default=6)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", help="Путь к файлу SQLite (по умолчанию временный)")
+    parser.add_argument("--redis-url", help="Локальный Redis вместо fakeredis (база будет очищена)")
+    parser.add_argument("--json", help="Сохранить отчет в JSON")
+    parser.add_argument("--log-level", default="CRITICAL", help="Уровень логов приложения")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(args.log_level.upper())
+    logging.getLogger("app").setLevel(args.log_level.upper())
+
+    report = asyncio.run(run_load_test(args))
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
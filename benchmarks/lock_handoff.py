@@ -0,0 +1,117 @@
+"""
+Бенчмарк передачи Redis-блокировки между ожидающими.
+
+Много корутин одновременно ждут один и тот же ключ (горячий слот).
+Измеряется задержка передачи: время от освобождения блокировки
+владельцем до захвата ее следующим ожидающим, а также количество
+попыток SET NX, отправленных в Redis.
+
+Сравниваются:
+- event: RedisClient.lock (уведомление через pub/sub + редкий опрос как страховка)
+- polling: прежняя схема (acquire_lock каждые 100 мс)
+
+Требуется запущенный Redis (настройки берутся из .env: REDIS_HOST, REDIS_PORT, ...).
+
+Запуск:
+    python -m benchmarks.lock_handoff --waiters 50 --hold-ms 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import List
+
+from dotenv import load_dotenv
+
+from app.services.redis.client import RedisClient
+
+
+class CountingRedisClient(RedisClient):
+    """RedisClient, считающий попытки захвата блокировки"""
+
+    def __init__(self):
+        super().__init__()
+        self.acquire_attempts = 0
+
+    async def acquire_lock(self, key, timeout=30, token=None):
+        self.acquire_attempts += 1
+        return await super().acquire_lock(key, timeout, token)
+
+
+@asynccontextmanager
+async def polling_lock(client: RedisClient, key: str, timeout: int = 30):
+    """Прежняя реализация ожидания: опрос каждые 100 мс"""
+    token = str(uuid.uuid4())
+    while not await client.acquire_lock(key, timeout, token):
+        await asyncio.sleep(0.1)
+    try:
+        yield
+    finally:
+        await client.release_lock(key, token)
+
+
+async def run_scenario(client: CountingRedisClient, mode: str, waiters: int, hold_ms: float) -> dict:
+    """Прогнать один сценарий и вернуть статистику"""
+    key = f"bench:lock:{mode}:{uuid.uuid4().hex[:8]}"
+    release_times: List[float] = []
+    handoffs: List[float] = []
+    client.acquire_attempts = 0
+
+    async def worker():
+        lock_cm = client.lock(key, timeout=30) if mode == "event" else polling_lock(client, key)
+        async with lock_cm:
+            acquired_at = time.perf_counter()
+            if release_times:
+                handoffs.append(acquired_at - release_times[-1])
+            await asyncio.sleep(hold_ms / 1000)
+            release_times.append(time.perf_counter())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(waiters)))
+    elapsed = time.perf_counter() - started
+
+    handoffs_ms = sorted(h * 1000 for h in handoffs)
+    return {
+        "mode": mode,
+        "waiters": waiters,
+        "elapsed_s": elapsed,
+        "acquire_attempts": client.acquire_attempts,
+        "handoff_p50_ms": statistics.median(handoffs_ms) if handoffs_ms else 0.0,
+        "handoff_p95_ms": handoffs_ms[int(len(handoffs_ms) * 0.95) - 1] if handoffs_ms else 0.0,
+        "handoff_max_ms": handoffs_ms[-1] if handoffs_ms else 0.0,
+    }
+
+
+def print_result(result: dict) -> None:
+    print(
+        f"{result['mode']:>8}: ожидающих={result['waiters']}, "
+        f"всего {result['elapsed_s']:.2f} с, SET NX попыток={result['acquire_attempts']}, "
+        f"передача p50={result['handoff_p50_ms']:.1f} мс, "
+        f"p95={result['handoff_p95_ms']:.1f} мс, max={result['handoff_max_ms']:.1f} мс"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк передачи Redis-блокировки")
+    parser.add_argument("--waiters", type=int, default=50, help="Количество одновременных ожидающих")
+    parser.add_argument("--hold-ms", type=float, default=5.0, help="Время удержания блокировки, мс")
+    parser.add_argument("--skip-polling", action="store_true", help="Не запускать сценарий с опросом")
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = CountingRedisClient()
+    await client.initialize()
+
+    try:
+        print_result(await run_scenario(client, "event", args.waiters, args.hold_ms))
+        if not args.skip_polling:
+            print_result(await run_scenario(client, "polling", args.waiters, args.hold_ms))
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
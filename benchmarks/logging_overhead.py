@@ -0,0 +1,134 @@
+"""
+Накладные расходы логирования на запрос репозитория.
+
+Сравниваются вызовы BaseRepository на SQLite в памяти при уровне INFO
+(как в проде) и файловых логах:
+- legacy: логирование как до перевода на очередь - str(query) и условия
+  форматируются на каждом запросе, INFO о каждом списке пишется в файл
+  прямо в event loop
+- current: проверки уровня, прореживание INFO и QueueHandler
+
+Отдельно замеряется стоимость logger.info для потока event loop: запись
+в файл напрямую и постановка в очередь (форматирование остается в вызывающем
+потоке, в фон уходит только ввод-вывод и ротация).
+
+Запуск:
+    python -m benchmarks.logging_overhead --number 2000
+"""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database.models import User, UserRole, init_models
+from app.database.repositories.base import BaseRepository
+from app.utils.logging_config import setup_logging, stop_logging
+
+BENCH_LOGGER = "app.bench"
+
+
+class LegacyRepository(BaseRepository):
+    """Логирование горячего пути в прежнем виде"""
+
+    async def _execute_query(self, query):
+        self.logger.debug(f"Выполнение запроса: {str(query)[:100]}...")
+        return await self.session.execute(query)
+
+    async def _get_many(self, model_class, *conditions, limit=None):
+        query = select(model_class).where(*conditions)
+        if limit:
+            query = query.limit(limit)
+        self.logger.debug(
+            f"Поиск записей {model_class.__name__}: "
+            f"conditions={conditions}, limit={limit}"
+        )
+        result = await self.session.execute(query)
+        entities = result.scalars().all()
+        self.logger.info(f"Найдено записей {model_class.__name__}: {len(entities)}")
+        return list(entities)
+
+
+async def _measure(repo_class, sessionmaker, number: int, rounds: int = 3) -> dict:
+    """Время вызова в микросекундах (лучший из rounds замеров)"""
+    results = {}
+    async with sessionmaker() as session:
+        repo = repo_class(session)
+        repo.logger = logging.getLogger(BENCH_LOGGER)
+        query = select(User).where(User.role == UserRole.client, User.telegram_id > 0).limit(10)
+
+        calls = {
+            "_execute_query": lambda: repo._execute_query(query),
+            "_get_many": lambda: repo._get_many(User, User.role == UserRole.client, limit=10),
+        }
+        for name, call in calls.items():
+            for _ in range(50):
+                await call()
+            best = None
+            for _ in range(rounds):
+                start = time.perf_counter()
+                for _ in range(number):
+                    await call()
+                elapsed = (time.perf_counter() - start) / number * 1e6
+                best = elapsed if best is None else min(best, elapsed)
+            results[name] = best
+    return results
+
+
+def _log_call_cost(number: int) -> float:
+    """Стоимость одного logger.info в микросекундах"""
+    logger = logging.getLogger(BENCH_LOGGER)
+    start = time.perf_counter()
+    for i in range(number):
+        logger.info(f"Найдено записей User: {i}")
+    return (time.perf_counter() - start) / number * 1e6
+
+
+async def run(number: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    await init_models(engine)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessionmaker() as session:
+        session.add_all(
+            User(
+                telegram_id=i + 1,
+                full_name=f"Клиент {i}",
+                phone_number=f"+7900{i:07d}",
+                role=UserRole.client
+            )
+            for i in range(50)
+        )
+        await session.commit()
+
+    log_dir = tempfile.mkdtemp(prefix="bench_logs_")
+    rows = {}
+    for label, repo_class, use_queue in (
+        ("legacy", LegacyRepository, False),
+        ("current", BaseRepository, True),
+    ):
+        setup_logging(level="INFO", file_logging=True, log_dir=log_dir, use_queue=use_queue)
+        rows[label] = await _measure(repo_class, sessionmaker, number)
+        rows[label]["logger.info"] = _log_call_cost(number)
+        stop_logging()
+
+    await engine.dispose()
+
+    print(f"{'вызов':<20} {'legacy, мкс':>12} {'current, мкс':>13} {'разница':>9}")
+    for name in rows["legacy"]:
+        old, new = rows["legacy"][name], rows["current"][name]
+        print(f"{name:<20} {old:>12.1f} {new:>13.1f} {(new - old) / old * 100:>+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Накладные расходы логирования")
+    parser.add_argument("--number", type=int, default=2000, help="Вызовов на замер")
+    args = parser.parse_args()
+    asyncio.run(run(args.number))
+
+
+if __name__ == "__main__":
+    main()
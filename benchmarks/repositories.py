@@ -0,0 +1,212 @@
+"""
+Бенчмарк горячих вызовов репозиториев и менеджеров на большом наборе данных.
+
+Данные создает benchmarks.data_generator (по умолчанию 50k пользователей,
+5k слотов, 100k бронирований с детьми, платежами и возвратами). Каждый вызов
+выполняется в новой сессии, замеряются время и число SQL запросов.
+
+Redis подменяется fakeredis: занятость слотов в расписании читается из
+счетчиков (засеваются на прогреве), как в проде. С --no-redis расписание
+считается по БД, как при недоступном Redis.
+
+Результаты сохраняются в JSON вместе с коммитом и размером данных,
+чтобы сравнивать прогоны между коммитами:
+    python -m benchmarks.repositories --db bench.db --output before.json
+    python -m benchmarks.repositories --db bench.db --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.database.instrumentation import setup_query_instrumentation, track_queries
+from app.database.managers import BookingManager, SlotManager, StatisticsManager, UserManager
+from app.database.models import UserRole
+from app.database.repositories import NotificationRepository
+from app.database.session import async_session
+from app.services.redis import redis_client
+
+from .data_generator import DatasetSize, create_engine_for, generate_dataset
+
+BenchFunc = Callable[[Any], Awaitable[Any]]
+
+
+def _month_bounds() -> tuple:
+    today = date.today()
+    start = datetime.combine(today - timedelta(days=30), datetime.min.time())
+    return start, datetime.combine(today, datetime.max.time())
+
+
+async def _month_schedule(session):
+    return await SlotManager(session).get_month_schedule()
+
+
+async def _expired_unpaid(session):
+    return await BookingManager(session).get_expired_unpaid_bookings()
+
+
+async def _period_stats(session):
+    start, end = _month_bounds()
+    return await StatisticsManager(session).get_period_stats(start, end)
+
+
+async def _captains_with_stats(session):
+    return await StatisticsManager(session).get_captains_with_stats()
+
+
+async def _search_users_name(session):
+    return await UserManager(session).search_users("Иванов Мария")
+
+
+async def _search_users_phone(session):
+    return await UserManager(session).search_users("+7912")
+
+
+async def _recipients_clients(session):
+    return await NotificationRepository(session).get_recipients_by_audience(UserRole.client)
+
+
+BENCHMARKS: Dict[str, BenchFunc] = {
+    "SlotManager.get_month_schedule": _month_schedule,
+    "BookingManager.get_expired_unpaid_bookings": _expired_unpaid,
+    "StatisticsManager.get_period_stats": _period_stats,
+    "StatisticsManager.get_captains_with_stats": _captains_with_stats,
+    "UserManager.search_users[name]": _search_users_name,
+    "UserManager.search_users[phone]": _search_users_phone,
+    "NotificationRepository.get_recipients_by_audience[client]": _recipients_clients,
+}
+
+
+async def run_benchmark(func: BenchFunc, repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    """Замер одного вызова: время (мс) и число SQL запросов"""
+    for _ in range(warmup):
+        async with async_session() as session:
+            await func(session)
+
+    timings: List[float] = []
+    statements = 0
+    for _ in range(repeat):
+        async with async_session() as session:
+            with track_queries("benchmark") as stats:
+                start = time.perf_counter()
+                await func(session)
+                timings.append((time.perf_counter() - start) * 1000)
+        statements = stats.count
+
+    return {
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.fmean(timings),
+        "max_ms": max(timings),
+        "statements": statements,
+        "repeat": repeat,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict]) -> None:
+    """Напечатать изменение медианы относительно базового прогона"""
+    print(f"\n{'вызов':<60} {'было, мс':>10} {'стало, мс':>10} {'изменение':>10}")
+    for name, row in results.items():
+        old = baseline.get(name)
+        if not old:
+            print(f"{name:<60} {'-':>10} {row['median_ms']:>10.2f} {'новый':>10}")
+            continue
+        change = (row["median_ms"] - old["median_ms"]) / old["median_ms"] * 100 if old["median_ms"] else 0
+        print(f"{name:<60} {old['median_ms']:>10.2f} {row['median_ms']:>10.2f} {change:>+9.1f}%")
+
+
+async def run_suite(args) -> Dict[str, Any]:
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="bench_"), "bench.db")
+    size = DatasetSize.scaled(args.scale)
+
+    engine = create_engine_for(db_path)
+    counts = None
+    if not os.path.exists(db_path) or os.path.getsize(db_path) == 0:
+        start = time.perf_counter()
+        counts = await generate_dataset(engine, size, args.seed)
+        print(f"Данные сгенерированы за {time.perf_counter() - start:.1f} с: {counts}")
+
+    # Все менеджеры используют общий async_session - перенаправляем его на БД бенчмарка
+    async_session.configure(bind=engine)
+
+    if not args.no_redis:
+        from fakeredis.aioredis import FakeRedis
+        redis_client._redis = FakeRedis(decode_responses=True)
+        redis_client._register_scripts()
+    setup_query_instrumentation(engine, slow_query_ms=60_000)
+
+    names = [name for name in BENCHMARKS if not args.filter or args.filter in name]
+    results = {}
+    for name in names:
+        results[name] = await run_benchmark(BENCHMARKS[name], args.repeat)
+        row = results[name]
+        print(f"{name:<60} median {row['median_ms']:>9.2f} мс  min {row['min_ms']:>9.2f} мс  SQL {row['statements']}")
+
+    await engine.dispose()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "scale": args.scale,
+            "dataset": asdict(size),
+            "rows": counts,
+            "redis": not args.no_redis,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк репозиториев и менеджеров")
+    parser.add_argument("--db", help="Файл SQLite; если не существует - будет сгенерирован")
+    parser.add_argument("--scale", type=float, default=1.0, help="Масштаб данных (1.0 = 50k пользователей)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=10, help="Замеров на вызов")
+    parser.add_argument("--filter", help="Запускать только вызовы, содержащие строку")
+    parser.add_argument("--no-redis", action="store_true", help="Без Redis (расписание по БД)")
+    parser.add_argument("--output", help="Сохранить результаты в JSON")
+    parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+    args = parser.parse_args()
+
+    # Логи менеджеров искажают замеры
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("app").setLevel(logging.WARNING)
+
+    report = asyncio.run(run_suite(args))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        compare(report["results"], baseline["results"])
+
+
+if __name__ == "__main__":
+    main()
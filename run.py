@@ -1,4 +1,5 @@
 import asyncio
+import multiprocessing
 import os
 
 from aiogram import Bot, Dispatcher
@@ -10,7 +11,19 @@ from dotenv import load_dotenv
 from app.routers import setup_routers
 from app.database.models import init_models
 from app.database.repositories import SettingsRepository
-from app.database.session import async_session
+from app.database.session import async_session, engine
+from app.database.instrumentation import setup_query_instrumentation
+from app.middlewares import QueryTrackingMiddleware, MetricsMiddleware, RouterLabelMiddleware
+from app.services.metrics import metrics_server, register_database_metrics
+from app.services.settings_cache import settings_cache
+from app.services.payment_confirmations import payment_confirmations
+from app.services.outbox import outbox_dispatcher
+from app.services.send_scheduler import send_scheduler, setup_send_scheduler
+from app.utils.admin_notifications import admin_digest
+from app.services.update_ordering import ChatEventIsolation
+from app.services.webhook import (
+    WebhookConfig, create_webhook_app, set_webhook, start_webhook_server, wait_for_stop_signal
+)
 from app.services.redis import redis_client, dumps, loads
 from app.services.scheduler.scheduler import scheduler_service
 from app.services.scheduler.bot_instance import set_bot_instance
@@ -27,6 +40,20 @@ LOG_DIR = os.getenv('LOG_DIR')
 ROTATION_MAX_SIZE_MB = int(os.getenv('ROTATION_MAX_SIZE_MB'))
 ROTATION_BACKUP_COUNT = int(os.getenv('ROTATION_BACKUP_COUNT'))
 
+# Инструментирование SQL
+SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', 100))
+SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'false').lower() == 'true'
+
+# Эндпоинт метрик (пустой METRICS_PORT - выключен)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = os.getenv('METRICS_PORT', '').strip()
+
+# Лимит одновременно выполняемых обработчиков (апдейты одного чата - по очереди)
+MAX_CONCURRENT_UPDATES = int(os.getenv('MAX_CONCURRENT_UPDATES', 100))
+
+# Режим получения апдейтов: polling или webhook (настройки WEBHOOK_*)
+BOT_MODE = os.getenv('BOT_MODE', 'polling').strip().lower()
+
 logger = setup_logging(
     level=LOG_LEVEL,
     console=ENABLE_CONSOLE_LOGGING,
@@ -42,10 +69,17 @@ bot = Bot(
     default=DefaultBotProperties(parse_mode=ParseMode.HTML)
 )
 set_bot_instance(bot)
+# Все отправки бота - через общий планировщик с лимитами Telegram
+setup_send_scheduler(bot)
 
-async def main():
-    logger.info("Запуск бота...")
+async def build_dispatcher(multiprocess: bool = False, primary: bool = True) -> Dispatcher:
+    """
+    Подключение к Redis, создание Dispatcher, мидлвари и роутеры.
 
+    multiprocess - апдейты одного чата могут прийти в разные процессы,
+    порядок дополнительно обеспечивается блокировкой в Redis.
+    primary - процесс запускает фоновые отправки (передается в startup).
+    """
     try:
         await redis_client.initialize()
         logger.info("Redis инициализирован")
@@ -60,14 +94,41 @@ async def main():
         json_dumps=dumps       # кастомный энкодер
     )
 
-    dp = Dispatcher(storage=redis_storage)
-    logger.info("Dispatcher создан с RedisStorage")
+    # Апдейты одного чата - последовательно, разных чатов - параллельно
+    events_isolation = ChatEventIsolation(
+        max_in_flight=MAX_CONCURRENT_UPDATES,
+        shared=redis_storage.create_isolation() if multiprocess else None
+    )
+
+    dp = Dispatcher(storage=redis_storage, events_isolation=events_isolation)
+    dp["primary"] = primary
+    logger.info(f"Dispatcher создан с RedisStorage (до {MAX_CONCURRENT_UPDATES} обработчиков одновременно)")
+
+    # Учет SQL запросов по апдейтам (после FSM, чтобы знать состояние)
+    dp.update.outer_middleware(QueryTrackingMiddleware())
+    # Латентность и ошибки по обработчикам
+    dp.update.outer_middleware(MetricsMiddleware())
+    for observer in (dp.message, dp.callback_query, dp.pre_checkout_query):
+        observer.middleware(RouterLabelMiddleware())
 
     logger.debug("Настройка роутеров...")
     setup_routers(dp)
 
     init_notification_service(bot)
 
+    dp.startup.register(startup)
+    dp.shutdown.register(shutdown)
+    return dp
+
+async def start_background_services():
+    """Сервер метрик, планировщик и отправка outbox (только в одном процессе)"""
+    if METRICS_PORT:
+        register_database_metrics()
+        try:
+            await metrics_server.start(METRICS_HOST, int(METRICS_PORT))
+        except Exception as e:
+            logger.error(f"Ошибка запуска сервера метрик: {e}", exc_info=True)
+
     # Запускаем планировщик
     try:
         await scheduler_service.start()
@@ -75,16 +136,97 @@ async def main():
     except Exception as e:
         logger.error(f"Ошибка запуска планировщика: {e}", exc_info=True)
 
-    dp.startup.register(startup)
-    dp.shutdown.register(shutdown)
+    # Сообщения из outbox отправляет один процесс
+    await outbox_dispatcher.start()
+
+async def main():
+    logger.info("Запуск бота...")
+
+    setup_query_instrumentation(
+        engine,
+        slow_query_ms=SLOW_QUERY_MS,
+        explain=SLOW_QUERY_EXPLAIN
+    )
+
+    dp = await build_dispatcher()
+    await start_background_services()
 
     logger.debug("Запуск polling...")
     try:
         await dp.start_polling(bot)
     finally:
+        await outbox_dispatcher.stop()
+        await send_scheduler.stop()
+        await metrics_server.stop()
         await redis_client.close()
 
-async def startup(dispatcher: Dispatcher):
+async def run_webhook(worker_index: int = 0):
+    """
+    Запуск в режиме webhook.
+
+    startup диспетчера (БД и настройки по умолчанию) выполняется в каждом
+    воркере при запуске приложения. Воркер 0 дополнительно запускает
+    планировщик и сервер метрик, регистрирует webhook и порождает
+    остальные воркеры.
+    """
+    config = WebhookConfig.from_env()
+    primary = worker_index == 0
+    if primary and not config.base_url:
+        raise RuntimeError("WEBHOOK_BASE_URL не задан для режима webhook")
+    if not config.secret:
+        raise RuntimeError("WEBHOOK_SECRET не задан для режима webhook")
+    logger.info(f"Запуск webhook воркера {worker_index + 1}/{config.workers}...")
+
+    setup_query_instrumentation(
+        engine,
+        slow_query_ms=SLOW_QUERY_MS,
+        explain=SLOW_QUERY_EXPLAIN
+    )
+
+    dp = await build_dispatcher(multiprocess=config.workers > 1, primary=primary)
+    if primary:
+        await start_background_services()
+
+    app = create_webhook_app(dp, bot, config)
+    # startup диспетчера выполняется при запуске приложения
+    runner = await start_webhook_server(app, config)
+
+    workers = []
+    if primary:
+        await set_webhook(dp, bot, config)
+        context = multiprocessing.get_context("spawn")
+        for index in range(1, config.workers):
+            process = context.Process(target=run_webhook_worker, args=(index,), name=f"webhook-worker-{index}")
+            process.start()
+            workers.append(process)
+
+    try:
+        await wait_for_stop_signal()
+        logger.info(f"Остановка webhook воркера {worker_index + 1}...")
+    finally:
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            await asyncio.to_thread(process.join, 30)
+
+        # shutdown диспетчера выполняется при остановке приложения
+        await runner.cleanup()
+        if primary:
+            await scheduler_service.shutdown()
+            await outbox_dispatcher.stop()
+            await metrics_server.stop()
+        await send_scheduler.stop()
+        await bot.session.close()
+        await redis_client.close()
+
+def run_webhook_worker(worker_index: int):
+    """Точка входа дочернего процесса webhook"""
+    try:
+        asyncio.run(run_webhook(worker_index))
+    except KeyboardInterrupt:
+        pass
+
+async def startup(dispatcher: Dispatcher, primary: bool = True):
     """Обработчик запуска бота"""
     try:
         await init_models()
@@ -103,6 +245,13 @@ async def startup(dispatcher: Dispatcher):
                 existing = await settings_repo.get_by_key(key)
                 if not existing:
                     await settings_repo.set(key, default_value, description)
+
+        # Снимок настроек в памяти и подписка на изменения из других процессов
+        await settings_cache.start()
+        # Воркер подтверждений платежей - только в основном процессе:
+        # лимиты отправки у каждого процесса свои, а очередь общая
+        if primary:
+            await payment_confirmations.start()
     except Exception as e:
         logger.error(f"Ошибка инициализации базы данных: {e}", exc_info=True)
         raise
@@ -112,12 +261,16 @@ async def startup(dispatcher: Dispatcher):
 
 async def shutdown(dispatcher: Dispatcher):
     """Обработчик остановки бота"""
+    await payment_confirmations.stop()
+    # Накопленные уведомления администраторам отправляются до закрытия сессии бота
+    await admin_digest.stop()
+    await settings_cache.stop()
     logger.info('Бот остановлен.')
     print('Бот остановлен.')
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        asyncio.run(run_webhook() if BOT_MODE == 'webhook' else main())
     except KeyboardInterrupt:
         logger.info("Получен сигнал KeyboardInterrupt")
     except Exception as e:
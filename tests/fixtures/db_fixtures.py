@@ -72,4 +72,13 @@ async def db_session(async_engine):
             yield session
         finally:
             await session.rollback()
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+@pytest.fixture
+def session_factory(async_engine):
+    """Фабрика сессий тестовой БД для сервисов, открывающих свои сессии."""
+    return async_sessionmaker(
+        async_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
@@ -1,9 +1,12 @@
 """Фикстуры для Redis."""
 
+import fakeredis
 import pytest
 from unittest.mock import AsyncMock
 from contextlib import asynccontextmanager
 
+from app.services.redis.client import WatchedLock
+
 
 class MockRedisClient:
     """Полноценный мок для Redis клиента."""
@@ -19,6 +22,18 @@ class MockRedisClient:
         # Просто возвращаем контекст, не делаем никаких проверок
         yield self
 
+    @asynccontextmanager
+    async def held_lock(self, key: str, timeout: int = 60, blocking_timeout=0, extend_interval=None):
+        """Мок для блокировки с watchdog (без фонового продления)."""
+        token = await self.acquire_lock(key, timeout=timeout)
+        if not token:
+            yield None
+            return
+        try:
+            yield WatchedLock(key, token)
+        finally:
+            await self.release_lock(key, token)
+
     async def acquire_lock(self, key: str, timeout: int = 30, token: str = None):
         """Мок для acquire_lock."""
         return token or "mock-token"
@@ -53,4 +68,10 @@ def patch_redis(monkeypatch, mock_redis_client):
         except AttributeError:
             pass  # Модуль ещё не импортирован — ок, пропускаем
 
-    return mock_redis_client
\ No newline at end of file
+    return mock_redis_client
+
+
+@pytest.fixture
+def redis():
+    """Redis в памяти (fakeredis) для сервисов, принимающих клиент явно."""
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
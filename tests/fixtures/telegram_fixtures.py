@@ -49,4 +49,11 @@ def mock_callback_query(telegram_message_mock):
 @pytest.fixture
 def fake_message():
     """Фикстура для создания message в тестах."""
-    return AsyncMock()
\ No newline at end of file
+    return AsyncMock()
+
+@pytest.fixture
+def mock_bot():
+    """Мок для Bot с асинхронной отправкой сообщений."""
+    bot = MagicMock()
+    bot.send_message = AsyncMock()
+    return bot
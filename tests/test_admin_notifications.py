@@ -0,0 +1,84 @@
+"""Тесты кэша администраторов и дайджеста уведомлений."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import delete
+
+from app.database.models import User, UserRole
+from app.database.repositories import UserRepository
+from app.services.admin_roster import AdminRoster
+from app.services.redis.keys import Cache
+from app.utils.admin_notifications import AdminDigest
+
+
+@pytest.fixture(autouse=True)
+async def admin_users(session_factory):
+    async with session_factory() as session:
+        session.add_all([
+            User(telegram_id=901, full_name="Админ 1", phone_number="+79009000001", role=UserRole.admin),
+            User(telegram_id=902, full_name="Админ 2", phone_number="+79009000002", role=UserRole.admin),
+            User(telegram_id=903, full_name="Клиент", phone_number="+79009000003", role=UserRole.client),
+        ])
+        await session.commit()
+    yield
+    async with session_factory() as session:
+        await session.execute(delete(User).where(User.telegram_id.in_([901, 902, 903])))
+        await session.commit()
+
+
+async def test_roster_cached_and_invalidated_on_role_change(session_factory, redis, monkeypatch):
+    """Список читается из БД один раз и сбрасывается при смене роли."""
+    roster = AdminRoster(redis=redis, session_factory=session_factory)
+    monkeypatch.setattr("app.database.repositories.user_repository.admin_roster", roster)
+
+    assert await roster.telegram_ids() == (901, 902)
+    factory, roster._session_factory = roster._session_factory, None  # любое обращение к БД упадет
+    assert await roster.telegram_ids() == (901, 902)
+    roster._session_factory = factory
+
+    async with session_factory() as session:
+        await UserRepository(session).promote_to_admin(903)
+    assert await roster.telegram_ids() == (901, 902, 903)
+
+    async with session_factory() as session:
+        await UserRepository(session).promote_to_client(901)
+    assert await roster.telegram_ids() == (902, 903)
+    assert int(await redis.get(Cache.ADMIN_ROSTER_VERSION)) == 2
+
+
+async def test_notifications_coalesced_into_digest(session_factory, redis, mock_bot):
+    """Серия уведомлений уходит одним сообщением каждому администратору."""
+    digest = AdminDigest(roster=AdminRoster(redis=redis, session_factory=session_factory))
+    digest.COALESCE_WINDOW = 0.05
+
+    for booking_id in (1, 2, 3):
+        digest.add(mock_bot, f"Ошибка возврата #{booking_id}")
+    await asyncio.wait_for(digest._flush_task, timeout=1)
+
+    assert mock_bot.send_message.await_count == 2
+    assert {call.kwargs["chat_id"] for call in mock_bot.send_message.await_args_list} == {901, 902}
+    text = mock_bot.send_message.await_args_list[0].kwargs["text"]
+    assert text.startswith("Уведомления для администраторов (3)")
+    assert all(f"Ошибка возврата #{booking_id}" in text for booking_id in (1, 2, 3))
+
+
+async def test_digest_split_and_partial_failure(session_factory, redis, mock_bot):
+    """Длинный дайджест делится на части, недоставка одному не мешает другим."""
+    digest = AdminDigest(roster=AdminRoster(redis=redis, session_factory=session_factory))
+    digest.MAX_MESSAGE_LENGTH = 100
+
+    async def send_message(chat_id, **kwargs):
+        if chat_id == 901:
+            raise RuntimeError("bot was blocked")
+
+    mock_bot.send_message.side_effect = send_message
+    digest.add(mock_bot, "а" * 60)
+    digest.add(mock_bot, "б" * 60)
+
+    assert await digest.flush() == [902]
+    await digest.stop()
+
+    texts = [call.kwargs["text"] for call in mock_bot.send_message.await_args_list if call.kwargs["chat_id"] == 902]
+    assert len(texts) == 2
+    assert texts[1] == "б" * 60
@@ -0,0 +1,164 @@
+"""Тесты сводной таблицы дневной статистики."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database.managers.statistic_manager import StatisticsManager
+from app.database.models import (
+    Booking, BookingChild, BookingStatus, ClientStatus, DailyStats, DailyStatsDirty,
+    Excursion, ExcursionSlot, Payment, PaymentMethod, Refund, RefundStatus, SlotStatus,
+    User, UserRole, init_models
+)
+from app.database.repositories import DailyStatsRepository
+
+DAY = date(2020, 3, 10)
+NEXT_DAY = DAY + timedelta(days=1)
+
+
+def at(day, hour=12):
+    return datetime.combine(day, datetime.min.time()) + timedelta(hours=hour)
+
+
+@pytest.fixture
+async def stats_data(db_session):
+    sea = Excursion(name="Сводка: море", base_duration_minutes=60, base_price=1000)
+    river = Excursion(name="Сводка: река", base_duration_minutes=60, base_price=800)
+    adult = User(full_name="Сводка Взрослый", phone_number="+79008880001", role=UserRole.client, created_at=at(DAY))
+    child = User(full_name="Сводка Ребенок", phone_number="+79008880002", role=UserRole.client, created_at=at(DAY))
+    db_session.add_all([sea, river, adult, child])
+    await db_session.flush()
+
+    sea_slot = ExcursionSlot(
+        excursion_id=sea.id, start_datetime=at(NEXT_DAY), end_datetime=at(NEXT_DAY, 13),
+        max_people=10, max_weight=500, status=SlotStatus.completed
+    )
+    river_slot = ExcursionSlot(
+        excursion_id=river.id, start_datetime=at(NEXT_DAY, 15), end_datetime=at(NEXT_DAY, 16),
+        max_people=10, max_weight=500
+    )
+    db_session.add_all([sea_slot, river_slot])
+    await db_session.flush()
+
+    paid = Booking(
+        slot_id=sea_slot.id, adult_user_id=adult.id, total_price=1500, created_at=at(DAY),
+        booking_status=BookingStatus.completed, client_status=ClientStatus.arrived
+    )
+    no_show = Booking(
+        slot_id=sea_slot.id, adult_user_id=child.id, total_price=1000, created_at=at(DAY, 14),
+        booking_status=BookingStatus.completed, client_status=ClientStatus.not_arrived
+    )
+    river_booking = Booking(slot_id=river_slot.id, adult_user_id=adult.id, total_price=800, created_at=at(DAY))
+    db_session.add_all([paid, no_show, river_booking])
+    await db_session.flush()
+
+    db_session.add(BookingChild(
+        booking_id=paid.id, child_user_id=child.id, age_category="8-12 лет", calculated_price=500
+    ))
+    payment = Payment(booking_id=river_booking.id, amount=800, payment_method=PaymentMethod.online)
+    db_session.add(payment)
+    await db_session.flush()
+    db_session.add(Refund(
+        payment_id=payment.id, booking_id=river_booking.id, amount=800,
+        status=RefundStatus.SUCCEEDED, created_at=at(NEXT_DAY)
+    ))
+    await db_session.commit()
+
+    ids = {
+        "excursions": [sea.id, river.id], "users": [adult.id, child.id],
+        "slots": [sea_slot.id, river_slot.id], "sea": sea.id, "river": river.id,
+        "river_booking": river_booking.id,
+    }
+    yield ids
+
+    await db_session.rollback()
+    booking_ids = select(Booking.id).where(Booking.slot_id.in_(ids["slots"]))
+    await db_session.execute(delete(Refund).where(Refund.booking_id.in_(booking_ids)))
+    await db_session.execute(delete(Payment).where(Payment.booking_id.in_(booking_ids)))
+    await db_session.execute(delete(BookingChild).where(BookingChild.booking_id.in_(booking_ids)))
+    await db_session.execute(delete(Booking).where(Booking.slot_id.in_(ids["slots"])))
+    await db_session.execute(delete(ExcursionSlot).where(ExcursionSlot.id.in_(ids["slots"])))
+    await db_session.execute(delete(User).where(User.id.in_(ids["users"])))
+    await db_session.execute(delete(Excursion).where(Excursion.id.in_(ids["excursions"])))
+    await db_session.execute(delete(DailyStats).where(DailyStats.stat_date.in_([DAY, NEXT_DAY])))
+    await db_session.execute(delete(DailyStatsDirty).where(DailyStatsDirty.stat_date.in_([DAY, NEXT_DAY])))
+    await db_session.commit()
+
+
+async def test_rebuild_aggregates_dirty_days(db_session, stats_data):
+    """Триггеры ставят дни в очередь, пересчет раскладывает показатели по экскурсиям."""
+    repo = DailyStatsRepository(db_session)
+    dirty = await repo.get_dirty_dates(limit=10_000)
+    assert {DAY, NEXT_DAY} <= set(dirty)
+
+    await repo.rebuild([DAY, NEXT_DAY])
+    await db_session.commit()
+
+    assert not {DAY, NEXT_DAY} & set(await repo.get_dirty_dates(limit=10_000))
+    rows = (await db_session.execute(
+        select(DailyStats).where(DailyStats.stat_date.in_([DAY, NEXT_DAY]))
+    )).scalars().all()
+    by_key = {(row.stat_date, row.excursion_id): row for row in rows}
+
+    sea_day = by_key[(DAY, stats_data["sea"])]
+    assert (sea_day.bookings, sea_day.revenue, sea_day.people, sea_day.no_shows) == (2, 2500, 3, 1)
+    assert by_key[(DAY, DailyStats.NO_EXCURSION)].new_users == 2
+    assert by_key[(NEXT_DAY, stats_data["sea"])].completed_slots == 1
+    assert by_key[(NEXT_DAY, stats_data["river"])].refunds_amount == 800
+
+    totals = await repo.get_totals(DAY, NEXT_DAY)
+    assert totals == {
+        'bookings': 3, 'revenue': 3300, 'people': 4, 'cancellations': 0, 'no_shows': 1,
+        'refunds_amount': 800, 'new_users': 2, 'completed_slots': 1
+    }
+    assert await repo.get_popular_excursion(DAY, NEXT_DAY) == ("Сводка: море", 2)
+
+
+async def test_status_change_requeues_booking_day(db_session, stats_data):
+    """Отмена старого бронирования снова ставит в очередь день его создания."""
+    repo = DailyStatsRepository(db_session)
+    await repo.rebuild([DAY, NEXT_DAY])
+    await db_session.commit()
+
+    await db_session.execute(
+        update(Booking).where(Booking.id == stats_data["river_booking"])
+        .values(booking_status=BookingStatus.cancelled)
+    )
+    await db_session.commit()
+    assert DAY in await repo.get_dirty_dates(limit=10_000)
+
+    await repo.rebuild([DAY])
+    await db_session.commit()
+
+    manager = StatisticsManager(db_session)
+    period = await manager.get_period_stats(at(DAY, 0), at(NEXT_DAY, 23))
+    assert period['total_bookings'] == 2
+    assert period['total_revenue'] == 2500
+    assert period['completed_excursions'] == 1
+    assert await manager.get_cancelled_stats(at(DAY, 0), at(NEXT_DAY, 23)) == {
+        'cancelled': 1, 'refunds_amount': 800, 'not_arrived': 1
+    }
+
+
+async def test_setup_queues_history_for_backfill(tmp_path):
+    """Для БД без сводной статистики init_models ставит в очередь все дни с данными."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}", poolclass=NullPool)
+    await init_models(engine)
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO users (full_name, phone_number, role, consent_to_pd, is_virtual, "
+            "registration_type, receive_mass_notifications, created_at, updated_at) "
+            "VALUES ('Старый Клиент', '+79001112233', 'client', 0, 0, 'SELF', 1, "
+            "'2019-05-01 10:00:00', '2019-05-01 10:00:00')"
+        ))
+        await conn.execute(text("DELETE FROM daily_stats_dirty"))
+
+    await init_models(engine)
+    async with engine.begin() as conn:
+        rows = await conn.execute(text("SELECT stat_date FROM daily_stats_dirty"))
+        assert [row[0] for row in rows] == ["2019-05-01"]
+
+    await engine.dispose()
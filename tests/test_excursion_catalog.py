@@ -0,0 +1,80 @@
+"""Тесты снимка каталога экскурсий."""
+
+import dataclasses
+
+import pytest
+from sqlalchemy import delete
+
+from app.database.models import Excursion
+from app.database.repositories import ExcursionRepository
+from app.services.excursion_catalog import ExcursionCatalog
+from app.services.redis.keys import Cache
+
+
+@pytest.fixture(autouse=True)
+async def catalog_excursions(session_factory):
+    async with session_factory() as session:
+        session.add_all([
+            Excursion(id=1, name="Закат", base_duration_minutes=90, base_price=2000, is_active=True),
+            Excursion(id=2, name="Острова", base_duration_minutes=120, base_price=3000, is_active=False),
+        ])
+        await session.commit()
+    yield
+    async with session_factory() as session:
+        await session.execute(delete(Excursion))
+        await session.commit()
+
+
+async def test_snapshot_served_from_memory(session_factory, redis):
+    """Каталог читается из БД один раз и отдает неизменяемые карточки."""
+    catalog = ExcursionCatalog(redis=redis, session_factory=session_factory)
+
+    active = await catalog.active()
+
+    assert [card.name for card in active] == ["Закат"]
+    assert (await catalog.get(2)).is_active is False
+    assert await catalog.get(99) is None
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        active[0].base_price = 1
+
+    catalog._session_factory = None  # любое обращение к БД упадет
+    assert await catalog.active() is active
+
+
+async def test_repository_changes_invalidate_snapshot(session_factory, redis, monkeypatch):
+    """create/update/activate репозитория сбрасывают снимок и версию."""
+    catalog = ExcursionCatalog(redis=redis, session_factory=session_factory)
+    monkeypatch.setattr("app.database.repositories.excursion_repository.excursion_catalog", catalog)
+    await catalog.load()
+
+    async with session_factory() as session:
+        repo = ExcursionRepository(session)
+        await repo.activate(2)
+        assert [card.id for card in await catalog.active()] == [1, 2]
+
+        await repo.update(1, base_price=2500)
+        assert (await catalog.get(1)).base_price == 2500
+
+        created = await repo.create(name="Маяк", base_duration_minutes=60, base_price=1000)
+        assert (await catalog.get(created.id)).name == "Маяк"
+
+    assert int(await redis.get(Cache.CATALOG_VERSION)) == 3
+    assert catalog.version == 3
+
+
+async def test_other_process_reloads_on_version_change(session_factory, redis):
+    """Другой процесс перечитывает каталог при смене версии в Redis."""
+    writer = ExcursionCatalog(redis=redis, session_factory=session_factory)
+    reader = ExcursionCatalog(redis=redis, session_factory=session_factory)
+    reader.VERSION_CHECK_INTERVAL = 0
+    assert len(await reader.active()) == 1
+
+    async with session_factory() as session:
+        await session.execute(
+            Excursion.__table__.update().where(Excursion.id == 2).values(is_active=True)
+        )
+        await session.commit()
+    await writer.invalidate()
+
+    assert len(await reader.active()) == 2
+    assert reader.version == 1
@@ -0,0 +1,161 @@
+"""Тесты дескрипторов счетов и быстрого pre-checkout."""
+
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import delete
+
+from app.database.managers.payment_manager import PaymentManager
+from app.database.models import (
+    Booking, Excursion, ExcursionSlot, Payment, PaymentMethod, PaymentStatus,
+    User, UserRole, YooKassaStatus
+)
+from app.database.repositories import payment_repository
+from app.routers.user import user_payment
+from app.services.invoice_descriptors import InvoiceCheck, InvoiceDescriptorService
+from app.services.redis.keys import Payments
+
+
+@pytest.fixture
+async def service(redis):
+    service = InvoiceDescriptorService(redis=redis, secret="test-secret")
+    assert await service.store(
+        payment_id=7,
+        booking_id=3,
+        user_telegram_id=100,
+        amount=250000,
+        slot_id=5,
+        slot_start=datetime.now() + timedelta(days=1)
+    )
+    return service
+
+
+async def test_check_matches_descriptor(service):
+    """Сохраненный счет проходит проверку, расхождения отклоняются."""
+    assert await service.check(7, 3, 100, 250000) == InvoiceCheck.ok
+    assert await service.check(7, 3, 101, 250000) == InvoiceCheck.wrong_user
+    assert await service.check(7, 3, 100, 100) == InvoiceCheck.wrong_amount
+    assert await service.check(7, 4, 100, 250000) == InvoiceCheck.invalid
+    assert await service.check(8, 3, 100, 250000) == InvoiceCheck.missing
+    assert await service.check(
+        7, 3, 100, 250000, now=datetime.now() + timedelta(days=2)
+    ) == InvoiceCheck.slot_started
+
+
+async def test_status_change_makes_descriptor_stale(service, redis):
+    """Изменение статуса брони после выставления счета требует проверки по БД."""
+    await service.bump_status_version(3)
+
+    assert await service.check(7, 3, 100, 250000) == InvoiceCheck.stale
+    assert await redis.ttl(Payments.status_version(3)) > service.DESCRIPTOR_TTL
+
+
+async def test_slot_change_makes_descriptor_stale(service):
+    """Перенос или отмена слота тоже требует проверки по БД."""
+    await service.bump_slot_version(6)
+    assert await service.check(7, 3, 100, 250000) == InvoiceCheck.ok
+
+    await service.bump_slot_version(5)
+    assert await service.check(7, 3, 100, 250000) == InvoiceCheck.stale
+
+
+async def test_tampered_descriptor_rejected(service, redis):
+    """Измененный в Redis дескриптор не проходит проверку подписи."""
+    data = json.loads(await redis.get(Payments.invoice(7)))
+    data["amount"] = 100
+    await redis.set(Payments.invoice(7), json.dumps(data))
+
+    assert await service.check(7, 3, 100, 100) == InvoiceCheck.invalid
+
+
+def make_pre_checkout(total_amount=250000):
+    query = MagicMock()
+    query.id = "q1"
+    query.from_user.id = 100
+    query.total_amount = total_amount
+    query.currency = "RUB"
+    query.invoice_payload = "booking:3:7"
+    query.bot.answer_pre_checkout_query = AsyncMock()
+    return query
+
+
+async def test_pre_checkout_answers_without_db(service):
+    """При действительном дескрипторе БД не используется."""
+    query = make_pre_checkout()
+
+    with patch.object(user_payment, "invoice_descriptors", service), \
+            patch.object(user_payment, "async_session") as session_factory:
+        await user_payment.pre_checkout_query_handler(query)
+
+    session_factory.assert_not_called()
+    query.bot.answer_pre_checkout_query.assert_awaited_once_with("q1", ok=True)
+
+
+async def test_pre_checkout_rejects_wrong_amount_without_db(service):
+    """Неверная сумма отклоняется по дескриптору."""
+    query = make_pre_checkout(total_amount=100)
+
+    with patch.object(user_payment, "invoice_descriptors", service), \
+            patch.object(user_payment, "async_session") as session_factory:
+        await user_payment.pre_checkout_query_handler(query)
+
+    session_factory.assert_not_called()
+    query.bot.answer_pre_checkout_query.assert_awaited_once_with(
+        "q1", ok=False, error_message="Ошибка: неверная сумма платежа"
+    )
+
+
+async def test_pre_checkout_after_cancel_checks_db(redis, session_factory):
+    """Отмененный платеж не подтверждается по ранее выданному дескриптору."""
+    service = InvoiceDescriptorService(redis=redis, secret="test-secret")
+    async with session_factory() as session:
+        user = User(telegram_id=100, full_name="Плательщик", phone_number="+79005550100", role=UserRole.client)
+        excursion = Excursion(name="Дескриптор", base_duration_minutes=60, base_price=2500)
+        session.add_all([user, excursion])
+        await session.flush()
+        start = datetime.now() + timedelta(days=1)
+        slot = ExcursionSlot(
+            excursion_id=excursion.id, start_datetime=start, end_datetime=start + timedelta(hours=1),
+            max_people=10, max_weight=800
+        )
+        session.add(slot)
+        await session.flush()
+        booking = Booking(slot_id=slot.id, adult_user_id=user.id, total_price=2500, payment_status=PaymentStatus.pending)
+        session.add(booking)
+        await session.flush()
+        payment = Payment(
+            booking_id=booking.id, amount=2500, payment_method=PaymentMethod.online, status=YooKassaStatus.pending
+        )
+        session.add(payment)
+        await session.commit()
+
+    try:
+        assert await service.store(payment.id, booking.id, 100, 250000, slot.id, start)
+        query = make_pre_checkout()
+        query.invoice_payload = f"booking:{booking.id}:{payment.id}"
+
+        with patch.object(payment_repository, "invoice_descriptors", service):
+            async with session_factory() as session:
+                assert await PaymentManager(session).cancel_pending_payment(payment.id)
+
+        assert await redis.get(Payments.invoice(payment.id)) is None
+        with patch.object(user_payment, "invoice_descriptors", service), \
+                patch.object(user_payment, "async_session", session_factory):
+            await user_payment.pre_checkout_query_handler(query)
+
+        query.bot.answer_pre_checkout_query.assert_awaited_once_with(
+            "q1", ok=False, error_message="Ошибка: неверный статус платежа"
+        )
+    finally:
+        async with session_factory() as session:
+            for model, condition in (
+                (Payment, Payment.id == payment.id),
+                (Booking, Booking.id == booking.id),
+                (ExcursionSlot, ExcursionSlot.id == slot.id),
+                (Excursion, Excursion.id == excursion.id),
+                (User, User.id == user.id),
+            ):
+                await session.execute(delete(model).where(condition))
+            await session.commit()
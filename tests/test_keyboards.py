@@ -0,0 +1,57 @@
+"""Тесты кеширования клавиатур."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.admin_panel import keyboards_adm
+from app.user_panel import keyboards
+
+
+def test_static_menus_built_once():
+    """Статические меню возвращают один и тот же объект."""
+    assert keyboards_adm.admin_main_menu() is keyboards_adm.admin_main_menu()
+    assert keyboards_adm.statistics_submenu() is keyboards_adm.statistics_submenu()
+    assert keyboards.main_menu() is keyboards.main_menu()
+
+
+def test_parametrized_menus_cached_by_arguments():
+    """Клавиатуры с параметрами кешируются по значениям аргументов."""
+    first = keyboards_adm.slot_actions_menu(10)
+
+    assert keyboards_adm.slot_actions_menu(10) is first
+    assert keyboards_adm.slot_actions_menu(11) is not first
+    assert first.inline_keyboard[0][0].callback_data == "slot_details:10"
+    assert keyboards_adm.slot_actions_menu.cache_info().maxsize == keyboards_adm.KEYBOARD_CACHE_SIZE
+
+
+def make_excursion(excursion_id, name):
+    excursion = MagicMock()
+    excursion.id = excursion_id
+    excursion.name = name
+    return excursion
+
+
+async def test_all_excursions_uses_loaded_list():
+    """С готовым списком экскурсий каталог не используется."""
+    excursions = [make_excursion(1, "Закат"), make_excursion(2, "Острова")]
+
+    with patch.object(keyboards.excursion_catalog, "active") as active:
+        markup = await keyboards.all_excursions(excursions=excursions)
+
+    active.assert_not_called()
+    callbacks = [row[0].callback_data for row in markup.inline_keyboard]
+    assert callbacks == ["public_schedule_all", "no_action", "public_exc_detail:1", "public_exc_detail:2", "back_to_main"]
+    assert await keyboards.all_excursions(excursions=excursions) is markup
+
+
+async def test_all_excursions_defaults_to_catalog():
+    """Без списка экскурсии берутся из снимка каталога, а не из БД."""
+    excursions = (make_excursion(3, "Маяк"),)
+
+    with patch.object(keyboards.excursion_catalog, "active", AsyncMock(return_value=excursions)) as active:
+        markup = await keyboards.all_excursions()
+
+    active.assert_awaited_once()
+    assert markup.inline_keyboard[2][0].callback_data == "public_exc_detail:3"
+
+    with patch.object(keyboards.excursion_catalog, "active", AsyncMock(return_value=())):
+        assert await keyboards.all_excursions() is None
@@ -2,12 +2,13 @@
 
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from app.database.managers.booking_manager import BookingManager
 from app.database.models import (
     BookingStatus, SlotStatus, ClientStatus, PaymentStatus
 )
+from app.services.slot_capacity import ReservationStatus
 
 
 class TestBookingManager:
@@ -181,6 +182,104 @@ class TestBookingManager:
         assert booking is None
         assert "ошибка" in error.lower()
 
+    @pytest.mark.asyncio
+    async def test_create_booking_rejected_by_capacity_counter(self, manager):
+        """Счетчик слота отклоняет резерв без чтения броней из БД."""
+        mock_slot = MagicMock()
+        mock_slot.status = SlotStatus.scheduled
+        mock_slot.max_people = 5
+        manager.slot_repo.get_by_id.return_value = mock_slot
+        manager.user_repo.get_by_id.return_value = MagicMock()
+        manager.booking_repo.get_user_active_for_slot.return_value = None
+
+        with patch("app.database.managers.booking_manager.SlotManager") as MockSlotManager, \
+             patch("app.database.managers.booking_manager.slot_capacity") as mock_capacity:
+            mock_slot_mgr = AsyncMock()
+            MockSlotManager.return_value = mock_slot_mgr
+            mock_capacity.reserve = AsyncMock(return_value=(ReservationStatus.no_places, 1, -1))
+
+            booking, error = await manager.create_booking(
+                slot_id=1, adult_user_id=5, children_count=2, total_price=5000
+            )
+
+            assert booking is None
+            assert "свободно: 1" in error.lower()
+            mock_slot_mgr.get_booked_places.assert_not_called()
+            manager.booking_repo.create.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_create_booking_releases_reservation_on_error(self, manager):
+        """Резерв освобождается, если бронь не удалось записать."""
+        mock_slot = MagicMock()
+        mock_slot.status = SlotStatus.scheduled
+        mock_slot.max_people = 5
+        manager.slot_repo.get_by_id.return_value = mock_slot
+        manager.user_repo.get_by_id.return_value = MagicMock()
+        manager.booking_repo.get_user_active_for_slot.return_value = None
+        manager.booking_repo.create.side_effect = Exception("DB error")
+
+        with patch("app.database.managers.booking_manager.SlotManager"), \
+             patch("app.database.managers.booking_manager.slot_capacity") as mock_capacity:
+            mock_capacity.reserve = AsyncMock(return_value=(ReservationStatus.reserved, 4, -1))
+            mock_capacity.release = AsyncMock(return_value=True)
+
+            booking, error = await manager.create_booking(
+                slot_id=1, adult_user_id=5, children_count=0, total_price=5000
+            )
+
+            assert booking is None
+            assert "ошибка" in error.lower()
+            mock_capacity.release.assert_awaited_once_with(1, 5)
+
+    @pytest.mark.asyncio
+    async def test_create_booking_releases_reservation_on_refusal(self, manager):
+        """Резерв освобождается, если бронь отклонена без исключения."""
+        mock_slot = MagicMock()
+        mock_slot.status = SlotStatus.scheduled
+        mock_slot.max_people = 5
+        manager.slot_repo.get_by_id.return_value = mock_slot
+        manager.user_repo.get_by_id.return_value = MagicMock()
+        manager.booking_repo.get_user_active_for_slot.return_value = None
+
+        with patch("app.database.managers.booking_manager.SlotManager"), \
+             patch("app.database.managers.booking_manager.slot_capacity") as mock_capacity:
+            mock_capacity.reserve = AsyncMock(return_value=(ReservationStatus.reserved, 3, -1))
+            mock_capacity.release = AsyncMock(return_value=True)
+
+            booking, error = await manager.create_booking(
+                slot_id=1, adult_user_id=5, children_count=1, total_price=5000,
+                children_data=[{'child_id': 7, 'price': 500}]
+            )
+
+            assert booking is None
+            assert "возрастная категория" in error
+            manager.booking_repo.create.assert_not_called()
+            mock_capacity.release.assert_awaited_once_with(1, 5)
+
+    @pytest.mark.asyncio
+    async def test_create_booking_rejected_when_already_reserved(self, manager):
+        """Постоянный резерв клиента в счетчике не перезаписывается второй бронью."""
+        mock_slot = MagicMock()
+        mock_slot.status = SlotStatus.scheduled
+        mock_slot.max_people = 5
+        manager.slot_repo.get_by_id.return_value = mock_slot
+        manager.user_repo.get_by_id.return_value = MagicMock()
+        manager.booking_repo.get_user_active_for_slot.return_value = None
+
+        with patch("app.database.managers.booking_manager.SlotManager"), \
+             patch("app.database.managers.booking_manager.slot_capacity") as mock_capacity:
+            mock_capacity.reserve = AsyncMock(return_value=(ReservationStatus.already_reserved, 4, -1))
+            mock_capacity.release = AsyncMock(return_value=True)
+
+            booking, error = await manager.create_booking(
+                slot_id=1, adult_user_id=5, children_count=0, total_price=5000
+            )
+
+            assert booking is None
+            assert "уже есть активная бронь" in error
+            manager.booking_repo.create.assert_not_called()
+            mock_capacity.release.assert_not_awaited()
+
     # ========== mark_client_arrived ==========
 
     @pytest.mark.asyncio
@@ -312,7 +411,13 @@ class TestBookingManager:
         mock_booking.slot.start_datetime = datetime.now() + timedelta(hours=5)
         manager.booking_repo.get_with_slot.return_value = mock_booking
 
-        success, msg, refund = await manager.cancel_booking(1)
+        with patch("app.database.managers.booking_manager.slot_capacity") as mock_capacity:
+            mock_capacity.release = AsyncMock(return_value=True)
+            success, msg, refund = await manager.cancel_booking(1)
+
+            mock_capacity.release.assert_awaited_once_with(
+                mock_booking.slot_id, mock_booking.adult_user_id
+            )
 
         assert success is True
         assert "отменено" in msg.lower()
@@ -420,20 +525,56 @@ class TestBookingManager:
         mock_booking = MagicMock()
         mock_booking.id = 1
         manager.booking_repo.create_booking_with_token.return_value = mock_booking
+        mock_user.weight = 80
+        mock_slot.max_weight = 500
 
-        result = await manager.create_booking_with_token(
-            user_id=5, slot_id=1, token="token123"
-        )
+        with patch("app.database.managers.booking_manager.SlotManager") as MockSlotManager, \
+             patch("app.database.managers.booking_manager.slot_capacity") as mock_capacity:
+            MockSlotManager.return_value.get_captain_weight = AsyncMock(return_value=90)
+            mock_capacity.reserve = AsyncMock(return_value=(ReservationStatus.reserved, 4, 300))
+            mock_capacity.invalidate = AsyncMock()
 
-        assert result is not None
-        assert result.id == 1
+            result = await manager.create_booking_with_token(
+                user_id=5, slot_id=1, token="token123"
+            )
+
+            assert result is not None
+            assert result.id == 1
+            assert mock_capacity.reserve.await_args.kwargs["user_id"] == 5
+            assert mock_capacity.reserve.await_args.kwargs["people"] == 1
+            assert mock_capacity.reserve.await_args.kwargs["weight_limit"] == 410
+            mock_capacity.invalidate.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_create_booking_with_token_no_places(self, manager):
+        """Бронь по токену не создается, если счетчик слота отказал в резерве."""
+        mock_user = MagicMock()
+        mock_user.verification_token = "token123"
+        mock_user.is_virtual = True
+        manager.user_repo.get_by_id.return_value = mock_user
+        mock_user.weight = None
+        mock_slot = MagicMock()
+        mock_slot.status = SlotStatus.scheduled
+        manager.slot_repo.get_by_id.return_value = mock_slot
+        manager.booking_repo.get_user_active_for_slot.return_value = None
+
+        with patch("app.database.managers.booking_manager.SlotManager"), \
+             patch("app.database.managers.booking_manager.slot_capacity") as mock_capacity:
+            mock_capacity.reserve = AsyncMock(return_value=(ReservationStatus.no_places, 0, -1))
+
+            result = await manager.create_booking_with_token(
+                user_id=5, slot_id=1, token="token123"
+            )
+
+            assert result is None
+            manager.booking_repo.create_booking_with_token.assert_not_called()
 
     # ========== calculate_price ==========
 
     @pytest.mark.asyncio
     async def test_calculate_price_slot_not_found(self, manager):
         """Слот не найден."""
-        manager.slot_repo.get_with_bookings.return_value = None
+        manager.slot_repo.get_by_id.return_value = None
 
         price, details = await manager.calculate_price(1, 5)
 
@@ -445,7 +586,7 @@ class TestBookingManager:
         """Только взрослый."""
         mock_slot = MagicMock()
         mock_slot.excursion.base_price = 5000
-        manager.slot_repo.get_with_bookings.return_value = mock_slot
+        manager.slot_repo.get_by_id.return_value = mock_slot
 
         price, details = await manager.calculate_price(1, 5)
 
@@ -453,6 +594,24 @@ class TestBookingManager:
         assert details['base_price'] == 5000
         assert details['total'] == 5000
 
+    @pytest.mark.asyncio
+    async def test_calculate_price_children_batch(self, manager):
+        """Дети загружаются одним запросом."""
+        mock_slot = MagicMock()
+        mock_slot.excursion.base_price = 1000
+        manager.slot_repo.get_by_id.return_value = mock_slot
+        child = MagicMock()
+        child.id = 7
+        child.date_of_birth = date.today() - timedelta(days=5 * 365 + 30)
+        manager.user_repo.get_by_ids.return_value = [child]
+
+        price, details = await manager.calculate_price(1, 5, child_user_ids=[7, 8])
+
+        assert price == 1400
+        assert details['children_prices'] == {7: {'price': 400, 'category': '4-7 лет'}}
+        manager.user_repo.get_by_ids.assert_awaited_once_with([7, 8])
+        manager.slot_repo.get_with_bookings.assert_not_called()
+
     # ========== get_full_info ==========
 
     @pytest.mark.asyncio
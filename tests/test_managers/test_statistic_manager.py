@@ -26,8 +26,17 @@ class TestStatisticsManager:
             manager.session = mock_session
             manager.logger = MagicMock()
             manager.stats_repo = AsyncMock()
+            manager.daily_stats_repo = AsyncMock()
             return manager
 
+    @staticmethod
+    def totals(**values):
+        """Суммы сводной таблицы за период (незаданные показатели - 0)."""
+        return {field: values.get(field, 0) for field in (
+            'bookings', 'revenue', 'people', 'cancellations',
+            'no_shows', 'refunds_amount', 'new_users', 'completed_slots'
+        )}
+
     # ========== get_daily_stats ==========
 
     @pytest.mark.asyncio
@@ -59,18 +68,19 @@ class TestStatisticsManager:
     @pytest.mark.asyncio
     async def test_get_period_stats_success(self, manager):
         """Успешное получение статистики за период."""
-        manager.stats_repo.get_period_bookings_count.return_value = 10
-        manager.stats_repo.get_period_revenue.return_value = 50000
-        manager.stats_repo.get_period_new_users.return_value = 7
-        manager.stats_repo.get_period_completed_excursions.return_value = 3
-        manager.stats_repo.get_period_total_people.return_value = 25
-        manager.stats_repo.get_popular_excursion.return_value = ("Морская прогулка", 8)
+        manager.daily_stats_repo.get_totals.return_value = self.totals(
+            bookings=10, revenue=50000, new_users=7, completed_slots=3, people=25
+        )
+        manager.daily_stats_repo.get_popular_excursion.return_value = ("Морская прогулка", 8)
 
         result = await manager.get_period_stats(
-            datetime(2026, 4, 1), datetime(2026, 4, 30)
+            datetime(2026, 4, 1), datetime(2026, 4, 30, 23, 59, 59)
         )
 
+        manager.daily_stats_repo.get_totals.assert_awaited_once_with(date(2026, 4, 1), date(2026, 4, 30))
         assert result['total_bookings'] == 10
+        assert result['completed_excursions'] == 3
+        assert result['total_people'] == 25
         assert result['total_revenue'] == 50000
         assert result['popular_excursion'] == "Морская прогулка"
         assert result['avg_check'] == 5000.0
@@ -78,12 +88,8 @@ class TestStatisticsManager:
     @pytest.mark.asyncio
     async def test_get_period_stats_avg_check_zero_bookings(self, manager):
         """Средний чек при 0 бронирований."""
-        manager.stats_repo.get_period_bookings_count.return_value = 0
-        manager.stats_repo.get_period_revenue.return_value = 0
-        manager.stats_repo.get_period_new_users.return_value = 0
-        manager.stats_repo.get_period_completed_excursions.return_value = 0
-        manager.stats_repo.get_period_total_people.return_value = 0
-        manager.stats_repo.get_popular_excursion.return_value = ("Нет данных", 0)
+        manager.daily_stats_repo.get_totals.return_value = self.totals()
+        manager.daily_stats_repo.get_popular_excursion.return_value = ("Нет данных", 0)
 
         result = await manager.get_period_stats(
             datetime(2026, 4, 1), datetime(2026, 4, 30)
@@ -94,7 +100,7 @@ class TestStatisticsManager:
     @pytest.mark.asyncio
     async def test_get_period_stats_error(self, manager):
         """Ошибка при получении статистики за период."""
-        manager.stats_repo.get_period_bookings_count.side_effect = Exception("Error")
+        manager.daily_stats_repo.get_totals.side_effect = Exception("Error")
 
         result = await manager.get_period_stats(
             datetime(2026, 4, 1), datetime(2026, 4, 30)
@@ -165,21 +171,22 @@ class TestStatisticsManager:
     @pytest.mark.asyncio
     async def test_get_cancelled_stats_success(self, manager):
         """Статистика отказов."""
-        manager.stats_repo.get_cancelled_stats.return_value = {
-            'cancelled': 5, 'refunds_amount': 15000, 'not_arrived': 2
-        }
+        manager.daily_stats_repo.get_totals.return_value = self.totals(
+            cancellations=5, refunds_amount=15000, no_shows=2
+        )
 
         result = await manager.get_cancelled_stats(
             datetime(2026, 4, 1), datetime(2026, 4, 30)
         )
 
         assert result['cancelled'] == 5
+        assert result['refunds_amount'] == 15000
         assert result['not_arrived'] == 2
 
     @pytest.mark.asyncio
     async def test_get_cancelled_stats_error(self, manager):
         """Ошибка при получении статистики отказов."""
-        manager.stats_repo.get_cancelled_stats.side_effect = Exception("Error")
+        manager.daily_stats_repo.get_totals.side_effect = Exception("Error")
 
         result = await manager.get_cancelled_stats(
             datetime(2026, 4, 1), datetime(2026, 4, 30)
@@ -225,12 +232,10 @@ class TestStatisticsManager:
     @pytest.mark.asyncio
     async def test_generate_period_report_success(self, manager):
         """Генерация отчёта."""
-        manager.stats_repo.get_period_bookings_count.return_value = 10
-        manager.stats_repo.get_period_revenue.return_value = 50000
-        manager.stats_repo.get_period_new_users.return_value = 5
-        manager.stats_repo.get_period_completed_excursions.return_value = 3
-        manager.stats_repo.get_period_total_people.return_value = 20
-        manager.stats_repo.get_popular_excursion.return_value = ("Морская прогулка", 7)
+        manager.daily_stats_repo.get_totals.return_value = self.totals(
+            bookings=10, revenue=50000, new_users=5, completed_slots=3, people=20
+        )
+        manager.daily_stats_repo.get_popular_excursion.return_value = ("Морская прогулка", 7)
 
         result = await manager.generate_period_report(
             datetime(2026, 4, 1), datetime(2026, 4, 30)
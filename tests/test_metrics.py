@@ -0,0 +1,130 @@
+"""Тесты метрик: реестр, мидлварь, эндпоинт."""
+
+import socket
+
+import aiohttp
+import pytest
+from unittest.mock import MagicMock
+
+from app.services.metrics import MetricsRegistry, MetricsServer
+from app.services.metrics.registry import metrics
+from app.middlewares.metrics import (
+    MetricsMiddleware, RouterLabelMiddleware, TRACE_KEY, UNHANDLED_ROUTER
+)
+
+
+def make_callback_update(data):
+    update = MagicMock()
+    update.event_type = "callback_query"
+    update.callback_query.data = data
+    update.message = None
+    return update
+
+
+def test_histogram_render():
+    """Гистограмма выводится кумулятивными бакетами."""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Задержка", ("handler",), buckets=(0.1, 1.0))
+
+    histogram.observe(0.05, handler="a")
+    histogram.observe(0.5, handler="a")
+    histogram.observe(3, handler="a")
+
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{handler="a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{handler="a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{handler="a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{handler="a"} 3' in text
+    assert histogram.quantile(0.5, handler="a") == 1.0
+
+
+def test_counter_gauge_and_collectors():
+    """Счетчики, gauge и коллекторы попадают в вывод, метки экранируются."""
+    registry = MetricsRegistry()
+    counter = registry.counter("errors_total", "Ошибки", ("error",))
+    gauge = registry.gauge("in_flight", "В обработке")
+
+    counter.inc(error='Bad"Quote')
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    registry.add_collector(lambda: ["custom_metric 7"])
+
+    text = registry.render()
+    assert 'errors_total{error="Bad\\"Quote"} 1' in text
+    assert "in_flight 1" in text
+    assert "custom_metric 7" in text
+    assert registry.counter("errors_total", "Ошибки", ("error",)) is counter
+
+
+@pytest.mark.asyncio
+async def test_middleware_records_router_and_latency():
+    """Мидлварь пишет латентность с роутером и обработчиком, которые сообщила внутренняя мидлварь."""
+    duration = metrics.get("bot_update_duration_seconds")
+    before = dict((key, count) for key, count, _ in duration.series())
+
+    async def public_book_slot(callback):
+        pass
+
+    async def handler(event, data):
+        router = MagicMock()
+        router.name = "user_booking"
+        handler_object = MagicMock()
+        handler_object.callback = public_book_slot
+        return await RouterLabelMiddleware()(
+            lambda e, d: _ok(), event, {**data, "event_router": router, "handler": handler_object}
+        )
+
+    result = await MetricsMiddleware()(handler, make_callback_update("public_book_slot:3"), {})
+
+    assert result == "ok"
+    key = ("user_booking", "public_book_slot")
+    assert dict((k, c) for k, c, _ in duration.series())[key] == before.get(key, 0) + 1
+    assert metrics.get("bot_updates_in_flight").get() == 0
+
+
+async def _ok():
+    return "ok"
+
+
+@pytest.mark.asyncio
+async def test_middleware_counts_errors():
+    """Исключение обработчика считается и пробрасывается дальше."""
+    errors = metrics.get("bot_update_errors_total")
+    labels = dict(router=UNHANDLED_ROUTER, handler="callback:broken", error="ValueError")
+    before = errors.get(**labels)
+
+    async def handler(event, data):
+        assert TRACE_KEY in data
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await MetricsMiddleware()(handler, make_callback_update("broken"), {})
+
+    assert errors.get(**labels) == before + 1
+    assert metrics.get("bot_updates_in_flight").get() == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint():
+    """Эндпоинт отдает метрики в текстовом формате."""
+    registry = MetricsRegistry()
+    registry.counter("served_total", "Запросы").inc(5)
+    server = MetricsServer(registry)
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    await server.start("127.0.0.1", port)
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                body = await response.text()
+                assert response.status == 200
+                assert response.headers["Content-Type"].startswith("text/plain")
+    finally:
+        await server.stop()
+
+    assert "served_total 5" in body
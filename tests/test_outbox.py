@@ -0,0 +1,141 @@
+"""Тесты outbox исходящих сообщений."""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from sqlalchemy import delete, select
+
+from app.database.models import OutboxMessage, OutboxStatus
+from app.database.repositories import OutboxRepository
+from app.database.unit_of_work import UnitOfWork
+from app.services.outbox import OutboxDispatcher
+
+
+@pytest.fixture(autouse=True)
+async def clean_outbox(session_factory):
+    yield
+    async with session_factory() as session:
+        await session.execute(delete(OutboxMessage))
+        await session.commit()
+
+
+@pytest.fixture
+def dispatcher(session_factory):
+    return OutboxDispatcher(session_factory=session_factory)
+
+
+async def enqueue(session_factory, *messages):
+    async with session_factory() as session:
+        async with UnitOfWork(session) as uow:
+            repo = OutboxRepository(uow.session)
+            for chat_id, text, dedup_key in messages:
+                await repo.enqueue(chat_id, text, dedup_key=dedup_key)
+
+
+async def get_messages(session_factory):
+    async with session_factory() as session:
+        result = await session.execute(select(OutboxMessage).order_by(OutboxMessage.id))
+        return list(result.scalars().all())
+
+
+async def test_rollback_discards_messages(session_factory, dispatcher, mock_bot):
+    """Сообщение из откаченной транзакции не отправляется."""
+    with pytest.raises(RuntimeError):
+        async with session_factory() as session:
+            async with UnitOfWork(session) as uow:
+                await OutboxRepository(uow.session).enqueue(100, "Отмена")
+                raise RuntimeError("бизнес-операция не удалась")
+
+    assert await dispatcher.drain_once(mock_bot) == 0
+    mock_bot.send_message.assert_not_awaited()
+
+
+async def test_drain_sends_and_marks_sent(session_factory, dispatcher, mock_bot):
+    """Сообщения отправляются по порядку и отмечаются одним запросом."""
+    await enqueue(session_factory, (100, "Первое", None), (200, "Второе", "slot_cancel:1"))
+    await enqueue(session_factory, (200, "Повтор", "slot_cancel:1"))
+
+    assert await dispatcher.drain_once(mock_bot) == 2
+
+    assert [call.kwargs["text"] for call in mock_bot.send_message.await_args_list] == ["Первое", "Второе"]
+    messages = await get_messages(session_factory)
+    assert [message.status for message in messages] == [OutboxStatus.sent, OutboxStatus.sent]
+    assert await dispatcher.drain_once(mock_bot) == 0
+
+
+async def test_failures_are_retried_then_given_up(session_factory, dispatcher, mock_bot):
+    """Сетевые ошибки повторяются с задержкой, блокировка бота - сразу failed."""
+    await enqueue(session_factory, (100, "Сеть", None), (200, "Блок", None))
+    mock_bot.send_message.side_effect = [
+        ConnectionError("timeout"),
+        TelegramForbiddenError(method=MagicMock(), message="bot was blocked by the user"),
+    ]
+    now = datetime.now()
+
+    await dispatcher.drain_once(mock_bot, now=now)
+
+    network, blocked = await get_messages(session_factory)
+    assert network.status == OutboxStatus.pending
+    assert network.attempts == 1
+    assert network.next_attempt_at == now + timedelta(seconds=dispatcher.RETRY_BASE_SECONDS)
+    assert blocked.status == OutboxStatus.failed
+
+    # Пока задержка не прошла, сообщение не берется
+    assert await dispatcher.drain_once(mock_bot, now=now) == 0
+
+    dispatcher.MAX_ATTEMPTS = 2
+    mock_bot.send_message.side_effect = ConnectionError("timeout")
+    await dispatcher.drain_once(mock_bot, now=now + timedelta(hours=1))
+    network, _ = await get_messages(session_factory)
+    assert network.status == OutboxStatus.failed
+    assert network.attempts == 2
+
+
+async def test_retry_after_postpones_rest_of_batch(session_factory, dispatcher, mock_bot):
+    """При 429 остаток пачки переносится без увеличения числа попыток."""
+    await enqueue(session_factory, (100, "Первое", None), (200, "Второе", None), (300, "Третье", None))
+    mock_bot.send_message.side_effect = [
+        None,
+        TelegramRetryAfter(method=MagicMock(), message="Too Many Requests", retry_after=7),
+    ]
+    now = datetime.now()
+
+    assert await dispatcher.drain_once(mock_bot, now=now) == 3
+
+    assert mock_bot.send_message.await_count == 2
+    first, second, third = await get_messages(session_factory)
+    assert first.status == OutboxStatus.sent
+    for message in (second, third):
+        assert message.status == OutboxStatus.pending
+        assert message.attempts == 0
+        assert message.next_attempt_at == now + timedelta(seconds=7)
+
+
+async def test_reschedule_notices_are_deduplicated(session_factory, dispatcher):
+    """Повторный перенос на то же время не ставит клиенту второе уведомление."""
+    from app.routers.admin.slots import _enqueue_reschedule_notices
+
+    client = SimpleNamespace(id=1, full_name="Клиент", phone_number=None, telegram_id=100)
+    bookings = [
+        SimpleNamespace(id=10, adult_user=client, booking_children=[]),
+        SimpleNamespace(
+            id=11, booking_children=[],
+            adult_user=SimpleNamespace(id=2, full_name="Без Telegram", phone_number=None, telegram_id=None)
+        ),
+    ]
+    new_start = datetime(2030, 1, 1, 12, 0)
+
+    for _ in range(2):
+        async with session_factory() as session:
+            async with UnitOfWork(session) as uow:
+                queued, no_telegram = await _enqueue_reschedule_notices(
+                    OutboxRepository(uow.session), bookings, "Море", "01.01.2030 10:00", new_start
+                )
+        assert (queued, no_telegram) == (["Клиент"], ["Без Telegram"])
+
+    messages = await get_messages(session_factory)
+    assert [message.dedup_key for message in messages] == [f"slot_reschedule:10:{new_start.isoformat()}"]
+    assert "Перенесено на: 01.01.2030 12:00" in messages[0].text
@@ -0,0 +1,203 @@
+"""Тесты очереди подтверждения успешных платежей."""
+
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import OperationalError
+
+from app.database.models import (
+    Booking, Excursion, ExcursionSlot, Payment, PaymentCharge, PaymentMethod,
+    PaymentStatus, User, UserRole, YooKassaStatus
+)
+from app.database.repositories import BookingRepository
+from app.services.payment_confirmations import (
+    PaymentConfirmation, PaymentConfirmationService, ProcessResult, SubmitResult
+)
+from app.services.redis.keys import Queues
+
+
+@pytest.fixture
+async def pending_payment(session_factory):
+    async with session_factory() as session:
+        user = User(telegram_id=5501, full_name="Плательщик", phone_number="+79005550001", role=UserRole.client)
+        excursion = Excursion(name="Оплата", base_duration_minutes=60, base_price=1500)
+        session.add_all([user, excursion])
+        await session.flush()
+        start = datetime.now() + timedelta(days=1)
+        slot = ExcursionSlot(
+            excursion_id=excursion.id, start_datetime=start, end_datetime=start + timedelta(hours=1),
+            max_people=10, max_weight=800
+        )
+        session.add(slot)
+        await session.flush()
+        booking = Booking(slot_id=slot.id, adult_user_id=user.id, total_price=1500, payment_status=PaymentStatus.pending)
+        session.add(booking)
+        await session.flush()
+        payment = Payment(
+            booking_id=booking.id, amount=1500, payment_method=PaymentMethod.online, status=YooKassaStatus.pending
+        )
+        session.add(payment)
+        await session.commit()
+    yield payment
+    async with session_factory() as session:
+        for model, condition in (
+            (PaymentCharge, PaymentCharge.payment_id == payment.id),
+            (Payment, Payment.id == payment.id),
+            (Booking, Booking.id == booking.id),
+            (ExcursionSlot, ExcursionSlot.id == slot.id),
+            (Excursion, Excursion.id == excursion.id),
+            (User, User.id == user.id),
+        ):
+            await session.execute(delete(model).where(condition))
+        await session.commit()
+
+
+def make_confirmation(payment, charge_id="tg-charge-1"):
+    return PaymentConfirmation(
+        charge_id=charge_id,
+        provider_charge_id="yk-1",
+        payment_id=payment.id,
+        booking_id=payment.booking_id,
+        chat_id=5501,
+        total_amount=150000,
+        currency="RUB"
+    )
+
+
+async def test_submit_deduplicates_by_charge_id(redis, pending_payment):
+    """Повторная доставка апдейта не ставит вторую задачу."""
+    service = PaymentConfirmationService(redis=redis)
+    confirmation = make_confirmation(pending_payment)
+
+    assert await service.submit(confirmation) == SubmitResult.queued
+    assert await service.submit(confirmation) == SubmitResult.duplicate
+    assert await redis.llen(Queues.PAYMENT_CONFIRMATIONS) == 1
+
+
+async def test_process_confirms_once(session_factory, pending_payment, mock_bot):
+    """Платеж подтверждается один раз, даже если задача пришла дважды."""
+    service = PaymentConfirmationService(session_factory=session_factory)
+    confirmation = make_confirmation(pending_payment)
+
+    assert await service.process(confirmation, mock_bot) == ProcessResult.confirmed
+    assert await service.process(confirmation, mock_bot) == ProcessResult.duplicate
+
+    async with session_factory() as session:
+        payment = await session.get(Payment, pending_payment.id)
+        booking = await session.get(Booking, pending_payment.booking_id)
+        charges = await session.scalar(
+            select(func.count()).select_from(PaymentCharge).where(PaymentCharge.payment_id == payment.id)
+        )
+    assert payment.status == YooKassaStatus.succeeded
+    assert booking.payment_status == PaymentStatus.paid
+    assert charges == 1
+    mock_bot.send_message.assert_awaited_once()
+    assert "Оплата прошла успешно" in mock_bot.send_message.call_args.args[1]
+
+
+async def test_worker_drains_queue(redis, session_factory, pending_payment, monkeypatch, mock_bot):
+    """Воркер обрабатывает задачи, в том числе оставшиеся после падения."""
+    service = PaymentConfirmationService(redis=redis, session_factory=session_factory)
+    service.POLL_TIMEOUT = 0.1
+    monkeypatch.setattr("app.services.payment_confirmations.get_bot_instance", lambda: mock_bot)
+    # Задача, взятая в работу процессом, который упал
+    await redis.lpush(Queues.PAYMENT_CONFIRMATIONS_PROCESSING, make_confirmation(pending_payment).to_json())
+
+    await service.start()
+    try:
+        for _ in range(50):
+            if mock_bot.send_message.await_count:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await service.stop()
+
+    mock_bot.send_message.assert_awaited_once()
+    assert await redis.llen(Queues.PAYMENT_CONFIRMATIONS) == 0
+    assert await redis.llen(Queues.PAYMENT_CONFIRMATIONS_PROCESSING) == 0
+
+
+async def run_worker_until(service, condition, attempts=100):
+    await service.start()
+    try:
+        for _ in range(attempts):
+            if await condition():
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await service.stop()
+
+
+async def test_failed_confirmation_retried(redis, session_factory, pending_payment, monkeypatch, mock_bot):
+    """Сбой обновления брони откатывает и списание, и платеж: повтор подтверждает оплату."""
+    service = PaymentConfirmationService(redis=redis, session_factory=session_factory)
+    service.POLL_TIMEOUT = 0.1
+    service.RETRY_BASE_SECONDS = 0
+    monkeypatch.setattr("app.services.payment_confirmations.get_bot_instance", lambda: mock_bot)
+
+    original = BookingRepository.mark_paid
+    calls = []
+
+    async def flaky_mark_paid(self, booking_id):
+        calls.append(booking_id)
+        if len(calls) == 1:
+            raise OperationalError("UPDATE bookings", {}, Exception("database is locked"))
+        return await original(self, booking_id)
+
+    monkeypatch.setattr(BookingRepository, "mark_paid", flaky_mark_paid)
+    confirmation = make_confirmation(pending_payment)
+
+    # Первая попытка: списание и платеж откатываются вместе с бронью
+    assert await service.process(confirmation, mock_bot, notify_failure=False) == ProcessResult.failed
+    async with session_factory() as session:
+        payment = await session.get(Payment, pending_payment.id)
+        charge = await session.get(PaymentCharge, confirmation.charge_id)
+    assert payment.status == YooKassaStatus.pending
+    assert charge is None
+
+    assert await service.submit(confirmation) == SubmitResult.queued
+
+    async def notified():
+        return mock_bot.send_message.await_count > 0
+
+    await run_worker_until(service, notified)
+
+    assert len(calls) == 2
+    mock_bot.send_message.assert_awaited_once()
+    assert "Оплата прошла успешно" in mock_bot.send_message.call_args.args[1]
+    async with session_factory() as session:
+        payment = await session.get(Payment, pending_payment.id)
+        booking = await session.get(Booking, payment.booking_id)
+    assert payment.status == YooKassaStatus.succeeded
+    assert booking.payment_status == PaymentStatus.paid
+    for queue in (Queues.PAYMENT_CONFIRMATIONS, Queues.PAYMENT_CONFIRMATIONS_PROCESSING,
+                  Queues.PAYMENT_CONFIRMATIONS_DEAD):
+        assert await redis.llen(queue) == 0
+    assert await redis.zcard(Queues.PAYMENT_CONFIRMATIONS_RETRY) == 0
+
+
+async def test_exhausted_confirmation_dead_lettered(redis, session_factory, pending_payment, monkeypatch, mock_bot):
+    """После MAX_ATTEMPTS задача уходит в dead-letter, повторная доставка снова принимается."""
+    service = PaymentConfirmationService(redis=redis, session_factory=session_factory)
+    service.POLL_TIMEOUT = 0.1
+    service.RETRY_BASE_SECONDS = 0
+    service.MAX_ATTEMPTS = 2
+    notify_admins = AsyncMock()
+    monkeypatch.setattr("app.services.payment_confirmations.get_bot_instance", lambda: mock_bot)
+    monkeypatch.setattr("app.services.payment_confirmations.notify_admins", notify_admins)
+    monkeypatch.setattr(BookingRepository, "mark_paid", AsyncMock(return_value=False))
+
+    confirmation = make_confirmation(pending_payment)
+    await service.submit(confirmation)
+    await run_worker_until(service, lambda: redis.llen(Queues.PAYMENT_CONFIRMATIONS_DEAD))
+
+    dead = PaymentConfirmation.from_json(await redis.lindex(Queues.PAYMENT_CONFIRMATIONS_DEAD, 0))
+    assert dead.attempts == 2
+    assert await redis.llen(Queues.PAYMENT_CONFIRMATIONS_PROCESSING) == 0
+    mock_bot.send_message.assert_awaited_once()
+    assert "ошибка при обновлении статуса" in mock_bot.send_message.call_args.args[1]
+    notify_admins.assert_awaited_once()
+    assert await service.submit(confirmation) == SubmitResult.queued
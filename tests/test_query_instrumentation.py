@@ -0,0 +1,171 @@
+"""Тесты инструментирования SQL запросов."""
+
+import asyncio
+import logging
+
+import pytest
+from unittest.mock import MagicMock
+from aiogram.enums import ContentType
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import instrumentation
+from app.database.instrumentation import (
+    setup_query_instrumentation, track_queries, with_query_tracking,
+    get_query_totals, get_worst_labels, reset_query_totals
+)
+from app.middlewares.query_tracking import QueryTrackingMiddleware, describe_update
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    setup_query_instrumentation(engine, slow_query_ms=10_000)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+    reset_query_totals()
+    yield engine
+    reset_query_totals()
+    await engine.dispose()
+
+
+async def run_queries(engine, count):
+    async with engine.connect() as conn:
+        for _ in range(count):
+            await conn.execute(text("SELECT * FROM items"))
+
+
+@pytest.mark.asyncio
+async def test_queries_attributed_to_unit(engine):
+    """Запросы внутри track_queries считаются для своей метки."""
+    with track_queries("callback:test") as stats:
+        await run_queries(engine, 3)
+
+    assert stats.count == 3
+    assert stats.total_time > 0
+    assert len(stats.slowest) == 3
+
+    totals = get_query_totals()["callback:test"]
+    assert totals["units"] == 1
+    assert totals["statements"] == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_units_do_not_mix(engine):
+    """Параллельные апдейты считаются раздельно."""
+    async def unit(label, count):
+        with track_queries(label) as stats:
+            await run_queries(engine, count)
+            await asyncio.sleep(0)
+        return stats.count
+
+    counts = await asyncio.gather(unit("a", 2), unit("b", 5))
+
+    assert counts == [2, 5]
+    assert [label for label, _ in get_worst_labels(by="statements")] == ["b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_job_decorator(engine):
+    """Декоратор задачи относит запросы к метке задачи."""
+    @with_query_tracking("job:test")
+    async def job():
+        await run_queries(engine, 2)
+        return "done"
+
+    assert await job() == "done"
+    assert get_query_totals()["job:test"]["statements"] == 2
+
+
+@pytest.mark.asyncio
+async def test_untracked_queries_counted(engine):
+    """Запросы вне единиц работы попадают в общую метку."""
+    await run_queries(engine, 1)
+
+    assert get_query_totals()[instrumentation.UNTRACKED_LABEL]["statements"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_query_logged_with_plan(engine, caplog):
+    """Медленный запрос пишется в лог с параметрами и планом."""
+    setup_query_instrumentation(engine, slow_query_ms=0, explain=True)
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.database.slow_queries"):
+            with track_queries("callback:slow"):
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT * FROM items WHERE id = :id"), {"id": 7})
+    finally:
+        setup_query_instrumentation(engine, slow_query_ms=10_000)
+
+    records = [r.getMessage() for r in caplog.records if r.name == "app.database.slow_queries"]
+    assert records
+    assert "[callback:slow]" in records[0]
+    assert "(7,)" in records[0]
+    assert "План:" in records[0]
+
+
+def test_setup_is_idempotent():
+    """Повторная настройка не дублирует хуки."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    setup_query_instrumentation(engine)
+    setup_query_instrumentation(engine)
+
+    assert len(engine.sync_engine.dispatch.before_cursor_execute) == 1
+
+
+def make_update(callback_data=None, text_value=None):
+    update = MagicMock()
+    update.event_type = "callback_query" if callback_data is not None else "message"
+    if callback_data is not None:
+        update.callback_query.data = callback_data
+        update.message = None
+    else:
+        update.callback_query = None
+        update.message.text = text_value
+        update.message.content_type = "text"
+    return update
+
+
+def test_describe_update():
+    """Метка апдейта не содержит пользовательских данных."""
+    assert describe_update(make_update(callback_data="public_book_slot:15"), {}) == "callback:public_book_slot"
+    assert describe_update(make_update(text_value="/start ref"), {}) == "message:/start"
+    assert describe_update(
+        make_update(text_value="75"), {"raw_state": "UserBookingStates:requesting_adult_weight"}
+    ) == "message:UserBookingStates:requesting_adult_weight"
+    assert describe_update(make_update(text_value="Иванов"), {}) == "message:text"
+
+    update = make_update(text_value="Иванов")
+    update.message.content_type = ContentType.SUCCESSFUL_PAYMENT
+    assert describe_update(update, {}) == "message:successful_payment"
+
+
+def test_describe_update_is_bounded():
+    """Идентификаторы и неизвестные команды не порождают новых меток."""
+    labels = {
+        describe_update(make_update(callback_data=data), {})
+        for data in ("concent_send_other_15", "concent_send_other_16", "concent_send_other:17")
+    }
+    assert labels == {"callback:concent_send_other"}
+    assert describe_update(
+        make_update(callback_data="select_time;2030-01-01;3;10:00"), {}
+    ) == "callback:select_time"
+    assert describe_update(make_update(callback_data="booking_detail42"), {}) == "callback:booking_detail"
+    assert describe_update(make_update(callback_data=""), {}) == "callback:empty"
+
+    assert describe_update(make_update(text_value="/start@excursions_bot ref"), {}) == "message:/start"
+    assert describe_update(make_update(text_value="/whatever123"), {}) == "message:command"
+    assert describe_update(make_update(text_value="/"), {}) == "message:command"
+
+
+@pytest.mark.asyncio
+async def test_middleware_tracks_handler(engine):
+    """Мидлварь оборачивает обработку апдейта в track_queries."""
+    async def handler(event, data):
+        await run_queries(engine, 4)
+        return "ok"
+
+    result = await QueryTrackingMiddleware()(handler, make_update(callback_data="menu"), {})
+
+    assert result == "ok"
+    assert get_query_totals()["callback:menu"]["statements"] == 4
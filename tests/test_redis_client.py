@@ -0,0 +1,166 @@
+"""Тесты для блокировок RedisClient."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.redis.client import (
+    RedisClient, LockLostError, RELEASE_LOCK_SCRIPT, EXTEND_LOCK_SCRIPT
+)
+from app.services.redis.keys import Locks
+
+
+def make_client():
+    """RedisClient с замоканным подключением и зарегистрированными скриптами."""
+    client = RedisClient()
+    redis = MagicMock()
+    redis.set = AsyncMock(return_value=True)
+
+    scripts = {}
+
+    def register_script(script):
+        mock_script = AsyncMock(return_value=1)
+        mock_script.registered_client = redis
+        scripts[script] = mock_script
+        return mock_script
+
+    redis.register_script = MagicMock(side_effect=register_script)
+    client._redis = redis
+    return client, redis, scripts
+
+
+@pytest.mark.asyncio
+async def test_release_lock_uses_registered_script():
+    """release_lock выполняется через зарегистрированный скрипт и публикует уведомление."""
+    client, redis, scripts = make_client()
+
+    assert await client.release_lock("lock:slot:1", "token-1") is True
+    assert await client.release_lock("lock:slot:1", "token-2") is True
+
+    # Скрипты регистрируются один раз, а не отправляются на каждый вызов
+    assert redis.register_script.call_count == 2
+    scripts[RELEASE_LOCK_SCRIPT].assert_called_with(
+        keys=["lock:slot:1"],
+        args=["token-2", Locks.released_channel("lock:slot:1")]
+    )
+    redis.eval.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_extend_lock_uses_registered_script():
+    """extend_lock передает время продления в миллисекундах."""
+    client, redis, scripts = make_client()
+
+    assert await client.extend_lock("lock:slot:1", "token-1", extra_time=20) is True
+    scripts[EXTEND_LOCK_SCRIPT].assert_called_once_with(
+        keys=["lock:slot:1"], args=["token-1", 20000]
+    )
+
+
+@pytest.mark.asyncio
+async def test_release_lock_without_token():
+    """Без токена блокировка не освобождается и Redis не вызывается."""
+    client, redis, scripts = make_client()
+
+    assert await client.release_lock("lock:slot:1", None) is False
+    redis.register_script.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_lock_timeout_does_not_release_foreign_lock(monkeypatch):
+    """При таймауте ожидания чужая блокировка не освобождается."""
+    client, redis, scripts = make_client()
+    redis.set = AsyncMock(return_value=None)
+    monkeypatch.setattr(client, "_ensure_lock_listener", AsyncMock())
+    client.release_lock = AsyncMock()
+
+    with pytest.raises(TimeoutError):
+        async with client.lock("lock:slot:1", blocking_timeout=0.1):
+            pass
+
+    client.release_lock.assert_not_called()
+    assert client._lock_waiters == {}
+
+
+@pytest.mark.asyncio
+async def test_lock_waiter_woken_by_release_notification(monkeypatch):
+    """Ожидающий захватывает блокировку по уведомлению, не дожидаясь опроса."""
+    client, redis, scripts = make_client()
+    client.LOCK_RETRY_INTERVAL = 10
+    client.LOCK_RETRY_INTERVAL_MAX = 10
+    monkeypatch.setattr(client, "_ensure_lock_listener", AsyncMock())
+
+    # Блокировка занята: первые две попытки (быстрая и после подписки) неудачны
+    redis.set = AsyncMock(side_effect=[None, None, True])
+
+    async def holder():
+        async with client.lock("lock:slot:1", blocking_timeout=5):
+            return True
+
+    task = asyncio.create_task(holder())
+    await asyncio.sleep(0.05)
+    assert len(client._lock_waiters["lock:slot:1"]) == 1
+
+    client._wake_lock_waiter("lock:slot:1")
+    assert await asyncio.wait_for(task, timeout=1) is True
+    assert redis.set.call_count == 3
+
+
+def test_wake_lock_waiter_wakes_only_first():
+    """Уведомление будит только одного ожидающего в порядке очереди."""
+    client = RedisClient()
+    first, second = asyncio.Event(), asyncio.Event()
+    client._lock_waiters["lock:slot:1"] = [first, second]
+
+    client._wake_lock_waiter("lock:slot:1")
+    assert first.is_set() and not second.is_set()
+
+    client._wake_lock_waiter("lock:slot:1")
+    assert second.is_set()
+
+
+@pytest.mark.asyncio
+async def test_held_lock_watchdog_extends_lock():
+    """Watchdog продлевает блокировку, пока владелец работает, и освобождает ее в конце."""
+    client, redis, scripts = make_client()
+    client.extend_lock = AsyncMock(return_value=True)
+    client.release_lock = AsyncMock(return_value=True)
+
+    async with client.held_lock("scheduler:lock:test", timeout=5, extend_interval=0.02) as lock:
+        assert lock is not None
+        await asyncio.sleep(0.1)
+        lock.ensure_held()
+
+    assert client.extend_lock.call_count >= 2
+    client.extend_lock.assert_called_with("scheduler:lock:test", lock.token, 5)
+    client.release_lock.assert_called_once_with("scheduler:lock:test", lock.token)
+
+
+@pytest.mark.asyncio
+async def test_held_lock_reports_lost_lock():
+    """Если продлить не удалось, блокировка помечается потерянной и не освобождается."""
+    client, redis, scripts = make_client()
+    client.extend_lock = AsyncMock(return_value=False)
+    client.release_lock = AsyncMock(return_value=True)
+
+    async with client.held_lock("scheduler:lock:test", timeout=5, extend_interval=0.01) as lock:
+        await asyncio.wait_for(lock.wait_lost(), timeout=1)
+        assert lock.lost is True
+        with pytest.raises(LockLostError):
+            lock.ensure_held()
+
+    client.release_lock.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_held_lock_not_acquired():
+    """Если блокировка занята, held_lock возвращает None без ожидания."""
+    client, redis, scripts = make_client()
+    redis.set = AsyncMock(return_value=None)
+    client.release_lock = AsyncMock()
+
+    async with client.held_lock("scheduler:lock:test") as lock:
+        assert lock is None
+
+    redis.set.assert_called_once()
+    client.release_lock.assert_not_called()
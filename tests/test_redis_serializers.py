@@ -0,0 +1,63 @@
+"""Тесты сериализатора FSM для RedisStorage."""
+
+import json
+from datetime import date, datetime
+
+import pytest
+
+from app.services.redis.serializers import (
+    RedisJSONEncoder, dumps, loads, simple_dumps
+)
+
+
+def test_round_trip_dates():
+    """date и datetime восстанавливаются, в том числе во вложенных структурах."""
+    payload = {
+        "slot_date": date(2026, 7, 14),
+        "slots": [{"start": datetime(2026, 7, 14, 10, 30), "id": 1}],
+        "name": "Экскурсия",
+    }
+
+    assert loads(dumps(payload)) == payload
+
+
+def test_reads_legacy_format():
+    """Данные, записанные прежним энкодером, читаются без изменений."""
+    payload = {
+        "slot_id": 5,
+        "full_name": "Иванова Мария",
+        "created": datetime(2026, 1, 2, 3, 4, 5),
+        "children_weights": {"10": 25},
+    }
+    legacy = json.dumps(payload, cls=RedisJSONEncoder)
+
+    assert loads(legacy) == payload
+    assert loads(legacy.encode()) == payload
+
+
+def test_dumps_is_compact():
+    """Новый формат компактнее и читается стандартным json."""
+    payload = {"full_name": "Иванова Мария", "ids": [1, 2]}
+
+    data = dumps(payload)
+
+    assert data == '{"full_name":"Иванова Мария","ids":[1,2]}'
+    assert json.loads(data) == payload
+
+
+def test_plain_payload_keeps_tag_like_strings():
+    """Строка с меткой без структуры даты остается строкой."""
+    payload = {"note": 'text with "__type__" inside', "value": {"__type__": "other"}}
+
+    assert loads(dumps(payload)) == payload
+
+
+def test_dumps_rejects_unknown_types():
+    """Неподдерживаемые типы по-прежнему вызывают TypeError."""
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_simple_dumps_unchanged():
+    """simple_dumps пишет даты строками."""
+    assert simple_dumps({"d": date(2026, 1, 1)}) == '{"d": "2026-01-01"}'
@@ -121,6 +121,16 @@ class TestUserRepository:
         assert len(clients) >= 1
         assert clients[0].id == client.id
 
+    async def test_get_by_ids(self, db_session, test_data):
+        """Тест получения нескольких пользователей одним запросом."""
+        repo = UserRepository(db_session)
+        admin = test_data["admin"]
+        client = test_data["client"]
+
+        users = await repo.get_by_ids([client.id, admin.id, client.id, 999999])
+        assert {user.id for user in users} == {admin.id, client.id}
+        assert await repo.get_by_ids([]) == []
+
     async def test_get_users_created_by(self, db_session, test_data):
         """Тест получения пользователей, созданных администратором."""
         repo = UserRepository(db_session)
@@ -8,6 +8,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from app.routers.user import user_create_booking
 from app.user_panel.states import UserBookingStates
 from app.database.models import Booking
+from app.services.slot_capacity import ReservationStatus
 
 
 @pytest.mark.asyncio
@@ -139,6 +140,102 @@ async def test_start_booking_no_free_places(
     assert "нет свободных мест" in mock_callback_query.message.answer.call_args[0][0]
 
 
+@pytest.mark.asyncio
+async def test_start_booking_holds_seat(
+    mock_callback_query,
+    mock_state,
+    test_slot,
+    test_data,
+    test_excursion,
+    mock_user_repository,
+    mock_slot_repository,
+    mock_booking_repository,
+    mock_excursion_repository,
+    mock_slot_manager,
+    mock_session
+):
+    """Тест временного резерва места при начале бронирования."""
+    mock_callback_query.data = f"public_book_slot:{test_slot.id}"
+    mock_callback_query.message = AsyncMock()
+
+    mock_user_repository.get_by_telegram_id.return_value = test_data["client"]
+    mock_user_repository.user_has_children.return_value = False
+    mock_slot_repository.get_by_id.return_value = test_slot
+    mock_booking_repository.get_user_active_for_slot.return_value = None
+    mock_excursion_repository.get_by_id.return_value = test_excursion
+    mock_slot_manager.get_captain_weight.return_value = 90
+
+    mock_capacity = MagicMock()
+    mock_capacity.get_usage = AsyncMock(return_value=(3, 200))
+    mock_capacity.hold = AsyncMock(return_value=(ReservationStatus.reserved, 6, 400))
+
+    with patch('app.routers.user.user_create_booking.UserRepository', return_value=mock_user_repository), \
+         patch('app.routers.user.user_create_booking.SlotRepository', return_value=mock_slot_repository), \
+         patch('app.routers.user.user_create_booking.BookingRepository', return_value=mock_booking_repository), \
+         patch('app.routers.user.user_create_booking.ExcursionRepository', return_value=mock_excursion_repository), \
+         patch('app.routers.user.user_create_booking.SlotManager', return_value=mock_slot_manager), \
+         patch('app.routers.user.user_create_booking.slot_capacity', mock_capacity), \
+         patch('app.routers.user.user_create_booking.async_session', return_value=mock_session):
+
+        await user_create_booking.start_booking(mock_callback_query, mock_state)
+
+    # Занятость не считается по БД
+    mock_slot_manager.get_booked_places.assert_not_called()
+    mock_slot_manager.get_current_weight.assert_not_called()
+
+    hold_kwargs = mock_capacity.hold.call_args.kwargs
+    assert hold_kwargs["people"] == 1
+    assert hold_kwargs["weight_limit"] == test_slot.max_weight - 90
+
+    state_data = mock_state.update_data.call_args[0][0]
+    assert state_data["seat_hold"] is True
+    assert state_data["available_weight"] == 400
+    mock_state.set_state.assert_called_once_with(UserBookingStates.checking_weight)
+
+
+@pytest.mark.asyncio
+async def test_start_booking_hold_rejected(
+    mock_callback_query,
+    mock_state,
+    test_slot,
+    test_data,
+    test_excursion,
+    mock_user_repository,
+    mock_slot_repository,
+    mock_booking_repository,
+    mock_excursion_repository,
+    mock_slot_manager,
+    mock_session
+):
+    """Тест начала бронирования, когда места заняты временными резервами."""
+    mock_callback_query.data = f"public_book_slot:{test_slot.id}"
+    mock_callback_query.message = AsyncMock()
+
+    mock_user_repository.get_by_telegram_id.return_value = test_data["client"]
+    mock_slot_repository.get_by_id.return_value = test_slot
+    mock_booking_repository.get_user_active_for_slot.return_value = None
+    mock_excursion_repository.get_by_id.return_value = test_excursion
+    mock_slot_manager.get_captain_weight.return_value = 0
+
+    mock_capacity = MagicMock()
+    mock_capacity.get_usage = AsyncMock(return_value=(test_slot.max_people - 1, 0))
+    mock_capacity.hold = AsyncMock(return_value=(ReservationStatus.no_places, 0, 500))
+
+    with patch('app.routers.user.user_create_booking.UserRepository', return_value=mock_user_repository), \
+         patch('app.routers.user.user_create_booking.SlotRepository', return_value=mock_slot_repository), \
+         patch('app.routers.user.user_create_booking.BookingRepository', return_value=mock_booking_repository), \
+         patch('app.routers.user.user_create_booking.ExcursionRepository', return_value=mock_excursion_repository), \
+         patch('app.routers.user.user_create_booking.SlotManager', return_value=mock_slot_manager), \
+         patch('app.routers.user.user_create_booking.slot_capacity', mock_capacity), \
+         patch('app.routers.user.user_create_booking.async_session', return_value=mock_session):
+
+        await user_create_booking.start_booking(mock_callback_query, mock_state)
+
+    mock_callback_query.message.answer.assert_called_once()
+    assert "нет свободных мест" in mock_callback_query.message.answer.call_args[0][0]
+    mock_state.set_state.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_confirm_booking_success(
     mock_callback_query,
@@ -332,7 +429,13 @@ async def test_cancel_booking_during_process(
     mock_callback_query.data = "cancel_booking"
     mock_callback_query.message = AsyncMock()
 
-    await user_create_booking.cancel_booking(mock_callback_query, mock_state)
+    mock_state.get_data.return_value = {"slot_id": 1, "user_id": 5, "seat_hold": True}
+
+    with patch('app.routers.user.user_create_booking.slot_capacity') as mock_capacity:
+        mock_capacity.release_hold = AsyncMock(return_value=True)
+        await user_create_booking.cancel_booking(mock_callback_query, mock_state)
+
+        mock_capacity.release_hold.assert_awaited_once_with(1, 5)
 
     mock_state.clear.assert_called_once()
     mock_callback_query.message.answer.assert_called_once()
@@ -2,7 +2,7 @@
 
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from app.services.scheduler.tasks import (
     auto_cancel_unpaid_bookings,
@@ -78,12 +78,18 @@ async def test_auto_cancel_unpaid_bookings_success(mock_redis_client, monkeypatc
     mock_booking_manager.cancel_booking.return_value = (True, "Успешно", None)
 
     monkeypatch.setattr("app.services.scheduler.tasks.BookingManager", lambda s: mock_booking_manager)
+    mock_outbox_repo = AsyncMock()
+    monkeypatch.setattr("app.services.scheduler.tasks.OutboxRepository", lambda s: mock_outbox_repo)
 
     await auto_cancel_unpaid_bookings()
 
     mock_booking_manager.get_expired_unpaid_bookings.assert_called_once()
     mock_booking_manager.cancel_booking.assert_called_once_with(booking_id=1, auto_refund=False)
-    mock_bot.send_message.assert_called_once()
+    # Уведомление пишется в outbox в транзакции, бот внутри нее не вызывается
+    mock_outbox_repo.enqueue.assert_awaited_once()
+    assert mock_outbox_repo.enqueue.call_args.kwargs["chat_id"] == 123456
+    mock_uow.commit.assert_awaited_once()
+    mock_bot.send_message.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -180,9 +186,41 @@ async def test_auto_cancel_unpaid_bookings_exception(mock_redis_client, monkeypa
 
     assert "Ошибка БД" in str(exc_info.value)
 
-    # В этом случае release_lock НЕ должен вызываться,
-    # потому что исключение произошло до входа в try
-    mock_redis_client.release_lock.assert_not_called()
+    # Блокировка освобождается контекстным менеджером даже при ошибке
+    # до входа в try, а не висит до истечения TTL
+    mock_redis_client.release_lock.assert_called_once_with(
+        "scheduler:lock:cancel_unpaid", "mock-token"
+    )
+
+
+@pytest.mark.asyncio
+async def test_auto_cancel_unpaid_bookings_lock_lost(mock_redis_client, monkeypatch):
+    """Тест прерывания автоотмены при потере блокировки."""
+    from contextlib import asynccontextmanager
+    from app.services.redis import WatchedLock
+
+    mock_session, mock_uow = setup_mocks(monkeypatch)
+    mock_redis_for_tasks(mock_redis_client, monkeypatch)
+    mock_bot = mock_bot_for_tasks(monkeypatch)
+
+    lost_lock = WatchedLock("scheduler:lock:cancel_unpaid", "mock-token")
+    lost_lock.mark_lost()
+
+    @asynccontextmanager
+    async def held_lock(key, timeout=60, **kwargs):
+        yield lost_lock
+
+    monkeypatch.setattr(mock_redis_client, "held_lock", held_lock)
+
+    mock_booking_manager = AsyncMock()
+    mock_booking_manager.get_expired_unpaid_bookings.return_value = [MagicMock(id=1)]
+    monkeypatch.setattr("app.services.scheduler.tasks.BookingManager", lambda s: mock_booking_manager)
+
+    # Задача завершается без исключения и не обрабатывает бронирования
+    await auto_cancel_unpaid_bookings()
+
+    mock_booking_manager.cancel_booking.assert_not_called()
+    mock_bot.send_message.assert_not_called()
 
 
 # ========== ТЕСТЫ ДЛЯ send_payment_reminder ==========
@@ -1360,4 +1398,26 @@ async def test_process_pending_notifications_lock_failed(mock_redis_client, monk
     with patch("app.services.scheduler.tasks.NotificationRepository") as mock_repo:
         from app.services.scheduler.tasks import process_pending_notifications
         await process_pending_notifications()
-        mock_repo.assert_not_called()
\ No newline at end of file
+        mock_repo.assert_not_called()
+
+# ========== ТЕСТЫ ДЛЯ rollup_daily_stats ==========
+
+@pytest.mark.asyncio
+async def test_rollup_daily_stats_processes_queue_in_batches(mock_redis_client, monkeypatch):
+    """Очередь пересчитывается пакетами до опустошения."""
+    setup_mocks(monkeypatch)
+    mock_redis_for_tasks(mock_redis_client, monkeypatch)
+
+    first_batch = [date(2026, 4, 1), date(2026, 4, 2)]
+    second_batch = [date(2026, 4, 3)]
+    mock_repo = AsyncMock()
+    mock_repo.get_dirty_dates.side_effect = [first_batch, second_batch, []]
+    monkeypatch.setattr("app.services.scheduler.tasks.DailyStatsRepository", lambda s: mock_repo)
+
+    from app.services.scheduler.tasks import rollup_daily_stats, DAILY_STATS_BATCH_DAYS
+
+    await rollup_daily_stats()
+
+    assert mock_repo.get_dirty_dates.await_count == 3
+    mock_repo.get_dirty_dates.assert_awaited_with(DAILY_STATS_BATCH_DAYS)
+    assert [call.args[0] for call in mock_repo.rebuild.await_args_list] == [first_batch, second_batch]
@@ -0,0 +1,156 @@
+"""Тесты телеметрии задач планировщика."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from apscheduler.events import (
+    EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED, JobExecutionEvent, JobSubmissionEvent
+)
+
+from app.services.scheduler import telemetry
+from app.services.scheduler.telemetry import (
+    scheduled_job, record_items, record_lock_failure,
+    set_job_interval, get_job_stats, reset_job_stats
+)
+from app.database.instrumentation import get_query_totals
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    reset_job_stats()
+    yield
+    reset_job_stats()
+
+
+@pytest.mark.asyncio
+async def test_run_recorded_with_items():
+    """Успешный запуск: длительность, элементы и метка SQL запросов."""
+    @scheduled_job("test_items")
+    async def job():
+        record_items(3)
+        record_items(2)
+        return "done"
+
+    assert await job() == "done"
+
+    stats = get_job_stats()["test_items"]
+    assert stats["runs"] == 1
+    assert stats["last_status"] == telemetry.STATUS_OK
+    assert stats["last_items"] == 5
+    assert stats["last_duration"] is not None
+    assert stats["running"] == 0
+    assert "job:test_items" in get_query_totals()
+    assert telemetry.job_runs.get(job="test_items", status="ok") >= 1
+
+
+@pytest.mark.asyncio
+async def test_exception_counted_and_reraised():
+    """Исключение задачи учитывается и пробрасывается планировщику."""
+    @scheduled_job("test_error")
+    async def job():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await job()
+
+    stats = get_job_stats()["test_error"]
+    assert stats["errors"] == 1
+    assert stats["last_status"] == telemetry.STATUS_ERROR
+    assert "boom" in stats["last_error"]
+    assert stats["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_lock_failure_not_counted_as_run():
+    """Запуск без блокировки считается отдельно и не портит длительность."""
+    @scheduled_job("test_lock")
+    async def job():
+        record_lock_failure()
+
+    await job()
+
+    stats = get_job_stats()["test_lock"]
+    assert stats["lock_failures"] == 1
+    assert stats["runs"] == 0
+    assert stats["last_status"] == telemetry.STATUS_LOCKED
+
+
+@pytest.mark.asyncio
+async def test_task_lock_failure_recorded(mock_redis_client, monkeypatch):
+    """Реальная задача отмечает неудачную попытку взять блокировку."""
+    mock_redis_client.acquire_lock = AsyncMock(return_value=None)
+    monkeypatch.setattr("app.services.scheduler.tasks.redis_client", mock_redis_client)
+
+    from app.services.scheduler.tasks import cancel_empty_slots
+    await cancel_empty_slots()
+
+    assert get_job_stats()["cancel_empty_slots"]["lock_failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_overrun_detected():
+    """Запуск дольше интервала помечается."""
+    set_job_interval("test_overrun", 0.000001)
+
+    @scheduled_job("test_overrun")
+    async def job():
+        pass
+
+    await job()
+
+    assert get_job_stats()["test_overrun"]["overrun"] is True
+
+
+def test_scheduler_events():
+    """Слушатель считает misfire, отброшенные запуски и задержку старта."""
+    scheduled = datetime.now() - timedelta(seconds=2)
+
+    telemetry._on_scheduler_event(JobExecutionEvent(EVENT_JOB_MISSED, "test_events", "default", scheduled))
+    telemetry._on_scheduler_event(
+        JobSubmissionEvent(EVENT_JOB_MAX_INSTANCES, "test_events", "default", [scheduled])
+    )
+    telemetry._on_scheduler_event(
+        JobSubmissionEvent(telemetry.EVENT_JOB_SUBMITTED, "test_events", "default", [scheduled])
+    )
+
+    stats = get_job_stats()["test_events"]
+    assert stats["misfires"] == 1
+    assert stats["skipped"] == 1
+    assert telemetry.job_start_delay.quantile(0.5, job="test_events") >= 2
+
+
+def test_service_records_intervals():
+    """SchedulerService передает интервалы задач в телеметрию."""
+    from app.services.scheduler.scheduler import SchedulerService
+
+    service = SchedulerService.__new__(SchedulerService)
+    job = MagicMock()
+    job.id = "test_interval"
+    job.trigger.interval = timedelta(minutes=5)
+    service.scheduler = MagicMock()
+    service.scheduler.get_jobs.return_value = [job]
+
+    service._record_job_intervals()
+
+    assert get_job_stats()["test_interval"]["interval"] == 300
+
+
+@pytest.mark.asyncio
+async def test_jobs_command(telegram_message_mock):
+    """Команда /jobs выводит статистику задач."""
+    from app.routers.admin.statistic import jobs_handler
+
+    set_job_interval("send_payment_reminder", 600)
+
+    @scheduled_job("send_payment_reminder")
+    async def job():
+        record_items(4)
+
+    await job()
+    await jobs_handler(telegram_message_mock)
+
+    text = telegram_message_mock.answer.call_args[0][0]
+    assert "send_payment_reminder" in text
+    assert "Обработано: 4" in text
+    assert "интервал 600 с" in text
@@ -0,0 +1,93 @@
+"""Тесты общего планировщика исходящих сообщений."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import GetMe, SendMessage
+
+from app.services.send_scheduler import (
+    Priority, SendScheduler, SendSchedulerMiddleware, send_priority
+)
+
+
+@pytest.fixture
+async def scheduler():
+    scheduler = SendScheduler()
+    # Один токен на 50 мс, чтобы очередь успевала накопиться
+    scheduler.GLOBAL_RATE = 20
+    scheduler.GLOBAL_BURST = 1
+    yield scheduler
+    await scheduler.stop()
+
+
+async def send(scheduler, order, chat_id, priority=None):
+    if priority is None:
+        await scheduler.acquire(chat_id)
+    else:
+        with send_priority(priority):
+            await scheduler.acquire(chat_id)
+    order.append(chat_id)
+
+
+async def test_higher_priority_goes_first(scheduler):
+    """Ожидающие отправки получают токены по классу, а не по времени постановки."""
+    order = []
+    await send(scheduler, order, 1)
+
+    tasks = [
+        asyncio.create_task(send(scheduler, order, 10, Priority.broadcast)),
+        asyncio.create_task(send(scheduler, order, 20, Priority.reminder)),
+        asyncio.create_task(send(scheduler, order, 30)),
+    ]
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=2)
+
+    assert order == [1, 30, 20, 10]
+
+
+async def test_chat_limit_lets_other_chats_through(scheduler):
+    """Чат, исчерпавший свой лимит, не задерживает другие чаты."""
+    scheduler.GLOBAL_BURST = 10
+    scheduler.GLOBAL_RATE = 100
+    scheduler.CHAT_BURST = 1
+    scheduler.CHAT_RATE = 5
+    order = []
+
+    tasks = [
+        asyncio.create_task(send(scheduler, order, 1)),
+        asyncio.create_task(send(scheduler, order, 1)),
+        asyncio.create_task(send(scheduler, order, 2, Priority.broadcast)),
+    ]
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=2)
+
+    assert order == [1, 2, 1]
+
+
+async def test_pause_blocks_all_senders(scheduler):
+    """retry_after от одного отправителя приостанавливает всех."""
+    scheduler.GLOBAL_BURST = 10
+    scheduler.pause(0.2)
+
+    task = asyncio.create_task(scheduler.acquire(5, Priority.transactional))
+    await asyncio.sleep(0.1)
+    assert not task.done()
+    await asyncio.wait_for(task, timeout=1)
+
+
+async def test_middleware_retries_after_429(scheduler):
+    """Мидлварь повторяет отправку после паузы и пропускает прочие методы."""
+    scheduler.GLOBAL_BURST = 10
+    middleware = SendSchedulerMiddleware(scheduler)
+    method = SendMessage(chat_id=1, text="Привет")
+    make_request = AsyncMock(side_effect=[
+        TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=0),
+        "ok",
+    ])
+
+    assert await middleware(make_request, MagicMock(), method) == "ok"
+    assert make_request.await_count == 2
+
+    make_request = AsyncMock(return_value="me")
+    scheduler.pause(60)
+    assert await asyncio.wait_for(middleware(make_request, MagicMock(), GetMe()), timeout=1) == "me"
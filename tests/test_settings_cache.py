@@ -0,0 +1,154 @@
+"""Тесты снимка системных настроек."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import delete, update
+
+from redis.exceptions import ConnectionError
+
+from app.database.models import SystemSetting
+from app.services.redis.keys import Cache
+from app.services.settings_cache import SettingsCache
+
+
+@pytest.fixture(autouse=True)
+async def system_settings(session_factory):
+    async with session_factory() as session:
+        session.add_all([
+            SystemSetting(key="send_receipt", value="true"),
+            SystemSetting(key="vat_rate", value="10"),
+            SystemSetting(key="broken_int", value="abc"),
+        ])
+        await session.commit()
+    yield
+    async with session_factory() as session:
+        await session.execute(delete(SystemSetting))
+        await session.commit()
+
+
+async def set_in_db(factory, key, value):
+    """Изменить настройку в БД в обход кеша (как другой процесс)"""
+    async with factory() as session:
+        await session.execute(update(SystemSetting).where(SystemSetting.key == key).values(value=value))
+        await session.commit()
+
+
+async def test_typed_accessors_served_from_memory(session_factory, redis):
+    """После загрузки значения читаются без обращения к БД."""
+    cache = SettingsCache(redis=redis, session_factory=session_factory)
+
+    assert await cache.get_bool("send_receipt") is True
+    assert await cache.get_int("vat_rate") == 10
+    assert await cache.get_int("broken_int", default=7) == 7
+    assert await cache.get_int("missing", default=1) == 1
+
+    # Изменение в БД в обход кеша не видно до инвалидации
+    await set_in_db(session_factory, "vat_rate", "22")
+    assert await cache.get_int("vat_rate") == 10
+
+
+async def test_apply_updates_snapshot_and_version(session_factory, redis):
+    """Запись сквозь кеш обновляет снимок и версию в Redis."""
+    cache = SettingsCache(redis=redis, session_factory=session_factory)
+    await cache.load()
+
+    await cache.apply("vat_rate", "5")
+
+    assert await cache.get_int("vat_rate") == 5
+    assert int(await redis.get(Cache.SETTINGS_VERSION)) == 1
+    assert cache.version == 1
+    assert await cache.refresh_if_stale() is False
+
+
+async def test_other_process_reloads_on_publish(session_factory, redis):
+    """Другой процесс перечитывает настройки по сообщению pub/sub."""
+    writer = SettingsCache(redis=redis, session_factory=session_factory)
+    reader = SettingsCache(redis=redis, session_factory=session_factory)
+    await writer.start()
+    await reader.start()
+    try:
+        assert await reader.get_int("vat_rate") == 10
+
+        await set_in_db(session_factory, "vat_rate", "22")
+        await writer.apply("vat_rate", "22")
+
+        for _ in range(50):
+            if await reader.get_int("vat_rate") == 22:
+                break
+            await asyncio.sleep(0.02)
+        assert await reader.get_int("vat_rate") == 22
+        assert reader.version == writer.version == 1
+    finally:
+        await writer.stop()
+        await reader.stop()
+
+
+class BrokenPubSub:
+    """Подписка, соединение которой оборвалось"""
+
+    async def get_message(self, **kwargs):
+        raise ConnectionError("Connection closed by server.")
+
+    async def aclose(self):
+        pass
+
+
+async def wait_for_value(cache, key, value):
+    for _ in range(50):
+        if await cache.get_int(key) == value:
+            return True
+        await asyncio.sleep(0.02)
+    return False
+
+
+async def test_listener_resubscribes_after_redis_error(session_factory, redis):
+    """Ошибка Redis в подписке не останавливает обновление настроек."""
+    writer = SettingsCache(redis=redis, session_factory=session_factory)
+    reader = SettingsCache(redis=redis, session_factory=session_factory)
+    reader.RESUBSCRIBE_MIN_DELAY = 0.01
+    await reader.load()
+    listener = asyncio.create_task(reader._listen(BrokenPubSub()))
+    try:
+        # Сверка версии работает и после ошибки
+        await set_in_db(session_factory, "vat_rate", "22")
+        await writer.apply("vat_rate", "22")
+        assert await wait_for_value(reader, "vat_rate", 22)
+
+        # Подписка восстановлена: изменения снова приходят сообщением
+        for _ in range(50):
+            if (await redis.pubsub_numsub(Cache.SETTINGS_CHANNEL))[0][1]:
+                break
+            await asyncio.sleep(0.02)
+        await set_in_db(session_factory, "vat_rate", "5")
+        await writer.apply("vat_rate", "5")
+        assert await wait_for_value(reader, "vat_rate", 5)
+        assert reader.version == 2
+        assert not listener.done()
+    finally:
+        listener.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await listener
+
+
+async def test_refresh_if_stale_catches_missed_messages(session_factory, redis):
+    """Без сообщения снимок обновляется при сверке версии."""
+    cache = SettingsCache(redis=redis, session_factory=session_factory)
+    await cache.load()
+
+    await set_in_db(session_factory, "send_receipt", "false")
+    await redis.incr(Cache.SETTINGS_VERSION)
+
+    assert await cache.refresh_if_stale() is True
+    assert await cache.get_bool("send_receipt") is False
+
+
+async def test_works_without_redis(session_factory):
+    """Без Redis снимок работает в пределах процесса."""
+    cache = SettingsCache(session_factory=session_factory)
+    assert await cache.get_int("vat_rate") == 10
+
+    await cache.apply("vat_rate", "7")
+
+    assert await cache.get_int("vat_rate") == 7
+    assert cache.version == 0
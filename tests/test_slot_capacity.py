@@ -0,0 +1,308 @@
+"""Тесты атомарных счетчиков занятости слотов."""
+
+import asyncio
+import random
+import time
+
+import fakeredis
+import pytest
+from unittest.mock import AsyncMock
+
+from app.services.redis.keys import Capacity
+from app.services.slot_capacity import SlotCapacityService, ReservationStatus
+
+
+class SlowRedis(fakeredis.FakeAsyncRedis):
+    """FakeAsyncRedis с сетевой задержкой на каждую команду."""
+
+    delay = 0.02
+
+    async def execute_command(self, *args, **options):
+        await asyncio.sleep(self.delay)
+        return await super().execute_command(*args, **options)
+
+
+def empty_snapshot():
+    return AsyncMock(return_value={})
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.mark.asyncio
+async def test_reserve_seeds_counter_from_snapshot(redis):
+    """Первый резерв заполняет счетчик из БД и учитывает существующие брони."""
+    service = SlotCapacityService(redis)
+    load_snapshot = AsyncMock(return_value={10: (3, 200), 11: (2, 150)})
+
+    status, free_people, free_weight = await service.reserve(
+        slot_id=1, user_id=12, people=2, weight=100,
+        people_limit=8, weight_limit=500, load_snapshot=load_snapshot
+    )
+
+    assert status == ReservationStatus.reserved
+    assert (free_people, free_weight) == (1, 50)
+    load_snapshot.assert_awaited_once()
+
+    # Счетчик уже есть - БД больше не читается
+    status, _, _ = await service.reserve(
+        slot_id=1, user_id=13, people=2, weight=10,
+        people_limit=8, weight_limit=500, load_snapshot=load_snapshot
+    )
+    assert status == ReservationStatus.no_places
+    load_snapshot.assert_awaited_once()
+    assert await redis.ttl(Capacity.slot(1)) > 0
+
+
+@pytest.mark.asyncio
+async def test_reserve_rejects_weight(redis):
+    """Превышение веса отклоняется без изменения счетчика."""
+    service = SlotCapacityService(redis)
+
+    status, free_people, free_weight = await service.reserve(
+        slot_id=1, user_id=1, people=1, weight=120,
+        people_limit=10, weight_limit=100, load_snapshot=empty_snapshot()
+    )
+
+    assert status == ReservationStatus.no_weight
+    assert (free_people, free_weight) == (10, 100)
+    assert await redis.hget(Capacity.slot(1), "people") == b"0"
+
+
+@pytest.mark.asyncio
+async def test_repeated_hold_replaces_previous(redis):
+    """Повторный временный резерв того же клиента не удваивает занятость."""
+    service = SlotCapacityService(redis)
+
+    for people in (3, 2):
+        status, _, _ = await service.hold(
+            slot_id=1, user_id=1, people=people, weight=0,
+            people_limit=10, weight_limit=None, load_snapshot=empty_snapshot()
+        )
+        assert status == ReservationStatus.reserved
+
+    assert await redis.hget(Capacity.slot(1), "people") == b"2"
+
+
+@pytest.mark.asyncio
+async def test_permanent_reserve_is_not_replaced(redis):
+    """Постоянный резерв не перезаписывается ни повторной бронью, ни временным резервом."""
+    service = SlotCapacityService(redis)
+    status, _, _ = await service.reserve(
+        slot_id=1, user_id=1, people=3, weight=150,
+        people_limit=10, weight_limit=500, load_snapshot=empty_snapshot()
+    )
+    assert status == ReservationStatus.reserved
+
+    for reserve in (service.reserve, service.hold):
+        status, free_people, free_weight = await reserve(
+            slot_id=1, user_id=1, people=1, weight=80,
+            people_limit=10, weight_limit=500, load_snapshot=empty_snapshot()
+        )
+        assert status == ReservationStatus.already_reserved
+        assert (free_people, free_weight) == (7, 350)
+
+    assert await redis.hget(Capacity.slot(1), "u:1") == b"3:150"
+    assert await redis.zcard(Capacity.holds(1)) == 0
+    assert await service.get_usage(1, load_snapshot=empty_snapshot()) == (3, 150)
+
+
+@pytest.mark.asyncio
+async def test_release_is_idempotent(redis):
+    """Освобождение возвращает места один раз."""
+    service = SlotCapacityService(redis)
+    await service.reserve(
+        slot_id=1, user_id=1, people=3, weight=150,
+        people_limit=3, weight_limit=None, load_snapshot=empty_snapshot()
+    )
+
+    assert await service.release(1, 1) is True
+    assert await service.release(1, 1) is False
+    assert await redis.hget(Capacity.slot(1), "people") == b"0"
+    assert await redis.hget(Capacity.slot(1), "weight") == b"0"
+
+    status, _, _ = await service.reserve(
+        slot_id=1, user_id=2, people=3, weight=150,
+        people_limit=3, weight_limit=None, load_snapshot=empty_snapshot()
+    )
+    assert status == ReservationStatus.reserved
+
+
+@pytest.mark.asyncio
+async def test_reserve_reports_unavailable_on_redis_error():
+    """Ошибка Redis не роняет бронирование, а требует проверки по БД."""
+    redis = fakeredis.FakeAsyncRedis()
+    service = SlotCapacityService(redis)
+    redis.register_script = lambda script: AsyncMock(side_effect=ConnectionError("down"))
+
+    status, _, _ = await service.reserve(
+        slot_id=1, user_id=1, people=1, weight=0,
+        people_limit=10, weight_limit=None, load_snapshot=empty_snapshot()
+    )
+
+    assert status == ReservationStatus.unavailable
+    assert await service.release(1, 1) is False
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reservations_never_overbook(redis):
+    """Стресс: параллельные резервы и отмены не превышают лимиты слота."""
+    service = SlotCapacityService(redis)
+    rng = random.Random(42)
+    people_limit, weight_limit = 12, 900
+    slots = range(1, 6)
+
+    async def attempt(slot_id, user_id):
+        people = rng.randint(1, 4)
+        weight = rng.randint(40, 300)
+        status, _, _ = await service.reserve(
+            slot_id=slot_id, user_id=user_id, people=people, weight=weight,
+            people_limit=people_limit, weight_limit=weight_limit,
+            load_snapshot=empty_snapshot()
+        )
+        if status == ReservationStatus.reserved and rng.random() < 0.3:
+            await service.release(slot_id, user_id)
+            return None
+        if status == ReservationStatus.reserved:
+            return slot_id, people, weight
+        return None
+
+    results = await asyncio.gather(*[
+        attempt(slot_id, user_id)
+        for user_id in range(200)
+        for slot_id in slots
+    ])
+
+    for slot_id in slots:
+        accepted = [r for r in results if r and r[0] == slot_id]
+        people = sum(r[1] for r in accepted)
+        weight = sum(r[2] for r in accepted)
+
+        assert people <= people_limit
+        assert weight <= weight_limit
+        # Счетчик совпадает с суммой подтвержденных резервов
+        assert int(await redis.hget(Capacity.slot(slot_id), "people")) == people
+        assert int(await redis.hget(Capacity.slot(slot_id), "weight")) == weight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reservations_run_in_parallel():
+    """Стресс: резервы не сериализуются глобальной блокировкой."""
+    redis = SlowRedis()
+    service = SlotCapacityService(redis)
+    # Заполняем счетчики заранее, чтобы мерить только резерв
+    for slot_id in range(1, 11):
+        await service.reserve(
+            slot_id=slot_id, user_id=0, people=1, weight=0,
+            people_limit=100, weight_limit=None, load_snapshot=empty_snapshot()
+        )
+
+    requests = 100
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        service.reserve(
+            slot_id=i % 10 + 1, user_id=i + 1, people=1, weight=0,
+            people_limit=100, weight_limit=None, load_snapshot=empty_snapshot()
+        )
+        for i in range(requests)
+    ])
+    elapsed = time.perf_counter() - started
+
+    assert all(status == ReservationStatus.reserved for status, _, _ in results)
+    # При последовательном выполнении ушло бы не меньше requests * delay
+    assert elapsed < requests * SlowRedis.delay / 4
+
+
+@pytest.mark.asyncio
+async def test_hold_counts_toward_usage_until_expired(redis):
+    """Временный резерв занимает места, пока не истечет."""
+    service = SlotCapacityService(redis)
+    await service.hold(
+        slot_id=1, user_id=1, people=2, weight=150,
+        people_limit=4, weight_limit=None, load_snapshot=empty_snapshot()
+    )
+
+    assert await service.get_usage(1, load_snapshot=empty_snapshot()) == (2, 150)
+
+    status, _, _ = await service.reserve(
+        slot_id=1, user_id=2, people=3, weight=0,
+        people_limit=4, weight_limit=None, load_snapshot=empty_snapshot()
+    )
+    assert status == ReservationStatus.no_places
+
+    # Имитируем истечение резерва
+    await redis.zadd(Capacity.holds(1), {"u:1": 0})
+
+    assert await service.get_usage(1, load_snapshot=empty_snapshot()) == (0, 0)
+    status, _, _ = await service.reserve(
+        slot_id=1, user_id=2, people=3, weight=0,
+        people_limit=4, weight_limit=None, load_snapshot=empty_snapshot()
+    )
+    assert status == ReservationStatus.reserved
+
+
+@pytest.mark.asyncio
+async def test_reserve_converts_hold_to_permanent(redis):
+    """Подтвержденная бронь заменяет временный резерв и не истекает."""
+    service = SlotCapacityService(redis)
+    await service.hold(
+        slot_id=1, user_id=1, people=1, weight=80,
+        people_limit=10, weight_limit=None, load_snapshot=empty_snapshot()
+    )
+    await service.reserve(
+        slot_id=1, user_id=1, people=3, weight=160,
+        people_limit=10, weight_limit=None, load_snapshot=empty_snapshot()
+    )
+
+    assert await redis.zcard(Capacity.holds(1)) == 0
+    # Снятие временного резерва не трогает подтвержденную бронь
+    assert await service.release_hold(1, 1) is False
+    assert await service.get_usage(1, load_snapshot=empty_snapshot()) == (3, 160)
+
+
+@pytest.mark.asyncio
+async def test_get_usage_seeds_counter(redis):
+    """Занятость без счетчика заполняется из БД один раз."""
+    service = SlotCapacityService(redis)
+    load_snapshot = AsyncMock(return_value={5: (2, 140)})
+
+    assert await service.get_usage(1, load_snapshot=load_snapshot) == (2, 140)
+    assert await service.get_usage(1, load_snapshot=load_snapshot) == (2, 140)
+    load_snapshot.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_invalidate_keeps_holds(redis):
+    """Сброс счетчика заполняет брони из БД заново и сохраняет временные резервы."""
+    service = SlotCapacityService(redis)
+    await service.reserve(
+        slot_id=1, user_id=1, people=2, weight=150,
+        people_limit=10, weight_limit=None, load_snapshot=empty_snapshot()
+    )
+    await service.hold(
+        slot_id=1, user_id=2, people=1, weight=70,
+        people_limit=10, weight_limit=None, load_snapshot=empty_snapshot()
+    )
+
+    await service.invalidate(1)
+
+    async def snapshot():
+        return {1: (2, 150), 3: (1, 60)}
+
+    assert await service.get_usage(1, load_snapshot=snapshot) == (4, 280)
+    assert await redis.zscore(Capacity.holds(1), "u:2") is not None
+    # Временный резерв по-прежнему заменяется, постоянный - нет
+    status, _, _ = await service.hold(
+        slot_id=1, user_id=2, people=2, weight=140,
+        people_limit=10, weight_limit=None, load_snapshot=snapshot
+    )
+    assert status == ReservationStatus.reserved
+    status, _, _ = await service.hold(
+        slot_id=1, user_id=3, people=1, weight=60,
+        people_limit=10, weight_limit=None, load_snapshot=snapshot
+    )
+    assert status == ReservationStatus.already_reserved
+    assert await service.get_usage(1, load_snapshot=snapshot) == (5, 350)
+
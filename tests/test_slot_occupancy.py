@@ -0,0 +1,184 @@
+"""Тесты столбцов занятости слотов и их триггеров."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database.managers.slot_manager import SlotManager
+from app.database.models import (
+    Booking, BookingChild, BookingStatus, Excursion, ExcursionSlot,
+    User, UserRole, init_models
+)
+from app.database.slot_occupancy import SLOT_OCCUPANCY_DDL, find_drift, fix_drift, setup_slot_occupancy
+
+
+@pytest.fixture
+async def occupancy_data(db_session):
+    excursion = Excursion(name="Занятость", base_duration_minutes=60, base_price=1000)
+    captain = User(full_name="Капитан Занятости", phone_number="+79007770001", role=UserRole.captain, weight=90)
+    adult = User(full_name="Взрослый Занятости", phone_number="+79007770002", role=UserRole.client, weight=80)
+    child = User(full_name="Ребенок Занятости", phone_number="+79007770003", role=UserRole.client, weight=30)
+    db_session.add_all([excursion, captain, adult, child])
+    await db_session.flush()
+
+    start = datetime.now() + timedelta(days=3)
+    slots = [
+        ExcursionSlot(
+            excursion_id=excursion.id, captain_id=captain.id, start_datetime=start + timedelta(hours=hour),
+            end_datetime=start + timedelta(hours=hour + 1), max_people=10, max_weight=500
+        )
+        for hour in (0, 2)
+    ]
+    db_session.add_all(slots)
+    await db_session.commit()
+
+    slot_ids = [slot.id for slot in slots]
+    user_ids = [captain.id, adult.id, child.id]
+    excursion_id = excursion.id
+
+    yield {"slots": slots, "captain": captain, "adult": adult, "child": child}
+
+    await db_session.rollback()
+    booking_ids = select(Booking.id).where(Booking.slot_id.in_(slot_ids))
+    await db_session.execute(delete(BookingChild).where(BookingChild.booking_id.in_(booking_ids)))
+    await db_session.execute(delete(Booking).where(Booking.slot_id.in_(slot_ids)))
+    await db_session.execute(delete(ExcursionSlot).where(ExcursionSlot.id.in_(slot_ids)))
+    await db_session.execute(delete(User).where(User.id.in_(user_ids)))
+    await db_session.execute(delete(Excursion).where(Excursion.id == excursion_id))
+    await db_session.commit()
+
+
+async def read_occupancy(session, slot_id):
+    result = await session.execute(
+        select(ExcursionSlot.booked_people, ExcursionSlot.booked_weight).where(ExcursionSlot.id == slot_id)
+    )
+    return tuple(result.one())
+
+
+async def add_booking(session, slot, adult, children=()):
+    booking = Booking(slot_id=slot.id, adult_user_id=adult.id, total_price=1000)
+    session.add(booking)
+    await session.flush()
+    for child in children:
+        session.add(BookingChild(
+            booking_id=booking.id, child_user_id=child.id, age_category="8-12 лет", calculated_price=500
+        ))
+    await session.commit()
+    return booking
+
+
+async def test_booking_lifecycle_updates_slot(db_session, occupancy_data):
+    """Создание, дети, отмена и восстановление меняют занятость в той же транзакции."""
+    slot, adult, child = occupancy_data["slots"][0], occupancy_data["adult"], occupancy_data["child"]
+
+    booking = await add_booking(db_session, slot, adult, [child])
+    assert await read_occupancy(db_session, slot.id) == (2, 110)
+
+    await db_session.execute(delete(BookingChild).where(BookingChild.booking_id == booking.id))
+    await db_session.commit()
+    assert await read_occupancy(db_session, slot.id) == (1, 80)
+
+    await db_session.execute(
+        update(Booking).where(Booking.id == booking.id).values(booking_status=BookingStatus.cancelled)
+    )
+    await db_session.commit()
+    assert await read_occupancy(db_session, slot.id) == (0, 0)
+
+    await db_session.execute(
+        update(Booking).where(Booking.id == booking.id).values(booking_status=BookingStatus.active)
+    )
+    slot_id = slot.id
+    await db_session.rollback()
+    assert await read_occupancy(db_session, slot_id) == (0, 0)
+
+
+async def test_move_and_weight_change(db_session, occupancy_data):
+    """Перенос бронирования и изменение веса участника учитываются в слотах."""
+    first, second = occupancy_data["slots"]
+    adult, child = occupancy_data["adult"], occupancy_data["child"]
+    booking = await add_booking(db_session, first, adult, [child])
+
+    await db_session.execute(update(Booking).where(Booking.id == booking.id).values(slot_id=second.id))
+    await db_session.commit()
+    assert await read_occupancy(db_session, first.id) == (0, 0)
+    assert await read_occupancy(db_session, second.id) == (2, 110)
+
+    await db_session.execute(update(User).where(User.id == child.id).values(weight=35))
+    await db_session.commit()
+    assert await read_occupancy(db_session, second.id) == (2, 115)
+
+    manager = SlotManager(db_session)
+    assert await manager.get_booked_places(second.id) == 2
+    assert await manager.get_current_weight(second.id) == 115 + 90
+
+
+async def test_reconcile_fixes_drift(db_session, occupancy_data):
+    """Сверка находит расхождение и восстанавливает значения по бронированиям."""
+    slot = occupancy_data["slots"][0]
+    await add_booking(db_session, slot, occupancy_data["adult"])
+    await db_session.execute(
+        update(ExcursionSlot).where(ExcursionSlot.id == slot.id).values(booked_people=7, booked_weight=1)
+    )
+
+    drift = await find_drift(db_session)
+    assert drift[slot.id] == (7, 1, 1, 80)
+
+    await fix_drift(db_session, drift)
+    await db_session.commit()
+    assert await read_occupancy(db_session, slot.id) == (1, 80)
+    assert slot.id not in await find_drift(db_session)
+
+
+async def test_reconcile_recomputes_at_write(db_session, occupancy_data):
+    """Бронирование, созданное после поиска расхождений, не теряется при исправлении."""
+    slot, adult, child = occupancy_data["slots"][0], occupancy_data["adult"], occupancy_data["child"]
+    await db_session.execute(
+        update(ExcursionSlot).where(ExcursionSlot.id == slot.id).values(booked_people=7, booked_weight=1)
+    )
+    drift = await find_drift(db_session)
+    assert drift[slot.id] == (7, 1, 0, 0)
+
+    # Триггер учел новое бронирование уже после find_drift
+    await add_booking(db_session, slot, adult, [child])
+
+    await fix_drift(db_session, drift)
+    await db_session.commit()
+    assert await read_occupancy(db_session, slot.id) == (2, 110)
+
+
+async def test_setup_adds_columns_to_existing_db(tmp_path):
+    """Для БД без столбцов init_models добавляет их, триггеры и заполняет значения."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}", poolclass=NullPool)
+    await init_models(engine)
+    async with engine.begin() as conn:
+        for statement in SLOT_OCCUPANCY_DDL:
+            trigger = statement.split()[5]
+            await conn.execute(text(f"DROP TRIGGER {trigger}"))
+        await conn.execute(text("ALTER TABLE excursion_slots DROP COLUMN booked_people"))
+        await conn.execute(text(
+            "INSERT INTO users (full_name, phone_number, role, weight, consent_to_pd, is_virtual, "
+            "registration_type, receive_mass_notifications, created_at, updated_at) "
+            "VALUES ('Старый Клиент', '+79001112233', 'client', 70, 0, 0, 'SELF', 1, "
+            "CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+        ))
+        await conn.execute(text(
+            "INSERT INTO excursions (name, base_duration_minutes, base_price, is_active) VALUES ('Старая', 60, 1000, 1)"
+        ))
+        await conn.execute(text(
+            "INSERT INTO excursion_slots (excursion_id, start_datetime, end_datetime, max_people, max_weight, "
+            "status, booked_weight) VALUES (1, '2030-01-01 10:00:00', '2030-01-01 11:00:00', 5, 400, 'scheduled', 0)"
+        ))
+        await conn.execute(text(
+            "INSERT INTO bookings (slot_id, adult_user_id, total_price, booking_status, client_status, "
+            "payment_status, created_at) VALUES (1, 1, 1000, 'active', 'not_arrived', 'not_paid', CURRENT_TIMESTAMP)"
+        ))
+
+    async with engine.begin() as conn:
+        await setup_slot_occupancy(conn)
+        row = (await conn.execute(text("SELECT booked_people, booked_weight FROM excursion_slots"))).one()
+        assert tuple(row) == (1, 70)
+
+    await engine.dispose()
@@ -0,0 +1,150 @@
+"""Тесты порядка обработки апдейтов по чатам."""
+
+import asyncio
+from datetime import datetime
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import CallbackQuery, Update
+
+from app.services.update_ordering import ChatEventIsolation
+
+
+def key(chat_id: int) -> StorageKey:
+    return StorageKey(bot_id=1, chat_id=chat_id, user_id=chat_id)
+
+
+async def test_same_chat_is_sequential():
+    """Апдейты одного чата не выполняются одновременно и идут по порядку."""
+    isolation = ChatEventIsolation(max_in_flight=10)
+    order = []
+    running = 0
+    max_running = 0
+
+    async def handle(n):
+        nonlocal running, max_running
+        async with isolation.lock(key(1)):
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            order.append(n)
+            running -= 1
+
+    await asyncio.gather(*(handle(n) for n in range(5)))
+
+    assert order == [0, 1, 2, 3, 4]
+    assert max_running == 1
+    assert isolation.active_chats == 0
+
+
+async def test_chats_parallel_with_global_limit():
+    """Разные чаты выполняются параллельно, но не больше max_in_flight."""
+    isolation = ChatEventIsolation(max_in_flight=3)
+    running = 0
+    max_running = 0
+
+    async def handle(chat_id):
+        nonlocal running, max_running
+        async with isolation.lock(key(chat_id)):
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+    await asyncio.gather(*(handle(chat_id) for chat_id in range(10)))
+
+    assert max_running == 3
+    assert isolation.active_chats == 0
+
+
+async def test_busy_chat_does_not_block_others():
+    """Очередь одного чата не занимает слоты общего лимита."""
+    isolation = ChatEventIsolation(max_in_flight=2)
+    release = asyncio.Event()
+    other_done = asyncio.Event()
+
+    async def slow():
+        async with isolation.lock(key(1)):
+            await release.wait()
+
+    async def other():
+        async with isolation.lock(key(2)):
+            other_done.set()
+
+    busy = [asyncio.create_task(slow()) for _ in range(5)]
+    await asyncio.sleep(0)
+    await asyncio.wait_for(other(), timeout=1)
+    assert other_done.is_set()
+
+    release.set()
+    await asyncio.gather(*busy)
+
+
+async def test_lock_released_on_error():
+    """Исключение в обработчике освобождает блокировку чата."""
+    isolation = ChatEventIsolation(max_in_flight=1)
+
+    try:
+        async with isolation.lock(key(1)):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+
+    async with isolation.lock(key(1)):
+        pass
+    assert isolation.active_chats == 0
+
+
+class Confirm(StatesGroup):
+    waiting = State()
+
+
+async def test_double_tap_handled_once():
+    """Повторное нажатие видит состояние FSM, измененное первым нажатием."""
+    isolation = ChatEventIsolation(max_in_flight=10)
+    dp = Dispatcher(storage=MemoryStorage(), events_isolation=isolation)
+    router = Router()
+    confirmed = []
+    stale = []
+
+    @router.callback_query(Confirm.waiting, F.data == "confirm")
+    async def confirm(callback: CallbackQuery, state: FSMContext):
+        await asyncio.sleep(0.02)
+        confirmed.append(callback.id)
+        await state.clear()
+
+    @router.callback_query(F.data == "confirm")
+    async def expired(callback: CallbackQuery):
+        stale.append(callback.id)
+
+    dp.include_router(router)
+    bot = Bot("123456:TEST")
+    await dp.fsm.get_context(bot, chat_id=42, user_id=42).set_state(Confirm.waiting)
+
+    def tap(update_id):
+        return Update.model_validate({
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "chat_instance": "1",
+                "data": "confirm",
+                "from": {"id": 42, "is_bot": False, "first_name": "Тест"},
+                "message": {
+                    "message_id": 1,
+                    "date": int(datetime.now().timestamp()),
+                    "chat": {"id": 42, "type": "private"},
+                    "text": "Подтвердить бронирование?",
+                },
+            },
+        })
+
+    await asyncio.gather(
+        dp.feed_update(bot, tap(1)),
+        dp.feed_update(bot, tap(2)),
+    )
+
+    assert confirmed == ["1"]
+    assert stale == ["2"]
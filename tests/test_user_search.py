@@ -0,0 +1,101 @@
+"""Тесты полнотекстового поиска пользователей (FTS5)."""
+
+import pytest
+from sqlalchemy import delete, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database.managers.user_manager import UserManager
+from app.database.models import User, UserRole, init_models
+from app.database.user_search import build_match_query, setup_user_search
+
+
+def test_build_match_query():
+    """Слова - префиксы ФИО, телефон в любом формате - префикс цифр."""
+    assert build_match_query("Иванов Мар") == 'full_name : "Иванов" * AND full_name : "Мар" *'
+    assert build_match_query("+7 (912) 123-45") == 'phone_digits : "791212345" *'
+    assert build_match_query("8912") == 'phone_digits : "7912" *'
+    assert build_match_query("Петров 912") == 'full_name : "Петров" * AND phone_digits : "912" *'
+    assert build_match_query('"; DROP') == 'full_name : "DROP" *'
+    assert build_match_query("  ") is None
+
+
+@pytest.fixture
+async def search_users(db_session):
+    users = [
+        User(full_name="Фтсова Мария Ивановна", phone_number="+7 (912) 555-10-01", role=UserRole.client),
+        User(full_name="Фтсов Иван Петрович", phone_number="+79125551002", role=UserRole.client),
+        User(full_name="Фтсов Иван", phone_number="+79125551003", role=UserRole.captain),
+        User(full_name="Другой Фтсмаршал", phone_number="89995551004", role=UserRole.client),
+    ]
+    db_session.add_all(users)
+    await db_session.commit()
+    yield users
+    await db_session.execute(delete(User).where(User.id.in_([u.id for u in users])))
+    await db_session.commit()
+
+
+async def test_search_by_name_prefix(db_session, search_users):
+    """Поиск по началу слов ФИО без учета регистра."""
+    manager = UserManager(db_session)
+
+    found = await manager.search_users("фтсов иван")
+
+    assert {u.full_name for u in found} == {
+        "Фтсова Мария Ивановна", "Фтсов Иван Петрович", "Фтсов Иван"
+    }
+    assert await manager.search_users("ФТСМАР") == [search_users[3]]
+
+
+async def test_search_by_phone(db_session, search_users):
+    """Телефон ищется по цифрам в любом формате и без кода страны."""
+    manager = UserManager(db_session)
+
+    assert await manager.search_users("+7 912 555-10-01") == [search_users[0]]
+    assert await manager.search_users("9125551002") == [search_users[1]]
+    assert await manager.search_users("8999555") == [search_users[3]]
+
+
+async def test_search_limit_applied_in_sql(db_session, search_users):
+    """LIMIT применяется в запросе."""
+    manager = UserManager(db_session)
+
+    assert len(await manager.search_users("Фтсов", limit=2)) == 2
+
+
+async def test_index_follows_updates_and_deletes(db_session, search_users):
+    """Триггеры обновляют индекс при изменении и удалении пользователя."""
+    manager = UserManager(db_session)
+    user = search_users[1]
+
+    user.full_name = "Переименованный Фтсзаменов"
+    await db_session.commit()
+    assert await manager.search_users("Фтсзаменов") == [user]
+    assert user not in await manager.search_users("Фтсов Петрович")
+
+    await db_session.delete(search_users[2])
+    await db_session.commit()
+    assert await manager.search_users("9125551003") == []
+
+
+async def test_setup_rebuilds_missing_index(tmp_path):
+    """Для БД без индекса init_models создает и заполняет его."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}", poolclass=NullPool)
+    await init_models(engine)
+    async with engine.begin() as conn:
+        for trigger in ("users_fts_insert", "users_fts_update", "users_fts_delete"):
+            await conn.execute(text(f"DROP TRIGGER {trigger}"))
+        await conn.execute(text("DROP TABLE users_fts"))
+        await conn.execute(text(
+            "INSERT INTO users (full_name, phone_number, role, consent_to_pd, is_virtual, "
+            "registration_type, receive_mass_notifications, created_at, updated_at) "
+            "VALUES ('Старый Клиент', '+79001112233', 'client', 0, 0, 'SELF', 1, "
+            "CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+        ))
+
+    async with engine.begin() as conn:
+        await setup_user_search(conn)
+        rows = await conn.execute(text("SELECT rowid FROM users_fts WHERE users_fts MATCH 'phone_digits : 900*'"))
+        assert len(rows.fetchall()) == 1
+
+    await engine.dispose()
@@ -606,14 +606,17 @@ class TestCalculateBookingTotal:
     async def test_with_children(self, mock_user_repo):
         """Взрослый + дети через сессию."""
         child1 = MagicMock()
+        child1.id = 10
         child1.full_name = "Ребёнок 1"
         child1.date_of_birth = date(2021, 5, 10)  # ~5 лет
 
         child2 = MagicMock()
+        child2.id = 11
         child2.full_name = "Ребёнок 2"
         child2.date_of_birth = date(2018, 3, 20)  # ~8 лет
 
-        mock_user_repo.get_by_id = AsyncMock(side_effect=[child1, child2])
+        # Порядок из БД не совпадает с порядком выбора
+        mock_user_repo.get_by_ids = AsyncMock(return_value=[child2, child1])
 
         with patch("app.utils.calculators.UserRepository", return_value=mock_user_repo):
             result = await BookingCalculator.calculate_booking_total(
@@ -624,8 +627,9 @@ class TestCalculateBookingTotal:
 
         # Взрослый 1000 + ребёнок 1 (4-7 лет, 40% = 400) + ребёнок 2 (8-12 лет, 60% = 600)
         assert result['final_price'] == 2000
-        assert len(result['children_prices']) == 2
+        assert [child['id'] for child in result['children_prices']] == [10, 11]
         assert len(result['children_details']) == 2
+        mock_user_repo.get_by_ids.assert_awaited_once_with([10, 11])
 
     @pytest.mark.asyncio
     async def test_with_promo_percent(self, mock_user_repo):
@@ -679,10 +683,11 @@ class TestCalculateBookingTotal:
     async def test_no_session_creates_new(self, mock_user_repo):
         """Без переданной сессии — создаёт новую."""
         child = MagicMock()
+        child.id = 10
         child.full_name = "Ребёнок"
         child.date_of_birth = date(2021, 5, 10)
 
-        mock_user_repo.get_by_id = AsyncMock(return_value=child)
+        mock_user_repo.get_by_ids = AsyncMock(return_value=[child])
 
         mock_session = AsyncMock()
         mock_session.__aenter__.return_value = mock_session
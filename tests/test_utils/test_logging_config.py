@@ -0,0 +1,52 @@
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+
+from app.utils.logging_config import LogSampler, setup_logging, stop_logging
+
+
+@pytest.fixture
+def restore_logging():
+    """Вернуть настройки логгеров после setup_logging."""
+    root, app = logging.getLogger(), logging.getLogger("app")
+    saved = [(lg, lg.handlers[:], lg.level, lg.propagate) for lg in (root, app)]
+    yield
+    stop_logging()
+    for lg, handlers, level, propagate in saved:
+        lg.handlers[:] = handlers
+        lg.setLevel(level)
+        lg.propagate = propagate
+
+
+def test_queue_logging_writes_files(tmp_path, restore_logging):
+    """Логгер приложения пишет через очередь, файл ошибок получает только ERROR."""
+    app_logger = setup_logging(level="INFO", file_logging=True, log_dir=str(tmp_path))
+
+    assert [type(h) for h in app_logger.handlers] == [QueueHandler]
+
+    logging.getLogger("app.test").info("обычное сообщение")
+    logging.getLogger("app.test").error("ошибка")
+    stop_logging()
+
+    main_log = (tmp_path / "app.log").read_text(encoding="utf-8")
+    error_log = (tmp_path / "errors.log").read_text(encoding="utf-8")
+    assert "обычное сообщение" in main_log and "ошибка" in main_log
+    assert "ошибка" in error_log
+    assert "обычное сообщение" not in error_log
+
+
+def test_logging_without_queue(tmp_path, restore_logging):
+    """use_queue=False подключает обработчики напрямую."""
+    app_logger = setup_logging(level="INFO", file_logging=True, log_dir=str(tmp_path), use_queue=False)
+
+    assert len(app_logger.handlers) == 2
+    assert not any(isinstance(h, QueueHandler) for h in app_logger.handlers)
+
+
+def test_log_sampler():
+    """Пропускается первое и каждое N-е сообщение."""
+    sampler = LogSampler(every=3)
+
+    assert [sampler.ready() for _ in range(7)] == [True, False, False, True, False, False, True]
+    assert all(LogSampler(every=1).ready() for _ in range(3))
@@ -0,0 +1,58 @@
+"""Тесты основы версионированных снимков."""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.services.versioned_snapshot import VersionedSnapshot
+
+
+class CounterSnapshot(VersionedSnapshot[int]):
+    """Снимок, который считает загрузки и может ждать события при чтении"""
+
+    VERSION_KEY = "test:snapshot:version"
+    NAME = "счетчика"
+
+    def __init__(self, redis=None):
+        super().__init__(redis=redis, session_factory=self._no_session)
+        self.loads = 0
+        self.gate = None
+
+    @staticmethod
+    @asynccontextmanager
+    async def _no_session():
+        yield None
+
+    async def _fetch(self, session, version):
+        self.loads += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        return self.loads
+
+
+async def test_snapshot_checks_version_between_processes(redis):
+    """Снимок отдается из памяти, пока версия в Redis не изменится."""
+    writer = CounterSnapshot(redis=redis)
+    reader = CounterSnapshot(redis=redis)
+    reader.VERSION_CHECK_INTERVAL = 0
+
+    assert await reader._current() == 1
+    assert await reader._current() == 1
+
+    assert await writer._bump_version() == 1
+    assert await reader._current() == 2
+    assert reader._version == 1
+
+
+async def test_reset_during_load_discards_result(redis):
+    """Загрузка, начатая до сброса, не сохраняет устаревший снимок."""
+    snapshot = CounterSnapshot(redis=redis)
+    snapshot.gate = asyncio.Event()
+    loading = asyncio.create_task(snapshot.load())
+    while snapshot.loads == 0:
+        await asyncio.sleep(0)
+
+    snapshot._reset()
+    snapshot.gate.set()
+
+    assert await loading == 1
+    assert not snapshot.loaded
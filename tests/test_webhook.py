@@ -0,0 +1,151 @@
+"""Тесты webhook режима: прием апдейтов локальным aiohttp сервером."""
+
+import asyncio
+import socket
+from datetime import datetime
+
+import aiohttp
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.base import BaseSession
+from aiogram.types import Message
+
+from app.services.webhook import (
+    WebhookConfig, create_webhook_app, set_webhook, start_webhook_server
+)
+
+
+class RecordingSession(BaseSession):
+    """Сессия без сети: запоминает методы API"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    async def make_request(self, bot, method, timeout=None):
+        self.requests.append(method)
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def message_update(update_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(datetime.now().timestamp()),
+            "chat": {"id": 42, "type": "private"},
+            "from": {"id": 42, "is_bot": False, "first_name": "Тест"},
+            "text": text,
+        },
+    }
+
+
+def make_dispatcher(received: list, handled: asyncio.Event, lifecycle: list) -> Dispatcher:
+    dp = Dispatcher()
+    router = Router(name="test")
+
+    @router.message()
+    async def echo(message: Message):
+        received.append(message.text)
+        handled.set()
+
+    @dp.startup()
+    async def on_startup():
+        lifecycle.append("startup")
+
+    @dp.shutdown()
+    async def on_shutdown():
+        lifecycle.append("shutdown")
+
+    dp.include_router(router)
+    return dp
+
+
+def test_config_from_env(monkeypatch):
+    """Настройки читаются из окружения, путь нормализуется."""
+    monkeypatch.setenv("WEBHOOK_BASE_URL", "https://bot.example.com/")
+    monkeypatch.setenv("WEBHOOK_PATH", "tg")
+    monkeypatch.setenv("WEBHOOK_PORT", "9000")
+    monkeypatch.setenv("WEBHOOK_SECRET", "s3cret")
+    monkeypatch.setenv("WEBHOOK_WORKERS", "0")
+
+    config = WebhookConfig.from_env()
+
+    assert config.url == "https://bot.example.com/tg"
+    assert config.port == 9000
+    assert config.secret == "s3cret"
+    assert config.workers == 1
+
+
+async def test_webhook_server_handles_updates():
+    """Апдейт с верным секретом обрабатывается, без секрета - 401."""
+    received, lifecycle = [], []
+    handled = asyncio.Event()
+    dp = make_dispatcher(received, handled, lifecycle)
+    bot = Bot("123456:TEST", session=RecordingSession())
+    config = WebhookConfig("https://bot.example.com", port=free_port(), secret="s3cret")
+
+    runner = await start_webhook_server(create_webhook_app(dp, bot, config), config)
+    assert lifecycle == ["startup"]
+
+    base = f"http://127.0.0.1:{config.port}"
+    try:
+        async with aiohttp.ClientSession() as http:
+            async with http.post(base + config.path, json=message_update(1, "чужой")) as resp:
+                assert resp.status == 401
+
+            async with http.post(
+                base + config.path,
+                json=message_update(2, "привет"),
+                headers={"X-Telegram-Bot-Api-Secret-Token": "s3cret"}
+            ) as resp:
+                assert resp.status == 200
+
+            async with http.get(base + "/healthz") as resp:
+                assert resp.status == 200
+                assert await resp.text() == "ok"
+
+        # Обработка идет в фоне после ответа Telegram
+        await asyncio.wait_for(handled.wait(), timeout=5)
+        assert received == ["привет"]
+    finally:
+        await runner.cleanup()
+
+    assert lifecycle == ["startup", "shutdown"]
+
+
+async def test_set_webhook_uses_config():
+    """setWebhook получает адрес, секрет и используемые типы апдейтов."""
+    dp = make_dispatcher([], asyncio.Event(), [])
+    session = RecordingSession()
+    bot = Bot("123456:TEST", session=session)
+    config = WebhookConfig("https://bot.example.com", secret="s3cret")
+
+    await set_webhook(dp, bot, config)
+
+    method = session.requests[-1]
+    assert method.url == "https://bot.example.com/webhook"
+    assert method.secret_token == "s3cret"
+    assert method.allowed_updates == ["message"]
+    assert method.drop_pending_updates is False
+
+
+def test_app_requires_secret():
+    """Без секрета приложение не создается: иначе принимался бы любой POST."""
+    dp = make_dispatcher([], asyncio.Event(), [])
+    bot = Bot("123456:TEST", session=RecordingSession())
+
+    with pytest.raises(ValueError):
+        create_webhook_app(dp, bot, WebhookConfig("https://bot.example.com", secret=""))